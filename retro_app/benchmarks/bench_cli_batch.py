@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+"""
+Benchmark scripted play throughput in sessions per second: the interactive
+CLI fed its choices on stdin (one process per session) against the headless
+batch mode, one process per session and many sessions in one process.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import subprocess
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from data_layer import dialogue_manager, json_dumps, json_loads
+from cli_parser import BatchRunner
+from generate_dialogue import write_dialogue_file
+
+CLI = os.path.join(ROOT_DIR, "cli_parser.py")
+
+
+class NullOutput:
+    """Text stream that only counts what is written to it"""
+
+    def __init__(self):
+        self.lines = []
+
+    def write(self, text):
+        self.lines.append(text)
+
+    def flush(self):
+        pass
+
+
+def run_cli(args, stdin=""):
+    """Run cli_parser.py in a fresh process, discarding its output"""
+    subprocess.run([sys.executable, CLI] + args, input=stdin, text=True, check=True,
+                   stdout=subprocess.DEVNULL, cwd=ROOT_DIR)
+
+
+def sessions_per_second(run, sessions):
+    """Time run() and return sessions per second"""
+    start = time.perf_counter()
+    run()
+    return sessions / (time.perf_counter() - start)
+
+
+def random_play(runner, sessions, choices, seed=1):
+    """
+    Play interleaved sessions in one runner, each picking random available responses,
+    the way an agent driving the JSON-lines protocol would
+
+    Returns:
+        The number of transitions made
+    """
+    rng = random.Random(seed)
+    output = NullOutput()
+    current = {session: None for session in range(sessions)}
+    transitions = 0
+    for _ in range(choices + 1):
+        requests = []
+        for session, record in current.items():
+            if record is None:
+                requests.append(json_dumps({"session": session}, pretty=False))
+            elif record.get("responses"):
+                requests.append(json_dumps({"session": session,
+                                            "choice": rng.randint(1, len(record["responses"]))}, pretty=False))
+            else:
+                requests.append(json_dumps({"session": session, "command": "restart"}, pretty=False))
+        output.lines.clear()
+        runner.run(requests, output)
+        for line in "".join(output.lines).splitlines():
+            record = json_loads(line)
+            current[record["session"]] = None if record.get("ended") else record
+            transitions += 1
+    return transitions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark headless batch play throughput')
+    parser.add_argument('--nodes', type=int, default=10000, help='Number of generated dialogue nodes (default: 10000)')
+    parser.add_argument('--choices', type=int, default=20, help='Choices made per session (default: 20)')
+    parser.add_argument('--process-sessions', type=int, default=10,
+                        help='Sessions measured with one process each (default: 10)')
+    parser.add_argument('--sessions', type=int, default=10000, help='Sessions played in one process (default: 10000)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = write_dialogue_file(os.path.join(tmp_dir, "bench.json"), args.nodes, variable_count=20)
+        script = os.path.join(tmp_dir, "choices.txt")
+        with open(script, 'w', encoding='utf-8') as file:
+            file.write("1\n" * args.choices)
+        # The interactive loop asks for a choice and then for a command after every dialogue
+        interactive_input = "1\n\n" * args.choices + "\nq\n"
+
+        run_cli([path, "--no-color"], interactive_input)  # warm the page cache
+        results = {}
+        results["interactive CLI, process per session"] = sessions_per_second(
+            lambda: [run_cli([path, "--no-color"], interactive_input) for _ in range(args.process_sessions)],
+            args.process_sessions)
+        results["batch, process per session"] = sessions_per_second(
+            lambda: [run_cli([path, "--script", script]) for _ in range(args.process_sessions)],
+            args.process_sessions)
+        results["batch, one process (incl. load)"] = sessions_per_second(
+            lambda: run_cli([path, "--script", script, "--sessions", str(args.sessions)]), args.sessions)
+
+        runner = BatchRunner(dialogue_manager.load_dialogue_data(path, use_cache=False))
+        start = time.perf_counter()
+        transitions = random_play(runner, args.sessions, args.choices)
+        elapsed = time.perf_counter() - start
+        results["batch, in process, random choices"] = args.sessions / elapsed
+
+    print(f"Nodes: {args.nodes}, choices per session: {args.choices}")
+    print(f"{'Mode':<38} {'sessions/s':>11}")
+    for label, rate in results.items():
+        print(f"{label:<38} {rate:>11.1f}")
+    print(f"In process: {transitions} transitions from {args.sessions} interleaved sessions, "
+          f"{transitions / elapsed:,.0f} transitions/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+"""
+Benchmark the memory used by loaded dialogue data: plain dicts vs. the compact model.
+"""
+import os
+import gc
+import sys
+import time
+import tempfile
+import argparse
+import tracemalloc
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from data_layer import DialogueDataManager
+from generate_dialogue import write_dialogue_file
+
+
+def measure_load(manager, path, compact):
+    """Load the file and return (data, retained bytes, peak bytes, seconds)"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    data = manager.load_dialogue_data(path, use_cache=False, compact=compact)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return data, retained, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark memory of the compact dialogue model')
+    parser.add_argument('--nodes', type=int, default=50000, help='Number of generated dialogue nodes (default: 50000)')
+    parser.add_argument('--responses', type=int, default=4, help='Responses per node (default: 4)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = write_dialogue_file(os.path.join(tmp_dir, "bench.json"), args.nodes,
+                                   responses_per_node=args.responses)
+        manager = DialogueDataManager(base_directory=tmp_dir)
+
+        data, dict_retained, dict_peak, dict_time = measure_load(manager, path, compact=False)
+        del data
+        data, compact_retained, compact_peak, compact_time = measure_load(manager, path, compact=True)
+        del data
+
+    mib = 1024 * 1024
+    print(f"Nodes: {args.nodes}, responses: {args.nodes * args.responses}")
+    print(f"{'Model':<10} {'retained MiB':>13} {'peak MiB':>10} {'load s':>8}")
+    print(f"{'dicts':<10} {dict_retained / mib:>13.1f} {dict_peak / mib:>10.1f} {dict_time:>8.2f}")
+    print(f"{'compact':<10} {compact_retained / mib:>13.1f} {compact_peak / mib:>10.1f} {compact_time:>8.2f}")
+    print(f"Retained memory saved: {(1 - compact_retained / dict_retained) * 100:.0f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+Benchmark Streamlit rerun latency with a long conversation log in the
+sidebar: one st.sidebar.markdown call per entry of an unbounded list (the
+original render_sidebar) against one markdown block for the visible page of
+the bounded ConversationHistory.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from streamlit.testing.v1 import AppTest
+from conversation_history import ConversationHistory
+from logic_layer import deep_sizeof
+
+# Each app fills its history on the first run, then every rerun adds one
+# entry, like a player clicking a response
+LEGACY_APP = """
+import streamlit as st
+
+if "history" not in st.session_state:
+    st.session_state.history = [
+        {"id": f"node_{n}", "speaker": "Player" if n % 2 else "Terminal",
+         "text": f"Line {n} of a long play session", "is_player": bool(n % 2)}
+        for n in range(ENTRIES)
+    ]
+history = st.session_state.history
+history.append({"id": "next", "speaker": "Terminal", "text": "Another line", "is_player": False})
+
+for entry in history:
+    speaker_color = "#FFFF00" if entry.get("is_player", False) else "#00FFFF"
+    st.sidebar.markdown(
+        f"<div class='history-entry'><span style='color: {speaker_color};'>{entry['speaker']}:</span> {entry['text']}</div>",
+        unsafe_allow_html=True
+    )
+"""
+
+PAGED_APP = """
+import sys
+sys.path.insert(0, ROOT_DIR)
+import streamlit as st
+from conversation_history import ConversationHistory
+from gui_layer import HISTORY_PAGE_SIZE, render_history_html
+
+if "history" not in st.session_state:
+    st.session_state.history = ConversationHistory(CAPACITY, ARCHIVE)
+    for n in range(ENTRIES):
+        st.session_state.history.append(
+            {"id": f"node_{n}", "speaker": "Player" if n % 2 else "Terminal",
+             "text": f"Line {n} of a long play session", "is_player": bool(n % 2)})
+history = st.session_state.history
+history.append({"id": "next", "speaker": "Terminal", "text": "Another line", "is_player": False})
+
+page_count = history.page_count(HISTORY_PAGE_SIZE)
+st.sidebar.markdown(render_history_html(history.page(page_count - 1, HISTORY_PAGE_SIZE)), unsafe_allow_html=True)
+"""
+
+
+def make_app(source, **constants):
+    """Substitute the benchmark settings into an app's source"""
+    for name, value in constants.items():
+        source = source.replace(name, repr(value))
+    return AppTest.from_string(source, default_timeout=600)
+
+
+def rerun_latency(app, reruns):
+    """Run the app once to fill its history, then return the average seconds per rerun"""
+    app.run()
+    start = time.perf_counter()
+    for _ in range(reruns):
+        app.run()
+    return (time.perf_counter() - start) / reruns
+
+
+def history_bytes(entries, capacity):
+    """Memory held by a session's history after a number of entries"""
+    history = ConversationHistory(capacity) if capacity else []
+    for n in range(entries):
+        history.append({"id": f"node_{n}", "speaker": "Player" if n % 2 else "Terminal",
+                        "text": f"Line {n} of a long play session", "is_player": bool(n % 2)})
+    return sys.getsizeof(history) + sum(deep_sizeof(entry) for entry in history)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark sidebar rerun latency with a long conversation history')
+    parser.add_argument('--entries', type=int, default=10000, help='Entries in the history (default: 10000)')
+    parser.add_argument('--reruns', type=int, default=5, help='Reruns per measurement (default: 5)')
+    parser.add_argument('--capacity', type=int, default=500, help='Entries kept in memory by the ring buffer (default: 500)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        archive = os.path.join(directory, "history.jsonl")
+        legacy = rerun_latency(make_app(LEGACY_APP, ENTRIES=args.entries), args.reruns)
+        bounded = rerun_latency(make_app(PAGED_APP, ENTRIES=args.entries, CAPACITY=args.capacity,
+                                         ARCHIVE=None, ROOT_DIR=ROOT_DIR), args.reruns)
+        spilled = rerun_latency(make_app(PAGED_APP, ENTRIES=args.entries, CAPACITY=args.capacity,
+                                         ARCHIVE=archive, ROOT_DIR=ROOT_DIR), args.reruns)
+
+    print(f"History entries: {args.entries}, ring buffer capacity: {args.capacity}, reruns: {args.reruns}")
+    print(f"{'Sidebar log':<40} {'ms per rerun':>13}")
+    print(f"{'markdown per entry, list (original)':<40} {legacy * 1000:>13.1f}")
+    print(f"{'one block per page, ring buffer':<40} {bounded * 1000:>13.1f}")
+    print(f"{'one block per page, spilled to disk':<40} {spilled * 1000:>13.1f}")
+    print(f"History memory: {history_bytes(args.entries, 0) / 1024:.0f} KiB as a list, "
+          f"{history_bytes(args.entries, args.capacity) / 1024:.0f} KiB in the ring buffer")
+    print(f"Rerun: {legacy / bounded:.0f}x faster")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
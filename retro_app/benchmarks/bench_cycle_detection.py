@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""
+Benchmark cycle detection: the original per-dialogue DFS vs. the Tarjan SCC pass.
+"""
+import os
+import sys
+import time
+import argparse
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from graph_analysis import ReferenceIndex, strongly_connected_components, find_closed_loops
+from generate_dialogue import generate_dialogue_data
+
+
+def legacy_check_for_circular_references(dialogue_data, warnings):
+    """The original DFS from every dialogue, kept here as the baseline"""
+    dialogue_dict = {d["id"]: d for d in dialogue_data["dialogues"]}
+    for dialogue_id in dialogue_dict:
+        legacy_dfs_check_cycles(dialogue_id, dialogue_dict, [], set(), warnings)
+
+
+def legacy_dfs_check_cycles(dialogue_id, dialogue_dict, path, visited, warnings):
+    if dialogue_id in path:
+        cycle = path[path.index(dialogue_id):] + [dialogue_id]
+        warnings.append(f"Circular dialogue reference detected: {' -> '.join(cycle)}")
+        return
+    if dialogue_id in visited or dialogue_id is None:
+        return
+    visited.add(dialogue_id)
+    path.append(dialogue_id)
+    dialogue = dialogue_dict.get(dialogue_id)
+    if dialogue:
+        for response in dialogue["responses"]:
+            next_id = response["next_dialogue"]
+            if next_id:
+                legacy_dfs_check_cycles(next_id, dialogue_dict, path.copy(), visited, warnings)
+    path.pop()
+
+
+def scc_check(dialogue_data):
+    """The linear-time pass used by DialogueValidator"""
+    index = ReferenceIndex(dialogue_data)
+    components = strongly_connected_components(index.adjacency)
+    return components, find_closed_loops(components, index.adjacency, index.terminals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dialogue cycle detection')
+    parser.add_argument('--legacy-sizes', default='250,500,1000',
+                        help='Comma-separated node counts for the original DFS (default: 250,500,1000)')
+    parser.add_argument('--sizes', default='1000,10000,50000',
+                        help='Comma-separated node counts for the SCC pass (default: 1000,10000,50000)')
+    parser.add_argument('--time-limit', type=float, default=30.0,
+                        help='Stop growing the original DFS once one run exceeds this many seconds (default: 30)')
+    args = parser.parse_args()
+
+    # The original DFS recurses once per path step
+    sys.setrecursionlimit(1000000)
+
+    print(f"{'Nodes':>8} {'original DFS s':>15} {'warnings':>9}")
+    for size in [int(s) for s in args.legacy_sizes.split(',')]:
+        dialogue_data = generate_dialogue_data(size)
+        warnings = []
+        start = time.perf_counter()
+        legacy_check_for_circular_references(dialogue_data, warnings)
+        elapsed = time.perf_counter() - start
+        print(f"{size:>8} {elapsed:>15.3f} {len(warnings):>9}")
+        if elapsed > args.time_limit:
+            break
+
+    print(f"\n{'Nodes':>8} {'SCC pass s':>15} {'loop families':>14} {'closed loops':>13}")
+    for size in [int(s) for s in args.sizes.split(',')]:
+        dialogue_data = generate_dialogue_data(size)
+        start = time.perf_counter()
+        components, closed = scc_check(dialogue_data)
+        elapsed = time.perf_counter() - start
+        families = sum(1 for c in components if len(c) > 1)
+        print(f"{size:>8} {elapsed:>15.3f} {families:>14} {len(closed):>13}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+Benchmark dialogue lookups: linear list scans vs. the indexed DialogueGraph.
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+import argparse
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from data_layer import DialogueDataManager, DialogueGraph
+from generate_dialogue import write_dialogue_file
+
+
+def linear_get_dialogue_by_id(dialogue_data, dialogue_id):
+    """The original list-scan lookup, kept here as the baseline"""
+    for dialogue in dialogue_data.get("dialogues", []):
+        if dialogue.get("id") == dialogue_id:
+            return dialogue
+    return None
+
+
+def linear_get_quest_stage(dialogue_data, quest_id, stage_id):
+    """The original list-scan quest stage lookup, kept here as the baseline"""
+    for quest in dialogue_data.get("quests", []):
+        if quest.get("id") == quest_id:
+            for stage in quest.get("stages", []):
+                if stage.get("id") == stage_id:
+                    return stage
+    return None
+
+
+def time_calls(func, args_list):
+    """Return the mean seconds per call of func over args_list"""
+    start = time.perf_counter()
+    for args in args_list:
+        func(*args)
+    return (time.perf_counter() - start) / len(args_list)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dialogue graph lookups')
+    parser.add_argument('--nodes', type=int, default=100000, help='Number of generated dialogue nodes (default: 100000)')
+    parser.add_argument('--lookups', type=int, default=200, help='Number of random lookups to time (default: 200)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = write_dialogue_file(os.path.join(tmp_dir, "bench.json"), args.nodes)
+        manager = DialogueDataManager(base_directory=tmp_dir)
+        dialogue_data = manager.load_dialogue_data(path)
+
+    start = time.perf_counter()
+    graph = DialogueGraph(dialogue_data)
+    build_time = time.perf_counter() - start
+    manager.get_graph(dialogue_data)
+
+    rng = random.Random(0)
+    dialogue_ids = [(dialogue_data, f"node_{rng.randrange(args.nodes)}") for _ in range(args.lookups)]
+    stage_ids = [(dialogue_data, "quest_9", rng.randint(1, 5)) for _ in range(args.lookups)]
+
+    linear_dialogue = time_calls(linear_get_dialogue_by_id, dialogue_ids)
+    graph_dialogue = time_calls(lambda _, d: graph.get_dialogue(d), dialogue_ids)
+    manager_dialogue = time_calls(manager.get_dialogue_by_id, dialogue_ids)
+    linear_stage = time_calls(linear_get_quest_stage, stage_ids)
+    graph_stage = time_calls(lambda _, q, s: graph.get_quest_stage(q, s), stage_ids)
+
+    print(f"Nodes: {args.nodes}, lookups: {args.lookups}")
+    print(f"Graph build time:              {build_time * 1000:10.2f} ms (once per load)")
+    print(f"get_dialogue_by_id  linear:    {linear_dialogue * 1e6:10.2f} us/call")
+    print(f"get_dialogue_by_id  graph:     {graph_dialogue * 1e6:10.2f} us/call")
+    print(f"get_dialogue_by_id  manager:   {manager_dialogue * 1e6:10.2f} us/call")
+    print(f"get_quest_stage     linear:    {linear_stage * 1e6:10.2f} us/call")
+    print(f"get_quest_stage     graph:     {graph_stage * 1e6:10.2f} us/call")
+    print(f"Dialogue lookup speedup:       {linear_dialogue / graph_dialogue:10.0f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
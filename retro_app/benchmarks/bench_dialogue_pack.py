@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""
+Benchmark process startup on a large dialogue file: parsing the JSON vs.
+memory-mapping a compiled dialogue pack. Each measurement runs in a fresh
+process, like a new Streamlit worker or CLI run would.
+"""
+import os
+import sys
+import json
+import tempfile
+import argparse
+import subprocess
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from dialogue_pack import compile_pack
+from generate_dialogue import generate_dialogue_data
+
+# Loads a file, plays a random walk of `visits` dialogues and reports timing and peak RSS (Linux)
+CHILD_SCRIPT = """
+import sys, time, json, random
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+from logic_layer import GameState
+state = GameState()
+assert state.load_dialogue({path!r})
+state.get_current_dialogue()
+first = time.perf_counter() - start
+rng = random.Random(1)
+for _ in range({visits}):
+    dialogue = state.get_current_dialogue()
+    responses = [r for r in dialogue["responses"] if r["next_dialogue"]]
+    if not responses:
+        state.reset_state()
+        continue
+    state.select_response(rng.choice(responses)["id"])
+total = time.perf_counter() - start
+# Peak resident set of this process in KiB (ru_maxrss would include the parent's, as it survives exec)
+with open("/proc/self/status") as status:
+    rss = next(int(line.split()[1]) for line in status if line.startswith("VmHWM:"))
+print(json.dumps({{"first": first, "total": total, "rss": rss}}))
+"""
+
+
+def run_child(path, visits):
+    """Run one fresh process against the file and return its measurements"""
+    script = CHILD_SCRIPT.format(root=ROOT_DIR, path=path, visits=visits)
+    output = subprocess.run([sys.executable, "-c", script], check=True,
+                            capture_output=True, text=True, cwd=ROOT_DIR).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark JSON parsing vs. memory-mapped dialogue packs')
+    parser.add_argument('--nodes', type=int, default=100000, help='Number of generated dialogue nodes (default: 100000)')
+    parser.add_argument('--visits', type=int, default=500, help='Dialogues visited by each process (default: 500)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dialogue_data = generate_dialogue_data(args.nodes, variable_count=20)
+        json_path = os.path.join(tmp_dir, "bench.json")
+        with open(json_path, 'w') as f:
+            json.dump(dialogue_data, f)
+        pack_path = compile_pack(dialogue_data, os.path.join(tmp_dir, "bench.dlgpack"))
+        del dialogue_data
+
+        results = {}
+        for label, path in (("json", json_path), ("pack", pack_path)):
+            run_child(path, 0)  # warm the page cache
+            results[label] = run_child(path, args.visits)
+            results[label]["size"] = os.path.getsize(path)
+
+    mib = 1024 * 1024
+    print(f"Nodes: {args.nodes}, dialogues visited per process: {args.visits}")
+    print(f"{'Format':<6} {'file MiB':>9} {'first dialogue s':>17} {'total s':>8} {'peak RSS MiB':>13}")
+    for label, result in results.items():
+        print(f"{label:<6} {result['size'] / mib:>9.1f} {result['first']:>17.3f} "
+              f"{result['total']:>8.3f} {result['rss'] / 1024:>13.1f}")
+    print(f"Startup: {results['json']['first'] / results['pack']['first']:.0f}x faster with a pack")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""
+Benchmark the dialogue editor's PREVIEW tree: the original recursive builder,
+which copies its visited set per response and so re-expands shared
+dialogues once per path, against the iterative builder that expands every
+dialogue once, and the original string-concatenating renderer against the
+depth-limited, join-based one.
+"""
+import os
+import sys
+import time
+import argparse
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from dialogue_editor import build_dialogue_tree, display_dialogue_tree, PREVIEW_DEPTH
+from generate_dialogue import generate_dialogue_data
+
+
+def legacy_build_dialogue_tree(dialogue_data, current_id, visited=None):
+    """The original recursive builder, kept here as the baseline"""
+    if visited is None:
+        visited = set()
+    if current_id in visited or current_id is None:
+        return {}
+    visited.add(current_id)
+    current_dialogue = None
+    for dialogue in dialogue_data["dialogues"]:
+        if dialogue["id"] == current_id:
+            current_dialogue = dialogue
+            break
+    if not current_dialogue:
+        return {"name": f"MISSING: {current_id}", "children": []}
+    children = []
+    for response in current_dialogue["responses"]:
+        next_id = response["next_dialogue"]
+        if next_id is None:
+            children.append({"name": f"{response['text']} -> [END]"})
+        elif next_id in visited:
+            children.append({"name": f"{response['text']} -> [LOOP: {next_id}]"})
+        else:
+            children.append({
+                "name": response["text"],
+                "children": [legacy_build_dialogue_tree(dialogue_data, next_id, visited.copy())]
+            })
+    return {
+        "name": f"{current_dialogue['npc']}: {current_dialogue['text'][:50]}{'...' if len(current_dialogue['text']) > 50 else ''}",
+        "children": children
+    }
+
+
+def legacy_display_dialogue_tree(tree, level=0):
+    """The original renderer"""
+    if not tree:
+        return ""
+    output = "  " * level + tree["name"] + "\n"
+    if "children" in tree:
+        for child in tree["children"]:
+            output += legacy_display_dialogue_tree(child, level + 1)
+    return output
+
+
+def diamond_chain(layers):
+    """A chain of dialogues where both responses of each lead to the next: 2^layers paths"""
+    dialogues = [{"id": f"node_{n}", "npc": "NPC", "text": f"Dialogue {n}",
+                  "responses": [{"id": "a", "text": "> Left", "next_dialogue": f"node_{n + 1}"},
+                                {"id": "b", "text": "> Right", "next_dialogue": f"node_{n + 1}"}]}
+                 for n in range(layers)]
+    dialogues.append({"id": f"node_{layers}", "npc": "NPC", "text": "The end",
+                      "responses": [{"id": "end", "text": "> Leave", "next_dialogue": None}]})
+    return {"starting_dialogue": "node_0", "dialogues": dialogues, "quests": []}
+
+
+def timed(function, *args):
+    """Call function and return (result, seconds), or (the error, seconds) if it raised"""
+    start = time.perf_counter()
+    try:
+        result = function(*args)
+    except RecursionError as e:
+        result = e
+    return result, time.perf_counter() - start
+
+
+def new_preview(dialogue_data, max_depth):
+    """Build the tree and render it the way the PREVIEW tab does"""
+    tree = build_dialogue_tree(dialogue_data, dialogue_data["starting_dialogue"])
+    return display_dialogue_tree(tree, None, max_depth)
+
+
+def cached_preview(tree, max_depth):
+    """A rerun with the tree cached for the current revision: render only"""
+    return display_dialogue_tree(tree, None, max_depth)
+
+
+def legacy_preview(dialogue_data):
+    return legacy_display_dialogue_tree(legacy_build_dialogue_tree(dialogue_data, dialogue_data["starting_dialogue"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the dialogue editor preview tree')
+    parser.add_argument('--layers', default='10,14,18', help='Comma-separated diamond chain lengths (default: 10,14,18)')
+    parser.add_argument('--sizes', default='1000,5000,20000', help='Comma-separated generated node counts (default: 1000,5000,20000)')
+    parser.add_argument('--time-limit', type=float, default=30.0,
+                        help='Skip the original builder once one run exceeds this many seconds (default: 30)')
+    args = parser.parse_args()
+
+    print(f"{'Graph':<26} {'original ms':>15} {'new ms':>9} {f'new, depth {PREVIEW_DEPTH} ms':>16} {'cached ms':>10}")
+    legacy_too_slow = False
+    for layers in (int(layers) for layers in args.layers.split(",")):
+        data = diamond_chain(layers)
+        legacy = "skipped"
+        if not legacy_too_slow:
+            _, elapsed = timed(legacy_preview, data)
+            legacy = f"{elapsed * 1000:.1f}"
+            legacy_too_slow = elapsed > args.time_limit
+        _, full = timed(new_preview, data, None)
+        _, limited = timed(new_preview, data, PREVIEW_DEPTH)
+        _, cached = timed(cached_preview, build_dialogue_tree(data, "node_0"), PREVIEW_DEPTH)
+        print(f"{f'diamond chain, {layers} layers':<26} {legacy:>15} {full * 1000:>9.1f} "
+              f"{limited * 1000:>16.1f} {cached * 1000:>10.1f}")
+
+    # Generated files branch at random, so the original builder explodes on all but tiny ones
+    for size in (int(size) for size in args.sizes.split(",")):
+        data = generate_dialogue_data(size)
+        result, elapsed = timed(legacy_preview, generate_dialogue_data(size, responses_per_node=1))
+        legacy = "RecursionError" if isinstance(result, RecursionError) else f"{elapsed * 1000:.1f}*"
+        _, full = timed(new_preview, data, None)
+        _, limited = timed(new_preview, data, PREVIEW_DEPTH)
+        _, cached = timed(cached_preview, build_dialogue_tree(data, data["starting_dialogue"]), PREVIEW_DEPTH)
+        print(f"{f'generated, {size} nodes':<26} {legacy:>15} {full * 1000:>9.1f} "
+              f"{limited * 1000:>16.1f} {cached * 1000:>10.1f}")
+    print("* original builder on a single-response chain of the same length; the branching file does not finish")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
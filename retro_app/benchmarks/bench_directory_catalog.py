@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""
+Benchmark listing a large conversations directory on every sidebar render:
+os.listdir plus os.path.isfile per entry (the original
+get_available_conversations) against the cached DirectoryCatalog.
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from dialogue_catalog import DirectoryCatalog
+from generate_dialogue import generate_dialogue_data
+
+
+def legacy_listing(directory):
+    """List the directory the way get_available_conversations did"""
+    return [f for f in os.listdir(directory)
+            if f.endswith(".json") and os.path.isfile(os.path.join(directory, f))]
+
+
+def per_call(func, calls):
+    """Return the average seconds per call"""
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark cached directory listings of dialogue files')
+    parser.add_argument('--files', type=int, default=5000, help='Number of dialogue files in the directory (default: 5000)')
+    parser.add_argument('--calls', type=int, default=200, help='Listings per measurement, like sidebar reruns (default: 200)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        template = generate_dialogue_data(20)
+        for number in range(args.files):
+            template["metadata"] = {"title": f"Scenario {number}"}
+            with open(os.path.join(directory, f"scenario_{number:05d}.json"), 'w') as f:
+                json.dump(template, f)
+
+        legacy = per_call(lambda: legacy_listing(directory), args.calls)
+
+        catalog = DirectoryCatalog(directory)
+        start = time.perf_counter()
+        catalog.entries()
+        first = time.perf_counter() - start
+        cached = per_call(catalog.entries, args.calls)
+        # A poll interval of 0 checks the directory on every listing: one stat, no rescan
+        catalog.poll_interval = 0
+        polled = per_call(catalog.entries, args.calls)
+
+        start = time.perf_counter()
+        catalog.wait_for_metadata()
+        metadata = time.perf_counter() - start + first
+        assert sorted(legacy_listing(directory)) == catalog.names()
+        assert all(entry.title for entry in catalog.entries())
+
+    print(f"Files: {args.files}, listings per measurement: {args.calls}")
+    print(f"{'Listing':<34} {'ms per listing':>15}")
+    print(f"{'listdir + isfile (original)':<34} {legacy * 1000:>15.3f}")
+    print(f"{'catalog, first scan':<34} {first * 1000:>15.3f}")
+    print(f"{'catalog, within poll interval':<34} {cached * 1000:>15.4f}")
+    print(f"{'catalog, polled (directory stat)':<34} {polled * 1000:>15.4f}")
+    print(f"Titles and node counts of all files read in the background in {metadata:.2f} s")
+    print(f"Sidebar listing: {legacy / polled:.0f}x faster when polling, {legacy / cached:.0f}x within the poll interval")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+"""
+Benchmark dialogue editor reruns on a large file: the views derived from the
+dialogue data (RAW JSON text, PREVIEW statistics and quest script check,
+preview tree, validation) as the original main() recomputed them on every
+rerun, against the per-revision cache, and the rerun latency of the whole
+editor app when nothing changed and after a one-field edit.
+"""
+import os
+import sys
+import copy
+import time
+import argparse
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from streamlit.testing.v1 import AppTest
+from data_layer import json_dumps
+from dialogue_editor import build_dialogue_tree, preview_statistics, validate_dialogue_data
+from generate_dialogue import generate_dialogue_data
+from bench_dialogue_tree import legacy_build_dialogue_tree
+
+EDITOR = os.path.join(ROOT_DIR, "dialogue_editor.py")
+
+
+def legacy_preview_statistics(dialogue_data):
+    """The statistics, warnings and quest script check the original PREVIEW tab ran on every rerun"""
+    dialogues = dialogue_data["dialogues"]
+    quests = dialogue_data["quests"]
+    stats = (len(dialogues), sum(len(d["responses"]) for d in dialogues),
+             len(quests), sum(len(q["stages"]) for q in quests))
+    missing_next = []
+    for dialogue in dialogues:
+        for response in dialogue["responses"]:
+            if response["next_dialogue"] is not None and not any(d["id"] == response["next_dialogue"] for d in dialogues):
+                missing_next.append((dialogue["id"], response["text"], response["next_dialogue"]))
+    quest_scripts = []
+    for dialogue in dialogues:
+        for response in dialogue["responses"]:
+            if "script" in response and response["script"]:
+                if response["script"].startswith("StartQuest_") or response["script"].startswith("UpdateQuest_"):
+                    quest_scripts.append(response["script"])
+    invalid_scripts = []
+    for script in quest_scripts:
+        if script.startswith("StartQuest_"):
+            quest_id = script.replace("StartQuest_", "")
+            if not any(q["id"] == quest_id for q in quests):
+                invalid_scripts.append(script)
+        elif script.startswith("UpdateQuest_"):
+            parts = script.replace("UpdateQuest_", "").split("_")
+            if len(parts) >= 2:
+                quest = next((q for q in quests if q["id"] == parts[0]), None)
+                stage_id = int(parts[1]) if parts[1].isdigit() else -1
+                if not quest or not any(s["id"] == stage_id for s in quest["stages"]):
+                    invalid_scripts.append(script)
+    return stats, missing_next, invalid_scripts
+
+
+def milliseconds(function, *args):
+    """Call function and return how long it took in ms"""
+    start = time.perf_counter()
+    function(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def rerun_latency(app, reruns, edit=False):
+    """Average ms per rerun of the editor, typing a new NPC name before each one if edit is set"""
+    start = time.perf_counter()
+    for n in range(reruns):
+        if edit:
+            app.text_input(key="npc_name").input(f"NPC {n}")
+        app.run()
+        assert not app.exception, app.exception
+    return (time.perf_counter() - start) * 1000 / reruns
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dialogue editor rerun latency')
+    parser.add_argument('--nodes', type=int, default=5000, help='Number of generated dialogue nodes (default: 5000)')
+    parser.add_argument('--reruns', type=int, default=5, help='Reruns per measurement (default: 5)')
+    args = parser.parse_args()
+
+    dialogue_data = generate_dialogue_data(args.nodes, variable_count=8)
+
+    def legacy_tree():
+        return legacy_build_dialogue_tree(dialogue_data, dialogue_data["starting_dialogue"])
+
+    # Every derived view: recomputed per rerun before, once per revision now
+    views = (
+        ("RAW JSON text", lambda: json_dumps(dialogue_data), lambda: json_dumps(dialogue_data)),
+        ("statistics + script check", lambda: legacy_preview_statistics(dialogue_data),
+         lambda: preview_statistics(dialogue_data)),
+        # The original recursive builder re-expands shared dialogues once per path, so it's
+        # only run where the generated chain is long enough to hit the recursion limit first
+        ("preview tree", legacy_tree if args.nodes > sys.getrecursionlimit() else None,
+         lambda: build_dialogue_tree(dialogue_data, dialogue_data["starting_dialogue"])),
+        # Only run when VALIDATE DATA is clicked, now also cached for repeated clicks
+        ("validation", None, lambda: validate_dialogue_data(dialogue_data)),
+    )
+    print(f"Nodes: {args.nodes}, reruns per measurement: {args.reruns}")
+    print(f"{'Derived view':<28} {'before, every rerun ms':>23} {'now, once per edit ms':>22}")
+    legacy_total = new_total = 0.0
+    for label, legacy, new in views:
+        if legacy is None:
+            legacy_text = "-"
+        else:
+            try:
+                legacy_ms = milliseconds(legacy)
+                legacy_total += legacy_ms
+                legacy_text = f"{legacy_ms:.1f}"
+            except RecursionError:
+                # The original recursive tree builder fails outright on long chains
+                legacy_text = "RecursionError"
+        new_ms = milliseconds(new)
+        new_total += new_ms
+        print(f"{label:<28} {legacy_text:>23} {new_ms:>22.1f}")
+    print(f"{'total':<28} {legacy_total:>22.1f}+ {new_total:>22.1f}")
+
+    # The whole app; reruns without an edit reuse every derived view, but still draw
+    # all the widgets, including one DIALOGUES list button per dialogue
+    app = AppTest.from_file(EDITOR, default_timeout=600)
+    app.session_state["dialogue_data"] = copy.deepcopy(dialogue_data)
+    start = time.perf_counter()
+    app.run()
+    first = (time.perf_counter() - start) * 1000
+    idle = rerun_latency(app, args.reruns)
+    edited = rerun_latency(app, args.reruns, edit=True)
+    print(f"Editor app: first run {first:.0f} ms, idle rerun {idle:.0f} ms, rerun after a one-field edit {edited:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
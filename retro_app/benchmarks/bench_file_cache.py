@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+"""
+Benchmark DialogueDataManager.load_dialogue_data with and without the parsed-file cache.
+"""
+import os
+import sys
+import time
+import tempfile
+import argparse
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from data_layer import DialogueDataManager, DialogueFileCache
+from generate_dialogue import write_dialogue_file
+
+
+def time_loads(manager, path, repeats, use_cache):
+    """Return the mean seconds per load_dialogue_data call"""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        manager.load_dialogue_data(path, use_cache=use_cache)
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the parsed dialogue file cache')
+    parser.add_argument('--nodes', type=int, default=20000, help='Number of generated dialogue nodes (default: 20000)')
+    parser.add_argument('--repeats', type=int, default=20, help='Number of loads to time (default: 20)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = write_dialogue_file(os.path.join(tmp_dir, "bench.json"), args.nodes)
+        manager = DialogueDataManager(base_directory=tmp_dir, cache=DialogueFileCache())
+
+        uncached = time_loads(manager, path, args.repeats, use_cache=False)
+
+        start = time.perf_counter()
+        manager.load_dialogue_data(path)
+        first_load = time.perf_counter() - start
+
+        cached = time_loads(manager, path, args.repeats, use_cache=True)
+        stats = manager.get_cache_stats()
+
+    print(f"Nodes: {args.nodes}, file size: {stats['bytes'] / 1024:.0f} KiB")
+    print(f"Uncached load (json.load):     {uncached * 1000:10.3f} ms")
+    print(f"First cached load (miss):      {first_load * 1000:10.3f} ms")
+    print(f"Repeated cached load (hit):    {cached * 1000:10.3f} ms")
+    print(f"Speedup on unchanged file:     {uncached / cached:10.0f}x")
+    print(f"Cache stats: {stats}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+"""
+Benchmark portrait loading on every render: a blocking requests.get per
+portrait (the original display_image_from_url) against the ImageCache, with
+portraits served by a local HTTP stand-in that adds network latency.
+"""
+import io
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+import requests
+from PIL import Image
+from image_cache import ImageCache
+
+
+def make_portrait(number, size):
+    """Encode a distinct test portrait as PNG bytes"""
+    image = Image.new("RGB", (size, size), ((number * 37) % 256, (number * 91) % 256, 120))
+    encoded = io.BytesIO()
+    image.save(encoded, format="PNG")
+    return encoded.getvalue()
+
+
+def start_server(portraits, latency):
+    """Serve the portraits at /portrait/<n>.png after a fixed delay; return (server, base URL)"""
+    class PortraitHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            try:
+                body = portraits[int(self.path.rsplit("/", 1)[-1].split(".")[0])]
+            except (ValueError, IndexError):
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PortraitHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/portrait/"
+
+
+def legacy_render(url):
+    """Load a portrait the way display_image_from_url did"""
+    response = requests.get(url)
+    return Image.open(io.BytesIO(response.content))
+
+
+def per_render(func, urls, renders):
+    """Return the average seconds per render, cycling through the portraits"""
+    start = time.perf_counter()
+    for number in range(renders):
+        func(urls[number % len(urls)])
+    return (time.perf_counter() - start) / renders
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark cached, prefetched portrait loading')
+    parser.add_argument('--portraits', type=int, default=20, help='Distinct portraits (default: 20)')
+    parser.add_argument('--renders', type=int, default=100, help='Renders per measurement (default: 100)')
+    parser.add_argument('--latency', type=float, default=0.1, help='Seconds the server waits per request (default: 0.1)')
+    parser.add_argument('--size', type=int, default=1024, help='Side of the served portraits in pixels (default: 1024)')
+    args = parser.parse_args()
+
+    portraits = [make_portrait(number, args.size) for number in range(args.portraits)]
+    server, base_url = start_server(portraits, args.latency)
+    urls = [f"{base_url}{number}.png" for number in range(args.portraits)]
+    directory = tempfile.mkdtemp()
+    try:
+        legacy = per_render(legacy_render, urls, args.renders)
+
+        cache = ImageCache(directory)
+        # Cold: nothing cached, every lookup returns at once and starts a background fetch
+        cold = per_render(cache.get, urls, args.portraits)
+        for url in urls:
+            cache.get(url, wait=None)
+        memory = per_render(cache.get, urls, args.renders)
+        cache.clear_memory()
+        disk = per_render(cache.get, urls, args.portraits)
+
+        # Prefetching while the player reads: the next portrait is ready when it is shown
+        prefetched = ImageCache(os.path.join(directory, "prefetched"))
+        start = time.perf_counter()
+        prefetched.prefetch_all(urls)
+        prefetch_time = time.perf_counter() - start
+        ready = sum(prefetched.get(url, wait=None) is not None for url in urls)
+        background = time.perf_counter() - start
+        cache.close()
+        prefetched.close()
+    finally:
+        server.shutdown()
+        shutil.rmtree(directory)
+
+    print(f"Portraits: {args.portraits} ({args.size}x{args.size} PNG), server latency: {args.latency * 1000:.0f} ms")
+    print(f"{'Portrait lookup':<40} {'ms per render':>14}")
+    print(f"{'requests.get per render (original)':<40} {legacy * 1000:>14.2f}")
+    print(f"{'cache, not yet fetched (non-blocking)':<40} {cold * 1000:>14.2f}")
+    print(f"{'cache, decoded image in memory':<40} {memory * 1000:>14.4f}")
+    print(f"{'cache, resized PNG on disk':<40} {disk * 1000:>14.2f}")
+    print(f"Prefetching {args.portraits} portraits took {prefetch_time * 1000:.1f} ms of render time; "
+          f"{ready}/{args.portraits} were ready after {background:.2f} s in the background")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
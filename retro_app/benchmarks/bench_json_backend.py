@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""
+Benchmark load and save throughput of the JSON backends in data_layer,
+in pretty and compact mode, against the json.load/json.dump calls the
+loaders and the editor used before.
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from data_layer import JSON_BACKENDS, set_json_backend, read_json_file, write_json_file
+from generate_dialogue import generate_dialogue_data
+
+
+def best_of(repeat, func):
+    """Return the fastest of several timed runs of func"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def stdlib_save(data, path, indent):
+    """Save the way data_layer (indent=2) and the editor (indent=4) did"""
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=indent)
+
+
+def stdlib_load(path):
+    """Load the way the loaders did"""
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark JSON backend load/save throughput')
+    parser.add_argument('--nodes', type=int, default=50000, help='Number of generated dialogue nodes (default: 50000)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement, best is reported (default: 3)')
+    args = parser.parse_args()
+
+    dialogue_data = generate_dialogue_data(args.nodes, variable_count=20)
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "bench.json")
+        for indent in (4, 2):
+            save = best_of(args.repeat, lambda: stdlib_save(dialogue_data, path, indent))
+            load = best_of(args.repeat, lambda: stdlib_load(path))
+            rows.append((f"json.dump indent={indent}", os.path.getsize(path), save, load))
+
+        for name in JSON_BACKENDS:
+            set_json_backend(name)
+            for pretty in (True, False):
+                save = best_of(args.repeat, lambda: write_json_file(path, dialogue_data, pretty))
+                load = best_of(args.repeat, lambda: read_json_file(path))
+                rows.append((f"{name} {'pretty' if pretty else 'compact'}", os.path.getsize(path), save, load))
+
+    mib = 1024 * 1024
+    print(f"Nodes: {args.nodes}, backends available: {', '.join(JSON_BACKENDS)}")
+    print(f"{'Writer':<22} {'file MiB':>9} {'save s':>8} {'save MiB/s':>11} {'load s':>8} {'load MiB/s':>11}")
+    for label, size, save, load in rows:
+        print(f"{label:<22} {size / mib:>9.1f} {save:>8.3f} {size / mib / save:>11.1f} "
+              f"{load:>8.3f} {size / mib / load:>11.1f}")
+    baseline, fastest = rows[0], rows[-1]
+    print(f"Editor save: {baseline[2] / fastest[2]:.1f}x faster with {fastest[0]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
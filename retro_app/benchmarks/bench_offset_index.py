@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""
+Benchmark lazy per-node loading through the sidecar offset index against
+parsing the whole JSON file. Each measurement runs in a fresh process and
+visits a few hundred dialogues, like a short play session on a huge file.
+"""
+import os
+import sys
+import json
+import tempfile
+import argparse
+import subprocess
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from offset_index import index_path_for
+from generate_dialogue import write_dialogue_file
+
+# Loads a file, plays a random walk of `visits` dialogues and reports timing and peak RSS (Linux)
+CHILD_SCRIPT = """
+import sys, time, json, random
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+from logic_layer import GameState
+state = GameState()
+assert state.load_dialogue({path!r}, lazy={lazy})
+state.get_current_dialogue()
+first = time.perf_counter() - start
+rng = random.Random(1)
+for _ in range({visits}):
+    dialogue = state.get_current_dialogue()
+    responses = [r for r in dialogue["responses"] if r["next_dialogue"]]
+    if not responses:
+        state.reset_state()
+        continue
+    state.select_response(rng.choice(responses)["id"])
+total = time.perf_counter() - start
+# Peak resident set of this process in KiB (ru_maxrss would include the parent's, as it survives exec)
+with open("/proc/self/status") as status:
+    rss = next(int(line.split()[1]) for line in status if line.startswith("VmHWM:"))
+print(json.dumps({{"first": first, "total": total, "rss": rss}}))
+"""
+
+
+def run_child(path, lazy, visits):
+    """Run one fresh process against the file and return its measurements"""
+    script = CHILD_SCRIPT.format(root=ROOT_DIR, path=path, lazy=lazy, visits=visits)
+    output = subprocess.run([sys.executable, "-c", script], check=True,
+                            capture_output=True, text=True, cwd=ROOT_DIR).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark lazy loading through an offset index vs. a full parse')
+    parser.add_argument('--nodes', type=int, default=100000, help='Number of generated dialogue nodes (default: 100000)')
+    parser.add_argument('--visits', type=int, default=300, help='Dialogues visited by each process (default: 300)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = write_dialogue_file(os.path.join(tmp_dir, "bench.json"), args.nodes, variable_count=20)
+        size = os.path.getsize(path)
+
+        run_child(path, False, 0)  # warm the page cache
+        results = {"full parse": run_child(path, False, args.visits)}
+        # The first lazy load scans the file once and writes the sidecar index
+        results["lazy, cold"] = run_child(path, True, args.visits)
+        index_size = os.path.getsize(index_path_for(path))
+        results["lazy, indexed"] = run_child(path, True, args.visits)
+
+    mib = 1024 * 1024
+    print(f"Nodes: {args.nodes} ({size / mib:.1f} MiB JSON, {index_size / mib:.1f} MiB index), "
+          f"dialogues visited per process: {args.visits}")
+    print(f"{'Loader':<14} {'first dialogue s':>17} {'total s':>8} {'peak RSS MiB':>13}")
+    for label, result in results.items():
+        print(f"{label:<14} {result['first']:>17.3f} {result['total']:>8.3f} {result['rss'] / 1024:>13.1f}")
+    full, indexed = results["full parse"], results["lazy, indexed"]
+    print(f"Startup with an index: {full['first'] / indexed['first']:.0f}x faster, "
+          f"peak memory {full['rss'] / indexed['rss']:.1f}x lower")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
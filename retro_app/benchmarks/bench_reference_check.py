@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""
+Benchmark the dialogue reference checks: per-node list search vs. the prebuilt adjacency index.
+"""
+import os
+import sys
+import time
+import argparse
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+import schema_validator
+from dialogue_validator import DialogueValidator
+from generate_dialogue import generate_dialogue_data
+
+SCHEMA_PATH = os.path.join(ROOT_DIR, "dialogue_schema.json")
+
+
+def legacy_reachability(dialogue_data):
+    """The original reachability BFS that searched the dialogue list per node, kept as the baseline"""
+    reachable = set()
+    to_check = [dialogue_data["starting_dialogue"]]
+    while to_check:
+        current = to_check.pop()
+        if current in reachable or current is None:
+            continue
+        reachable.add(current)
+        dialogue = next((d for d in dialogue_data["dialogues"] if d["id"] == current), None)
+        if dialogue:
+            for response in dialogue["responses"]:
+                if response["next_dialogue"] and response["next_dialogue"] not in reachable:
+                    to_check.append(response["next_dialogue"])
+    return reachable
+
+
+def timed(func, *args):
+    """Return the seconds taken by one call"""
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dialogue reference checks')
+    parser.add_argument('--sizes', default='1000,10000,100000',
+                        help='Comma-separated node counts (default: 1000,10000,100000)')
+    parser.add_argument('--legacy-max', type=int, default=10000,
+                        help='Largest node count to run the quadratic baseline on (default: 10000)')
+    args = parser.parse_args()
+
+    validator = DialogueValidator(schema_path=SCHEMA_PATH)
+
+    print(f"{'Nodes':>8} {'old BFS s':>10} {'schema_validator s':>19} {'DialogueValidator s':>20}")
+    for size in [int(s) for s in args.sizes.split(',')]:
+        dialogue_data = generate_dialogue_data(size)
+        legacy = f"{timed(legacy_reachability, dialogue_data):>10.3f}" if size <= args.legacy_max else f"{'skipped':>10}"
+        schema_time = timed(schema_validator.check_dialogue_references, dialogue_data)
+        # Dialogue references (including loop analysis) and quest references share one index
+        validator_time = timed(lambda data: (validator.check_dialogue_references(data),
+                                             validator.check_quest_references(data)), dialogue_data)
+        print(f"{size:>8} {legacy} {schema_time:>19.3f} {validator_time:>20.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""
+Benchmark the latency of saving a one-field change to a large dialogue file:
+the original in-place json.dump, the atomic full rewrite, and an incremental
+save through the save journal.
+"""
+import os
+import sys
+import json
+import time
+import random
+import tempfile
+import argparse
+import statistics
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from data_layer import get_json_backend, write_json_file, read_json_file
+from save_journal import SaveJournal
+from generate_dialogue import generate_dialogue_data
+
+
+def legacy_save(data, path):
+    """Save the way save_dialogue_data did: truncate and rewrite in place"""
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+
+def time_saves(data, save, edits, rng):
+    """Change one dialogue's text before each save and return the save latencies"""
+    times = []
+    for edit in range(edits):
+        data["dialogues"][rng.randrange(len(data["dialogues"]))]["text"] = f"Edited line {edit}"
+        start = time.perf_counter()
+        save()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark one-field save latency on a large dialogue file')
+    parser.add_argument('--nodes', type=int, default=62000, help='Number of generated dialogue nodes (default: 62000, ~50 MB)')
+    parser.add_argument('--edits', type=int, default=10, help='Saves timed per method (default: 10)')
+    args = parser.parse_args()
+
+    data = generate_dialogue_data(args.nodes, variable_count=20)
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "bench.json")
+        rows = [("json.dump in place", time_saves(data, lambda: legacy_save(data, path), args.edits, rng))]
+        size = os.path.getsize(path)
+        rows.append((f"atomic ({get_json_backend().name})",
+                     time_saves(data, lambda: write_json_file(path, data), args.edits, rng)))
+
+        # A long compaction delay keeps the background compaction out of the timed saves
+        journal = SaveJournal(path, compact_delay=3600)
+        journal.save(data)
+        rows.append(("journal", time_saves(data, lambda: journal.save(data), args.edits, rng)))
+        journal_bytes = journal.get_stats()["journal_bytes"]
+
+        start = time.perf_counter()
+        journal.compact()
+        compaction = time.perf_counter() - start
+        assert read_json_file(path) == data
+
+    print(f"Nodes: {args.nodes} ({size / (1024 * 1024):.1f} MiB), one changed field per save, {args.edits} saves")
+    print(f"{'Save':<20} {'median ms':>10} {'max ms':>9}")
+    for label, times in rows:
+        print(f"{label:<20} {statistics.median(times) * 1000:>10.1f} {max(times) * 1000:>9.1f}")
+    print(f"Journal after {args.edits} saves: {journal_bytes} bytes; background compaction took {compaction:.2f} s")
+    print(f"One-field save: {statistics.median(rows[0][1]) / statistics.median(rows[-1][1]):.0f}x faster with the journal")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""
+Benchmark per-file schema validation: jsonschema.validate vs. the compiled, reused validator.
+Runs over every dialogue file in the conversations directory.
+"""
+import os
+import sys
+import json
+import glob
+import time
+import argparse
+
+import jsonschema
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from schema_validator import get_schema_validator
+
+SCHEMA_PATH = os.path.join(ROOT_DIR, "dialogue_schema.json")
+CONVERSATIONS_DIR = os.path.join(ROOT_DIR, "conversations")
+
+
+def validate_per_call(dialogue_data, schema):
+    """The original approach: jsonschema.validate checks and compiles the schema on every call"""
+    try:
+        jsonschema.validate(instance=dialogue_data, schema=schema)
+    except jsonschema.ValidationError:
+        pass
+
+
+def validate_compiled(dialogue_data, schema):
+    """The compiled validator, collecting every error"""
+    return list(get_schema_validator(schema).iter_errors(dialogue_data))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark schema validation per file')
+    parser.add_argument('--repeats', type=int, default=50, help='Validations per file (default: 50)')
+    args = parser.parse_args()
+
+    with open(SCHEMA_PATH, 'r') as f:
+        schema = json.load(f)
+
+    print(f"{'File':<32} {'validate() ms':>14} {'compiled ms':>12} {'errors':>7}")
+    total_before = total_after = 0.0
+    for path in sorted(glob.glob(os.path.join(CONVERSATIONS_DIR, "*.json"))):
+        with open(path, 'r') as f:
+            dialogue_data = json.load(f)
+
+        start = time.perf_counter()
+        for _ in range(args.repeats):
+            validate_per_call(dialogue_data, schema)
+        before = (time.perf_counter() - start) / args.repeats
+
+        start = time.perf_counter()
+        for _ in range(args.repeats):
+            errors = validate_compiled(dialogue_data, schema)
+        after = (time.perf_counter() - start) / args.repeats
+
+        total_before += before
+        total_after += after
+        print(f"{os.path.basename(path):<32} {before * 1000:>14.2f} {after * 1000:>12.2f} {len(errors):>7}")
+
+    print(f"{'TOTAL per corpus pass':<32} {total_before * 1000:>14.2f} {total_after * 1000:>12.2f}")
+    print(f"Speedup: {total_before / total_after:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
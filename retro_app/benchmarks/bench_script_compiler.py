@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+"""
+Benchmark script and condition evaluation: string parsing vs. precompiled operations.
+Runs over every dialogue file in the conversations directory.
+"""
+import os
+import sys
+import time
+import glob
+import argparse
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from data_layer import dialogue_manager
+from logic_layer import GameState
+
+
+def _coerce(value):
+    if value.lower() == "true":
+        return True
+    elif value.lower() == "false":
+        return False
+    elif value.isdigit():
+        return int(value)
+    return value
+
+
+def legacy_execute_script(state, script):
+    """The original string-parsing execute_script, kept here as the baseline"""
+    if not script:
+        return
+    if script.startswith("StartQuest_"):
+        state.quest_state[script.replace("StartQuest_", "")] = {"current_stage": 1}
+    elif script.startswith("UpdateQuest_"):
+        parts = script.replace("UpdateQuest_", "").split("_")
+        if len(parts) >= 2:
+            try:
+                stage = int(parts[1])
+                if parts[0] in state.quest_state:
+                    state.quest_state[parts[0]]["current_stage"] = stage
+            except ValueError:
+                pass
+    elif script.startswith("CompleteQuest_"):
+        quest_id = script.replace("CompleteQuest_", "")
+        if quest_id in state.quest_state:
+            state.quest_state[quest_id]["completed"] = True
+    elif script.startswith("SetVariable_"):
+        parts = script.replace("SetVariable_", "").split("_")
+        if len(parts) >= 2:
+            state.variables[parts[0]] = _coerce(parts[1])
+
+
+def legacy_evaluate_condition(state, condition):
+    """The original string-parsing evaluate_condition, kept here as the baseline"""
+    if not condition:
+        return True
+    if condition.startswith("VariableEquals_"):
+        parts = condition.replace("VariableEquals_", "").split("_")
+        if len(parts) >= 2:
+            return parts[0] in state.variables and state.variables[parts[0]] == _coerce(parts[1])
+    if condition.startswith("QuestActive_"):
+        return condition.replace("QuestActive_", "") in state.quest_state
+    if condition.startswith("QuestCompleted_"):
+        quest_id = condition.replace("QuestCompleted_", "")
+        return quest_id in state.quest_state and state.quest_state[quest_id].get("completed", False)
+    if condition.startswith("QuestStage_"):
+        parts = condition.replace("QuestStage_", "").split("_")
+        if len(parts) >= 2:
+            try:
+                stage = int(parts[1])
+                return parts[0] in state.quest_state and state.quest_state[parts[0]].get("current_stage") == stage
+            except ValueError:
+                return False
+    return False
+
+
+def collect_strings(dialogue_data):
+    """Collect every script, on_entry and condition string in the dialogue data"""
+    scripts, conditions = [], []
+    for dialogue in dialogue_data.get("dialogues", []):
+        if dialogue.get("on_entry"):
+            scripts.append(dialogue["on_entry"])
+        for response in dialogue.get("responses", []):
+            if response.get("script"):
+                scripts.append(response["script"])
+            conditions.append(response.get("condition"))
+    return scripts, conditions
+
+
+def time_pass(func, state, items, repeats):
+    """Return the total seconds to apply func to every item, repeats times"""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for item in items:
+            func(state, item)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark precompiled scripts and conditions')
+    parser.add_argument('--repeats', type=int, default=2000, help='Passes over each file (default: 2000)')
+    args = parser.parse_args()
+
+    print(f"{'File':<32} {'scripts':>8} {'conds':>6} {'legacy ms':>10} {'compiled ms':>12} {'speedup':>8}")
+    total_legacy = total_compiled = 0.0
+    for path in sorted(glob.glob(os.path.join(dialogue_manager.conversations_directory, "*.json"))):
+        dialogue_data = dialogue_manager.load_dialogue_data(path)
+        scripts, conditions = collect_strings(dialogue_data)
+
+        legacy_state = GameState()
+        legacy_state.dialogue_data = dialogue_data
+        compiled_state = GameState()
+        compiled_state.dialogue_data = dialogue_data
+
+        # Both implementations must agree before timing anything
+        for script in scripts:
+            legacy_execute_script(legacy_state, script)
+            compiled_state.execute_script(script)
+        assert legacy_state.quest_state == compiled_state.quest_state, path
+        assert legacy_state.variables == compiled_state.variables, path
+        for condition in conditions:
+            assert legacy_evaluate_condition(legacy_state, condition) == compiled_state.evaluate_condition(condition), condition
+
+        legacy = (time_pass(legacy_execute_script, legacy_state, scripts, args.repeats) +
+                  time_pass(legacy_evaluate_condition, legacy_state, conditions, args.repeats))
+        compiled = (time_pass(GameState.execute_script, compiled_state, scripts, args.repeats) +
+                    time_pass(GameState.evaluate_condition, compiled_state, conditions, args.repeats))
+        total_legacy += legacy
+        total_compiled += compiled
+
+        print(f"{os.path.basename(path):<32} {len(scripts):>8} {len(conditions):>6} "
+              f"{legacy * 1000:>10.1f} {compiled * 1000:>12.1f} {legacy / compiled:>7.1f}x")
+
+    print(f"{'TOTAL':<48} {total_legacy * 1000:>10.1f} {total_compiled * 1000:>12.1f} "
+          f"{total_legacy / total_compiled:>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+"""
+Benchmark the exhaustive state explorer: states explored per second on
+generated files of growing size, in one process and with worker processes,
+and how closely the state and memory caps are kept.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from data_layer import dialogue_manager
+from state_explorer import StateExplorer
+from generate_dialogue import write_dialogue_file
+
+
+def explore(path, **options):
+    """Explore a file and return (report, seconds including worker start-up)"""
+    dialogue_data = dialogue_manager.load_dialogue_data(path, use_cache=False)
+    start = time.perf_counter()
+    report = StateExplorer(dialogue_data, file_path=path, **options).explore()
+    return report, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the exhaustive state explorer')
+    parser.add_argument('--sizes', default='100,400,1600', help='Comma-separated node counts (default: 100,400,1600)')
+    parser.add_argument('--quests', type=int, default=2, help='Quests in the generated files (default: 2)')
+    parser.add_argument('--variables', type=int, default=4, help='Boolean variables in the generated files (default: 4)')
+    parser.add_argument('--jobs', type=int, default=4, help='Worker processes for the parallel run (default: 4)')
+    parser.add_argument('--max-states', type=int, default=500000, help='State cap (default: 500000)')
+    args = parser.parse_args()
+
+    print(f"CPU cores: {os.cpu_count()}, quests: {args.quests}, variables: {args.variables}")
+    print(f"{'Nodes':>6} {'states':>9} {'coverage':>9} {'1 process st/s':>15} {f'{args.jobs} workers st/s':>16}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in (int(size) for size in args.sizes.split(",")):
+            path = write_dialogue_file(os.path.join(tmp_dir, f"bench_{size}.json"), size,
+                                       quest_count=args.quests, variable_count=args.variables)
+            serial, serial_time = explore(path, max_states=args.max_states)
+            parallel, parallel_time = explore(path, max_states=args.max_states, jobs=args.jobs)
+            assert parallel.states == serial.states and parallel.available_responses == serial.available_responses
+            print(f"{size:>6} {serial.states:>9} {serial.response_coverage:>9.1%} "
+                  f"{serial.states / serial_time:>15,.0f} {parallel.states / parallel_time:>16,.0f}"
+                  + (" (capped)" if serial.truncated else ""))
+
+        # Caps on a file whose state space is far too large to finish
+        path = write_dialogue_file(os.path.join(tmp_dir, "bench_huge.json"), 5000, variable_count=16)
+        for label, options in (("max_states=200000", {"max_states": 200000}),
+                                ("max_memory=32 MiB", {"max_memory": 32 * 1024 * 1024, "max_states": 10 ** 9})):
+            report, elapsed = explore(path, **options)
+            print(f"Cap {label}: stopped on {report.truncated} after {report.states} states in {elapsed:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+"""
+Benchmark state-space search over a dialogue file with many boolean
+variables: the same GameState-driven BFS with states keyed by JSON dumps of
+the quest and variable dicts, by sorted item tuples, and by the canonical
+StateEncoder keys. Reports states/s and the memory held by the visited set,
+then the cost of answering reachability queries with early exit.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from logic_layer import GameState
+from state_space import get_state_encoder
+from generate_dialogue import write_dialogue_file
+
+
+def json_keys():
+    """Key states by JSON dumps of their dicts"""
+    def encode(state):
+        return (state.current_dialogue_id, json.dumps(state.quest_state, sort_keys=True),
+                json.dumps(state.variables, sort_keys=True))
+
+    def decode(state, key):
+        state.current_dialogue_id = key[0]
+        state.quest_state = json.loads(key[1])
+        state.variables = json.loads(key[2])
+    return encode, decode
+
+
+def tuple_keys():
+    """Key states by sorted (name, value) tuples"""
+    def encode(state):
+        quests = tuple(sorted((quest_id, quest.get("current_stage"), quest.get("completed", False))
+                              for quest_id, quest in state.quest_state.items()))
+        return (state.current_dialogue_id, quests, tuple(sorted(state.variables.items())))
+
+    def decode(state, key):
+        state.current_dialogue_id = key[0]
+        state.quest_state = {quest_id: {"current_stage": stage, "completed": completed}
+                             for quest_id, stage, completed in key[1]}
+        state.variables = dict(key[2])
+    return encode, decode
+
+
+def canonical_keys():
+    """Key states with the StateEncoder, through GameState"""
+    return GameState.state_key, GameState.restore_state
+
+
+def search(dialogue_data, keys, max_states):
+    """Breadth-first search over every state, returning the visited set"""
+    encode, decode = keys
+    state = GameState(history_capacity=1)
+    state.dialogue_data = dialogue_data
+    state.reset_state()
+    start = encode(state)
+    visited = {start}
+    queue = [start]
+    for key in queue:
+        decode(state, key)
+        dialogue = state.get_current_dialogue()
+        if not dialogue:
+            continue
+        available = [response["id"] for response in dialogue["responses"]
+                     if state.evaluate_condition(response.get("condition"))]
+        for response_id in available:
+            decode(state, key)
+            state.select_response(response_id)
+            next_key = encode(state)
+            if next_key not in visited:
+                if len(queue) >= max_states:
+                    return visited
+                visited.add(next_key)
+                queue.append(next_key)
+    return visited
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark state keys for dialogue state-space search')
+    parser.add_argument('--nodes', type=int, default=300, help='Number of generated dialogue nodes (default: 300)')
+    parser.add_argument('--variables', type=int, default=32, help='Boolean variables (default: 32)')
+    parser.add_argument('--max-states', type=int, default=50000, help='States explored per search (default: 50000)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = write_dialogue_file(os.path.join(tmp_dir, "bench.json"), args.nodes,
+                                   quest_count=2, variable_count=args.variables)
+        game = GameState()
+        game.load_dialogue(path)
+
+    print(f"Nodes: {args.nodes}, boolean variables: {args.variables}, state cap: {args.max_states}")
+    print(f"{'State key':<20} {'states':>8} {'states/s':>10} {'visited set MiB':>16} {'bytes/state':>12}")
+    for label, keys in (("JSON dumps", json_keys()), ("sorted tuples", tuple_keys()),
+                        ("StateEncoder", canonical_keys())):
+        start = time.perf_counter()
+        visited = search(game.dialogue_data, keys, args.max_states)
+        elapsed = time.perf_counter() - start
+        del visited
+
+        tracemalloc.start()
+        visited = search(game.dialogue_data, keys, args.max_states)
+        held = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"{label:<20} {len(visited):>8} {len(visited) / elapsed:>10,.0f} "
+              f"{held / (1024 * 1024):>16.1f} {held / len(visited):>12.0f}")
+        del visited
+
+    # Reachability queries: the whole file, then the last dialogue's responses only
+    encoder = get_state_encoder(game.graph, game.dialogue_data)
+    print(f"Encoder: {len(encoder.quest_ids)} quests, {len(encoder.variable_names)} variables")
+    last = game.dialogue_data["dialogues"][-1]
+    for label, targets in (("every response", None),
+                           (f"{last['id']}'s responses", [(last["id"], response["id"]) for response in last["responses"]])):
+        start = time.perf_counter()
+        result = game.find_response_paths(targets, max_states=args.max_states)
+        elapsed = time.perf_counter() - start
+        status = "complete" if result.complete else ("capped" if result.truncated else "all targets found")
+        print(f"Query {label}: {len(result.paths)} reachable after {result.states} states "
+              f"in {elapsed * 1000:.0f} ms ({status})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
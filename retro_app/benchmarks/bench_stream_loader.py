@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""
+Benchmark the streaming loader: time until the first dialogue can be shown
+and peak memory while parsing, against loading the whole file with json.load.
+"""
+import os
+import gc
+import sys
+import json
+import time
+import tempfile
+import argparse
+import tracemalloc
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from data_layer import dialogue_file_cache
+from logic_layer import GameState
+from stream_loader import load_dialogue_json
+from generate_dialogue import write_dialogue_file
+
+
+def time_to_first_dialogue(path, stream):
+    """Return (seconds until the starting dialogue is available, seconds until fully loaded)"""
+    dialogue_file_cache.invalidate()
+    gc.collect()
+    start = time.perf_counter()
+    state = GameState()
+    state.load_dialogue(path, stream=stream)
+    first = state.get_current_dialogue()
+    first_time = time.perf_counter() - start
+    assert first is not None
+    if stream:
+        state.graph.stream.join()
+    return first_time, time.perf_counter() - start
+
+
+def peak_memory(load, path):
+    """Return the peak bytes traced while loading the file"""
+    gc.collect()
+    tracemalloc.start()
+    data = load(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    return peak
+
+
+def json_load(path):
+    """Parse the file the way the loaders did before streaming"""
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark time-to-first-dialogue of the streaming loader')
+    parser.add_argument('--nodes', type=int, default=200000, help='Number of generated dialogue nodes (default: 200000)')
+    parser.add_argument('--memory-nodes', type=int, default=50000, help='Nodes for the (slower, traced) memory measurement (default: 50000)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = write_dialogue_file(os.path.join(tmp_dir, "bench.json"), args.nodes)
+        size_mib = os.path.getsize(path) / (1024 * 1024)
+
+        eager_first, eager_total = time_to_first_dialogue(path, stream=False)
+        stream_first, stream_total = time_to_first_dialogue(path, stream=True)
+
+        memory_path = write_dialogue_file(os.path.join(tmp_dir, "memory.json"), args.memory_nodes)
+        memory_size_mib = os.path.getsize(memory_path) / (1024 * 1024)
+        json_peak = peak_memory(json_load, memory_path)
+        stream_peak = peak_memory(load_dialogue_json, memory_path)
+
+    mib = 1024 * 1024
+    print(f"Nodes: {args.nodes} ({size_mib:.1f} MiB)")
+    print(f"{'Loader':<10} {'first dialogue s':>17} {'fully loaded s':>15}")
+    print(f"{'json.load':<10} {eager_first:>17.4f} {eager_total:>15.2f}")
+    print(f"{'stream':<10} {stream_first:>17.4f} {stream_total:>15.2f}")
+    print(f"Time to first dialogue: {eager_first / stream_first:.0f}x faster")
+    print()
+    print(f"Peak parse memory, {args.memory_nodes} nodes ({memory_size_mib:.1f} MiB file):")
+    print(f"{'json.load':<10} {json_peak / mib:>8.1f} MiB")
+    print(f"{'stream':<10} {stream_peak / mib:>8.1f} MiB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
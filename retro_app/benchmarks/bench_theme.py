@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""
+Benchmark the bytes each rerun sends to the browser for the app styling:
+the whole <style> block re-sent through st.markdown (the original
+apply_terminal_style functions) against the theme loader, which links the
+static stylesheet into the page once per session.
+"""
+import os
+import sys
+import argparse
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from streamlit.testing.v1 import AppTest
+from theme import available_themes, load_theme_css
+
+# Counts the bytes the script run sends to the browser, then styles the app
+APP = """
+import sys
+sys.path.insert(0, ROOT_DIR)
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from theme import apply_theme, load_theme_css
+
+ctx = get_script_run_ctx()
+send = ctx._enqueue
+
+def counting_send(msg):
+    if msg.HasField("delta"):
+        st.session_state.bytes += msg.ByteSize()
+    send(msg)
+
+st.session_state.bytes = 0
+ctx._enqueue = counting_send
+
+if LEGACY:
+    st.markdown(f"<style>{load_theme_css(THEME)}</style>", unsafe_allow_html=True)
+else:
+    apply_theme(THEME)
+"""
+
+
+def bytes_per_rerun(theme, legacy, reruns):
+    """Run the app and return the average bytes sent per rerun, after the first run"""
+    source = APP.replace("ROOT_DIR", repr(ROOT_DIR)).replace("THEME", repr(theme)).replace("LEGACY", repr(legacy))
+    app = AppTest.from_string(source, default_timeout=60)
+    app.run()
+    sent = 0
+    for _ in range(reruns):
+        app.run()
+        if app.exception:
+            raise RuntimeError(app.exception[0].message)
+        sent += app.session_state.bytes
+    return sent / reruns
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the styling bytes sent per rerun')
+    parser.add_argument('--reruns', type=int, default=10, help='Reruns per measurement (default: 10)')
+    args = parser.parse_args()
+
+    print(f"{'Theme':<16} {'stylesheet B':>13} {'inline B/rerun':>15} {'loader B/rerun':>15}")
+    for theme in available_themes():
+        inline = bytes_per_rerun(theme, True, args.reruns)
+        loader = bytes_per_rerun(theme, False, args.reruns)
+        print(f"{theme:<16} {len(load_theme_css(theme).encode('utf-8')):>13} {inline:>15.0f} {loader:>15.0f}")
+    print("The stylesheet itself is fetched by the browser once per session, from the component's static files")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""
+Benchmark the cost of showing one dialogue with a typewriter effect: one
+st.markdown update per character (the original typewriter_text) against the
+client-side typewriter component, counting the messages and bytes the
+server sends to the browser.
+"""
+import os
+import sys
+import time
+import argparse
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from streamlit.testing.v1 import AppTest
+
+# Counts the messages the script run sends to the browser, then shows TEXT
+APP = """
+import sys
+sys.path.insert(0, ROOT_DIR)
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+ctx = get_script_run_ctx()
+send = ctx._enqueue
+
+def counting_send(msg):
+    if msg.HasField("delta"):
+        st.session_state.messages += 1
+        st.session_state.bytes += msg.ByteSize()
+    send(msg)
+
+st.session_state.messages = 0
+st.session_state.bytes = 0
+ctx._enqueue = counting_send
+
+if LEGACY:
+    typed_text = st.empty()
+    for i in range(len(TEXT) + 1):
+        typed_text.markdown(f"<div class='dialog-text'>{TEXT[:i]}▋</div>", unsafe_allow_html=True)
+else:
+    from typewriter import typewriter_text
+    typewriter_text(TEXT)
+"""
+
+
+def measure(text, legacy):
+    """Run the app once and return (messages, bytes, seconds)"""
+    source = APP.replace("ROOT_DIR", repr(ROOT_DIR)).replace("TEXT", repr(text)).replace("LEGACY", repr(legacy))
+    app = AppTest.from_string(source, default_timeout=600)
+    start = time.perf_counter()
+    app.run()
+    elapsed = time.perf_counter() - start
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+    return app.session_state.messages, app.session_state.bytes, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the server cost of the typewriter effect')
+    parser.add_argument('--lengths', type=int, nargs='+', default=[200, 1000, 5000],
+                        help='Dialogue text lengths in characters (default: 200 1000 5000)')
+    args = parser.parse_args()
+
+    sentence = "The terminal hums as the old mainframe wakes up. "
+    print(f"{'Characters':>10} {'Typewriter':<22} {'messages':>9} {'KiB sent':>10} {'script ms':>10}")
+    for length in args.lengths:
+        text = (sentence * (length // len(sentence) + 1))[:length]
+        for legacy, label in ((True, "markdown per character"), (False, "client-side component")):
+            messages, sent, elapsed = measure(text, legacy)
+            print(f"{length:>10} {label:<22} {messages:>9} {sent / 1024:>10.1f} {elapsed * 1000:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
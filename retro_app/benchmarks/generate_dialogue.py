@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+"""
+Generate large synthetic dialogue files for benchmarking.
+The generated files follow the standardized dialogue format and pass the schema.
+"""
+import sys
+import json
+import random
+import argparse
+
+
+def generate_dialogue_data(node_count, responses_per_node=3, quest_count=10,
+                           stages_per_quest=5, variable_count=0, seed=42):
+    """
+    Build a synthetic dialogue data structure.
+
+    Every node links forward to the next node so the whole graph is reachable,
+    the remaining responses jump to random nodes (creating loops like real
+    "return to intro" hubs) and a few end the conversation. Quest scripts,
+    quest conditions and variable scripts/conditions are sprinkled in so the
+    script and condition paths get exercised.
+    """
+    rng = random.Random(seed)
+    quest_ids = [f"quest_{q}" for q in range(quest_count)]
+    variable_names = [f"flag{v}" for v in range(variable_count)]
+
+    dialogues = []
+    for n in range(node_count):
+        responses = []
+        next_id = f"node_{n + 1}" if n + 1 < node_count else None
+        responses.append({
+            "id": f"node_{n}_next",
+            "text": f"> Continue from node {n}",
+            "next_dialogue": next_id,
+            "script": None,
+            "condition": None
+        })
+
+        for r in range(1, responses_per_node):
+            roll = rng.random()
+            script = None
+            condition = None
+            if quest_ids and roll < 0.05:
+                script = f"StartQuest_{rng.choice(quest_ids)}"
+            elif quest_ids and roll < 0.10:
+                script = f"UpdateQuest_{rng.choice(quest_ids)}_{rng.randint(1, stages_per_quest)}"
+            elif quest_ids and roll < 0.12:
+                script = f"CompleteQuest_{rng.choice(quest_ids)}"
+            elif variable_names and roll < 0.20:
+                script = f"SetVariable_{rng.choice(variable_names)}_{rng.choice(['true', 'false'])}"
+
+            roll = rng.random()
+            if quest_ids and roll < 0.10:
+                condition = f"QuestActive_{rng.choice(quest_ids)}"
+            elif quest_ids and roll < 0.15:
+                condition = f"QuestStage_{rng.choice(quest_ids)}_{rng.randint(1, stages_per_quest)}"
+            elif variable_names and roll < 0.25:
+                condition = f"VariableEquals_{rng.choice(variable_names)}_{rng.choice(['true', 'false'])}"
+
+            target = None if rng.random() < 0.05 else f"node_{rng.randrange(node_count)}"
+            responses.append({
+                "id": f"node_{n}_resp_{r}",
+                "text": f"> Option {r} at node {n}",
+                "next_dialogue": target,
+                "script": script,
+                "condition": condition
+            })
+
+        dialogues.append({
+            "id": f"node_{n}",
+            "npc": f"Character {n % 7}",
+            "text": f"This is dialogue node {n}. " * 3,
+            "responses": responses,
+            "on_entry": None
+        })
+
+    quests = []
+    for quest_id in quest_ids:
+        quests.append({
+            "id": quest_id,
+            "title": f"Quest {quest_id}",
+            "description": f"Synthetic quest {quest_id}",
+            "stages": [
+                {
+                    "id": s,
+                    "description": f"Stage {s}",
+                    "journal_entry": f"Journal entry for {quest_id} stage {s}",
+                    "on_complete": None
+                }
+                for s in range(1, stages_per_quest + 1)
+            ],
+            "rewards": {"xp": 100, "items": []}
+        })
+
+    return {
+        "schema_version": "1.0",
+        "metadata": {
+            "title": f"Synthetic benchmark dialogue ({node_count} nodes)",
+            "author": "Benchmark Generator",
+            "creation_date": "2025-05-08",
+            "description": "Generated for performance benchmarks"
+        },
+        "starting_dialogue": "node_0",
+        "dialogues": dialogues,
+        "quests": quests,
+        "variables": {name: False for name in variable_names}
+    }
+
+
+def write_dialogue_file(path, node_count, **kwargs):
+    """Generate a synthetic dialogue file and write it to path"""
+    dialogue_data = generate_dialogue_data(node_count, **kwargs)
+    with open(path, 'w') as f:
+        json.dump(dialogue_data, f)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic dialogue file for benchmarking')
+    parser.add_argument('output', help='Path of the dialogue JSON file to write')
+    parser.add_argument('--nodes', type=int, default=100000, help='Number of dialogue nodes (default: 100000)')
+    parser.add_argument('--responses', type=int, default=3, help='Responses per node (default: 3)')
+    parser.add_argument('--quests', type=int, default=10, help='Number of quests (default: 10)')
+    parser.add_argument('--variables', type=int, default=0, help='Number of boolean variables (default: 0)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+
+    args = parser.parse_args()
+
+    write_dialogue_file(args.output, args.nodes, responses_per_node=args.responses,
+                        quest_count=args.quests, variable_count=args.variables, seed=args.seed)
+    print(f"Wrote {args.nodes} nodes to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
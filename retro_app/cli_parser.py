@@ -13,6 +13,9 @@ import sys
 import os
 import re
 from pathlib import Path
+from data_layer import PACK_EXTENSION, dialogue_manager, json_dumps, json_loads, read_dialogue_file
+from conversation_history import ConversationHistory
+from state_space import DEFAULT_MAX_STATES, find_response_paths, get_state_encoder
 
 # ANSI color codes for terminal output
 GREEN = "\033[32m"
@@ -27,26 +30,76 @@ BOLD = "\033[1m"
 class DialogueCLI:
     """Command-line interface for running dialogue trees"""
     
-    def __init__(self, dialogue_file):
-        """Initialize with a dialogue file"""
-        self.dialogue_data = self._load_dialogue_file(dialogue_file)
+    def __init__(self, dialogue_file, compact=False, stream=False, lazy=False, dialogue_data=None,
+                 events=None):
+        """
+        Initialize with a dialogue file
+        
+        Args:
+            dialogue_file: Path to the dialogue file; ignored if dialogue_data is given
+            dialogue_data: Already loaded dialogue data to play, shared with other
+                sessions instead of loading the file again
+            events: List that quest notifications are appended to as dicts
+                instead of being printed, for headless play
+        """
+        self.stream = None
+        self.graph = None
+        self.variables_pending = False
+        self.events = events
+        self.dialogue_history = ConversationHistory()
+        if stream:
+            self._start_dialogue_stream(dialogue_file, compact)
+            return
+        
+        if dialogue_data is not None:
+            self.dialogue_data = dialogue_data
+            self.graph = dialogue_manager.get_graph(dialogue_data)
+        else:
+            self.dialogue_data = self._load_dialogue_file(dialogue_file, compact, lazy)
+            if lazy or dialogue_file.endswith(PACK_EXTENSION):
+                # Packs and lazily loaded files are looked up through their on-disk index instead of scanned
+                self.graph = dialogue_manager.get_graph(self.dialogue_data)
         self.current_dialogue_id = self.dialogue_data.get("starting_dialogue")
-        self.dialogue_history = []
         self.active_quests = {}
         self.variables = self.dialogue_data.get("variables", {}).copy()
+    
+    def _start_dialogue_stream(self, file_path, compact=False):
+        """Start on a file that keeps loading in the background, for very large files"""
+        try:
+            self.stream = dialogue_manager.stream_dialogue_data(os.path.abspath(file_path), compact=compact)
+            self.dialogue_data = self.stream.data
+            self.graph = self.stream.graph
+            self.current_dialogue_id = self.stream.get_field("starting_dialogue")
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            print(f"{RED}Error loading dialogue file: {e}{RESET}")
+            sys.exit(1)
+        self.active_quests = {}
+        # Variables usually come after the dialogues, so they are applied once parsed
+        self.variables = {}
+        self.variables_pending = True
+    
+    def _apply_streamed_variables(self):
+        """Fill in the variable defaults once the stream has parsed them, keeping values set since"""
+        for var_name, value in self.stream.get_field("variables", {}).items():
+            self.variables.setdefault(var_name, value)
+        self.variables_pending = False
         
-    def _load_dialogue_file(self, file_path):
+    def _load_dialogue_file(self, file_path, compact=False, lazy=False):
         """Load dialogue data from a JSON file"""
         try:
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-                return data
-        except (FileNotFoundError, json.JSONDecodeError) as e:
+            if lazy:
+                return dialogue_manager.load_dialogue_data(os.path.abspath(file_path), use_cache=False, lazy=True)
+            if compact or file_path.endswith(PACK_EXTENSION):
+                return dialogue_manager.load_dialogue_data(os.path.abspath(file_path), use_cache=False, compact=True)
+            return read_dialogue_file(file_path)
+        except (FileNotFoundError, ValueError) as e:
             print(f"{RED}Error loading dialogue file: {e}{RESET}")
             sys.exit(1)
     
     def get_dialogue_by_id(self, dialogue_id):
         """Find a dialogue node by its ID"""
+        if self.graph is not None:
+            return self.graph.get_dialogue(dialogue_id)
         for dialogue in self.dialogue_data.get("dialogues", []):
             if dialogue["id"] == dialogue_id:
                 return dialogue
@@ -54,6 +107,8 @@ class DialogueCLI:
     
     def get_quest_by_id(self, quest_id):
         """Find a quest by its ID"""
+        if self.graph is not None:
+            return self.graph.get_quest(quest_id)
         for quest in self.dialogue_data.get("quests", []):
             if quest["id"] == quest_id:
                 return quest
@@ -71,7 +126,9 @@ class DialogueCLI:
             if quest:
                 self.active_quests[quest_id] = 1  # Start at stage 1
                 quest_stage = next((s for s in quest["stages"] if s["id"] == 1), None)
-                if quest_stage:
+                if self.events is not None:
+                    self.events.append({"event": "quest_started", "quest": quest_id, "stage": 1})
+                elif quest_stage:
                     print(f"\n{YELLOW}NEW QUEST: {quest['title']}{RESET}")
                     print(f"{YELLOW}> {quest_stage['journal_entry']}{RESET}\n")
         
@@ -86,7 +143,9 @@ class DialogueCLI:
                     if quest and quest_id in self.active_quests:
                         self.active_quests[quest_id] = stage_id
                         quest_stage = next((s for s in quest["stages"] if s["id"] == stage_id), None)
-                        if quest_stage:
+                        if self.events is not None:
+                            self.events.append({"event": "quest_updated", "quest": quest_id, "stage": stage_id})
+                        elif quest_stage:
                             print(f"\n{YELLOW}QUEST UPDATED: {quest['title']}{RESET}")
                             print(f"{YELLOW}> {quest_stage['journal_entry']}{RESET}\n")
                 except ValueError:
@@ -98,9 +157,12 @@ class DialogueCLI:
             if quest_id in self.active_quests:
                 quest = self.get_quest_by_id(quest_id)
                 if quest:
-                    print(f"\n{YELLOW}QUEST COMPLETED: {quest['title']}{RESET}")
-                    if "rewards" in quest and quest["rewards"]:
-                        print(f"{YELLOW}Rewards: {self._format_rewards(quest['rewards'])}{RESET}")
+                    if self.events is not None:
+                        self.events.append({"event": "quest_completed", "quest": quest_id})
+                    else:
+                        print(f"\n{YELLOW}QUEST COMPLETED: {quest['title']}{RESET}")
+                        if "rewards" in quest and quest["rewards"]:
+                            print(f"{YELLOW}Rewards: {self._format_rewards(quest['rewards'])}{RESET}")
                     del self.active_quests[quest_id]
         
         # SetVariable command
@@ -171,18 +233,24 @@ class DialogueCLI:
                 elif value.isdigit():
                     value = int(value)
                 
+                if self.variables_pending:
+                    self._apply_streamed_variables()
                 return var_name in self.variables and self.variables[var_name] == value
             return False
         
         # Default to True for unknown conditions
         return True
     
-    def show_dialogue(self):
-        """Display the current dialogue"""
+    def enter_dialogue(self):
+        """
+        Enter the current dialogue: run its on_entry script and add it to the history
+        
+        Returns:
+            The dialogue, or None if the current dialogue ID doesn't exist
+        """
         dialogue = self.get_dialogue_by_id(self.current_dialogue_id)
         if not dialogue:
-            print(f"{RED}Error: Dialogue with ID '{self.current_dialogue_id}' not found.{RESET}")
-            return False
+            return None
         
         # Process on_entry script if present
         if "on_entry" in dialogue and dialogue["on_entry"]:
@@ -194,16 +262,99 @@ class DialogueCLI:
             "npc": dialogue["npc"],
             "text": dialogue["text"]
         })
+        return dialogue
+    
+    def get_valid_responses(self, dialogue):
+        """Get the (index, response) pairs of a dialogue whose conditions are met"""
+        valid_responses = []
+        for i, response in enumerate(dialogue["responses"]):
+            if self.evaluate_condition(response.get("condition")):
+                valid_responses.append((i, response))
+        return valid_responses
+    
+    def choose_response(self, response):
+        """
+        Take a response: add it to the history, run its script and move on
+        
+        Returns:
+            The ID of the next dialogue, or None if the conversation ends here
+        """
+        # Add selected response to history
+        self.dialogue_history.append({
+            "text": response["text"],
+            "is_player": True
+        })
+        
+        # Process any script command
+        if "script" in response and response["script"]:
+            self.process_script(response["script"])
+        
+        # Set the next dialogue
+        next_dialogue = response["next_dialogue"]
+        if next_dialogue is not None:
+            self.current_dialogue_id = next_dialogue
+        return next_dialogue
+    
+    def state_key(self):
+        """Get the canonical key of the current state, in the same encoding as GameState.state_key"""
+        if self.variables_pending:
+            self._apply_streamed_variables()
+        encoder = get_state_encoder(self._get_graph(), self.dialogue_data)
+        quest_state = {quest_id: {"current_stage": stage} for quest_id, stage in self.active_quests.items()}
+        return encoder.encode(self.current_dialogue_id, quest_state, self.variables)
+    
+    def restore_state(self, key):
+        """Go back to a state saved with state_key"""
+        encoder = get_state_encoder(self._get_graph(), self.dialogue_data)
+        self.current_dialogue_id, quest_state, self.variables = encoder.decode(key)
+        self.active_quests = {quest_id: quest["current_stage"] for quest_id, quest in quest_state.items()}
+    
+    def _get_graph(self):
+        """Get the dialogue graph, also when lookups scan the lists"""
+        return self.graph if self.graph is not None else dialogue_manager.get_graph(self.dialogue_data)
+    
+    def find_response_paths(self, targets=None, max_states=DEFAULT_MAX_STATES):
+        """
+        Find which responses can still be taken from the current state under the CLI's rules
+        
+        Args:
+            targets: (dialogue ID, response ID) pairs to look for; None looks for all
+            max_states: Stop after exploring this many distinct states
+            
+        Returns:
+            A state_space.ReachabilityResult
+        """
+        scratch = DialogueCLI(None, dialogue_data=self.dialogue_data, events=[])
+        
+        def expand(key):
+            scratch.restore_state(key)
+            dialogue = scratch.get_dialogue_by_id(key[0])
+            if not dialogue:
+                return []
+            transitions = []
+            for _, response in scratch.get_valid_responses(dialogue):
+                scratch.restore_state(key)
+                next_dialogue = scratch.choose_response(response)
+                scratch.events.clear()
+                transitions.append((dialogue["id"], response["id"],
+                                    scratch.state_key() if next_dialogue is not None else None))
+            return transitions
+        
+        return find_response_paths(self.state_key(), expand, targets, max_states)
+    
+    def show_dialogue(self):
+        """Display the current dialogue"""
+        dialogue = self.enter_dialogue()
+        if not dialogue:
+            print(f"{RED}Error: Dialogue with ID '{self.current_dialogue_id}' not found.{RESET}")
+            return False
         
         # Display the dialogue
         print(f"\n{CYAN}{dialogue['npc']}{RESET}")
         print(f"{BRIGHT_GREEN}{dialogue['text']}{RESET}\n")
         
         # Get valid responses (filtering by conditions)
-        valid_responses = []
-        for i, response in enumerate(dialogue["responses"]):
-            if self.evaluate_condition(response.get("condition")):
-                valid_responses.append((i, response))
+        valid_responses = self.get_valid_responses(dialogue)
         
         # Check if there are no valid responses
         if not valid_responses:
@@ -225,24 +376,9 @@ class DialogueCLI:
             
             # Process the selected response
             _, selected_response = valid_responses[choice_idx]
-            
-            # Add selected response to history
-            self.dialogue_history.append({
-                "text": selected_response["text"],
-                "is_player": True
-            })
-            
-            # Process any script command
-            if "script" in selected_response and selected_response["script"]:
-                self.process_script(selected_response["script"])
-            
-            # Set the next dialogue
-            next_dialogue = selected_response["next_dialogue"]
-            if next_dialogue is None:
+            if self.choose_response(selected_response) is None:
                 print(f"\n{YELLOW}End of conversation.{RESET}")
                 return False
-            
-            self.current_dialogue_id = next_dialogue
             return True
             
         except ValueError:
@@ -267,6 +403,8 @@ class DialogueCLI:
     
     def show_variables(self):
         """Display the current variables (for debugging)"""
+        if self.variables_pending:
+            self._apply_streamed_variables()
         if not self.variables:
             print(f"\n{BLUE}No variables set.{RESET}")
             return
@@ -298,7 +436,7 @@ class DialogueCLI:
                     break
                 # Reset to starting dialogue
                 self.current_dialogue_id = self.dialogue_data.get("starting_dialogue")
-                self.dialogue_history = []
+                self.dialogue_history.clear()
                 # Don't reset quests or variables to allow for persistent state
             
             # Check for special commands
@@ -318,20 +456,295 @@ class DialogueCLI:
         
         print(f"\n{BOLD}Thank you for playing!{RESET}")
 
+# Commands a batch request can give instead of (or before) a choice
+BATCH_COMMANDS = ("start", "restart", "state", "end")
+
+class BatchSession:
+    """One headless play-through: the player state and the dialogue currently shown"""
+    __slots__ = ("cli", "dialogue", "responses", "step")
+    
+    def __init__(self, cli):
+        self.cli = cli
+        self.dialogue = None
+        self.responses = []
+        self.step = 0
+
+class BatchRunner:
+    """
+    Headless engine that plays many independent sessions of one dialogue file
+    
+    Every session shares the loaded dialogue data and its graph and only keeps
+    its own position, quests, variables and history, so thousands of sessions
+    can run in one process. Requests and the resulting state transitions are
+    JSON objects, one per line; nothing is prompted for or colored.
+    
+    A request names its session and either a choice, which is the 1-based
+    number of a currently available response or a response ID, or a command:
+    "start" (the default for a request without a choice), "restart" to go back
+    to the starting dialogue keeping quests and variables, "state" and "end".
+    A session is created only by "start" or "restart" and dropped when its
+    conversation ends; any other request for a missing session is an error.
+    "start" for a session that already exists describes where it is again.
+    """
+    
+    def __init__(self, dialogue_data, include_state=False):
+        """
+        Args:
+            dialogue_data: Loaded dialogue data, shared by every session
+            include_state: Add the active quests and variables to every transition
+        """
+        self.dialogue_data = dialogue_data
+        self.include_state = include_state
+        self.sessions = {}
+        # Build the shared graph once instead of on the first session
+        dialogue_manager.get_graph(dialogue_data)
+    
+    def handle(self, request):
+        """
+        Apply one request
+        
+        Args:
+            request: Dict with a "session" and a "choice" or "command"
+            
+        Returns:
+            The list of transition (or error) records it produced
+        """
+        if not isinstance(request, dict):
+            return [{"error": "request must be a JSON object"}]
+        session_id = request.get("session", "default")
+        command = request.get("command")
+        if command is None and "choice" not in request:
+            command = "start"
+        if command is not None and command not in BATCH_COMMANDS:
+            return [{"session": session_id, "error": f"unknown command {command!r}"}]
+        records = []
+        
+        # Only start and restart create a session; anything else needs one already
+        session = self.sessions.get(session_id)
+        if session is None and command not in ("start", "restart"):
+            return [{"session": session_id, "error": "no such session"}]
+        if command == "end":
+            del self.sessions[session_id]
+            return [{"session": session_id, "ended": True}]
+        if command == "state":
+            return [self._state_record(session_id, session, include_state=True)]
+        if session is None or command == "restart":
+            if session is None:
+                session = BatchSession(DialogueCLI(None, dialogue_data=self.dialogue_data, events=[]))
+                self.sessions[session_id] = session
+            else:
+                session.cli.current_dialogue_id = self.dialogue_data.get("starting_dialogue")
+                session.cli.dialogue_history.clear()
+            records.append(self._enter(session_id, session))
+            if "ended" in records[-1]:
+                return records
+        elif "choice" not in request:
+            # Every request gets an answer, so a start for a running session repeats its transition
+            record = self._state_record(session_id, session, include_state=self.include_state)
+            record["events"] = self._take_events(session)
+            records.append(record)
+        
+        if "choice" in request:
+            records.append(self.choose(session_id, session, request["choice"]))
+        return records
+    
+    def choose(self, session_id, session, choice):
+        """Take a response by its 1-based number or ID and enter the next dialogue"""
+        response = None
+        if isinstance(choice, int) and not isinstance(choice, bool):
+            if 1 <= choice <= len(session.responses):
+                response = session.responses[choice - 1]
+        else:
+            response = next((r for r in session.responses if r["id"] == choice), None)
+        if response is None:
+            return {"session": session_id, "step": session.step, "dialogue": session.dialogue["id"],
+                    "error": f"invalid choice {choice!r}"}
+        
+        from_id = session.dialogue["id"]
+        if session.cli.choose_response(response) is None:
+            record = {"session": session_id, "step": session.step + 1, "from": from_id,
+                      "response": response["id"], "events": self._take_events(session), "ended": True}
+            if self.include_state:
+                self._add_state(record, session)
+            del self.sessions[session_id]
+            return record
+        record = self._enter(session_id, session)
+        record["from"] = from_id
+        record["response"] = response["id"]
+        return record
+    
+    def run(self, lines, output, flush_lines=256):
+        """
+        Apply JSON-lines requests and write the transitions as JSON lines
+        
+        Output is written in blocks of flush_lines records; pass 1 when a
+        client waits for each transition before sending its next choice.
+        
+        Args:
+            lines: Iterable of request lines (blank lines are skipped)
+            output: Text stream to write to
+            flush_lines: Records buffered before each write
+            
+        Returns:
+            The number of records written
+        """
+        buffer = []
+        written = 0
+        for line_number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                records = self.handle(json_loads(line))
+            except ValueError as e:
+                records = [{"line": line_number, "error": f"invalid JSON: {e}"}]
+            buffer.extend(json_dumps(record, pretty=False) + "\n" for record in records)
+            if len(buffer) >= flush_lines:
+                written += self._write(buffer, output)
+        written += self._write(buffer, output)
+        return written
+    
+    def _write(self, buffer, output):
+        """Write and flush the buffered records, returning how many there were"""
+        count = len(buffer)
+        if count:
+            output.write("".join(buffer))
+            output.flush()
+            buffer.clear()
+        return count
+    
+    def _enter(self, session_id, session):
+        """Enter the session's current dialogue and describe it"""
+        dialogue = session.cli.enter_dialogue()
+        session.step += 1
+        if dialogue is None:
+            missing = session.cli.current_dialogue_id
+            self.sessions.pop(session_id, None)
+            return {"session": session_id, "step": session.step,
+                    "error": f"dialogue '{missing}' not found", "ended": True}
+        session.dialogue = dialogue
+        session.responses = [response for _, response in session.cli.get_valid_responses(dialogue)]
+        record = self._state_record(session_id, session, include_state=self.include_state)
+        record["events"] = self._take_events(session)
+        return record
+    
+    def _state_record(self, session_id, session, include_state):
+        """Describe the dialogue a session is at and its available responses"""
+        dialogue = session.dialogue
+        record = {
+            "session": session_id,
+            "step": session.step,
+            "dialogue": dialogue["id"],
+            "npc": dialogue["npc"],
+            "text": dialogue["text"],
+            "responses": [{"choice": number, "id": response["id"], "text": response["text"]}
+                          for number, response in enumerate(session.responses, 1)]
+        }
+        if include_state:
+            self._add_state(record, session)
+        return record
+    
+    def _add_state(self, record, session):
+        """Add a session's active quests and variables to a record"""
+        record["quests"] = dict(session.cli.active_quests)
+        record["variables"] = dict(session.cli.variables)
+    
+    def _take_events(self, session):
+        """Get the quest events since the last transition"""
+        events = session.cli.events[:]
+        session.cli.events.clear()
+        return events
+
+def read_choice_script(file_path):
+    """
+    Read a choice script: one choice per line, a response number or ID
+    
+    Blank lines and lines starting with # are skipped.
+    """
+    choices = []
+    with open(file_path, 'r', encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            choices.append(int(line) if line.isdigit() else line)
+    return choices
+
+def script_requests(choices, sessions=1):
+    """Turn a choice script into JSON-lines requests that play it in numbered sessions"""
+    for session_number in range(1, sessions + 1):
+        yield json_dumps({"session": session_number}, pretty=False)
+        for choice in choices:
+            yield json_dumps({"session": session_number, "choice": choice}, pretty=False)
+
+def run_batch(args):
+    """Run the headless batch mode for the parsed command line"""
+    try:
+        dialogue_data = dialogue_manager.load_dialogue_data(
+            os.path.abspath(args.dialogue_file), use_cache=False,
+            compact=args.compact or args.dialogue_file.endswith(PACK_EXTENSION), lazy=args.lazy)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error loading dialogue file: {e}", file=sys.stderr)
+        return 1
+    
+    runner = BatchRunner(dialogue_data, include_state=args.state)
+    if args.script:
+        try:
+            requests = script_requests(read_choice_script(args.script), args.sessions)
+        except OSError as e:
+            print(f"Error reading choice script: {e}", file=sys.stderr)
+            return 1
+    else:
+        requests = sys.stdin
+    runner.run(requests, sys.stdout, flush_lines=1 if args.line_buffered else 256)
+    return 0
+
+def print_reachability(cli, max_states):
+    """Print the responses a new game can never take under the CLI's rules"""
+    result = cli.find_response_paths(max_states=max_states)
+    missing = [(dialogue["id"], response["id"])
+               for dialogue in cli.dialogue_data.get("dialogues", [])
+               for response in dialogue.get("responses", [])
+               if (dialogue["id"], response["id"]) not in result.paths]
+    print(f"Explored {result.states} distinct states; {len(result.paths)} responses can be taken")
+    if result.truncated:
+        print(f"{YELLOW}Stopped after {max_states} states; responses below may still be reachable{RESET}")
+    for dialogue_id, response_id in missing:
+        print(f"{RED}Never available: {dialogue_id} → {response_id}{RESET}")
+    return 1 if missing else 0
+
 def main():
     parser = argparse.ArgumentParser(description='Run dialogue trees from the command line.')
-    parser.add_argument('dialogue_file', help='Path to the dialogue JSON file')
+    parser.add_argument('dialogue_file', help=f'Path to the dialogue JSON file or compiled {PACK_EXTENSION} pack')
     parser.add_argument('--no-color', action='store_true', help='Disable colored output')
+    parser.add_argument('--compact', action='store_true', help='Use the memory-efficient compact dialogue model')
+    parser.add_argument('--stream', action='store_true', help='Start playing while a large dialogue file is still loading')
+    parser.add_argument('--lazy', action='store_true', help='Read each dialogue from disk when visited, through an offset index')
+    parser.add_argument('--batch', action='store_true',
+                        help='Headless mode: read JSON-lines choices on stdin, write JSON-lines transitions on stdout')
+    parser.add_argument('--script', help='Headless mode: play the choices in this file (one per line) instead of reading stdin')
+    parser.add_argument('--sessions', type=int, default=1, help='With --script, play the script in this many sessions')
+    parser.add_argument('--state', action='store_true', help='Headless mode: add quests and variables to every transition')
+    parser.add_argument('--line-buffered', action='store_true', help='Headless mode: write each transition as soon as it is made')
+    parser.add_argument('--reachability', action='store_true', help='List the responses a new game can never take, then exit')
+    parser.add_argument('--max-states', type=int, default=DEFAULT_MAX_STATES,
+                        help=f'States explored by --reachability (default: {DEFAULT_MAX_STATES})')
     
     args = parser.parse_args()
     
+    if args.batch or args.script:
+        if args.stream:
+            parser.error("--stream can't be used in headless mode")
+        sys.exit(run_batch(args))
+    
     # Disable colors if requested
     if args.no_color:
         global GREEN, BRIGHT_GREEN, YELLOW, BLUE, CYAN, RED, RESET, BOLD
         GREEN = BRIGHT_GREEN = YELLOW = BLUE = CYAN = RED = RESET = BOLD = ""
     
     # Run the CLI
-    cli = DialogueCLI(args.dialogue_file)
+    cli = DialogueCLI(args.dialogue_file, compact=args.compact, stream=args.stream, lazy=args.lazy)
+    if args.reachability:
+        sys.exit(print_reachability(cli, args.max_states))
     cli.run()
 
 if __name__ == "__main__":
@@ -0,0 +1,156 @@
+"""
+Conversation History for Terminal Dialogue System
+Bounded log of a play session, with older entries optionally spilled to an archive file
+"""
+import os
+import threading
+from array import array
+from collections import deque
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional
+from data_layer import json_dumps, json_loads
+
+# Entries kept in memory per session unless a capacity is given
+DEFAULT_HISTORY_CAPACITY = 500
+
+
+class ConversationHistory:
+    """
+    Ring buffer of the most recent conversation entries
+
+    Appending is O(1) and memory stays bounded however long a session runs:
+    once the buffer is full the oldest entry is dropped, or, with an archive
+    path, appended to a JSON-lines archive file. The archive's line offsets
+    are kept so any page of the full history can be read back with one seek.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_HISTORY_CAPACITY, archive_path: Optional[str] = None):
+        """
+        Args:
+            capacity: Number of entries kept in memory
+            archive_path: File that entries pushed out of memory are appended
+                to; None discards them. An existing file is overwritten.
+        """
+        if capacity < 1:
+            raise ValueError("History capacity must be at least 1")
+        self.capacity = capacity
+        self.archive_path = archive_path
+        self._entries = deque(maxlen=capacity)
+        self._dropped = 0
+        self._archive = None
+        self._archive_offsets = array('q')
+        self._archive_lock = threading.Lock()
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        """Add an entry, spilling or dropping the oldest one if the buffer is full"""
+        if len(self._entries) == self.capacity:
+            oldest = self._entries[0]
+            if self.archive_path is not None:
+                self._spill(oldest)
+            else:
+                self._dropped += 1
+        self._entries.append(entry)
+
+    def clear(self) -> None:
+        """Remove every entry, including the archived ones"""
+        self._entries.clear()
+        self._dropped = 0
+        with self._archive_lock:
+            self._archive_offsets = array('q')
+            if self._archive is not None:
+                self._archive.seek(0)
+                self._archive.truncate()
+
+    def close(self) -> None:
+        """Close the archive file, keeping it on disk"""
+        with self._archive_lock:
+            if self._archive is not None:
+                self._archive.close()
+                self._archive = None
+
+    @property
+    def total(self) -> int:
+        """Number of entries ever appended since the last clear, including spilled and dropped ones"""
+        return self._dropped + len(self._archive_offsets) + len(self._entries)
+
+    @property
+    def available(self) -> int:
+        """Number of entries that can still be read (in memory or archived)"""
+        return len(self._archive_offsets) + len(self._entries)
+
+    def page_count(self, page_size: int) -> int:
+        """Get the number of pages of readable entries"""
+        return max(1, -(-self.available // page_size))
+
+    def page(self, page: int, page_size: int) -> List[Dict[str, Any]]:
+        """
+        Get one page of the readable history, oldest entry first
+
+        Args:
+            page: Page number from 0 (oldest) to page_count - 1 (most recent);
+                negative numbers count back from the most recent page
+            page_size: Entries per page
+
+        Returns:
+            The entries of the page; pages are aligned to the most recent
+            entry, so the last page is always full unless the history is short
+        """
+        pages = self.page_count(page_size)
+        if page < 0:
+            page += pages
+        page = min(max(page, 0), pages - 1)
+        end = self.available - (pages - 1 - page) * page_size
+        return self.slice(max(0, end - page_size), end)
+
+    def slice(self, start: int, end: int) -> List[Dict[str, Any]]:
+        """Get readable entries from position start up to end, oldest first"""
+        archived = len(self._archive_offsets)
+        result = []
+        if start < archived:
+            result.extend(self._read_archive(start, min(end, archived)))
+        if end > archived:
+            result.extend(islice(self._entries, max(start - archived, 0), end - archived))
+        return result
+
+    def _spill(self, entry: Dict[str, Any]) -> None:
+        """Append an entry leaving the buffer to the archive file"""
+        with self._archive_lock:
+            if self._archive is None:
+                directory = os.path.dirname(self.archive_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._archive = open(self.archive_path, 'w+b')
+            # The archive can be rebuilt by replaying the session, so it isn't fsynced
+            self._archive.seek(0, os.SEEK_END)
+            self._archive_offsets.append(self._archive.tell())
+            self._archive.write((json_dumps(entry, pretty=False) + "\n").encode("utf-8"))
+
+    def _read_archive(self, start: int, end: int) -> List[Dict[str, Any]]:
+        """Read archived entries from position start up to end"""
+        with self._archive_lock:
+            self._archive.flush()
+            self._archive.seek(self._archive_offsets[start])
+            if end < len(self._archive_offsets):
+                raw = self._archive.read(self._archive_offsets[end] - self._archive_offsets[start])
+            else:
+                raw = self._archive.read()
+        return [json_loads(line) for line in raw.splitlines()]
+
+    def __len__(self) -> int:
+        """Number of entries in memory"""
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over the entries in memory, oldest first"""
+        return iter(self._entries)
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        """Get an entry in memory; -1 is the most recent"""
+        return self._entries[index]
+
+    def __sizeof__(self) -> int:
+        """Size of the history and its buffers, excluding the entries themselves"""
+        return object.__sizeof__(self) + self._entries.__sizeof__() + self._archive_offsets.__sizeof__()
+
+    def __repr__(self) -> str:
+        return f"ConversationHistory(capacity={self.capacity}, in_memory={len(self)}, total={self.total})"
@@ -2,89 +2,880 @@
 Data Layer for Terminal Dialogue System
 Handles all file loading, saving, and data management
 """
+import gc
 import json
 import os
-from typing import Dict, List, Any, Optional, Union
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from collections.abc import Mapping, Sequence
+from typing import Dict, Iterable, List, Any, Optional, Union, Tuple
+from script_compiler import CompiledOp, compile_script, compile_condition
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# File extension of compiled dialogue packs (see dialogue_pack)
+PACK_EXTENSION = ".dlgpack"
+
+
+def _json_default(value: Any) -> Any:
+    """Serialize read-only dialogue data (compact records, lazy views) like the dicts and lists they stand for"""
+    if isinstance(value, Mapping):
+        return dict(value)
+    if isinstance(value, Sequence) and not isinstance(value, (str, bytes)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class JSONBackend:
+    """
+    JSON encoder/decoder used for every dialogue file read or written
+    
+    The stdlib backend is always available. The orjson backend is several
+    times faster and is picked automatically when orjson is installed.
+    Both write UTF-8 and produce the same documents, so files saved by
+    either read back identically with the other.
+    """
+    
+    name = "json"
+    
+    def loads(self, text: Union[str, bytes]) -> Any:
+        """Parse a JSON document"""
+        return json.loads(text)
+    
+    def dumps(self, data: Any, pretty: bool = True, sort_keys: bool = False) -> bytes:
+        """
+        Serialize data to UTF-8 JSON
+        
+        Args:
+            data: The data to serialize
+            pretty: Indent by two spaces (the layout of the files in the repo);
+                False writes the smallest file, without any whitespace
+            sort_keys: Sort object keys, for stable hashes
+        """
+        if pretty:
+            text = json.dumps(data, indent=2, sort_keys=sort_keys, ensure_ascii=False, default=_json_default)
+        else:
+            text = json.dumps(data, separators=(",", ":"), sort_keys=sort_keys,
+                              ensure_ascii=False, default=_json_default)
+        return text.encode("utf-8")
+
+
+class OrjsonBackend(JSONBackend):
+    """
+    JSON backend on top of orjson
+    
+    orjson reads integers beyond 64 bits as floats and can't write them,
+    so documents it rejects fall back to the stdlib backend.
+    """
+    
+    name = "orjson"
+    
+    def loads(self, text: Union[str, bytes]) -> Any:
+        """Parse a JSON document, reporting errors like the json module does"""
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            return json.loads(text)
+    
+    def dumps(self, data: Any, pretty: bool = True, sort_keys: bool = False) -> bytes:
+        """Serialize data to UTF-8 JSON"""
+        option = (orjson.OPT_INDENT_2 if pretty else 0) | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        try:
+            return orjson.dumps(data, default=_json_default, option=option)
+        except orjson.JSONEncodeError:
+            return super().dumps(data, pretty, sort_keys)
+
+
+# Available JSON backends by name, fastest last
+JSON_BACKENDS = {"json": JSONBackend}
+if orjson is not None:
+    JSON_BACKENDS["orjson"] = OrjsonBackend
+
+_json_backend = list(JSON_BACKENDS.values())[-1]()
+
+
+def get_json_backend() -> JSONBackend:
+    """Get the JSON backend in use"""
+    return _json_backend
+
+
+def set_json_backend(name: str) -> JSONBackend:
+    """
+    Select the JSON backend used by every loader and writer
+    
+    Raises:
+        ValueError: If the backend isn't available
+    """
+    global _json_backend
+    if name not in JSON_BACKENDS:
+        raise ValueError(f"JSON backend '{name}' is not available (choose from {', '.join(JSON_BACKENDS)})")
+    _json_backend = JSON_BACKENDS[name]()
+    return _json_backend
+
+
+@contextmanager
+def _gc_paused():
+    """
+    Pause the cyclic garbage collector while parsing
+    
+    A parse allocates millions of containers, each of which counts towards
+    the next collection, and every full collection walks the whole heap.
+    Parsed JSON can't contain reference cycles, so nothing is missed.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+def json_loads(text: Union[str, bytes]) -> Any:
+    """Parse a JSON document with the selected backend"""
+    with _gc_paused():
+        return _json_backend.loads(text)
+
+
+def json_dumps(data: Any, pretty: bool = True, sort_keys: bool = False) -> str:
+    """Serialize data to a JSON string with the selected backend"""
+    return _json_backend.dumps(data, pretty, sort_keys).decode("utf-8")
+
+
+def json_load(file) -> Any:
+    """Parse JSON from a file object opened in text or binary mode (e.g. an uploaded file)"""
+    return json_loads(file.read())
+
+
+def read_json_file(file_path: str) -> Any:
+    """
+    Read a JSON file with the selected backend
+    
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        json.JSONDecodeError: If the file contains invalid JSON
+    """
+    with open(file_path, 'rb') as file:
+        return json_loads(file.read())
+
+
+def read_dialogue_file(file_path: str) -> Any:
+    """
+    Read a dialogue JSON file, folding a pending save journal into it first
+
+    Saves made with journal=True (see save_journal) leave the file itself
+    stale until the journal is compacted, so every reader of dialogue files
+    goes through here or through DialogueDataManager.load_dialogue_data.
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        json.JSONDecodeError: If the file contains invalid JSON
+    """
+    dialogue_manager.apply_pending_journal(file_path)
+    return read_json_file(file_path)
+
+
+def _current_umask() -> int:
+    """Read the process umask (it can only be read by setting it)"""
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# Permissions given to newly created files, as open() would
+_NEW_FILE_MODE = 0o666 & ~_current_umask()
+
+
+def fsync_directory(directory: str) -> None:
+    """Flush a directory entry change (a rename or new file) to disk, where the platform allows it"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return  # e.g. Windows, where directories can't be opened
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write(file_path: str, content: Union[bytes, Iterable[bytes]], fsync: bool = True) -> None:
+    """
+    Replace a file's contents without ever leaving it partly written
+    
+    The content is written to a temporary file in the same directory,
+    flushed to disk and renamed over the target, so after a crash the file
+    holds either the old or the new contents. A symlink is followed and its
+    target replaced; an existing file keeps its permissions.
+    
+    Args:
+        file_path: Path of the file to write
+        content: The bytes to write, or an iterable of byte chunks
+        fsync: Flush the data and the rename to disk before returning
+    
+    Raises:
+        OSError: If the file can't be written
+    """
+    real_path = os.path.realpath(file_path)
+    directory = os.path.dirname(real_path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            if isinstance(content, (bytes, bytearray, memoryview)):
+                file.write(content)
+            else:
+                for chunk in content:
+                    file.write(chunk)
+            if fsync:
+                file.flush()
+                os.fsync(file.fileno())
+        try:
+            os.chmod(tmp_path, os.stat(real_path).st_mode & 0o7777)
+        except FileNotFoundError:
+            os.chmod(tmp_path, _NEW_FILE_MODE)
+        os.replace(tmp_path, real_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    if fsync:
+        fsync_directory(directory)
+
+
+def write_json_file(file_path: str, data: Any, pretty: bool = True, fsync: bool = True) -> None:
+    """
+    Write data to a JSON file (UTF-8) with the selected backend, atomically
+    
+    Args:
+        file_path: Path of the file to write
+        data: The data to write
+        pretty: Indent the file for reading and diffing; False writes it compactly
+        fsync: Flush the file to disk before returning (see atomic_write)
+    """
+    atomic_write(file_path, _json_backend.dumps(data, pretty), fsync)
+
+
+def _read_only(self, *args, **kwargs):
+    """Reject mutation of cached dialogue data"""
+    raise TypeError("Cached dialogue data is read-only; use thaw() to get a mutable copy")
+
+
+class FrozenDict(dict):
+    """A dict that refuses modification, used for cached dialogue data"""
+    __slots__ = ()
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+    
+    def __copy__(self):
+        return dict(self)
+    
+    def __deepcopy__(self, memo):
+        return thaw(self)
+    
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
+class FrozenList(list):
+    """A list that refuses modification, used for cached dialogue data"""
+    __slots__ = ()
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+    
+    def __copy__(self):
+        return list(self)
+    
+    def __deepcopy__(self, memo):
+        return thaw(self)
+    
+    def __reduce__(self):
+        return (list, (list(self),))
+
+
+def freeze(value: Any) -> Any:
+    """Recursively convert parsed JSON data into read-only containers"""
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(item) for item in value)
+    return value
+
+
+def _freeze_list(items: list) -> "FrozenList":
+    """Freeze a parsed JSON array; objects inside it are already frozen by the parser hook"""
+    frozen = FrozenList(items)
+    for index, item in enumerate(items):
+        if type(item) is list:
+            list.__setitem__(frozen, index, _freeze_list(item))
+    return frozen
+
+
+def _frozen_object(pairs: List[Tuple[str, Any]]) -> "FrozenDict":
+    """json object_pairs_hook that builds read-only containers while parsing"""
+    frozen = FrozenDict(pairs)
+    for key, value in pairs:
+        if type(value) is list and frozen[key] is value:
+            dict.__setitem__(frozen, key, _freeze_list(value))
+    return frozen
+
+
+def load_frozen_json(file) -> Any:
+    """Parse JSON from a file object straight into read-only containers"""
+    # Always the stdlib parser: freezing another backend's output afterwards
+    # costs more than building the frozen containers during the parse
+    with _gc_paused():
+        data = json.load(file, object_pairs_hook=_frozen_object)
+    return _freeze_list(data) if type(data) is list else data
+
+
+def thaw(value: Any) -> Any:
+    """Recursively copy (possibly frozen or compact) JSON data into plain, mutable containers"""
+    if isinstance(value, Mapping):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, Sequence) and not isinstance(value, (str, bytes)):
+        return [thaw(item) for item in value]
+    return value
+
+
+class DialogueFileCache:
+    """
+    Process-wide LRU cache of parsed dialogue files.
+    
+    Entries are keyed by the resolved file path and the form of the data,
+    and validated against the file's modification time and size, so a
+    repeated load of an unchanged file only costs a stat call. Cached data is
+    frozen: every caller shares the same read-only structure and must thaw()
+    it before modifying it.
+    
+    The DialogueGraph of a cached document is kept in the document's entry
+    and charged to the byte budget with it, so evicting a file also releases
+    its graph instead of the graph keeping the document alive.
+    """
+    
+    def __init__(self, max_entries: int = 32, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_entries: Maximum number of files kept in the cache
+            max_bytes: Maximum total size (in bytes of JSON on disk) of the fully
+                parsed cached files; lazily read files don't count towards it
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        # id() of each cached document -> its entry key, to find the entry a graph belongs to
+        self._keys_by_data: Dict[int, Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+    
+    def configure(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None) -> None:
+        """Change the cache limits, evicting entries if they no longer fit"""
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            self._evict()
+    
+    def load(self, file_path: str, compact: bool = False, lazy: bool = False) -> Dict[str, Any]:
+        """
+        Load a dialogue file through the cache.
+        
+        Args:
+            file_path: Path to the JSON file
+            compact: Cache and return the compact model (see dialogue_model)
+                instead of frozen dicts
+            lazy: Cache and return the file read node by node through its
+                offset index (see offset_index)
+        
+        Raises:
+            FileNotFoundError: If the file doesn't exist
+            json.JSONDecodeError: If the file contains invalid JSON
+        """
+        real_path = os.path.realpath(file_path)
+        is_pack = real_path.endswith(PACK_EXTENSION)
+        lazy = lazy and not is_pack
+        key = (real_path, "lazy" if lazy else "compact" if compact else "dicts")
+        stat = os.stat(real_path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        
+        # Parsed files are charged their size; lazily read ones only keep an index and a few nodes
+        cost = 0
+        if is_pack:
+            # A pack is already compact and read-only; it is mapped, not parsed
+            from dialogue_pack import DialoguePack
+            data = DialoguePack(real_path).data
+        elif lazy:
+            from offset_index import IndexedDialogueFile
+            data = IndexedDialogueFile(real_path).data
+        else:
+            cost = stat.st_size
+            with open(real_path, 'rb') as file:
+                if compact:
+                    from dialogue_model import compact_dialogue_data
+                    data = compact_dialogue_data(json_load(file))
+                else:
+                    data = load_frozen_json(file)
+        
+        with self._lock:
+            self._remove(key)
+            if cost <= self.max_bytes:
+                self._entries[key] = (signature, data, cost, None)
+                self._keys_by_data[id(data)] = key
+                self.total_bytes += cost
+                self._evict()
+        return data
+    
+    def get_graph(self, dialogue_data: Any) -> Optional["DialogueGraph"]:
+        """
+        Get the graph of a cached document, building it on first use.
+        
+        The graph's lookup tables are added to the entry's cost; if they don't
+        fit in the budget the graph is returned without being kept.
+        
+        Returns:
+            The graph, or None if the data is not a document held by this cache
+        """
+        with self._lock:
+            key = self._keys_by_data.get(id(dialogue_data))
+            entry = self._entries.get(key) if key is not None else None
+            if entry is None or entry[1] is not dialogue_data:
+                return None
+            self._entries.move_to_end(key)
+            if entry[3] is not None:
+                return entry[3]
+        
+        # Cached documents are read-only, so the graph never goes stale
+        graph = DialogueGraph(dialogue_data)
+        graph_cost = graph.index_bytes()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] is not dialogue_data:
+                return graph
+            if entry[3] is not None:
+                return entry[3]
+            signature, _, cost, _ = entry
+            if cost + graph_cost <= self.max_bytes:
+                self._entries[key] = (signature, dialogue_data, cost + graph_cost, graph)
+                self.total_bytes += graph_cost
+                self._evict()
+        return graph
+    
+    def invalidate(self, file_path: Optional[str] = None) -> None:
+        """Drop one file from the cache, or every file if no path is given"""
+        with self._lock:
+            if file_path is None:
+                self._entries.clear()
+                self._keys_by_data.clear()
+                self.total_bytes = 0
+            else:
+                real_path = os.path.realpath(file_path)
+                for variant in ("dicts", "compact", "lazy"):
+                    self._remove((real_path, variant))
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Get the cache counters and current usage"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "graphs": sum(1 for entry in self._entries.values() if entry[3] is not None),
+                "bytes": self.total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes
+            }
+    
+    def _remove(self, key: Tuple[str, str]) -> None:
+        """Remove an entry if present (caller holds the lock)"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry[2]
+            self._keys_by_data.pop(id(entry[1]), None)
+    
+    def _evict(self) -> None:
+        """Evict least recently used entries until within limits (caller holds the lock)"""
+        while self._entries and (len(self._entries) > self.max_entries or
+                                 self.total_bytes > self.max_bytes):
+            _, (_, data, cost, _) = self._entries.popitem(last=False)
+            self.total_bytes -= cost
+            self._keys_by_data.pop(id(data), None)
+            self.evictions += 1
+
+
+# Shared cache used by every DialogueDataManager unless one is given explicitly
+dialogue_file_cache = DialogueFileCache()
+
+
+class DialogueGraph:
+    """
+    Indexed view over loaded dialogue data.
+    
+    Built once when dialogue data is loaded so that dialogue, response, quest
+    and quest stage lookups are dictionary hits instead of list scans. The graph
+    holds references to the original node dictionaries, it does not copy them.
+    When IDs are duplicated the first occurrence wins, matching the behaviour
+    of a front-to-back scan of the lists.
+    
+    Every script, on_entry and condition string in the data is compiled once
+    here, so evaluating them at runtime needs no string parsing.
+    """
+    
+    def __init__(self, dialogue_data: Dict[str, Any]):
+        """Build the lookup tables for the given dialogue data"""
+        self.dialogue_data = dialogue_data
+        self._dialogues_list = dialogue_data.get("dialogues", [])
+        self._quests_list = dialogue_data.get("quests", [])
+        self._size = (len(self._dialogues_list), len(self._quests_list))
+        
+        self.dialogues: Dict[str, Dict[str, Any]] = {}
+        self.responses: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.scripts: Dict[str, CompiledOp] = {}
+        self.conditions: Dict[str, CompiledOp] = {}
+        self.quests: Dict[str, Dict[str, Any]] = {}
+        self.quest_stages: Dict[Tuple[str, Any], Dict[str, Any]] = {}
+        # Indexed on first use; only files with character portraits need it
+        self._characters_by_name: Optional[Dict[str, Dict[str, Any]]] = None
+        for dialogue in self._dialogues_list:
+            self.index_dialogue(dialogue)
+        for quest in self._quests_list:
+            self.index_quest(quest)
+    
+    def index_dialogue(self, dialogue: Dict[str, Any]) -> None:
+        """Add a dialogue node, its responses and its compiled scripts to the lookup tables"""
+        on_entry = dialogue.get("on_entry")
+        if on_entry and on_entry not in self.scripts:
+            self.scripts[on_entry] = compile_script(on_entry)
+        
+        responses_by_id = {}
+        for response in dialogue.get("responses", []):
+            responses_by_id.setdefault(response.get("id"), response)
+            
+            script = response.get("script")
+            if script and script not in self.scripts:
+                self.scripts[script] = compile_script(script)
+            condition = response.get("condition")
+            if condition and condition not in self.conditions:
+                self.conditions[condition] = compile_condition(condition)
+        
+        dialogue_id = dialogue.get("id")
+        if dialogue_id not in self.dialogues:
+            # Responses first, so a reader that finds the dialogue also finds them
+            self.responses[dialogue_id] = responses_by_id
+            self.dialogues[dialogue_id] = dialogue
+    
+    def index_quest(self, quest: Dict[str, Any]) -> None:
+        """Add a quest and its stages to the lookup tables"""
+        quest_id = quest.get("id")
+        if quest_id in self.quests:
+            return
+        
+        for stage in quest.get("stages", []):
+            self.quest_stages.setdefault((quest_id, stage.get("id")), stage)
+        self.quests[quest_id] = quest
+    
+    def index_bytes(self) -> int:
+        """Approximate memory of the lookup tables; the nodes they point to belong to the data"""
+        size = sum(sys.getsizeof(table) for table in
+                   (self.dialogues, self.responses, self.scripts, self.conditions, self.quests, self.quest_stages))
+        size += sum(sys.getsizeof(responses) for responses in self.responses.values())
+        size += sum(sys.getsizeof(op) for op in self.scripts.values())
+        size += sum(sys.getsizeof(op) for op in self.conditions.values())
+        return size
+    
+    def is_current(self, dialogue_data: Dict[str, Any]) -> bool:
+        """Check whether this graph still describes the given dialogue data"""
+        return (self.dialogue_data is dialogue_data and
+                dialogue_data.get("dialogues", []) is self._dialogues_list and
+                dialogue_data.get("quests", []) is self._quests_list and
+                (len(self._dialogues_list), len(self._quests_list)) == self._size)
+    
+    def get_dialogue(self, dialogue_id: str) -> Optional[Dict[str, Any]]:
+        """Find a dialogue by its ID"""
+        return self.dialogues.get(dialogue_id)
+    
+    def get_response(self, dialogue_id: str, response_id: str) -> Optional[Dict[str, Any]]:
+        """Find a response by its ID within a dialogue"""
+        return self.responses.get(dialogue_id, {}).get(response_id)
+    
+    def get_script_op(self, script: str) -> CompiledOp:
+        """Get the compiled operation for a script command"""
+        op = self.scripts.get(script)
+        return op if op is not None else compile_script(script)
+    
+    def get_condition_op(self, condition: str) -> CompiledOp:
+        """Get the compiled operation for a condition expression"""
+        op = self.conditions.get(condition)
+        return op if op is not None else compile_condition(condition)
+    
+    def get_quest(self, quest_id: str) -> Optional[Dict[str, Any]]:
+        """Find a quest by its ID"""
+        return self.quests.get(quest_id)
+    
+    def get_quest_stage(self, quest_id: str, stage_id: int) -> Optional[Dict[str, Any]]:
+        """Find a quest stage by quest ID and stage ID"""
+        return self.quest_stages.get((quest_id, stage_id))
+    
+    def get_character_by_name(self, name: str) -> Optional[Dict[str, Any]]:
+        """Find an entry of the "characters" section by its display name"""
+        if self._characters_by_name is None:
+            characters_by_name = {}
+            for character in self.dialogue_data.get("characters", {}).values():
+                characters_by_name.setdefault(character.get("name"), character)
+            self._characters_by_name = characters_by_name
+        return self._characters_by_name.get(name)
 
 
 class DialogueDataManager:
     """Handles loading, saving, and manipulating dialogue data"""
     
-    def __init__(self, base_directory: str = None):
+    def __init__(self, base_directory: str = None, cache: Optional[DialogueFileCache] = None):
         """Initialize the data manager"""
         # If no base directory provided, use the directory this file is in
         self.base_directory = base_directory or os.path.dirname(__file__)
         self.conversations_directory = os.path.join(self.base_directory, "conversations")
         self.templates_directory = os.path.join(self.base_directory, "templates")
+        self.cache = cache if cache is not None else dialogue_file_cache
+        self.max_graphs = 8
+        self._graphs = OrderedDict()
+        self._graphs_lock = threading.Lock()
+        # Incremental savers (see save_journal) by real file path
+        self._journals = {}
+        self._journals_lock = threading.Lock()
+        # Cached directory listings (see dialogue_catalog) by real directory path
+        self._catalogs = {}
+        self._catalogs_lock = threading.Lock()
         
-    def get_available_conversations(self) -> List[str]:
-        """Get a list of available conversation files in the conversations directory"""
-        if not os.path.exists(self.conversations_directory):
-            return []
+    def get_catalog(self, directory: str):
+        """
+        Get the cached listing of a directory of dialogue files.
         
-        return [f for f in os.listdir(self.conversations_directory) 
-                if f.endswith(".json") and os.path.isfile(os.path.join(self.conversations_directory, f))]
+        Returns:
+            A dialogue_catalog.DirectoryCatalog, shared by every caller
+        """
+        from dialogue_catalog import DirectoryCatalog
+        
+        real_directory = os.path.realpath(directory)
+        with self._catalogs_lock:
+            catalog = self._catalogs.get(real_directory)
+            if catalog is None:
+                catalog = self._catalogs[real_directory] = DirectoryCatalog(real_directory)
+            return catalog
+    
+    def get_available_conversations(self) -> List[str]:
+        """Get a sorted list of available conversation files in the conversations directory"""
+        return self.get_catalog(self.conversations_directory).names()
     
     def get_available_templates(self) -> List[str]:
-        """Get a list of available template files in the templates directory"""
-        if not os.path.exists(self.templates_directory):
-            return []
+        """Get a sorted list of available template files in the templates directory"""
+        return self.get_catalog(self.templates_directory).names()
+    
+    def get_conversation_entries(self) -> List[Any]:
+        """
+        Get the conversation files with their titles and node counts.
         
-        return [f for f in os.listdir(self.templates_directory) 
-                if f.endswith(".json") and os.path.isfile(os.path.join(self.templates_directory, f))]
+        Titles and counts are read in the background; entries whose file
+        hasn't been read yet have loaded set to False.
+        """
+        return self.get_catalog(self.conversations_directory).entries()
+    
+    def get_template_entries(self) -> List[Any]:
+        """Get the template files with their titles and node counts (see get_conversation_entries)"""
+        return self.get_catalog(self.templates_directory).entries()
     
-    def load_dialogue_data(self, file_path: str) -> Dict[str, Any]:
+    def resolve_dialogue_path(self, file_path: str) -> str:
         """
-        Load dialogue data from a JSON file.
+        Resolve where a dialogue file should be loaded from.
         
-        Args:
-            file_path: Path to the JSON file (absolute or relative to conversations dir)
-            
-        Returns:
-            A dictionary containing the dialogue data
-            
-        Raises:
-            FileNotFoundError: If the file doesn't exist
-            json.JSONDecodeError: If the file contains invalid JSON
+        Absolute paths are used as-is; otherwise the conversations directory,
+        then the templates directory, then the path itself are tried.
         """
         # Absolute path provided
         if os.path.isabs(file_path):
-            with open(file_path, 'r') as file:
-                return json.load(file)
+            return file_path
         
         # Try in conversations directory
         conversations_path = os.path.join(self.conversations_directory, os.path.basename(file_path))
         if os.path.exists(conversations_path):
-            with open(conversations_path, 'r') as file:
-                return json.load(file)
+            return conversations_path
         
         # Try in templates directory
         templates_path = os.path.join(self.templates_directory, os.path.basename(file_path))
         if os.path.exists(templates_path):
-            with open(templates_path, 'r') as file:
-                return json.load(file)
+            return templates_path
         
         # Try direct path
-        with open(file_path, 'r') as file:
-            return json.load(file)
+        return file_path
+    
+    def load_dialogue_data(self, file_path: str, use_cache: bool = True,
+                           compact: bool = False, lazy: bool = False) -> Dict[str, Any]:
+        """
+        Load dialogue data from a JSON file or a compiled dialogue pack.
+        
+        A pack (see dialogue_pack) is memory-mapped instead of parsed and
+        returned as a read-only mapping whose dialogues are decoded on access.
+        A lazily loaded JSON file is returned the same way, read through a
+        sidecar offset index (see offset_index) that is built on first load.
+        
+        Args:
+            file_path: Path to the JSON or pack file (absolute or relative to conversations dir)
+            use_cache: Serve the data from the parsed-file cache. Cached data is
+                read-only and shared; pass False to get a private, mutable copy.
+            compact: Return the memory-efficient compact model (read-only
+                __slots__ records that behave like dicts) instead of dicts
+            lazy: Return read-only data that parses each dialogue from disk
+                when it is first looked up, instead of parsing the whole file
+            
+        Returns:
+            A dictionary containing the dialogue data
+            
+        Raises:
+            FileNotFoundError: If the file doesn't exist
+            json.JSONDecodeError: If the file contains invalid JSON
+        """
+        resolved_path = self.resolve_dialogue_path(file_path)
+        self.apply_pending_journal(resolved_path)
+        if use_cache:
+            return self.cache.load(resolved_path, compact=compact, lazy=lazy)
+        
+        if resolved_path.endswith(PACK_EXTENSION):
+            from dialogue_pack import DialoguePack
+            data = DialoguePack(resolved_path).data
+            return data if compact or lazy else thaw(data)
+        if lazy:
+            from offset_index import IndexedDialogueFile
+            return IndexedDialogueFile(resolved_path).data
+        
+        data = read_json_file(resolved_path)
+        if compact:
+            from dialogue_model import compact_dialogue_data
+            return compact_dialogue_data(data)
+        return data
+    
+    def stream_dialogue_data(self, file_path: str, compact: bool = False):
+        """
+        Start parsing a dialogue file on a background thread.
+        
+        The returned stream's data and graph fill up as the file is read, and
+        graph lookups wait for nodes that haven't been parsed yet, so a game
+        can start as soon as its starting dialogue is available. Streamed data
+        bypasses the parsed-file cache.
+        
+        Args:
+            file_path: Path to the JSON file (absolute or relative to conversations dir)
+            compact: Convert each dialogue and quest to the compact model as it arrives
+            
+        Returns:
+            A started stream_loader.DialogueStream
+        """
+        from stream_loader import DialogueStream
+        convert = None
+        if compact:
+            from dialogue_model import CompactDialogue, CompactQuest
+            convert = {"dialogues": CompactDialogue, "quests": CompactQuest}
+        
+        resolved_path = self.resolve_dialogue_path(file_path)
+        self.apply_pending_journal(resolved_path)
+        stream = DialogueStream(resolved_path, convert=convert)
+        with self._graphs_lock:
+            self._graphs[id(stream.data)] = stream.graph
+            while len(self._graphs) > self.max_graphs:
+                self._graphs.popitem(last=False)
+        return stream.start()
+    
+    def get_cache_stats(self) -> Dict[str, int]:
+        """Get hit/miss counters and usage of the parsed-file cache"""
+        return self.cache.get_stats()
             
-    def save_dialogue_data(self, data: Dict[str, Any], file_path: str) -> None:
+    def save_dialogue_data(self, data: Dict[str, Any], file_path: str, pretty: bool = True,
+                           journal: bool = False) -> None:
         """
         Save dialogue data to a JSON file.
         
+        The file is replaced atomically, so a crash during a save leaves either
+        the old or the new contents. With journal=True, repeated saves of the
+        same file only append what changed to a journal next to it, which is
+        folded into the file in the background (see save_journal).
+        
         Args:
             data: The dialogue data to save
             file_path: Path where to save the file
+            pretty: Indent the file; False writes compact JSON, which is
+                smaller and faster to save
+            journal: Save incrementally through the file's journal
             
         Raises:
             IOError: If the file can't be written
         """
+        from save_journal import SaveJournal, remove_journal
+        
         # Ensure directory exists
         os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+        real_path = os.path.realpath(file_path)
+        
+        with self._journals_lock:
+            saver = self._journals.get(real_path)
+            if journal and (saver is None or saver.pretty != pretty):
+                if saver is not None:
+                    saver.compact()
+                saver = self._journals[real_path] = SaveJournal(real_path, pretty)
+            elif not journal and saver is not None:
+                del self._journals[real_path]
+                saver.discard()
         
-        # Write the file
-        with open(file_path, 'w') as file:
-            json.dump(data, file, indent=2)
+        if journal:
+            saver.save(data)
+        else:
+            # Write the file; a journal of earlier saves is superseded by it
+            write_json_file(file_path, data, pretty)
+            remove_journal(file_path)
+        
+        # Never serve the previous contents from the cache, or a stale listing
+        self.cache.invalidate(file_path)
+        with self._catalogs_lock:
+            catalog = self._catalogs.get(os.path.dirname(real_path))
+        if catalog is not None:
+            catalog.invalidate()
+    
+    def apply_pending_journal(self, file_path: str) -> bool:
+        """
+        Fold a journal of incremental saves into its file before the file is read
+        
+        Returns:
+            True if the file was changed
+        """
+        from save_journal import JOURNAL_SUFFIX, compact_journal
+        
+        if not os.path.exists(os.path.realpath(file_path) + JOURNAL_SUFFIX):
+            return False
+        with self._journals_lock:
+            saver = self._journals.get(os.path.realpath(file_path))
+        if saver is not None:
+            saver.compact()
+            return True
+        return compact_journal(file_path)
     
     def create_empty_dialogue_data(self) -> Dict[str, Any]:
         """Create an empty dialogue data structure"""
@@ -118,28 +909,54 @@ class DialogueDataManager:
             "variables": {}
         }
     
+    def get_graph(self, dialogue_data: Dict[str, Any]) -> DialogueGraph:
+        """
+        Get the indexed graph for dialogue data, building it if needed.
+        
+        The graph of a document from the parsed-file cache lives in its cache
+        entry, so every session playing it shares one graph and evicting the
+        file releases both. Graphs of other dialogue data (private copies,
+        streams) are kept for the max_graphs most recently used objects.
+        """
+        # Dialogue packs and lazily loaded files answer lookups from their own on-disk index
+        pack_graph = getattr(dialogue_data, "graph", None)
+        if pack_graph is not None:
+            return pack_graph
+        
+        graph = self.cache.get_graph(dialogue_data)
+        if graph is not None:
+            return graph
+        
+        key = id(dialogue_data)
+        with self._graphs_lock:
+            graph = self._graphs.get(key)
+            if graph is not None and graph.is_current(dialogue_data):
+                self._graphs.move_to_end(key)
+                return graph
+        
+        graph = DialogueGraph(dialogue_data)
+        with self._graphs_lock:
+            self._graphs[key] = graph
+            self._graphs.move_to_end(key)
+            while len(self._graphs) > self.max_graphs:
+                self._graphs.popitem(last=False)
+        return graph
+    
     def get_dialogue_by_id(self, dialogue_data: Dict[str, Any], dialogue_id: str) -> Optional[Dict[str, Any]]:
         """Find a dialogue by its ID in the dialogue data"""
-        for dialogue in dialogue_data.get("dialogues", []):
-            if dialogue.get("id") == dialogue_id:
-                return dialogue
-        return None
+        return self.get_graph(dialogue_data).get_dialogue(dialogue_id)
+    
+    def get_response_by_id(self, dialogue_data: Dict[str, Any], dialogue_id: str, response_id: str) -> Optional[Dict[str, Any]]:
+        """Find a response by its ID within a dialogue in the dialogue data"""
+        return self.get_graph(dialogue_data).get_response(dialogue_id, response_id)
     
     def get_quest_by_id(self, dialogue_data: Dict[str, Any], quest_id: str) -> Optional[Dict[str, Any]]:
         """Find a quest by its ID in the dialogue data"""
-        for quest in dialogue_data.get("quests", []):
-            if quest.get("id") == quest_id:
-                return quest
-        return None
+        return self.get_graph(dialogue_data).get_quest(quest_id)
     
     def get_quest_stage(self, dialogue_data: Dict[str, Any], quest_id: str, stage_id: int) -> Optional[Dict[str, Any]]:
         """Find a quest stage by quest ID and stage ID"""
-        quest = self.get_quest_by_id(dialogue_data, quest_id)
-        if quest:
-            for stage in quest.get("stages", []):
-                if stage.get("id") == stage_id:
-                    return stage
-        return None
+        return self.get_graph(dialogue_data).get_quest_stage(quest_id, stage_id)
 
 
 # Singleton instance for easy import
@@ -0,0 +1,211 @@
+"""
+Dialogue Catalog for Terminal Dialogue System
+Cached listing of a directory of dialogue files, with their titles and sizes read in the background
+"""
+import os
+import queue
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from stream_loader import iter_dialogue_file
+
+
+def read_dialogue_summary(file_path: str) -> Tuple[Optional[str], Optional[str], Optional[int]]:
+    """
+    Read the title, description and dialogue count of a dialogue file
+
+    The file is parsed incrementally, so a huge file is never held in memory.
+
+    Returns:
+        (title, description, node count); each is None if the file doesn't have it
+
+    Raises:
+        OSError: If the file can't be read
+        ValueError: If the file isn't valid JSON
+    """
+    title = description = None
+    node_count = None
+    with open(file_path, 'r', encoding='utf-8') as file:
+        for kind, key, value in iter_dialogue_file(file):
+            if kind == "item":
+                if key == "dialogues":
+                    node_count += 1
+            elif key == "metadata" and isinstance(value, dict):
+                title = value.get("title")
+                description = value.get("description")
+            elif key == "dialogues" and value == []:
+                node_count = 0
+    return title, description, node_count
+
+
+class CatalogEntry:
+    """One dialogue file in a catalog"""
+    __slots__ = ("name", "path", "size", "mtime_ns", "title", "description", "node_count", "error", "loaded")
+
+    def __init__(self, name: str, path: str, size: int, mtime_ns: int):
+        self.name = name
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.title: Optional[str] = None
+        self.description: Optional[str] = None
+        self.node_count: Optional[int] = None
+        self.error: Optional[str] = None
+        # Whether title, description and node_count have been read yet
+        self.loaded = False
+
+    def label(self) -> str:
+        """Get a one-line description for a file selector"""
+        if not self.loaded:
+            return self.name
+        if self.error:
+            return f"{self.name} (unreadable)"
+        label = f"{self.title} - {self.name}" if self.title else self.name
+        if self.node_count is not None:
+            label += f" ({self.node_count} node{'' if self.node_count == 1 else 's'})"
+        return label
+
+    def __repr__(self) -> str:
+        return f"CatalogEntry({self.name!r}, title={self.title!r}, node_count={self.node_count!r})"
+
+
+class DirectoryCatalog:
+    """
+    Cached listing of the dialogue files in one directory
+
+    Listing a directory only costs a stat of the directory itself while it
+    is unchanged, and at most one such stat per poll interval: adding,
+    removing or renaming a file (including every atomic save) changes the
+    directory's modification time and triggers a rescan with os.scandir. A
+    file edited in place is picked up by the periodic full rescan.
+
+    Titles and node counts are read on a background thread, once per version
+    of each file, so listing never waits for files to be parsed.
+    """
+
+    def __init__(self, directory: str, suffix: str = ".json", poll_interval: float = 2.0,
+                 rescan_interval: float = 30.0, load_metadata: bool = True):
+        """
+        Args:
+            directory: Directory to list
+            suffix: Only files ending with this are listed
+            poll_interval: Seconds a listing is reused before the directory is checked again
+            rescan_interval: Seconds after which files are rescanned even if the directory is unchanged
+            load_metadata: Read titles and node counts in the background
+        """
+        self.directory = directory
+        self.suffix = suffix
+        self.poll_interval = poll_interval
+        self.rescan_interval = rescan_interval
+        self.load_metadata = load_metadata
+        self.scans = 0
+        self._entries: Dict[str, CatalogEntry] = {}
+        self._sorted: List[CatalogEntry] = []
+        self._directory_mtime = None
+        self._checked = 0.0
+        self._scanned = 0.0
+        self._stale = True
+        self._lock = threading.Lock()
+        self._pending = queue.Queue()
+        self._worker = None
+
+    def entries(self) -> List[CatalogEntry]:
+        """Get the files in the directory, sorted by name"""
+        with self._lock:
+            self._refresh()
+            self._start_worker()
+            return self._sorted
+
+    def names(self) -> List[str]:
+        """Get the file names in the directory, sorted"""
+        return [entry.name for entry in self.entries()]
+
+    def get(self, name: str) -> Optional[CatalogEntry]:
+        """Get the entry of one file, or None if it isn't in the directory"""
+        with self._lock:
+            self._refresh()
+            self._start_worker()
+            return self._entries.get(name)
+
+    def invalidate(self) -> None:
+        """Rescan the directory on the next listing, e.g. after writing a file into it"""
+        with self._lock:
+            self._stale = True
+
+    def wait_for_metadata(self, timeout: Optional[float] = None) -> bool:
+        """Block until every listed file's metadata has been read; False on timeout"""
+        if not self.load_metadata:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                if all(entry.loaded for entry in self._sorted):
+                    return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+
+    def _refresh(self) -> None:
+        """Rescan the directory if it may have changed (caller holds the lock)"""
+        now = time.monotonic()
+        if not self._stale and now - self._checked < self.poll_interval:
+            return
+        self._checked = now
+
+        try:
+            directory_mtime = os.stat(self.directory).st_mtime_ns
+        except OSError:
+            self._entries, self._sorted = {}, []
+            self._directory_mtime = None
+            return
+        if (not self._stale and directory_mtime == self._directory_mtime and
+                now - self._scanned < self.rescan_interval):
+            return
+
+        entries = {}
+        try:
+            with os.scandir(self.directory) as scan:
+                for dir_entry in scan:
+                    if not dir_entry.name.endswith(self.suffix):
+                        continue
+                    try:
+                        if not dir_entry.is_file():
+                            continue
+                        stat = dir_entry.stat()
+                    except OSError:
+                        continue  # removed while scanning
+                    entry = self._entries.get(dir_entry.name)
+                    if entry is None or (entry.mtime_ns, entry.size) != (stat.st_mtime_ns, stat.st_size):
+                        entry = CatalogEntry(dir_entry.name, dir_entry.path, stat.st_size, stat.st_mtime_ns)
+                        if self.load_metadata:
+                            self._pending.put(entry)
+                    entries[entry.name] = entry
+        except OSError:
+            return
+
+        self._entries = entries
+        self._sorted = [entries[name] for name in sorted(entries)]
+        self._directory_mtime = directory_mtime
+        self._scanned = now
+        self._stale = False
+        self.scans += 1
+
+    def _start_worker(self) -> None:
+        """Start the metadata reader if files are waiting for it (caller holds the lock)"""
+        if not self._pending.empty() and (self._worker is None or not self._worker.is_alive()):
+            self._worker = threading.Thread(target=self._read_metadata, name=f"dialogue-catalog:{self.directory}",
+                                            daemon=True)
+            self._worker.start()
+
+    def _read_metadata(self) -> None:
+        """Worker thread: read the title and node count of each new or changed file"""
+        while True:
+            try:
+                entry = self._pending.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                entry.title, entry.description, entry.node_count = read_dialogue_summary(entry.path)
+            except (OSError, ValueError) as e:
+                entry.error = str(e)
+            entry.loaded = True
@@ -3,6 +3,8 @@ import json
 import uuid
 import os
 from datetime import datetime
+from data_layer import dialogue_manager, json_dumps, json_load, json_loads
+from theme import apply_theme
 
 # Set page configuration
 st.set_page_config(
@@ -14,98 +16,7 @@ st.set_page_config(
 
 # Apply the 80s terminal retro styling
 def apply_terminal_style():
-    st.markdown("""
-    <style>
-    .main {
-        background-color: #000000;
-        color: #00FF00;
-        font-family: 'Courier New', monospace;
-    }
-    .stButton>button {
-        background-color: #000000;
-        color: #00FF00;
-        border: 1px solid #00FF00;
-        border-radius: 0px;
-        font-family: 'Courier New', monospace;
-        width: 100%;
-        text-align: left;
-        padding: 10px;
-        transition: background-color 0.3s ease;
-    }
-    .stButton>button:hover {
-        background-color: #003300;
-        color: #00FF00;
-    }
-    .stTextInput>div>div>input, .stTextArea>div>div>textarea, .stSelectbox>div>div>div, .stNumberInput>div>div>input {
-        background-color: #000000 !important;
-        color: #00FF00 !important;
-        border: 1px solid #00FF00 !important;
-        border-radius: 0px !important;
-        font-family: 'Courier New', monospace !important;
-    }
-    .stSidebar {
-        background-color: #000000;
-    }
-    .stTabs>div>div>div>div {
-        background-color: #000000 !important;
-        color: #00FF00 !important;
-    }
-    div[role="tab"] {
-        background-color: #000000 !important;
-        color: #00FF00 !important;
-        border: 1px solid #00FF00 !important;
-    }
-    div[role="tab"][aria-selected="true"] {
-        background-color: #003300 !important;
-        border-bottom: 2px solid #00FF00 !important;
-    }
-    div[data-baseweb="select"] > div {
-        background-color: #000000 !important;
-        color: #00FF00 !important;
-    }
-    div[data-baseweb="base-input"] > input {
-        background-color: #000000 !important;
-        color: #00FF00 !important;
-    }
-    div[data-testid="stVerticalBlock"] {
-        background-color: #000000;
-    }
-    .editor-panel {
-        background-color: #001100;
-        border: 1px solid #00FF00;
-        padding: 15px;
-        margin-bottom: 15px;
-    }
-    .terminal-header {
-        color: #00FFFF;
-        margin-bottom: 10px;
-        border-bottom: 1px solid #00FFFF;
-        padding-bottom: 5px;
-    }
-    .terminal-subheader {
-        color: #FFFF00;
-        margin: 10px 0;
-    }
-    .success-msg {
-        color: #00FF00;
-        border: 1px solid #00FF00;
-        padding: 10px;
-        background-color: #001100;
-    }
-    .warning-msg {
-        color: #FFFF00;
-        border: 1px solid #FFFF00;
-        padding: 10px;
-        background-color: #110000;
-    }
-    .error-msg {
-        color: #FF0000;
-        border: 1px solid #FF0000;
-        padding: 10px;
-        background-color: #110000;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    apply_theme("dialogue_editor")
 
 # Initialize dialogue template
 DEFAULT_DIALOGUE = {
@@ -157,11 +68,14 @@ DEFAULT_DIALOGUE = {
     ]
 }
 
-# Function to save dialogue data to a JSON file
-def save_dialogue_data(dialogue_data, filename):
+# Dialogue levels shown in the preview tree before subtrees are collapsed
+PREVIEW_DEPTH = 6
+
+# Function to save dialogue data to a JSON file (compact JSON saves faster and smaller).
+# Saves are atomic; with journal=True repeated saves only append the changed dialogues.
+def save_dialogue_data(dialogue_data, filename, pretty=True, journal=False):
     try:
-        with open(filename, 'w') as file:
-            json.dump(dialogue_data, file, indent=4)
+        dialogue_manager.save_dialogue_data(dialogue_data, os.path.abspath(filename), pretty, journal=journal)
         return True, f"Successfully saved to {filename}"
     except Exception as e:
         return False, f"Error saving file: {str(e)}"
@@ -169,8 +83,9 @@ def save_dialogue_data(dialogue_data, filename):
 # Function to load dialogue data from a JSON file
 def load_dialogue_data(file_path):
     try:
-        with open(file_path, 'r') as file:
-            return json.load(file), f"Successfully loaded {file_path}"
+        # Through the data manager, so a pending save journal is applied first
+        data = dialogue_manager.load_dialogue_data(os.path.abspath(file_path), use_cache=False)
+        return data, f"Successfully loaded {file_path}"
     except FileNotFoundError:
         return DEFAULT_DIALOGUE, f"File '{file_path}' not found. Loading default template."
     except json.JSONDecodeError:
@@ -263,58 +178,186 @@ def validate_dialogue_data(dialogue_data):
     
     return errors
 
-# Function to preview dialogue tree
-def build_dialogue_tree(dialogue_data, current_id, visited=None):
-    if visited is None:
-        visited = set()
+# Function to count a new revision of the dialogue data, so views derived from it are rebuilt
+def mark_changed():
+    st.session_state.data_revision += 1
+
+# Function to replace the dialogue data (load, upload, reset, raw JSON), starting a new revision
+def set_dialogue_data(data):
+    st.session_state.dialogue_data = data
+    mark_changed()
+
+# Function to store an edited field, counting a new revision only if the value changed
+def set_field(container, key, value):
+    if key not in container or container[key] != value:
+        container[key] = value
+        mark_changed()
+
+# Function to get a view derived from the dialogue data (JSON text, tree, statistics, validation),
+# computed at most once per revision instead of on every rerun
+def get_derived_view(name, build):
+    revision = st.session_state.data_revision
+    cached = st.session_state.derived_views.get(name)
+    if cached is None or cached[0] != revision:
+        cached = (revision, build(st.session_state.dialogue_data))
+        st.session_state.derived_views[name] = cached
+    return cached[1]
+
+# Function to calculate the PREVIEW statistics and warnings
+def preview_statistics(dialogue_data):
+    dialogue_ids = {d["id"] for d in dialogue_data["dialogues"]}
+    quest_stages = {}
+    for quest in dialogue_data["quests"]:
+        quest_stages.setdefault(quest["id"], {s["id"] for s in quest["stages"]})
     
-    # Prevent infinite recursion
-    if current_id in visited or current_id is None:
-        return {}
+    stats = {
+        "num_dialogues": len(dialogue_data["dialogues"]),
+        "total_responses": sum(len(d["responses"]) for d in dialogue_data["dialogues"]),
+        "num_quests": len(dialogue_data["quests"]),
+        "total_stages": sum(len(q["stages"]) for q in dialogue_data["quests"]),
+        "missing_next": [],
+        "invalid_scripts": []
+    }
     
-    visited.add(current_id)
+    for dialogue in dialogue_data["dialogues"]:
+        for response in dialogue["responses"]:
+            # Find responses with missing next_dialogue
+            if response["next_dialogue"] is not None and response["next_dialogue"] not in dialogue_ids:
+                stats["missing_next"].append((dialogue["id"], response["text"], response["next_dialogue"]))
+            
+            # Check if quest scripts reference valid quests
+            script = response.get("script")
+            if not script:
+                continue
+            if script.startswith("StartQuest_"):
+                quest_id = script.replace("StartQuest_", "")
+                if quest_id not in quest_stages:
+                    stats["invalid_scripts"].append(f"Script '{script}' references non-existent quest '{quest_id}'")
+            elif script.startswith("UpdateQuest_"):
+                parts = script.replace("UpdateQuest_", "").split("_")
+                if len(parts) >= 2:
+                    quest_id = parts[0]
+                    stage_id = int(parts[1]) if parts[1].isdigit() else -1
+                    if quest_id not in quest_stages:
+                        stats["invalid_scripts"].append(f"Script '{script}' references non-existent quest '{quest_id}'")
+                    elif stage_id not in quest_stages[quest_id]:
+                        stats["invalid_scripts"].append(f"Script '{script}' references non-existent stage '{stage_id}' in quest '{quest_id}'")
     
-    # Find the current dialogue
-    current_dialogue = None
+    return stats
+
+# Function to get the label of a dialogue in the preview tree
+def dialogue_label(dialogue):
+    return f"{dialogue['npc']}: {dialogue['text'][:50]}{'...' if len(dialogue['text']) > 50 else ''}"
+
+# Function to build the preview tree. Each reachable dialogue is expanded once, under the
+# shortest path to it; every other response leading there is a reference, so the work is
+# linear in the graph size. Iterative, so long chains don't hit the recursion limit.
+def build_dialogue_tree(dialogue_data, starting_id):
+    dialogues = {}
     for dialogue in dialogue_data["dialogues"]:
-        if dialogue["id"] == current_id:
-            current_dialogue = dialogue
-            break
+        dialogues.setdefault(dialogue["id"], dialogue)
     
-    if not current_dialogue:
-        return {"name": f"MISSING: {current_id}", "children": []}
+    tree = {"root": starting_id, "nodes": {}}
+    nodes = tree["nodes"]
+    if starting_id not in dialogues:
+        return tree
     
-    # Build children (responses)
-    children = []
-    for response in current_dialogue["responses"]:
-        next_id = response["next_dialogue"]
-        if next_id is None:
-            children.append({"name": f"{response['text']} -> [END]"})
-        elif next_id in visited:
-            children.append({"name": f"{response['text']} -> [LOOP: {next_id}]"})
-        else:
-            children.append({
-                "name": response["text"],
-                "children": [build_dialogue_tree(dialogue_data, next_id, visited.copy())]
-            })
+    # Response children are (response text, next dialogue ID, kind), kind being one of
+    # "expand", "end", "loop" (back to a dialogue on the path from the start), "ref" or "missing"
+    nodes[starting_id] = {"name": dialogue_label(dialogues[starting_id]), "children": [], "size": 1}
+    order = [starting_id]
+    for current_id in order:
+        children = nodes[current_id]["children"]
+        for response in dialogues[current_id]["responses"]:
+            next_id = response["next_dialogue"]
+            if next_id is None:
+                kind = "end"
+            elif next_id in nodes:
+                kind = "ref"
+            elif next_id not in dialogues:
+                kind = "missing"
+            else:
+                kind = "expand"
+                nodes[next_id] = {"name": dialogue_label(dialogues[next_id]), "children": [], "size": 1}
+                order.append(next_id)
+            children.append((response["text"], next_id, kind))
     
-    return {
-        "name": f"{current_dialogue['npc']}: {current_dialogue['text'][:50]}{'...' if len(current_dialogue['text']) > 50 else ''}",
-        "children": children
-    }
-
-# Function to display dialogue tree
-def display_dialogue_tree(tree, level=0):
-    if not tree:
-        return ""
+    # Expanded dialogues come after their parent, so subtree sizes add up in reverse order
+    for current_id in reversed(order):
+        node = nodes[current_id]
+        node["size"] = 1 + sum(nodes[next_id]["size"] for _, next_id, kind in node["children"] if kind == "expand")
+    
+    # References to a dialogue on the path from the start are loops
+    on_path = set()
+    stack = [(starting_id, False)]
+    while stack:
+        current_id, leaving = stack.pop()
+        if leaving:
+            on_path.discard(current_id)
+            continue
+        on_path.add(current_id)
+        stack.append((current_id, True))
+        children = nodes[current_id]["children"]
+        for i, (text, next_id, kind) in enumerate(children):
+            if kind == "ref" and next_id in on_path:
+                children[i] = (text, next_id, "loop")
+            elif kind == "expand":
+                stack.append((next_id, False))
     
-    output = "  " * level + tree["name"] + "\n"
+    return tree
+
+# Function to get the preview tree, rebuilt only when the dialogue data changed. A dialogue
+# the start doesn't lead to gets a tree of its own, kept until the next change as well
+def get_dialogue_tree(root_id=None):
+    tree = get_derived_view("tree", lambda data: build_dialogue_tree(data, data["starting_dialogue"]))
+    if root_id is None or root_id in tree["nodes"]:
+        return tree
+    other_trees = get_derived_view("other_trees", lambda data: {})
+    if root_id not in other_trees:
+        other_trees[root_id] = build_dialogue_tree(st.session_state.dialogue_data, root_id)
+    return other_trees[root_id]
+
+# Function to display the dialogue tree from a dialogue down to max_depth dialogues;
+# deeper subtrees stay collapsed until the preview is expanded from them
+def display_dialogue_tree(tree, root_id=None, max_depth=None):
+    nodes = tree["nodes"]
+    if root_id is None:
+        root_id = tree["root"]
+    if root_id not in nodes:
+        return f"MISSING: {root_id}" if root_id is not None else ""
     
-    if "children" in tree:
-        for child in tree["children"]:
-            output += display_dialogue_tree(child, level + 1)
+    # The stack holds finished lines and (dialogue ID, depth) entries still to expand
+    lines = []
+    stack = [(root_id, 0)]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            lines.append(item)
+            continue
+        
+        dialogue_id, depth = item
+        node = nodes[dialogue_id]
+        lines.append("    " * depth + node["name"])
+        indent = "    " * depth + "  "
+        pending = []
+        for text, next_id, kind in node["children"]:
+            if kind == "end":
+                pending.append(f"{indent}{text} -> [END]")
+            elif kind == "loop":
+                pending.append(f"{indent}{text} -> [LOOP: {next_id}]")
+            elif kind == "ref":
+                pending.append(f"{indent}{text} -> [SEE: {next_id}]")
+            elif kind == "missing":
+                pending.append(f"{indent}{text} -> [MISSING: {next_id}]")
+            elif max_depth is not None and depth + 1 >= max_depth:
+                pending.append(f"{indent}{text} -> [+{nodes[next_id]['size']} DIALOGUES FROM: {next_id}]")
+            else:
+                pending.append(f"{indent}{text}")
+                pending.append((next_id, depth + 1))
+        # Reversed, so each subtree comes right after the response leading to it
+        stack.extend(reversed(pending))
     
-    return output
+    return "\n".join(lines)
 
 # Main editor function
 def main():
@@ -339,6 +382,13 @@ def main():
     if "current_file" not in st.session_state:
         st.session_state.current_file = "dialogue_data.json"
     
+    # Views derived from the dialogue data are cached per revision of it
+    if "data_revision" not in st.session_state:
+        st.session_state.data_revision = 0
+    
+    if "derived_views" not in st.session_state:
+        st.session_state.derived_views = {}
+    
     # Page header
     st.markdown("<h1 style='color: #00FF00; text-align: center;'>TERMINAL DIALOGUE EDITOR v1.0</h1>", unsafe_allow_html=True)
     
@@ -356,14 +406,16 @@ def main():
                 if "Error" in message:
                     st.session_state.error_messages = [message]
                 else:
-                    st.session_state.dialogue_data = data
+                    set_dialogue_data(data)
                     st.session_state.success_message = message
                     st.session_state.error_messages = []
         
         with file_ops_col2:
             if st.button("💾 SAVE"):
                 save_filename = st.session_state.current_file
-                success, message = save_dialogue_data(st.session_state.dialogue_data, save_filename)
+                success, message = save_dialogue_data(st.session_state.dialogue_data, save_filename,
+                                                      pretty=not st.session_state.get("compact_json", False),
+                                                      journal=st.session_state.get("journal_saves", False))
                 if success:
                     st.session_state.success_message = message
                     st.session_state.error_messages = []
@@ -372,12 +424,17 @@ def main():
         
         # File name input
         st.text_input("FILENAME:", key="current_file")
+        st.checkbox("COMPACT JSON (FASTER SAVES)", key="compact_json")
+        # Off by default: until the journal is compacted, tools outside this app see the file without the latest saves
+        st.checkbox("INCREMENTAL SAVES (JOURNAL)", key="journal_saves")
         
         # Upload/Download
+        # The uploader keeps returning the file on every rerun, so it's only loaded once
         uploaded_file = st.file_uploader("UPLOAD DIALOGUE FILE:", type=["json"])
-        if uploaded_file is not None:
+        if uploaded_file is not None and uploaded_file.file_id != st.session_state.get("uploaded_file_id"):
+            st.session_state.uploaded_file_id = uploaded_file.file_id
             try:
-                st.session_state.dialogue_data = json.load(uploaded_file)
+                set_dialogue_data(json_load(uploaded_file))
                 st.session_state.success_message = f"Successfully loaded uploaded file"
                 st.session_state.error_messages = []
             except json.JSONDecodeError:
@@ -389,7 +446,8 @@ def main():
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             export_filename = f"dialogue_export_{timestamp}.json"
             
-            success, message = save_dialogue_data(st.session_state.dialogue_data, export_filename)
+            success, message = save_dialogue_data(st.session_state.dialogue_data, export_filename,
+                                                  pretty=not st.session_state.get("compact_json", False))
             if success:
                 st.session_state.success_message = f"Exported to {export_filename}"
             else:
@@ -397,7 +455,7 @@ def main():
         
         # Validate dialogue data
         if st.button("🔍 VALIDATE DATA"):
-            errors = validate_dialogue_data(st.session_state.dialogue_data)
+            errors = get_derived_view("validation", validate_dialogue_data)
             if errors:
                 st.session_state.error_messages = errors
             else:
@@ -406,7 +464,7 @@ def main():
         
         # Reset to default
         if st.button("⚠️ RESET TO DEFAULT"):
-            st.session_state.dialogue_data = DEFAULT_DIALOGUE.copy()
+            set_dialogue_data(DEFAULT_DIALOGUE.copy())
             st.session_state.current_dialogue_index = 0
             st.session_state.current_quest_index = 0
             st.session_state.success_message = "Reset to default template"
@@ -432,7 +490,7 @@ def main():
         
         # Set the starting dialogue
         starting_dialogue = st.text_input("STARTING DIALOGUE ID:", st.session_state.dialogue_data["starting_dialogue"])
-        st.session_state.dialogue_data["starting_dialogue"] = starting_dialogue
+        set_field(st.session_state.dialogue_data, "starting_dialogue", starting_dialogue)
         
         # Create columns for dialogue list and editor
         dialogue_list_col, dialogue_editor_col = st.columns([1, 3])
@@ -456,6 +514,7 @@ def main():
                     ]
                 }
                 st.session_state.dialogue_data["dialogues"].append(new_dialogue)
+                mark_changed()
                 st.session_state.current_dialogue_index = len(st.session_state.dialogue_data["dialogues"]) - 1
             
             # Display dialogue list for selection
@@ -473,15 +532,15 @@ def main():
                 
                 # Dialogue ID
                 dialogue_id = st.text_input("DIALOGUE ID:", current_dialogue["id"], key="dialogue_id")
-                current_dialogue["id"] = dialogue_id
+                set_field(current_dialogue, "id", dialogue_id)
                 
                 # NPC name
                 npc_name = st.text_input("NPC NAME:", current_dialogue["npc"], key="npc_name")
-                current_dialogue["npc"] = npc_name
+                set_field(current_dialogue, "npc", npc_name)
                 
                 # Dialogue text
                 dialogue_text = st.text_area("DIALOGUE TEXT:", current_dialogue["text"], height=150, key="dialogue_text")
-                current_dialogue["text"] = dialogue_text
+                set_field(current_dialogue, "text", dialogue_text)
                 
                 # Dialogue responses
                 st.markdown("<h4 class='terminal-subheader'>RESPONSES</h4>", unsafe_allow_html=True)
@@ -493,6 +552,7 @@ def main():
                         "text": "> New response option",
                         "next_dialogue": None
                     })
+                    mark_changed()
                 
                 # List all dialogue IDs for dropdown
                 dialogue_id_options = ["None"] + [d["id"] for d in st.session_state.dialogue_data["dialogues"]]
@@ -505,11 +565,11 @@ def main():
                     with response_cols[0]:
                         # Response ID
                         response_id = st.text_input(f"RESPONSE ID:", response["id"], key=f"response_id_{i}")
-                        response["id"] = response_id
+                        set_field(response, "id", response_id)
                         
                         # Response text
                         response_text = st.text_input(f"RESPONSE TEXT:", response["text"], key=f"response_text_{i}")
-                        response["text"] = response_text
+                        set_field(response, "text", response_text)
                         
                         # Next dialogue selection
                         next_dialogue_index = 0
@@ -527,20 +587,22 @@ def main():
                             index=next_dialogue_index,
                             key=f"next_dialogue_{i}"
                         )
-                        response["next_dialogue"] = None if next_dialogue == "None" else next_dialogue
+                        set_field(response, "next_dialogue", None if next_dialogue == "None" else next_dialogue)
                         
                         # Optional script
                         script = response.get("script", "")
                         script_input = st.text_input(f"SCRIPT (OPTIONAL):", script, key=f"script_{i}")
                         if script_input:
-                            response["script"] = script_input
+                            set_field(response, "script", script_input)
                         elif "script" in response:
                             del response["script"]
+                            mark_changed()
                     
                     with response_cols[1]:
                         # Delete response button
                         if st.button("🗑️ DELETE", key=f"delete_response_{i}"):
                             current_dialogue["responses"].pop(i)
+                            mark_changed()
                             st.rerun()
                     
                     st.markdown("</div>", unsafe_allow_html=True)
@@ -549,6 +611,7 @@ def main():
                 if st.button("🗑️ DELETE DIALOGUE", key="delete_dialogue"):
                     if len(st.session_state.dialogue_data["dialogues"]) > 1:
                         st.session_state.dialogue_data["dialogues"].pop(st.session_state.current_dialogue_index)
+                        mark_changed()
                         st.session_state.current_dialogue_index = max(0, st.session_state.current_dialogue_index - 1)
                         st.rerun()
                     else:
@@ -582,6 +645,7 @@ def main():
                     ]
                 }
                 st.session_state.dialogue_data["quests"].append(new_quest)
+                mark_changed()
                 st.session_state.current_quest_index = len(st.session_state.dialogue_data["quests"]) - 1
             
             # Display quest list for selection
@@ -599,15 +663,15 @@ def main():
                 
                 # Quest ID
                 quest_id = st.text_input("QUEST ID:", current_quest["id"], key="quest_id")
-                current_quest["id"] = quest_id
+                set_field(current_quest, "id", quest_id)
                 
                 # Quest title
                 quest_title = st.text_input("QUEST TITLE:", current_quest["title"], key="quest_title")
-                current_quest["title"] = quest_title
+                set_field(current_quest, "title", quest_title)
                 
                 # Quest description
                 quest_desc = st.text_area("QUEST DESCRIPTION:", current_quest["description"], height=100, key="quest_desc")
-                current_quest["description"] = quest_desc
+                set_field(current_quest, "description", quest_desc)
                 
                 # Quest stages
                 st.markdown("<h4 class='terminal-subheader'>STAGES</h4>", unsafe_allow_html=True)
@@ -625,6 +689,7 @@ def main():
                         "description": "New stage",
                         "journal_entry": "Enter journal entry here."
                     })
+                    mark_changed()
                 
                 # Display each stage
                 for i, stage in enumerate(current_quest["stages"]):
@@ -634,20 +699,21 @@ def main():
                     with stage_cols[0]:
                         # Stage ID
                         stage_id = st.number_input(f"STAGE ID:", min_value=1, value=stage["id"], key=f"stage_id_{i}")
-                        stage["id"] = int(stage_id)
+                        set_field(stage, "id", int(stage_id))
                         
                         # Stage description
                         stage_desc = st.text_input(f"STAGE DESCRIPTION:", stage["description"], key=f"stage_desc_{i}")
-                        stage["description"] = stage_desc
+                        set_field(stage, "description", stage_desc)
                         
                         # Journal entry
                         journal_entry = st.text_area(f"JOURNAL ENTRY:", stage["journal_entry"], height=100, key=f"journal_entry_{i}")
-                        stage["journal_entry"] = journal_entry
+                        set_field(stage, "journal_entry", journal_entry)
                     
                     with stage_cols[1]:
                         # Delete stage button
                         if st.button("🗑️ DELETE", key=f"delete_stage_{i}"):
                             current_quest["stages"].pop(i)
+                            mark_changed()
                             st.rerun()
                     
                     st.markdown("</div>", unsafe_allow_html=True)
@@ -655,6 +721,7 @@ def main():
                 # Delete current quest button
                 if st.button("🗑️ DELETE QUEST", key="delete_quest"):
                     st.session_state.dialogue_data["quests"].pop(st.session_state.current_quest_index)
+                    mark_changed()
                     st.session_state.current_quest_index = max(0, st.session_state.current_quest_index - 1)
                     st.rerun()
                 
@@ -669,89 +736,58 @@ def main():
         with preview_cols[0]:
             st.markdown("<h3 class='terminal-subheader'>DIALOGUE STRUCTURE</h3>", unsafe_allow_html=True)
             
-            # Build dialogue tree
-            starting_id = st.session_state.dialogue_data["starting_dialogue"]
-            dialogue_tree = build_dialogue_tree(st.session_state.dialogue_data, starting_id)
+            # Build dialogue tree (cached until the dialogues change)
+            dialogue_tree = get_dialogue_tree()
+            
+            # Collapsed subtrees are expanded by showing the preview from their dialogue
+            tree_cols = st.columns([2, 1])
+            with tree_cols[0]:
+                preview_root = st.text_input("EXPAND FROM DIALOGUE:", "", key="preview_root",
+                                             placeholder=str(dialogue_tree["root"]))
+            with tree_cols[1]:
+                preview_depth = st.number_input("DEPTH:", min_value=1, value=PREVIEW_DEPTH, key="preview_depth")
             
             # Display dialogue tree
-            tree_display = display_dialogue_tree(dialogue_tree)
+            root_id = preview_root.strip() or None
+            if root_id is not None and root_id not in dialogue_tree["nodes"]:
+                dialogue_tree = get_dialogue_tree(root_id)
+                if root_id in dialogue_tree["nodes"]:
+                    st.caption(f"'{root_id}' is not reachable from the starting dialogue")
+            tree_display = display_dialogue_tree(dialogue_tree, root_id, int(preview_depth))
             st.markdown(f"<pre style='color: #00FF00; background-color: #001100; padding: 10px;'>{tree_display}</pre>", unsafe_allow_html=True)
         
         with preview_cols[1]:
             st.markdown("<h3 class='terminal-subheader'>STATISTICS</h3>", unsafe_allow_html=True)
             
-            # Calculate statistics
-            num_dialogues = len(st.session_state.dialogue_data["dialogues"])
-            total_responses = sum(len(d["responses"]) for d in st.session_state.dialogue_data["dialogues"])
-            num_quests = len(st.session_state.dialogue_data["quests"])
-            total_stages = sum(len(q["stages"]) for q in st.session_state.dialogue_data["quests"])
-            
-            # Find dialogues with missing next_dialogue
-            missing_next = []
-            for dialogue in st.session_state.dialogue_data["dialogues"]:
-                for response in dialogue["responses"]:
-                    if response["next_dialogue"] is not None and not any(d["id"] == response["next_dialogue"] for d in st.session_state.dialogue_data["dialogues"]):
-                        missing_next.append((dialogue["id"], response["text"], response["next_dialogue"]))
+            # Calculate statistics (cached until the dialogue data changes)
+            stats = get_derived_view("statistics", preview_statistics)
             
             # Display statistics
             st.markdown(f"""
             <div style='background-color: #001100; padding: 10px;'>
-                <p>Total Dialogues: {num_dialogues}</p>
-                <p>Total Responses: {total_responses}</p>
-                <p>Total Quests: {num_quests}</p>
-                <p>Total Quest Stages: {total_stages}</p>
+                <p>Total Dialogues: {stats["num_dialogues"]}</p>
+                <p>Total Responses: {stats["total_responses"]}</p>
+                <p>Total Quests: {stats["num_quests"]}</p>
+                <p>Total Quest Stages: {stats["total_stages"]}</p>
             </div>
             """, unsafe_allow_html=True)
             
             # Display any missing next_dialogue warnings
-            if missing_next:
+            if stats["missing_next"]:
                 st.markdown("<h4 class='terminal-subheader'>WARNINGS</h4>", unsafe_allow_html=True)
                 
-                warning_text = ""
-                for dialogue_id, response_text, next_id in missing_next:
-                    warning_text += f"• Dialogue '{dialogue_id}' response '{response_text}' points to non-existent dialogue '{next_id}'\n"
+                warning_text = "".join(
+                    f"• Dialogue '{dialogue_id}' response '{response_text}' points to non-existent dialogue '{next_id}'\n"
+                    for dialogue_id, response_text, next_id in stats["missing_next"]
+                )
                 
                 st.markdown(f"<div class='warning-msg'><pre>{warning_text}</pre></div>", unsafe_allow_html=True)
             
             # Quest scripts check
             st.markdown("<h4 class='terminal-subheader'>QUEST SCRIPT CHECK</h4>", unsafe_allow_html=True)
             
-            # Find all quest scripts
-            quest_scripts = []
-            for dialogue in st.session_state.dialogue_data["dialogues"]:
-                for response in dialogue["responses"]:
-                    if "script" in response and response["script"]:
-                        if response["script"].startswith("StartQuest_") or response["script"].startswith("UpdateQuest_"):
-                            quest_scripts.append(response["script"])
-            
-            # Check if quest scripts reference valid quests
-            invalid_scripts = []
-            for script in quest_scripts:
-                if script.startswith("StartQuest_"):
-                    quest_id = script.replace("StartQuest_", "")
-                    if not any(q["id"] == quest_id for q in st.session_state.dialogue_data["quests"]):
-                        invalid_scripts.append(f"Script '{script}' references non-existent quest '{quest_id}'")
-                elif script.startswith("UpdateQuest_"):
-                    parts = script.replace("UpdateQuest_", "").split("_")
-                    if len(parts) >= 2:
-                        quest_id = parts[0]
-                        stage_id = int(parts[1]) if parts[1].isdigit() else -1
-                        
-                        quest = None
-                        for q in st.session_state.dialogue_data["quests"]:
-                            if q["id"] == quest_id:
-                                quest = q
-                                break
-                        
-                        if not quest:
-                            invalid_scripts.append(f"Script '{script}' references non-existent quest '{quest_id}'")
-                        elif not any(s["id"] == stage_id for s in quest["stages"]):
-                            invalid_scripts.append(f"Script '{script}' references non-existent stage '{stage_id}' in quest '{quest_id}'")
-            
-            if invalid_scripts:
-                warning_text = ""
-                for script in invalid_scripts:
-                    warning_text += f"• {script}\n"
+            if stats["invalid_scripts"]:
+                warning_text = "".join(f"• {script}\n" for script in stats["invalid_scripts"])
                 
                 st.markdown(f"<div class='warning-msg'><pre>{warning_text}</pre></div>", unsafe_allow_html=True)
             else:
@@ -762,13 +798,13 @@ def main():
         st.markdown("<h2 class='terminal-header'>RAW JSON</h2>", unsafe_allow_html=True)
         
         # Display and edit raw JSON
-        raw_json = st.text_area("Edit JSON directly:", json.dumps(st.session_state.dialogue_data, indent=2), height=600)
+        raw_json = st.text_area("Edit JSON directly:", get_derived_view("json", json_dumps), height=600)
         
         # Apply JSON changes button
         if st.button("APPLY JSON CHANGES"):
             try:
-                updated_data = json.loads(raw_json)
-                st.session_state.dialogue_data = updated_data
+                updated_data = json_loads(raw_json)
+                set_dialogue_data(updated_data)
                 st.session_state.success_message = "JSON changes applied successfully"
             except json.JSONDecodeError as e:
                 st.session_state.error_messages = [f"JSON Error: {str(e)}"]
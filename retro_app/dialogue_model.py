@@ -0,0 +1,148 @@
+"""
+Compact Dialogue Model for Terminal Dialogue System
+Memory-efficient, read-only representation of dialogue nodes, responses and quests
+"""
+import sys
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Tuple
+from data_layer import FrozenDict, freeze
+
+# Marks a field that was absent in the source data, so "key in record" and
+# record.get(key) behave exactly like they did on the original dict
+_MISSING = object()
+
+
+class CompactRecord(Mapping):
+    """
+    Base class for compact records.
+
+    Known fields are stored in __slots__ instead of a per-object dict, short
+    identifier strings are interned so repeated IDs, speakers, scripts and
+    conditions are stored once, and nested lists become tuples. Records are
+    read-only and implement the Mapping interface, so code written against
+    the plain JSON dicts (record["text"], record.get("condition"),
+    "image_url" in record) keeps working unchanged. Keys iterate in the order
+    of the source object, so a record saves back with its keys where they were.
+    """
+    __slots__ = ("_extra", "_keys")
+
+    # Field names stored in slots
+    _fields: Tuple[str, ...] = ()
+    # Fields whose string values are interned
+    _interned: frozenset = frozenset()
+    # Fields holding a list of nested records, mapped to the record class
+    _nested: Dict[str, type] = {}
+    # (field, slot setter) pairs, filled in for each subclass
+    _slot_setters: Tuple[Tuple[str, Any], ...] = ()
+    # Key orders seen so far; records with the same keys in the same order share one tuple
+    _key_orders: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Slot descriptors set values directly, bypassing the read-only __setattr__
+        cls._slot_setters = tuple((field, getattr(cls, field).__set__) for field in cls._fields)
+        cls._key_orders = {}
+
+    def __init__(self, data: Mapping):
+        """Build the record from a parsed JSON object"""
+        present = 0
+        for field, set_slot in self._slot_setters:
+            value = data.get(field, _MISSING)
+            if value is not _MISSING:
+                present += 1
+                if field in self._nested:
+                    record_class = self._nested[field]
+                    value = tuple([record_class(item) for item in value])
+                elif type(value) is str:
+                    if field in self._interned:
+                        value = sys.intern(value)
+                elif isinstance(value, (dict, list)):
+                    value = freeze(value)
+            set_slot(self, value)
+
+        extra = None
+        if len(data) > present:
+            extra = freeze({key: value for key, value in data.items() if key not in self._fields})
+        object.__setattr__(self, "_extra", extra)
+        keys = tuple(data)
+        object.__setattr__(self, "_keys", self._key_orders.setdefault(keys, keys))
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._fields:
+            value = getattr(self, key)
+            if value is not _MISSING:
+                return value
+        elif self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise TypeError("Compact dialogue records are read-only; use thaw() to get a mutable copy")
+
+    def __delattr__(self, name: str) -> None:
+        raise TypeError("Compact dialogue records are read-only; use thaw() to get a mutable copy")
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self)!r})"
+
+
+class CompactResponse(CompactRecord):
+    """A player response within a dialogue node"""
+    __slots__ = ("id", "text", "next_dialogue", "script", "condition")
+    _fields = __slots__
+    _interned = frozenset({"id", "next_dialogue", "script", "condition"})
+
+
+class CompactDialogue(CompactRecord):
+    """A dialogue node"""
+    __slots__ = ("id", "npc", "image_url", "text", "responses", "on_entry")
+    _fields = __slots__
+    _interned = frozenset({"id", "npc", "image_url", "on_entry"})
+    _nested = {"responses": CompactResponse}
+
+
+class CompactStage(CompactRecord):
+    """A quest stage"""
+    __slots__ = ("id", "description", "journal_entry", "on_complete")
+    _fields = __slots__
+    _interned = frozenset({"on_complete"})
+
+
+class CompactQuest(CompactRecord):
+    """A quest with its stages"""
+    __slots__ = ("id", "title", "description", "stages", "rewards")
+    _fields = __slots__
+    _interned = frozenset({"id", "title"})
+    _nested = {"stages": CompactStage}
+
+
+def compact_dialogue_data(dialogue_data: Mapping) -> FrozenDict:
+    """
+    Convert parsed dialogue data into the compact model
+
+    Args:
+        dialogue_data: Dialogue data as loaded from JSON
+
+    Returns:
+        A read-only dict whose "dialogues" and "quests" are tuples of compact records
+    """
+    compact = {}
+    for key, value in dialogue_data.items():
+        if key == "dialogues":
+            compact[key] = tuple(CompactDialogue(dialogue) for dialogue in value)
+        elif key == "quests":
+            compact[key] = tuple(CompactQuest(quest) for quest in value)
+        elif key == "starting_dialogue" and type(value) is str:
+            compact[key] = sys.intern(value)
+        else:
+            compact[key] = freeze(value)
+    return FrozenDict(compact)
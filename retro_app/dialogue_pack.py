@@ -0,0 +1,476 @@
+#!/usr/bin/env python
+"""
+Dialogue Pack for Terminal Dialogue System
+Compiles dialogue JSON into a binary pack that is memory-mapped and read lazily
+
+A pack holds a string table, a dialogue node table, a response table, the
+precompiled script and condition operations and an on-disk hash index of
+dialogue IDs. Opening one only maps the file, so every process playing the
+same pack shares the operating system's page cache and nothing is parsed
+until a dialogue is actually visited.
+"""
+import os
+import sys
+import mmap
+import glob
+import zlib
+import struct
+import argparse
+import tempfile
+from collections.abc import Mapping
+from typing import Any, Dict, List, Optional, Tuple
+from data_layer import (PACK_EXTENSION, FrozenDict, FrozenList, DialogueGraph, freeze, thaw,
+                        atomic_write, json_dumps, json_loads, read_dialogue_file)
+from script_compiler import CompiledOp, compile_script, compile_condition
+from lazy_dialogue import LazyDialogueSource
+
+PACK_MAGIC = b"DLGPACK\0"
+PACK_VERSION = 1
+
+# A string reference is an index into the string table or one of these markers
+ABSENT = 0xFFFFFFFF  # the field is not present in the record
+NULL = 0xFFFFFFFE    # the field is present and null
+
+# Header: magic, version, string/dialogue/response/op counts, hash slots,
+# top-level fields and quests (string refs to JSON), then section offsets
+_HEADER = struct.Struct("<8sIIIIIIIIQQQQQQ")
+# String table entry: offset and length of the UTF-8 bytes in the string data
+_STRING = struct.Struct("<II")
+# Node: id, npc, text, image_url, on_entry, extra fields (JSON), first response,
+# response count (ABSENT if there is no "responses" key), on_entry op
+_NODE = struct.Struct("<9I")
+# Response: id, text, next_dialogue, script, condition, extra fields (JSON), script op, condition op
+_RESPONSE = struct.Struct("<8I")
+# Operation: opcode, value kind, argument (string ref), value
+_OP = struct.Struct("<BBxxIq")
+_SLOT = struct.Struct("<I")
+
+NODE_FIELDS = ("id", "npc", "text", "image_url", "on_entry")
+RESPONSE_FIELDS = ("id", "text", "next_dialogue", "script", "condition")
+
+# How an operation's value is stored
+VALUE_NONE = 0
+VALUE_BOOL = 1
+VALUE_INT = 2
+VALUE_STRING = 3
+VALUE_BIG_INT = 4  # an int outside int64, stored as its decimal string
+
+_INT64_MIN, _INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+class _PackBuilder:
+    """Accumulates the tables of a pack while walking the dialogue data"""
+
+    def __init__(self):
+        self.strings: Dict[str, int] = {}
+        self.ops: Dict[Tuple[str, str], int] = {}
+        self.op_records: List[bytes] = []
+        self.nodes: List[bytes] = []
+        self.responses: List[bytes] = []
+
+    def string(self, value: Optional[str]) -> int:
+        """Reference a string, adding it to the table on first use"""
+        if value is None:
+            return NULL
+        index = self.strings.get(value)
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+        return index
+
+    def op(self, kind: str, source: str) -> int:
+        """Reference the compiled operation for a script ("s") or condition ("c")"""
+        index = self.ops.get((kind, source))
+        if index is not None:
+            return index
+
+        opcode, arg, value = compile_script(source) if kind == "s" else compile_condition(source)
+        if value is None:
+            value_kind, stored = VALUE_NONE, 0
+        elif type(value) is bool:
+            value_kind, stored = VALUE_BOOL, int(value)
+        elif type(value) is int and _INT64_MIN <= value <= _INT64_MAX:
+            value_kind, stored = VALUE_INT, value
+        elif type(value) is int:
+            value_kind, stored = VALUE_BIG_INT, self.string(str(value))
+        else:
+            value_kind, stored = VALUE_STRING, self.string(value)
+
+        index = self.ops[(kind, source)] = len(self.op_records)
+        self.op_records.append(_OP.pack(opcode, value_kind, self.string(arg), stored))
+        return index
+
+    def record(self, record: Mapping, fields: Tuple[str, ...], nested: str = "") -> List[int]:
+        """
+        Reference a record's string fields, followed by a reference to its other fields as JSON
+
+        Fields holding something other than a string or null, and every field not
+        in `fields` except `nested`, go into the extra JSON.
+        """
+        refs = []
+        extra = {}
+        for field in fields:
+            if field not in record:
+                refs.append(ABSENT)
+            elif record[field] is None or type(record[field]) is str:
+                refs.append(self.string(record[field]))
+            else:
+                refs.append(ABSENT)
+                extra[field] = record[field]
+        for key, value in record.items():
+            if key not in fields and key != nested:
+                extra[key] = value
+        refs.append(self.string(json_dumps(extra, pretty=False)) if extra else ABSENT)
+        return refs
+
+    def script_op(self, kind: str, source: Any) -> int:
+        """Reference the operation for a script or condition field, or ABSENT if there is none"""
+        return self.op(kind, source) if source and type(source) is str else ABSENT
+
+    def add_dialogue(self, dialogue: Mapping) -> None:
+        """Add a dialogue node and its responses"""
+        if not isinstance(dialogue, Mapping):
+            raise ValueError("Every entry of 'dialogues' must be an object to be packed")
+
+        responses = dialogue.get("responses")
+        nested = "responses" if isinstance(responses, list) else ""
+        refs = self.record(dialogue, NODE_FIELDS, nested)
+
+        first_response = len(self.responses)
+        if nested:
+            for response in responses:
+                if not isinstance(response, Mapping):
+                    raise ValueError(f"Every response of dialogue '{dialogue.get('id')}' must be an object to be packed")
+                response_refs = self.record(response, RESPONSE_FIELDS)
+                self.responses.append(_RESPONSE.pack(
+                    *response_refs,
+                    self.script_op("s", response.get("script")),
+                    self.script_op("c", response.get("condition"))))
+            response_count = len(responses)
+        else:
+            response_count = ABSENT
+
+        self.nodes.append(_NODE.pack(*refs, first_response, response_count,
+                                     self.script_op("s", dialogue.get("on_entry"))))
+
+    def hash_index(self, dialogues: List[Mapping]) -> Tuple[int, bytes]:
+        """Build the open-addressing table of dialogue IDs; the first occurrence of an ID wins"""
+        slot_count = 8
+        while slot_count < 2 * len(dialogues):
+            slot_count *= 2
+        slots = [ABSENT] * slot_count
+        seen = set()
+        for index, dialogue in enumerate(dialogues):
+            dialogue_id = dialogue.get("id")
+            if type(dialogue_id) is not str or dialogue_id in seen:
+                continue
+            seen.add(dialogue_id)
+            slot = zlib.crc32(dialogue_id.encode("utf-8")) & (slot_count - 1)
+            while slots[slot] != ABSENT:
+                slot = (slot + 1) & (slot_count - 1)
+            slots[slot] = index
+        return slot_count, struct.pack(f"<{slot_count}I", *slots)
+
+
+def compile_pack(dialogue_data: Mapping, output_path: str) -> str:
+    """
+    Compile dialogue data into a binary pack
+
+    Args:
+        dialogue_data: Dialogue data as loaded from JSON
+        output_path: Where to write the pack; it is replaced atomically
+
+    Returns:
+        The output path
+
+    Raises:
+        ValueError: If the data isn't shaped like a dialogue file
+    """
+    if not isinstance(dialogue_data, Mapping):
+        raise ValueError("Dialogue data must be a JSON object to be packed")
+    dialogues = dialogue_data.get("dialogues")
+    if not isinstance(dialogues, list):
+        raise ValueError("Dialogue data must have a 'dialogues' array to be packed")
+
+    builder = _PackBuilder()
+    for dialogue in dialogues:
+        builder.add_dialogue(dialogue)
+
+    # Everything except the dialogue table is stored as JSON; "dialogues" and
+    # "quests" are kept as placeholders so the key order survives
+    fields = {}
+    for key, value in dialogue_data.items():
+        if key in ("dialogues", "quests"):
+            fields[key] = None
+        else:
+            fields[key] = value
+    fields_ref = builder.string(json_dumps(fields, pretty=False))
+    quests_ref = builder.string(json_dumps(dialogue_data["quests"], pretty=False)) if "quests" in dialogue_data else ABSENT
+    slot_count, hash_table = builder.hash_index(dialogues)
+
+    string_index = bytearray()
+    string_data = bytearray()
+    for value in builder.strings:
+        encoded = value.encode("utf-8")
+        string_index += _STRING.pack(len(string_data), len(encoded))
+        string_data += encoded
+
+    sections = [bytes(string_index), bytes(string_data), b"".join(builder.nodes),
+                b"".join(builder.responses), b"".join(builder.op_records), hash_table]
+    offsets = []
+    position = _HEADER.size
+    for section in sections:
+        offsets.append(position)
+        position += len(section)
+
+    header = _HEADER.pack(PACK_MAGIC, PACK_VERSION, len(builder.strings), len(builder.nodes),
+                          len(builder.responses), len(builder.op_records), slot_count,
+                          fields_ref, quests_ref, *offsets)
+
+    # Write next to the destination and rename, so readers never map a half-written pack
+    atomic_write(output_path, [header, *sections])
+    return output_path
+
+
+def is_pack(file_path: str) -> bool:
+    """Check whether a path names a dialogue pack"""
+    return file_path.endswith(PACK_EXTENSION)
+
+
+class DialoguePack(LazyDialogueSource):
+    """
+    A memory-mapped dialogue pack
+
+    Strings are decoded straight from the mapped file when a record is read.
+    Decoded dialogue nodes are kept in a bounded LRU, everything else stays on disk.
+    """
+
+    def __init__(self, file_path: str, max_cached_nodes: int = 4096):
+        """
+        Map a pack file
+
+        Raises:
+            FileNotFoundError: If the file doesn't exist
+            ValueError: If the file is not a dialogue pack of a supported version
+        """
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < _HEADER.size:
+                raise ValueError(f"'{file_path}' is not a dialogue pack")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        (magic, version, self.string_count, self.dialogue_count, self.response_count,
+         self.op_count, self._slot_count, self._fields_ref, self._quests_ref,
+         self._string_index, self._string_data, self._nodes, self._responses,
+         self._ops, self._hash) = _HEADER.unpack_from(self._mmap, 0)
+        if magic != PACK_MAGIC:
+            raise ValueError(f"'{file_path}' is not a dialogue pack")
+        if version != PACK_VERSION:
+            raise ValueError(f"'{file_path}' is pack version {version}, expected {PACK_VERSION}; recompile it")
+
+        super().__init__(file_path, max_cached_nodes)
+        self._field_names = None
+
+    def string(self, ref: int) -> Optional[str]:
+        """Decode a string from the table (None for a null reference)"""
+        if ref == NULL:
+            return None
+        offset, length = _STRING.unpack_from(self._mmap, self._string_index + ref * _STRING.size)
+        start = self._string_data + offset
+        return str(self._view[start:start + length], "utf-8")
+
+    def json(self, ref: int) -> Any:
+        """Decode a JSON value stored in the string table as read-only data"""
+        return freeze(json_loads(self.string(ref)))
+
+    def op(self, index: int) -> CompiledOp:
+        """Read a precompiled operation"""
+        opcode, value_kind, arg, value = _OP.unpack_from(self._mmap, self._ops + index * _OP.size)
+        if value_kind == VALUE_NONE:
+            value = None
+        elif value_kind == VALUE_BOOL:
+            value = bool(value)
+        elif value_kind == VALUE_STRING:
+            value = self.string(value)
+        elif value_kind == VALUE_BIG_INT:
+            value = int(self.string(value))
+        return (opcode, self.string(arg), value)
+
+    def find_dialogue(self, dialogue_id: str) -> Optional[int]:
+        """Look up a dialogue's position in the node table through the hash index"""
+        if type(dialogue_id) is not str or not self.dialogue_count:
+            return None
+        key = dialogue_id.encode("utf-8")
+        mask = self._slot_count - 1
+        slot = zlib.crc32(key) & mask
+        while True:
+            (index,) = _SLOT.unpack_from(self._mmap, self._hash + slot * _SLOT.size)
+            if index == ABSENT:
+                return None
+            (id_ref,) = _SLOT.unpack_from(self._mmap, self._nodes + index * _NODE.size)
+            offset, length = _STRING.unpack_from(self._mmap, self._string_index + id_ref * _STRING.size)
+            start = self._string_data + offset
+            if length == len(key) and self._view[start:start + length] == key:
+                return index
+            slot = (slot + 1) & mask
+
+    def field_names(self) -> List[str]:
+        """Get the top-level keys, in the order of the source file"""
+        if self._field_names is None:
+            self._field_names = list(self.field(None))
+        return self._field_names
+
+    def _read_field(self, key: Optional[str]) -> Any:
+        """Decode a top-level field; None decodes every field except the dialogues and quests"""
+        if key is None:
+            return self.json(self._fields_ref)
+        if key == "quests":
+            return self.json(self._quests_ref)
+        return self.field(None)[key]
+
+    def _read_record(self, refs: Tuple[int, ...], fields: Tuple[str, ...]) -> List[Tuple[str, Any]]:
+        """Decode a record's string fields, followed by its extra fields"""
+        pairs = [(field, self.string(ref)) for field, ref in zip(fields, refs) if ref != ABSENT]
+        extra_ref = refs[len(fields)]
+        if extra_ref != ABSENT:
+            pairs.extend(self.json(extra_ref).items())
+        return pairs
+
+    def _read_dialogue(self, index: int) -> FrozenDict:
+        """Decode a dialogue node and its responses from the mapped file"""
+        refs = _NODE.unpack_from(self._mmap, self._nodes + index * _NODE.size)
+        first_response, response_count, on_entry_op = refs[6:]
+        pairs = self._read_record(refs, NODE_FIELDS)
+
+        if on_entry_op != ABSENT:
+            self.graph.scripts.setdefault(dict(pairs)["on_entry"], self.op(on_entry_op))
+
+        if response_count != ABSENT:
+            responses = []
+            for position in range(first_response, first_response + response_count):
+                response_refs = _RESPONSE.unpack_from(self._mmap, self._responses + position * _RESPONSE.size)
+                response = FrozenDict(self._read_record(response_refs, RESPONSE_FIELDS))
+                script_op, condition_op = response_refs[6:]
+                if script_op != ABSENT:
+                    self.graph.scripts.setdefault(response["script"], self.op(script_op))
+                if condition_op != ABSENT:
+                    self.graph.conditions.setdefault(response["condition"], self.op(condition_op))
+                responses.append(response)
+            pairs.append(("responses", FrozenList(responses)))
+        return FrozenDict(pairs)
+
+    def close(self) -> None:
+        """Unmap the file; data read from the pack stays usable"""
+        self._view.release()
+        self._mmap.close()
+
+
+def verify_pack(json_path: str, pack_path: str) -> List[str]:
+    """
+    Check that a pack reproduces its source JSON file
+
+    Returns:
+        A list of differences; empty when the pack is equivalent
+    """
+    original = read_dialogue_file(json_path)
+    pack = DialoguePack(pack_path)
+    problems = []
+    try:
+        if thaw(pack.data) != original:
+            problems.append("Decoded data differs from the JSON file")
+
+        reference = DialogueGraph(original)
+        for dialogue_id, dialogue in reference.dialogues.items():
+            if thaw(pack.graph.get_dialogue(dialogue_id)) != dialogue:
+                problems.append(f"Dialogue '{dialogue_id}' differs")
+                continue
+            for response_id, response in reference.responses[dialogue_id].items():
+                if thaw(pack.graph.get_response(dialogue_id, response_id)) != response:
+                    problems.append(f"Response '{response_id}' of dialogue '{dialogue_id}' differs")
+        if pack.graph.get_dialogue("\0missing") is not None:
+            problems.append("Lookup of a missing dialogue found something")
+
+        # Every node has been decoded above, so these are the pack's precompiled operations
+        for script, op in reference.scripts.items():
+            packed = pack.graph.scripts.get(script)
+            if packed != op or type(packed[2]) is not type(op[2]):
+                problems.append(f"Script '{script}' compiled differently")
+        for condition, op in reference.conditions.items():
+            packed = pack.graph.conditions.get(condition)
+            if packed != op or type(packed[2]) is not type(op[2]):
+                problems.append(f"Condition '{condition}' compiled differently")
+        for (quest_id, stage_id), stage in reference.quest_stages.items():
+            if thaw(pack.graph.get_quest_stage(quest_id, stage_id)) != stage:
+                problems.append(f"Stage {stage_id} of quest '{quest_id}' differs")
+    finally:
+        pack.close()
+    return problems
+
+
+def _schema_errors(dialogue_data: Dict, schema_path: str) -> List[str]:
+    """Validate the data against the schema before packing it"""
+    from schema_validator import load_schema, validate_dialogue_all
+    return [error.message for error in validate_dialogue_all(dialogue_data, load_schema(schema_path))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compile dialogue JSON files into memory-mapped binary packs')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    compile_parser = subparsers.add_parser('compile', help='Compile a dialogue JSON file into a pack')
+    compile_parser.add_argument('file', help='Dialogue JSON file to compile')
+    compile_parser.add_argument('--output', '-o', help=f'Pack file to write (default: the input file with a {PACK_EXTENSION} extension)')
+    compile_parser.add_argument('--schema', default='dialogue_schema.json', help='Path to the schema file (default: dialogue_schema.json)')
+    compile_parser.add_argument('--strict', action='store_true', help='Refuse to compile files with schema errors')
+
+    verify_parser = subparsers.add_parser('verify', help='Round-trip dialogue JSON files through packs and compare')
+    verify_parser.add_argument('paths', nargs='*', help='JSON files or directories (default: conversations/)')
+
+    args = parser.parse_args()
+
+    if args.command == 'compile':
+        dialogue_data = read_dialogue_file(args.file)
+
+        errors = _schema_errors(dialogue_data, args.schema)
+        for error in errors:
+            print(f"Schema error: {error}")
+        if errors and args.strict:
+            print(f"❌ Not compiling {args.file}: {len(errors)} schema error(s)")
+            return 1
+
+        output_path = args.output or os.path.splitext(args.file)[0] + PACK_EXTENSION
+        compile_pack(dialogue_data, output_path)
+        print(f"✅ Compiled {args.file} -> {output_path} ({os.path.getsize(output_path)} bytes)")
+        return 0
+
+    paths = args.paths or [os.path.join(os.path.dirname(os.path.abspath(__file__)), "conversations")]
+    json_paths = []
+    for path in paths:
+        json_paths.extend(sorted(glob.glob(os.path.join(path, "*.json"))) if os.path.isdir(path) else [path])
+
+    failed = 0
+    checked = 0
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for json_path in json_paths:
+            pack_path = os.path.join(tmp_dir, os.path.basename(json_path) + PACK_EXTENSION)
+            dialogue_data = read_dialogue_file(json_path)
+            try:
+                compile_pack(dialogue_data, pack_path)
+            except ValueError as e:
+                print(f"⚠️  Skipped {json_path}: {e}")
+                continue
+            problems = verify_pack(json_path, pack_path)
+            checked += 1
+            if problems:
+                failed += 1
+                print(f"❌ {json_path}")
+                for problem in problems:
+                    print(f"   - {problem}")
+            else:
+                print(f"✅ {json_path}")
+
+    print(f"\n{checked - failed}/{checked} files round-trip through a pack unchanged")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,10 +5,20 @@ import os
 import sys
 import argparse
 from pathlib import Path
-from jsonschema import validate, ValidationError
+from jsonschema import ValidationError
+from jsonschema.exceptions import best_match
 from typing import Dict, List, Tuple, Any, Optional, Set
 import glob
+import hashlib
 import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from schema_validator import schema_hash, get_schema_validator
+from stream_loader import load_dialogue_json
+from data_layer import dialogue_manager, read_json_file, write_json_file
+from graph_analysis import (
+    ReferenceIndex, reachable_from, strongly_connected_components, is_cyclic, find_cycle, find_closed_loops
+)
 
 # Configure logging
 logging.basicConfig(
@@ -20,15 +30,136 @@ logging.basicConfig(
 )
 logger = logging.getLogger('dialogue_validator')
 
+# Bump whenever a check is added or its messages change so cached results are re-checked
+VALIDATOR_VERSION = "2"
+
+# Name of the results cache the command line keeps in the validated directory
+# (or next to the validated file) unless --cache-file says otherwise
+DEFAULT_CACHE_FILE = ".dialogue_validator_cache.json"
+
+
+class ValidationCache:
+    """
+    Persistent cache of validation results keyed by file content
+    
+    A result is reused only while the file's bytes, the schema and the validator
+    version are all unchanged, so editing any of them re-checks the file.
+    """
+    
+    def __init__(self, cache_path: str, schema_hash: str, max_entries: int = 5000):
+        """
+        Load the cache file if there is one
+        
+        Args:
+            cache_path: JSON file the results are kept in
+            schema_hash: Hash of the schema the results were checked against
+            max_entries: Number of results kept; the least recently used are dropped
+        """
+        self.cache_path = cache_path
+        self.schema_hash = schema_hash
+        self.max_entries = max_entries
+        self.entries = self._load()
+        self.hits = 0
+        self.misses = 0
+        self.time_saved = 0.0
+        self._dirty = False
+    
+    def _load(self) -> Dict[str, Dict]:
+        """Read the cached entries, starting empty if the file is missing or unreadable"""
+        try:
+            return read_json_file(self.cache_path).get("entries", {})
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable validation cache '{self.cache_path}': {e}")
+            return {}
+    
+    def key_for(self, file_path: str) -> Optional[str]:
+        """Return the cache key of a file's current contents, or None if it can't be read"""
+        try:
+            with open(file_path, 'rb') as f:
+                content_hash = hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            return None
+        return f"{VALIDATOR_VERSION}:{self.schema_hash}:{content_hash}"
+    
+    def get(self, key: Optional[str], file_path: str) -> Optional[Dict]:
+        """Return the cached result for a key, reported under file_path, or None on a miss"""
+        entry = self.entries.get(key) if key else None
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        self.time_saved += entry["elapsed"]
+        # Recency is kept in memory and written along with the next new result or
+        # eviction; a run that only hits the cache leaves the file untouched
+        entry["last_used"] = time.time()
+        # The same content may live under another name, so the path isn't cached
+        return dict(entry["result"], path=file_path)
+    
+    def put(self, key: Optional[str], result: Dict, elapsed: float) -> None:
+        """Cache a result along with the time it took to produce"""
+        if not key:
+            return
+        self.entries[key] = {
+            "result": {name: value for name, value in result.items() if name != "path"},
+            "elapsed": elapsed,
+            "last_used": time.time()
+        }
+        self._dirty = True
+        self._evict()
+    
+    def _evict(self) -> None:
+        """Drop the least recently used results beyond max_entries"""
+        if len(self.entries) <= self.max_entries:
+            return
+        newest = sorted(self.entries.items(), key=lambda item: item[1]["last_used"], reverse=True)
+        self.entries = dict(newest[:self.max_entries])
+        self._dirty = True
+    
+    def save(self) -> None:
+        """Write the cache back to disk if results were added or evicted"""
+        if not self._dirty:
+            return
+        
+        # Written atomically so an interrupted run never leaves a truncated cache
+        try:
+            write_json_file(self.cache_path, {"validator_version": VALIDATOR_VERSION, "entries": self.entries},
+                            pretty=False, fsync=False)
+            self._dirty = False
+        except OSError as e:
+            logger.warning(f"Could not write validation cache '{self.cache_path}': {e}")
+    
+    def summary(self) -> str:
+        """Describe how much work the cache saved in this run"""
+        total = self.hits + self.misses
+        hit_rate = (self.hits / total) * 100 if total else 0.0
+        return (f"Validation cache: {self.hits}/{total} files unchanged ({hit_rate:.1f}% hit rate), "
+                f"saved ~{self.time_saved:.2f}s")
+
+
 class DialogueValidator:
     """Comprehensive validator for dialogue JSON files"""
     
     def __init__(self, schema_path: str = "dialogue_schema.json", 
-                 schema_version: str = "1.0"):
-        """Initialize the validator with schema path and expected version"""
+                 schema_version: str = "1.0", cache_path: Optional[str] = None):
+        """
+        Initialize the validator with schema path and expected version
+        
+        Args:
+            schema_path: Path to the JSON schema
+            schema_version: Schema version files are expected to declare
+            cache_path: File to keep validation results in so unchanged files
+                aren't checked again; None disables the cache
+        """
         self.schema_path = schema_path
         self.schema_version = schema_version
         self.schema = self._load_schema()
+        self.schema_hash = schema_hash(self.schema)
+        self.schema_validator = get_schema_validator(self.schema)
+        self.cache = ValidationCache(cache_path, self.schema_hash) if cache_path else None
+        self._reference_index = None
         self.statistics = {
             "files_checked": 0,
             "files_valid": 0,
@@ -40,8 +171,7 @@ class DialogueValidator:
     def _load_schema(self) -> Dict:
         """Load the JSON schema file"""
         try:
-            with open(self.schema_path, 'r') as f:
-                return json.load(f)
+            return read_json_file(self.schema_path)
         except FileNotFoundError:
             logger.error(f"Schema file '{self.schema_path}' not found.")
             sys.exit(1)
@@ -52,8 +182,8 @@ class DialogueValidator:
     def load_dialogue_file(self, file_path: str) -> Dict:
         """Load a dialogue JSON file"""
         try:
-            with open(file_path, 'r') as f:
-                return json.load(f)
+            # Parsed in chunks so a huge file is never held as one string
+            return load_dialogue_json(file_path)
         except FileNotFoundError:
             logger.error(f"Dialogue file '{file_path}' not found.")
             sys.exit(1)
@@ -63,53 +193,39 @@ class DialogueValidator:
     
     def validate_schema(self, dialogue_data: Dict) -> Tuple[bool, Optional[ValidationError]]:
         """Validate dialogue data against the schema"""
-        try:
-            validate(instance=dialogue_data, schema=self.schema)
+        errors = self.validate_schema_all(dialogue_data)
+        if not errors:
             return True, None
-        except ValidationError as e:
-            return False, e
+        return False, best_match(errors)
+    
+    def validate_schema_all(self, dialogue_data: Dict) -> List[ValidationError]:
+        """Validate dialogue data against the schema and return every error in one pass"""
+        return list(self.schema_validator.iter_errors(dialogue_data))
+    
+    def _get_reference_index(self, dialogue_data: Dict) -> ReferenceIndex:
+        """Index the dialogue data once and share it between the reference checks"""
+        if self._reference_index is None or self._reference_index[0] is not dialogue_data:
+            self._reference_index = (dialogue_data, ReferenceIndex(dialogue_data))
+        return self._reference_index[1]
     
     def check_dialogue_references(self, dialogue_data: Dict) -> Tuple[List[str], List[str]]:
         """Check for missing or circular dialogue references"""
         errors = []
         warnings = []
-        
-        # Get all dialogue IDs
-        dialogue_ids = {d["id"] for d in dialogue_data["dialogues"]}
+        index = self._get_reference_index(dialogue_data)
         
         # Check starting dialogue
-        if dialogue_data["starting_dialogue"] not in dialogue_ids:
+        if dialogue_data["starting_dialogue"] not in index.adjacency:
             errors.append(f"Starting dialogue '{dialogue_data['starting_dialogue']}' doesn't exist in dialogues array")
         
         # Check next_dialogue references
-        for dialogue in dialogue_data["dialogues"]:
-            for response in dialogue["responses"]:
-                next_id = response["next_dialogue"]
-                if next_id is not None and next_id not in dialogue_ids:
-                    errors.append(f"In dialogue '{dialogue['id']}', response '{response['id']}' references non-existent dialogue '{next_id}'")
+        for dialogue_id, response_id, next_id in index.broken_references:
+            errors.append(f"In dialogue '{dialogue_id}', response '{response_id}' references non-existent dialogue '{next_id}'")
         
         # Check for dialogues that can't be reached from starting point
-        reachable = set()
-        to_check = [dialogue_data["starting_dialogue"]]
-        
-        while to_check:
-            current = to_check.pop()
-            if current in reachable or current is None:
-                continue
-                
-            reachable.add(current)
-            
-            # Find dialogue object
-            dialogue = next((d for d in dialogue_data["dialogues"] if d["id"] == current), None)
-            if dialogue:
-                # Add all next_dialogue values to check
-                for response in dialogue["responses"]:
-                    if response["next_dialogue"] and response["next_dialogue"] not in reachable:
-                        to_check.append(response["next_dialogue"])
-        
-        unreachable = dialogue_ids - reachable
-        if unreachable:
-            for d_id in unreachable:
+        reachable = reachable_from(dialogue_data["starting_dialogue"], index.adjacency)
+        for d_id in index.dialogue_ids:
+            if d_id not in reachable:
                 warnings.append(f"Dialogue '{d_id}' is unreachable from the starting dialogue")
         
         # Check for circular references and dead ends
@@ -119,35 +235,27 @@ class DialogueValidator:
     
     def _check_for_circular_references(self, dialogue_data: Dict, warnings: List[str]) -> None:
         """Check for circular references and ensure proper conversation endings"""
-        dialogue_dict = {d["id"]: d for d in dialogue_data["dialogues"]}
-        
-        # Track paths to detect cycles
-        for dialogue_id in dialogue_dict:
-            path = []
-            self._dfs_check_cycles(dialogue_id, dialogue_dict, path, set(), warnings)
-    
-    def _dfs_check_cycles(self, dialogue_id: str, dialogue_dict: Dict, 
-                         path: List[str], visited: Set[str], warnings: List[str]) -> None:
-        """Depth-first search to check for dialogue cycles"""
-        if dialogue_id in path:
-            cycle = path[path.index(dialogue_id):] + [dialogue_id]
-            warnings.append(f"Circular dialogue reference detected: {' -> '.join(cycle)}")
-            return
+        index = self._get_reference_index(dialogue_data)
+        adjacency = index.adjacency
+        components = strongly_connected_components(adjacency)
         
-        if dialogue_id in visited or dialogue_id is None:
-            return
-            
-        visited.add(dialogue_id)
-        path.append(dialogue_id)
-        
-        dialogue = dialogue_dict.get(dialogue_id)
-        if dialogue:
-            for response in dialogue["responses"]:
-                next_id = response["next_dialogue"]
-                if next_id:
-                    self._dfs_check_cycles(next_id, dialogue_dict, path.copy(), visited, warnings)
-        
-        path.pop()
+        # Report each family of mutually reachable dialogues once
+        for component in reversed(components):
+            if not is_cyclic(component, adjacency):
+                continue
+            cycle = find_cycle(component, adjacency)
+            message = f"Circular dialogue reference detected: {' -> '.join(cycle)}"
+            if len(component) > len(cycle) - 1:
+                message += f" ({len(component)} dialogues in this loop)"
+            warnings.append(message)
+        
+        # Report the places a player can get stuck without reaching an ending
+        for component in reversed(find_closed_loops(components, adjacency, index.terminals)):
+            if is_cyclic(component, adjacency):
+                cycle = find_cycle(component, adjacency)
+                warnings.append(f"Dialogue loop has no exit to the end of the conversation: {' -> '.join(cycle)}")
+            else:
+                warnings.append(f"Dialogue '{component[0]}' is a dead end: no response ends the conversation or leads to another dialogue")
     
     def check_quest_references(self, dialogue_data: Dict) -> Tuple[List[str], List[str]]:
         """Check for valid quest references in dialogue scripts"""
@@ -161,35 +269,16 @@ class DialogueValidator:
         # Get all quest IDs
         quest_ids = {q["id"] for q in dialogue_data["quests"]}
         
-        # Check script references to quests in dialogue entries
-        for dialogue in dialogue_data["dialogues"]:
-            # Check on_entry script if it exists
-            if dialogue.get("on_entry") and dialogue["on_entry"] is not None:
-                script = dialogue["on_entry"]
-                self._check_script_quest_reference(script, quest_ids, dialogue["id"], None, errors)
-            
-            # Check response scripts
-            for response in dialogue["responses"]:
-                if response.get("script") and response["script"] is not None:
-                    script = response["script"]
-                    self._check_script_quest_reference(script, quest_ids, dialogue["id"], response["id"], errors)
-            
-        # Check for unused quests
+        # Check script references to quests in on_entry and response scripts,
+        # collecting the referenced quests along the way
         referenced_quest_ids = set()
-        for dialogue in dialogue_data["dialogues"]:
-            # Get references from on_entry
-            if dialogue.get("on_entry") and dialogue["on_entry"] is not None:
-                quest_id = self._extract_quest_id_from_script(dialogue["on_entry"])
-                if quest_id:
-                    referenced_quest_ids.add(quest_id)
-            
-            # Get references from response scripts
-            for response in dialogue["responses"]:
-                if response.get("script") and response["script"] is not None:
-                    quest_id = self._extract_quest_id_from_script(response["script"])
-                    if quest_id:
-                        referenced_quest_ids.add(quest_id)
+        for dialogue_id, response_id, script in self._get_reference_index(dialogue_data).scripts:
+            self._check_script_quest_reference(script, quest_ids, dialogue_id, response_id, errors)
+            quest_id = self._extract_quest_id_from_script(script)
+            if quest_id:
+                referenced_quest_ids.add(quest_id)
         
+        # Check for unused quests
         unused_quests = quest_ids - referenced_quest_ids
         if unused_quests:
             for quest_id in unused_quests:
@@ -345,11 +434,46 @@ class DialogueValidator:
     
     def validate_file(self, file_path: str) -> Tuple[bool, Dict]:
         """Validate a single dialogue file and return results"""
+        result = self._check_file_cached(file_path)
+        self.record_statistics(result)
+        self.save_cache()
+        return len(result["all_errors"]) == 0, result
+    
+    def _lookup_cache(self, file_path: str) -> Tuple[Optional[str], Optional[Dict]]:
+        """Return the file's cache key and its cached result, if the cache has one"""
+        if self.cache is None:
+            return None, None
+        # The key hashes the bytes on disk, so journaled saves must be in the file first
+        dialogue_manager.apply_pending_journal(file_path)
+        key = self.cache.key_for(file_path)
+        result = self.cache.get(key, file_path)
+        if result is not None:
+            logger.info(f"Validating file: {file_path} (unchanged, using cached result)")
+        return key, result
+    
+    def _check_file_cached(self, file_path: str) -> Dict:
+        """Check a file unless the cache already holds the result for its contents"""
+        key, result = self._lookup_cache(file_path)
+        if result is None:
+            started = time.perf_counter()
+            result = self.check_file(file_path)
+            if self.cache is not None:
+                self.cache.put(key, result, time.perf_counter() - started)
+        return result
+    
+    def save_cache(self) -> None:
+        """Persist any new validation results"""
+        if self.cache is not None:
+            self.cache.save()
+    
+    def check_file(self, file_path: str) -> Dict:
+        """Run every check on a dialogue file without touching the statistics"""
         logger.info(f"Validating file: {file_path}")
         result = {
             "path": file_path,
             "valid_schema": False,
             "schema_error": None,
+            "schema_errors": [],
             "reference_errors": [],
             "reference_warnings": [],
             "quest_errors": [],
@@ -365,12 +489,16 @@ class DialogueValidator:
         # Load the dialogue file
         dialogue_data = self.load_dialogue_file(file_path)
         
-        # Validate against schema
-        is_valid, validation_error = self.validate_schema(dialogue_data)
-        result["valid_schema"] = is_valid
-        if not is_valid and validation_error:
-            result["schema_error"] = str(validation_error)
-            result["all_errors"].append(f"Schema error: {validation_error}")
+        # Validate against schema, collecting every error rather than only the first
+        validation_errors = self.validate_schema_all(dialogue_data)
+        result["valid_schema"] = not validation_errors
+        if validation_errors:
+            result["schema_error"] = str(best_match(validation_errors))
+            for validation_error in validation_errors:
+                location = " → ".join(str(p) for p in validation_error.path) or "(root)"
+                message = f"{validation_error.message} at {location}"
+                result["schema_errors"].append(message)
+                result["all_errors"].append(f"Schema error: {message}")
         
         # Check dialogue references
         ref_errors, ref_warnings = self.check_dialogue_references(dialogue_data)
@@ -406,7 +534,10 @@ class DialogueValidator:
         result["quest_progression_warnings"] = quest_progression_warnings
         result["all_warnings"].extend(quest_progression_warnings)
         
-        # Update statistics
+        return result
+    
+    def record_statistics(self, result: Dict) -> None:
+        """Add a file's validation result to the statistics"""
         self.statistics["files_checked"] += 1
         if not result["all_errors"]:
             self.statistics["files_valid"] += 1
@@ -422,15 +553,24 @@ class DialogueValidator:
         for warning in result["all_warnings"]:
             warning_type = warning.split(" ")[0]
             self.statistics["warnings_by_type"][warning_type] = self.statistics["warnings_by_type"].get(warning_type, 0) + 1
-        
-        return len(result["all_errors"]) == 0, result
     
-    def validate_directory(self, directory_path: str, pattern: str = "*.json") -> List[Dict]:
-        """Validate all JSON files in a directory"""
+    def validate_directory(self, directory_path: str, pattern: str = "*.json", jobs: int = 1) -> List[Dict]:
+        """
+        Validate all JSON files in a directory
+        
+        Args:
+            directory_path: Directory to search for dialogue files
+            pattern: Glob pattern of the files to validate
+            jobs: Number of worker processes; 1 validates in this process,
+                0 uses one worker per CPU core
+        
+        Returns:
+            The result dicts in file name order, whatever order the files finished in
+        """
         results = []
         
         # Find all JSON files in the directory
-        file_paths = glob.glob(os.path.join(directory_path, pattern))
+        file_paths = sorted(glob.glob(os.path.join(directory_path, pattern)))
         
         if not file_paths:
             logger.warning(f"No files matching pattern '{pattern}' found in '{directory_path}'")
@@ -438,10 +578,56 @@ class DialogueValidator:
         
         logger.info(f"Found {len(file_paths)} files to validate")
         
-        # Validate each file
+        if jobs == 1 or len(file_paths) == 1:
+            # Validate each file
+            for file_path in file_paths:
+                result = self._check_file_cached(file_path)
+                self.record_statistics(result)
+                results.append(result)
+            self.save_cache()
+            return results
+        
+        # Only the files that changed since the last run go to the workers
+        keys = []
         for file_path in file_paths:
-            _, result = self.validate_file(file_path)
+            key, result = self._lookup_cache(file_path)
+            keys.append(key)
             results.append(result)
+        pending = [position for position, result in enumerate(results) if result is None]
+        
+        if pending:
+            checked = self._validate_in_parallel([file_paths[position] for position in pending],
+                                                 jobs or os.cpu_count())
+            for position, (result, elapsed) in zip(pending, checked):
+                results[position] = result
+                if self.cache is not None:
+                    self.cache.put(keys[position], result, elapsed)
+        
+        # Statistics are recorded in file order so the report doesn't depend on scheduling
+        for result in results:
+            self.record_statistics(result)
+        self.save_cache()
+        return results
+    
+    def _validate_in_parallel(self, file_paths: List[str], jobs: int) -> List[Tuple[Dict, float]]:
+        """
+        Validate files in a process pool, reporting each file as soon as it's done
+        
+        Returns:
+            (result, seconds spent checking) for each file, in the order given
+        """
+        results = [None] * len(file_paths)
+        
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(self.schema_path, self.schema_version)) as executor:
+            futures = {executor.submit(_check_file_in_worker, file_path): position
+                       for position, file_path in enumerate(file_paths)}
+            
+            for done, future in enumerate(as_completed(futures), start=1):
+                result, elapsed = future.result()
+                results[futures[future]] = (result, elapsed)
+                status = "✅" if not result["all_errors"] else "❌"
+                logger.info(f"[{done}/{len(file_paths)}] {status} {result['path']}")
         
         return results
     
@@ -581,6 +767,23 @@ class DialogueValidator:
         return upgraded
 
 
+# Validator owned by each worker process of a parallel directory run
+_worker_validator = None
+
+
+def _init_worker(schema_path: str, schema_version: str) -> None:
+    """Create the worker process's validator, loading the schema once per process"""
+    global _worker_validator
+    _worker_validator = DialogueValidator(schema_path=schema_path, schema_version=schema_version)
+
+
+def _check_file_in_worker(file_path: str) -> Tuple[Dict, float]:
+    """Validate one file in a worker process, timing the check for the results cache"""
+    started = time.perf_counter()
+    result = _worker_validator.check_file(file_path)
+    return result, time.perf_counter() - started
+
+
 def main():
     parser = argparse.ArgumentParser(description='Validate dialogue JSON files against schema and best practices')
     parser.add_argument('--file', help='Specific dialogue JSON file to validate')
@@ -591,6 +794,9 @@ def main():
     parser.add_argument('--output-dir', help='Output directory for fixed versions (only used with --fix)')
     parser.add_argument('--verbose', '-v', action='store_true', help='Show detailed warning information')
     parser.add_argument('--quiet', '-q', action='store_true', help='Show only summary information')
+    parser.add_argument('--jobs', '-j', type=int, default=1, help='Number of worker processes for --dir (default: 1, 0 = one per CPU core)')
+    parser.add_argument('--cache-file', help=f'File that keeps results of unchanged files between runs (default: {DEFAULT_CACHE_FILE} in the validated directory)')
+    parser.add_argument('--no-cache', action='store_true', help='Check every file again without reading or updating the results cache')
     
     args = parser.parse_args()
     
@@ -600,8 +806,11 @@ def main():
     elif args.verbose:
         logger.setLevel(logging.DEBUG)
     
-    # Create validator
-    validator = DialogueValidator(schema_path=args.schema)
+    # Create validator, keeping the results cache with the files it describes
+    cache_path = None
+    if not args.no_cache and (args.file or args.dir):
+        cache_path = args.cache_file or os.path.join(args.dir or os.path.dirname(args.file), DEFAULT_CACHE_FILE)
+    validator = DialogueValidator(schema_path=args.schema, cache_path=cache_path)
     
     # Validate files
     results = []
@@ -639,15 +848,14 @@ def main():
                         file_path = Path(args.file)
                         output_path = file_path.with_stem(file_path.stem + "_fixed")
                     
-                    with open(output_path, 'w') as f:
-                        json.dump(fixed_data, f, indent=2)
+                    write_json_file(output_path, fixed_data)
                     logger.info(f"✍️  Fixed data written to {output_path}")
                 else:
                     logger.error("❌ Automatic fixes were not sufficient to make the file valid")
         
     elif args.dir:
         # Validate all files in a directory
-        results = validator.validate_directory(args.dir, args.pattern)
+        results = validator.validate_directory(args.dir, args.pattern, jobs=args.jobs)
         
         # Fix if requested
         if args.fix and args.output_dir:
@@ -669,8 +877,7 @@ def main():
                         file_name = os.path.basename(file_path)
                         output_path = os.path.join(args.output_dir, file_name)
                         
-                        with open(output_path, 'w') as f:
-                            json.dump(fixed_data, f, indent=2)
+                        write_json_file(output_path, fixed_data)
                         logger.info(f"✅ Fixed and saved: {output_path}")
                         fix_count += 1
                     else:
@@ -684,6 +891,8 @@ def main():
     
     # Print validation results
     validator.print_validation_results(results, args.verbose)
+    if args.dir and validator.cache is not None and results:
+        logger.info(f"\n{validator.cache.summary()}")
     
     # Return appropriate exit code
     if all(not r["all_errors"] for r in results):
@@ -4,6 +4,8 @@ import os
 import re
 from PIL import Image
 import base64
+from typewriter import typewriter_text
+from theme import apply_theme
 
 # Set page configuration
 st.set_page_config(
@@ -15,81 +17,7 @@ st.set_page_config(
 
 # Apply the 80s terminal retro styling
 def apply_terminal_style():
-    # CSS for retro terminal look
-    st.markdown("""
-    <style>
-    .main {
-        background-color: #000000;
-        color: #00FF00;
-        font-family: 'Courier New', monospace;
-    }
-    .stButton>button {
-        background-color: #000000;
-        color: #00FF00;
-        border: 1px solid #00FF00;
-        border-radius: 0px;
-        font-family: 'Courier New', monospace;
-        width: 100%;
-        text-align: left;
-        padding: 10px;
-        transition: background-color 0.3s ease;
-    }
-    .stButton>button:hover {
-        background-color: #003300;
-        color: #00FF00;
-    }
-    .stTextInput>div>div>input {
-        background-color: #000000;
-        color: #00FF00;
-        border: 1px solid #00FF00;
-        border-radius: 0px;
-        font-family: 'Courier New', monospace;
-    }
-    .stSidebar {
-        background-color: #000000;
-        color: #00FF00;
-    }
-    .css-1kyxreq {
-        background-color: #000000;
-        color: #00FF00;
-    }
-    .css-1kyxreq a {
-        color: #00FFFF !important;
-    }
-    .dialog-text {
-        background-color: #000000;
-        color: #00FF00;
-        border: 1px solid #00FF00;
-        padding: 10px;
-        font-family: 'Courier New', monospace;
-        margin-bottom: 20px;
-        position: relative;
-    }
-    .dialog-header {
-        color: #FFFFFF;
-        margin-bottom: 5px;
-        font-weight: bold;
-    }
-    .terminal-cursor {
-        animation: blink 1s step-end infinite;
-    }
-    @keyframes blink {
-        50% { opacity: 0; }
-    }
-    .history-entry {
-        margin-bottom: 10px;
-        border-bottom: 1px dashed #003300;
-        padding-bottom: 10px;
-    }
-    .quest-log {
-        background-color: #000000;
-        color: #00FF00;
-        border: 1px solid #00FF00;
-        padding: 10px;
-        margin-top: 20px;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    apply_theme("editor")
 
 # Sample dialogue data structure (can be replaced with your Twine data)
 # This is a simplified version of what you'd typically have
@@ -250,14 +178,6 @@ def load_dialogue_data():
     # For this prototype, we'll use the sample data
     return SAMPLE_DIALOGUE
 
-# Function to simulate typing effect
-def typewriter_text(text, speed=10):
-    typed_text = st.empty()
-    for i in range(len(text) + 1):
-        typed_text.markdown(f"<div class='dialog-text'>{text[:i]}▋</div>", unsafe_allow_html=True)
-        # In a real implementation, you'd add a delay here
-        # But for the prototype, we'll skip that
-
 # Function to handle script actions
 def handle_script(script_name):
     if not script_name:
@@ -317,7 +237,7 @@ def main():
         
         if is_new_dialogue:
             st.markdown(f"<div class='dialog-header'>{current_dialogue['npc']}</div>", unsafe_allow_html=True)
-            typewriter_text(current_dialogue["text"])
+            typewriter_text(current_dialogue["text"], theme="editor")
             
             # Add to history
             st.session_state.conversation_history.append({
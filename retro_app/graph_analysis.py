@@ -0,0 +1,200 @@
+"""
+Graph Analysis for Terminal Dialogue System
+Linear-time structural checks over the dialogue graph (reachability, loops, dead ends)
+"""
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# Adjacency index: dialogue ID -> IDs of the existing dialogues its responses lead to
+Adjacency = Dict[str, List[str]]
+
+
+class ReferenceIndex:
+    """
+    Everything the reference checks need, gathered in one pass over the dialogues
+
+    Attributes:
+        dialogue_ids: Dialogue IDs in file order (first occurrence of duplicates)
+        adjacency: Dialogue ID -> IDs of the existing dialogues its responses lead to.
+            When a dialogue ID is duplicated the first occurrence is used, like the game does.
+        terminals: IDs of dialogues with a response that ends the conversation
+        broken_references: (dialogue ID, response ID, missing next_dialogue) for every
+            response that leads to a dialogue that doesn't exist
+        scripts: (dialogue ID, response ID or None for on_entry, script) for every script
+    """
+
+    def __init__(self, dialogue_data: Dict[str, Any]):
+        """Index the dialogue data"""
+        self.adjacency: Adjacency = {}
+        self.terminals: Set[str] = set()
+        self.scripts: List[Tuple[str, Optional[str], str]] = []
+        self.broken_references: List[Tuple[str, str, str]] = []
+
+        edges = []
+        for dialogue in dialogue_data.get("dialogues", []):
+            dialogue_id = dialogue["id"]
+            first = dialogue_id not in self.adjacency
+            if first:
+                self.adjacency[dialogue_id] = []
+
+            if dialogue.get("on_entry"):
+                self.scripts.append((dialogue_id, None, dialogue["on_entry"]))
+
+            for response in dialogue.get("responses", []):
+                next_id = response.get("next_dialogue")
+                if next_id is None:
+                    if first:
+                        self.terminals.add(dialogue_id)
+                else:
+                    edges.append((dialogue_id, response["id"], next_id, first))
+                if response.get("script"):
+                    self.scripts.append((dialogue_id, response["id"], response["script"]))
+
+        self.dialogue_ids = list(self.adjacency)
+        for dialogue_id, response_id, next_id, first in edges:
+            if next_id not in self.adjacency:
+                self.broken_references.append((dialogue_id, response_id, next_id))
+            elif first:
+                self.adjacency[dialogue_id].append(next_id)
+
+        # Several responses may lead to the same dialogue; keep each edge once
+        for dialogue_id, targets in self.adjacency.items():
+            if len(targets) > 1:
+                self.adjacency[dialogue_id] = list(dict.fromkeys(targets))
+
+
+def reachable_from(start_id: Optional[str], adjacency: Adjacency) -> Set[str]:
+    """Return the IDs of all dialogues reachable from start_id (including itself)"""
+    if start_id not in adjacency:
+        return set()
+
+    reachable = {start_id}
+    to_check = [start_id]
+    while to_check:
+        for next_id in adjacency[to_check.pop()]:
+            if next_id not in reachable:
+                reachable.add(next_id)
+                to_check.append(next_id)
+    return reachable
+
+
+def strongly_connected_components(adjacency: Adjacency) -> List[List[str]]:
+    """
+    Find the strongly connected components of the dialogue graph
+
+    Iterative version of Tarjan's algorithm, O(V + E) and safe for graphs
+    deeper than the recursion limit. Components are returned in reverse
+    topological order: every component comes after the components it leads to.
+    """
+    index_of: Dict[str, int] = {}
+    lowlink: Dict[str, int] = {}
+    on_stack: Set[str] = set()
+    stack: List[str] = []
+    components: List[List[str]] = []
+    next_index = 0
+
+    for root in adjacency:
+        if root in index_of:
+            continue
+
+        index_of[root] = lowlink[root] = next_index
+        next_index += 1
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(adjacency[root]))]
+
+        while work:
+            node, edges = work[-1]
+            descended = False
+            for next_id in edges:
+                if next_id not in index_of:
+                    index_of[next_id] = lowlink[next_id] = next_index
+                    next_index += 1
+                    stack.append(next_id)
+                    on_stack.add(next_id)
+                    work.append((next_id, iter(adjacency[next_id])))
+                    descended = True
+                    break
+                if next_id in on_stack and index_of[next_id] < lowlink[node]:
+                    lowlink[node] = index_of[next_id]
+            if descended:
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                if lowlink[node] < lowlink[parent]:
+                    lowlink[parent] = lowlink[node]
+
+            if lowlink[node] == index_of[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                component.reverse()
+                components.append(component)
+
+    return components
+
+
+def is_cyclic(component: List[str], adjacency: Adjacency) -> bool:
+    """Check whether a strongly connected component contains a loop"""
+    return len(component) > 1 or component[0] in adjacency[component[0]]
+
+
+def find_cycle(component: List[str], adjacency: Adjacency) -> List[str]:
+    """
+    Find one shortest loop through the first dialogue of a cyclic component
+
+    Returns:
+        The loop as a list of IDs that starts and ends with the same dialogue
+    """
+    start = component[0]
+    members = set(component)
+    parents = {start: None}
+    queue = [start]
+    for node in queue:
+        for next_id in adjacency[node]:
+            if next_id == start:
+                cycle = [start]
+                while node is not None:
+                    cycle.append(node)
+                    node = parents[node]
+                cycle.reverse()
+                return cycle
+            if next_id in members and next_id not in parents:
+                parents[next_id] = node
+                queue.append(next_id)
+    return []
+
+
+def find_closed_loops(components: List[List[str]], adjacency: Adjacency,
+                      terminals: Set[str]) -> List[List[str]]:
+    """
+    Find the groups of dialogues the player can never leave
+
+    A component is closed when none of its dialogues can end the conversation
+    and none of its responses lead to another component. Every dialogue that
+    cannot reach an ending leads into one of these, so they are the places to fix.
+
+    Args:
+        components: Strongly connected components in reverse topological order
+        adjacency: The adjacency index
+        terminals: IDs of dialogues with a response that ends the conversation
+    """
+    component_of = {}
+    for number, component in enumerate(components):
+        for member in component:
+            component_of[member] = number
+
+    closed = []
+    for number, component in enumerate(components):
+        if any(member in terminals for member in component):
+            continue
+        leaves = any(component_of[next_id] != number
+                     for member in component for next_id in adjacency[member])
+        if not leaves:
+            closed.append(component)
+    return closed
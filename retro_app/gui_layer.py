@@ -7,250 +7,40 @@ import os
 from PIL import Image
 from typing import List, Dict, Any, Optional
 from data_layer import dialogue_manager
-from logic_layer import game_state
+from logic_layer import GameState, session_registry
+from typewriter import typewriter_text
+from theme import apply_theme
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Conversation log entries shown per sidebar page
+HISTORY_PAGE_SIZE = 20
+
+
+def get_game_state() -> GameState:
+    """Get the game state belonging to the current browser session"""
+    ctx = get_script_run_ctx()
+    session_key = ctx.session_id if ctx is not None else "default"
+    return session_registry.get_state(session_key)
 
 
 def apply_terminal_style():
     """Apply the retro terminal CSS styling"""
-    st.markdown("""
-    <style>
-    /* Base styling */
-    body {
-        margin: 0;
-        padding: 0;
-        background-color: #111;
-        color: #00FF00;
-        font-family: 'Courier New', monospace;
-        height: 100vh;
-        overflow: hidden;
-    }
-    
-    /* Main container to position the CRT in the center */
-    .main {
-        display: flex;
-        justify-content: center;
-        align-items: center;
-        height: 100vh;
-        padding: 0 !important;
-        max-width: 100% !important;
-    }
-    
-    /* CRT Monitor Bezel */
-    .block-container {
-        max-width: 1000px !important;
-        padding-top: 0 !important;
-        padding-left: 0 !important;
-        padding-right: 0 !important;
-        margin: 0 auto;
-        position: relative;
-    }
-    
-    /* CRT Screen Effect */
-    .stApp {
-        background-color: #000000;
-        border-radius: 20px;
-        border: 25px solid #333;
-        box-shadow: 
-            inset 0 0 10px rgba(0, 255, 0, 0.3),
-            0 0 30px rgba(0, 255, 0, 0.1),
-            0 10px 50px rgba(0, 0, 0, 0.8);
-        position: relative;
-        overflow: hidden;
-        margin: 40px auto;
-        width: 90% !important;
-        max-width: 900px;
-    }
-    
-    /* CRT monitor plastic frame */
-    .stApp::before {
-        content: "";
-        position: absolute;
-        top: -25px;
-        left: -25px;
-        right: -25px;
-        bottom: -25px;
-        background-color: #222;
-        border-radius: 30px;
-        border: 5px solid #111;
-        z-index: -1;
-    }
-    
-    /* CRT scanlines */
-    .stApp::after {
-        content: "";
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        bottom: 0;
-        background: linear-gradient(
-            rgba(0, 0, 0, 0) 50%, 
-            rgba(0, 0, 0, 0.15) 50%
-        );
-        background-size: 100% 4px;
-        pointer-events: none;
-        z-index: 999;
-    }
-    
-    /* Add CRT screen curvature */
-    .stApp {
-        border-radius: 20px;
-        overflow: hidden;
-    }
-    
-    /* CRT glare effect */
-    .stApp::before {
-        content: "";
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        bottom: 0;
-        background: radial-gradient(
-            ellipse at center,
-            rgba(0, 20, 0, 0) 0%,
-            rgba(0, 20, 0, 0.2) 80%,
-            rgba(0, 20, 0, 0.3) 100%
-        );
-        pointer-events: none;
-        z-index: 998;
-    }
-    
-    /* Add power button to the frame */
-    footer {
-        position: fixed;
-        right: calc(50% - 450px);
-        bottom: 10px;
-        z-index: 1000;
-    }
-    
-    footer:after {
-        content: "POWER";
-        position: absolute;
-        bottom: 25px;
-        right: 25px;
-        width: 60px;
-        height: 30px;
-        background-color: #222;
-        border: 2px solid #111;
-        border-radius: 5px;
-        color: #555;
-        font-size: 10px;
-        text-align: center;
-        line-height: 30px;
-        cursor: pointer;
-    }
-    
-    /* Buttons styling */
-    .stButton>button {
-        background-color: #000000;
-        color: #00FF00;
-        border: 1px solid #00FF00;
-        border-radius: 0px;
-        font-family: 'Courier New', monospace;
-        width: 100%;
-        text-align: left;
-        padding: 10px;
-        transition: background-color 0.3s ease;
-    }
-    
-    .stButton>button:hover {
-        background-color: #003300;
-        color: #00FF00;
-    }
-    
-    /* Terminal text styling */
-    .stTextInput>div>div>input {
-        background-color: #000000;
-        color: #00FF00;
-        border: 1px solid #00FF00;
-        border-radius: 0px;
-        font-family: 'Courier New', monospace;
-    }
-    
-    /* Sidebar styling */
-    .stSidebar {
-        background-color: #000000;
-        color: #00FF00;
-        border-left: 1px solid #00FF00;
-    }
-    
-    /* Dialog text styling */
-    .dialog-text {
-        background-color: #000000;
-        color: #00FF00;
-        border: 1px solid #00FF00;
-        padding: 10px;
-        font-family: 'Courier New', monospace;
-        margin-bottom: 20px;
-        position: relative;
-        box-shadow: 0 0 5px rgba(0, 255, 0, 0.3);
-    }
-    
-    .dialog-header {
-        color: #FFFFFF;
-        margin-bottom: 5px;
-        font-weight: bold;
-        text-shadow: 0 0 5px rgba(255, 255, 255, 0.5);
-    }
-    
-    /* Terminal cursor */
-    .terminal-cursor {
-        animation: blink 1s step-end infinite;
-    }
-    
-    @keyframes blink {
-        0%, 100% { opacity: 1; }
-        50% { opacity: 0; }
-    }
-    
-    /* Conversation history */
-    .history-entry {
-        margin-bottom: 10px;
-        border-bottom: 1px dashed #003300;
-        padding-bottom: 10px;
-    }
-    
-    /* Quest log styling */
-    .quest-log {
-        background-color: #000000;
-        color: #00FF00;
-        border: 1px solid #00FF00;
-        padding: 10px;
-        margin-top: 20px;
-        box-shadow: 0 0 5px rgba(0, 255, 0, 0.3);
-    }
-    
-    /* Text flicker animation */
-    @keyframes textFlicker {
-        0% { text-shadow: 0 0 5px rgba(0, 255, 0, 0.8); }
-        5% { text-shadow: 0 0 10px rgba(0, 255, 0, 0.8); }
-        10% { text-shadow: 0 0 5px rgba(0, 255, 0, 0.8); }
-        15% { text-shadow: 0 0 7px rgba(0, 255, 0, 0.8); }
-        25% { text-shadow: 0 0 5px rgba(0, 255, 0, 0.8); }
-        30% { text-shadow: 0 0 8px rgba(0, 255, 0, 0.8); }
-        70% { text-shadow: 0 0 5px rgba(0, 255, 0, 0.8); }
-        80% { text-shadow: 0 0 9px rgba(0, 255, 0, 0.8); }
-        100% { text-shadow: 0 0 5px rgba(0, 255, 0, 0.8); }
-    }
-    
-    .dialog-text, .dialog-header {
-        animation: textFlicker 3s infinite;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    apply_theme("terminal")
 
 
 def render_sidebar():
     """Render the sidebar with controls and information"""
+    game_state = get_game_state()
     st.sidebar.markdown("<h2 style='color: #00FF00;'>SYSTEM CONTROLS</h2>", unsafe_allow_html=True)
     
-    # Create a file selector for conversation files
-    conversation_files = ["Select a conversation..."] + dialogue_manager.get_available_conversations()
+    # Create a file selector for conversation files, labelled with their titles and sizes
+    conversations = {entry.name: entry for entry in dialogue_manager.get_conversation_entries()}
+    conversation_files = ["Select a conversation..."] + list(conversations)
     
     selected_conversation = st.sidebar.selectbox(
         "Load conversation", 
         conversation_files, 
+        format_func=lambda name: conversations[name].label() if name in conversations else name,
         key="conversation_selector"
     )
     
@@ -319,16 +109,38 @@ def render_sidebar():
     # Conversation history
     st.sidebar.markdown("<h2 style='color: #00FF00;'>CONVERSATION LOG</h2>", unsafe_allow_html=True)
     
+    history = game_state.conversation_history
     if st.sidebar.button("Clear History"):
-        game_state.conversation_history = []
+        history.clear()
+        st.session_state.history_pages_back = 0
         st.rerun()
     
-    for entry in game_state.conversation_history:
-        speaker_color = "#FFFF00" if entry.get("is_player", False) else "#00FFFF"
-        st.sidebar.markdown(
-            f"<div class='history-entry'><span style='color: {speaker_color};'>{entry['speaker']}:</span> {entry['text']}</div>", 
-            unsafe_allow_html=True
-        )
+    # Only the visible page is rendered, counted back from the most recent one
+    # so the log follows new entries unless the player has paged back
+    page_count = history.page_count(HISTORY_PAGE_SIZE)
+    pages_back = min(st.session_state.get("history_pages_back", 0), page_count - 1)
+    if page_count > 1:
+        older_column, newer_column = st.sidebar.columns(2)
+        if older_column.button("◀ OLDER", disabled=pages_back >= page_count - 1, key="history_older"):
+            st.session_state.history_pages_back = pages_back + 1
+            st.rerun()
+        if newer_column.button("NEWER ▶", disabled=pages_back == 0, key="history_newer"):
+            st.session_state.history_pages_back = pages_back - 1
+            st.rerun()
+        st.sidebar.caption(f"Page {page_count - pages_back} of {page_count} ({history.total} entries)")
+    
+    entries = history.page(page_count - 1 - pages_back, HISTORY_PAGE_SIZE)
+    if entries:
+        st.sidebar.markdown(render_history_html(entries), unsafe_allow_html=True)
+
+
+def render_history_html(entries: List[Dict[str, Any]]) -> str:
+    """Render conversation entries as one HTML block for a single markdown call"""
+    return "".join(
+        f"<div class='history-entry'><span style='color: {'#FFFF00' if entry.get('is_player', False) else '#00FFFF'};'>"
+        f"{entry['speaker']}:</span> {entry['text']}</div>"
+        for entry in entries
+    )
 
 
 def display_image(image_url: str):
@@ -346,20 +158,9 @@ def display_image(image_url: str):
         st.error(f"Unable to load image: {e}")
 
 
-def typewriter_text(text: str, speed: int = 10):
-    """Display text with a typewriter effect"""
-    typed_text = st.empty()
-    for i in range(len(text) + 1):
-        typed_text.markdown(
-            f"<div class='dialog-text'>{text[:i]}▋</div>", 
-            unsafe_allow_html=True
-        )
-        # In a real implementation, you'd add a delay here
-        # But for the prototype, we'll skip that
-
-
 def render_dialogue():
     """Render the current dialogue and its responses"""
+    game_state = get_game_state()
     # Terminal header
     st.markdown(
         "<h1 style='color: #00FF00; text-align: center;'>TERMINAL ACCESS v2.47</h1>", 
@@ -385,7 +186,7 @@ def render_dialogue():
                     unsafe_allow_html=True
                 )
                 if is_new_dialogue:
-                    typewriter_text(current_dialogue["text"])
+                    typewriter_text(current_dialogue["text"], theme="terminal")
                 else:
                     st.markdown(
                         f"<div class='dialog-text'>{current_dialogue['text']}</div>", 
@@ -397,7 +198,7 @@ def render_dialogue():
                 unsafe_allow_html=True
             )
             if is_new_dialogue:
-                typewriter_text(current_dialogue["text"])
+                typewriter_text(current_dialogue["text"], theme="terminal")
             else:
                 st.markdown(
                     f"<div class='dialog-text'>{current_dialogue['text']}</div>", 
@@ -460,6 +261,7 @@ def initialize_streamlit():
     apply_terminal_style()
     
     # Initialize session state for the first use
+    game_state = get_game_state()
     if not game_state.dialogue_data:
         try:
             game_state.load_dialogue("dialogue_data.json")
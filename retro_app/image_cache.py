@@ -0,0 +1,224 @@
+"""
+Image Cache for Terminal Dialogue System
+Character portraits fetched in the background, resized once and kept on disk and in memory
+"""
+import hashlib
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Optional, Tuple
+import requests
+from PIL import Image
+from data_layer import atomic_write
+
+# Largest portrait side kept, in pixels; the apps show portraits at 150-250 px
+DEFAULT_MAX_IMAGE_SIZE = (300, 300)
+
+# Bumped whenever the stored images change (e.g. a different resize), so old files aren't reused
+CACHE_VERSION = 1
+
+
+def cache_key(image_url: str) -> str:
+    """Get the disk cache name of an image URL"""
+    return hashlib.sha256(f"{CACHE_VERSION}:{image_url}".encode("utf-8")).hexdigest()
+
+
+class ImageCache:
+    """
+    Cache of character portraits
+
+    A portrait is downloaded once (with a timeout), scaled down and stored as
+    a PNG named after the hash of its URL, so it survives restarts and is
+    shared by every session. Decoded images are kept in a bounded LRU.
+    Lookups never wait for the network: a portrait that isn't cached yet is
+    fetched on a background thread and shows up on a later rerun.
+    """
+
+    def __init__(self, cache_directory: str, max_memory_images: int = 64, timeout: float = 5.0,
+                 max_image_size: Tuple[int, int] = DEFAULT_MAX_IMAGE_SIZE, workers: int = 4,
+                 retry_after: float = 60.0):
+        """
+        Args:
+            cache_directory: Directory for the resized PNGs; created when first needed
+            max_memory_images: Decoded images kept in memory
+            timeout: Seconds to wait for a server to connect and to send each chunk
+            max_image_size: Portraits are scaled down to fit in this (width, height)
+            workers: Portraits downloaded at the same time
+            retry_after: Seconds before a portrait that failed to load is tried again
+        """
+        self.cache_directory = cache_directory
+        self.max_memory_images = max_memory_images
+        self.timeout = timeout
+        self.max_image_size = max_image_size
+        self.retry_after = retry_after
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.fetches = 0
+        self.failures = 0
+        self._images: "OrderedDict[str, Image.Image]" = OrderedDict()
+        self._pending: Dict[str, Future] = {}
+        self._failed: Dict[str, Tuple[float, str]] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-cache")
+
+    def get(self, image_url: str, wait: Optional[float] = 0) -> Optional[Image.Image]:
+        """
+        Get a portrait if it is available without waiting for the network
+
+        Args:
+            image_url: URL (or local file path) of the image
+            wait: Seconds to wait for a download that isn't finished; None waits
+                until it is. The default returns at once.
+
+        Returns:
+            The scaled-down image, or None while it is still loading or if it failed
+        """
+        with self._lock:
+            image = self._images.get(image_url)
+            if image is not None:
+                self._images.move_to_end(image_url)
+                self.memory_hits += 1
+                return image
+
+        image = self._read_disk(image_url)
+        if image is not None:
+            self._remember(image_url, image)
+            with self._lock:
+                self.disk_hits += 1
+            return image
+
+        future = self.prefetch(image_url)
+        if future is None or wait == 0:
+            return None
+        try:
+            return future.result(timeout=wait)
+        except Exception:
+            return None
+
+    def prefetch(self, image_url: str) -> Optional[Future]:
+        """
+        Start loading a portrait in the background if it isn't cached
+
+        Returns:
+            The pending load, or None if the image is cached or recently failed
+        """
+        with self._lock:
+            if image_url in self._images:
+                return None
+            pending = self._pending.get(image_url)
+            if pending is not None:
+                return pending
+            failed = self._failed.get(image_url)
+            if failed is not None and time.monotonic() - failed[0] < self.retry_after:
+                return None
+            future = self._executor.submit(self._load, image_url)
+            self._pending[image_url] = future
+        return future
+
+    def prefetch_all(self, image_urls: Iterable[str]) -> None:
+        """Start loading several portraits in the background"""
+        for image_url in image_urls:
+            if image_url:
+                self.prefetch(image_url)
+
+    def get_error(self, image_url: str) -> Optional[str]:
+        """Get why a portrait last failed to load, or None"""
+        with self._lock:
+            failed = self._failed.get(image_url)
+        return failed[1] if failed is not None else None
+
+    def clear_memory(self) -> None:
+        """Drop the decoded images; the disk cache is kept"""
+        with self._lock:
+            self._images.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit and fetch counters"""
+        with self._lock:
+            return {"memory_hits": self.memory_hits, "disk_hits": self.disk_hits,
+                    "fetches": self.fetches, "failures": self.failures,
+                    "in_memory": len(self._images), "pending": len(self._pending)}
+
+    def close(self) -> None:
+        """Stop the download threads, waiting for the downloads in progress"""
+        self._executor.shutdown(wait=True)
+
+    def _disk_path(self, image_url: str) -> str:
+        """Path of an image in the disk cache, spread over subdirectories by hash prefix"""
+        source = image_url
+        if not image_url.startswith(("http://", "https://")):
+            # A local file is cached per version, so editing it is picked up
+            try:
+                stat = os.stat(image_url)
+                source = f"{image_url}:{stat.st_mtime_ns}:{stat.st_size}"
+            except OSError:
+                pass
+        key = cache_key(source)
+        return os.path.join(self.cache_directory, key[:2], key + ".png")
+
+    def _read_disk(self, image_url: str) -> Optional[Image.Image]:
+        """Decode an image from the disk cache, or None if it isn't there"""
+        try:
+            image = Image.open(self._disk_path(image_url))
+            image.load()
+            return image
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            return None  # damaged; it is fetched and written again
+
+    def _remember(self, image_url: str, image: Image.Image) -> None:
+        """Add a decoded image to the memory LRU"""
+        with self._lock:
+            self._images[image_url] = image
+            self._images.move_to_end(image_url)
+            while len(self._images) > self.max_memory_images:
+                self._images.popitem(last=False)
+
+    def _download(self, image_url: str) -> bytes:
+        """Get the raw image bytes from a URL or a local file"""
+        if not image_url.startswith(("http://", "https://")):
+            with open(image_url, 'rb') as file:
+                return file.read()
+        response = requests.get(image_url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.content
+
+    def _load(self, image_url: str) -> Optional[Image.Image]:
+        """Worker thread: download, scale down, store on disk and in memory"""
+        try:
+            image = Image.open(io.BytesIO(self._download(image_url)))
+            image.load()
+            image.thumbnail(self.max_image_size)
+            if image.mode not in ("1", "L", "LA", "P", "RGB", "RGBA", "I", "I;16"):
+                image = image.convert("RGBA")
+            encoded = io.BytesIO()
+            image.save(encoded, format="PNG", optimize=True)
+
+            path = self._disk_path(image_url)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # A lost cache file is just downloaded again, so it isn't worth an fsync
+                atomic_write(path, encoded.getvalue(), fsync=False)
+            except OSError:
+                pass  # a read-only cache still works from memory
+            self._remember(image_url, image)
+            with self._lock:
+                self.fetches += 1
+                self._failed.pop(image_url, None)
+            return image
+        except Exception as e:
+            with self._lock:
+                self.failures += 1
+                self._failed[image_url] = (time.monotonic(), str(e))
+            return None
+        finally:
+            with self._lock:
+                self._pending.pop(image_url, None)
+
+
+# Singleton instance for easy import, caching next to the apps
+image_cache = ImageCache(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".image_cache"))
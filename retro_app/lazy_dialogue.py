@@ -0,0 +1,189 @@
+"""
+Lazy Dialogue Data for Terminal Dialogue System
+Read-only dialogue data whose nodes are decoded from disk only when they are visited
+"""
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, Iterator, List, Optional
+from data_layer import FrozenDict, DialogueGraph
+from script_compiler import CompiledOp, compile_script, compile_condition
+
+
+class LazyDialogueSource(ABC):
+    """
+    Base class for dialogue files that can decode one node at a time
+
+    Subclasses locate and decode nodes and top-level fields on disk; this class
+    keeps a bounded LRU of decoded nodes and exposes the file as `data` (a
+    read-only mapping shaped like the JSON file) and `graph` (the DialogueGraph
+    lookup interface).
+
+    Subclasses set dialogue_count and implement find_dialogue, field_names,
+    _read_field and _read_dialogue; a subclass missing any of them can't be
+    instantiated.
+    """
+
+    dialogue_count = 0
+
+    def __init__(self, file_path: str, max_cached_nodes: int):
+        """
+        Args:
+            file_path: Path of the file the nodes are read from
+            max_cached_nodes: Number of decoded dialogue nodes kept in memory
+        """
+        self.file_path = file_path
+        self.max_cached_nodes = max_cached_nodes
+        self._node_cache: "OrderedDict[int, FrozenDict]" = OrderedDict()
+        self._fields: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self.graph = LazyDialogueGraph(self)
+        self.data = LazyDialogueData(self)
+
+    @abstractmethod
+    def find_dialogue(self, dialogue_id: str) -> Optional[int]:
+        """Get the position of the first dialogue with an ID, or None"""
+
+    @abstractmethod
+    def field_names(self) -> List[str]:
+        """Get the top-level keys of the file, in file order"""
+
+    @abstractmethod
+    def _read_field(self, key: str) -> Any:
+        """Decode a top-level field other than "dialogues" """
+
+    @abstractmethod
+    def _read_dialogue(self, index: int) -> FrozenDict:
+        """Decode the dialogue node at a position"""
+
+    def field(self, key: str) -> Any:
+        """Get a top-level field other than "dialogues", decoding it on first use"""
+        if key not in self._fields:
+            self._fields[key] = self._read_field(key)
+        return self._fields[key]
+
+    def dialogue(self, index: int) -> FrozenDict:
+        """Get the dialogue node at a position, through the LRU of decoded nodes"""
+        with self._lock:
+            node = self._node_cache.get(index)
+            if node is not None:
+                self._node_cache.move_to_end(index)
+                return node
+
+        node = self._read_dialogue(index)
+        with self._lock:
+            self._node_cache[index] = node
+            while len(self._node_cache) > self.max_cached_nodes:
+                self._node_cache.popitem(last=False)
+        return node
+
+    def get_cache_stats(self) -> Dict[str, int]:
+        """Get the number of decoded nodes held in memory"""
+        return {"cached_nodes": len(self._node_cache), "max_cached_nodes": self.max_cached_nodes,
+                "dialogues": self.dialogue_count}
+
+
+class LazyDialogueList(Sequence):
+    """The "dialogues" array of a lazy source; nodes are decoded when indexed"""
+
+    def __init__(self, source: LazyDialogueSource):
+        self.source = source
+
+    def __len__(self) -> int:
+        return self.source.dialogue_count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.source.dialogue(position) for position in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("dialogue index out of range")
+        return self.source.dialogue(index)
+
+
+class LazyDialogueData(Mapping):
+    """
+    Read-only dialogue data backed by a lazy source
+
+    Behaves like the dict loaded from the JSON file: top-level fields are
+    decoded on first access and "dialogues" is a sequence decoded per node.
+    """
+
+    def __init__(self, source: LazyDialogueSource):
+        self.source = source
+        self.graph = source.graph
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.source.field_names():
+            raise KeyError(key)
+        if key == "dialogues":
+            return LazyDialogueList(self.source)
+        return self.source.field(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.source.field_names())
+
+    def __len__(self) -> int:
+        return len(self.source.field_names())
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.source.file_path!r})"
+
+
+class LazyDialogueGraph:
+    """The lookup interface of DialogueGraph, answered from a lazy source's index"""
+
+    def __init__(self, source: LazyDialogueSource):
+        self.source = source
+        # Sources with precompiled operations fill these in as nodes are decoded
+        self.scripts: Dict[str, CompiledOp] = {}
+        self.conditions: Dict[str, CompiledOp] = {}
+        self._quest_graph = None
+
+    def is_current(self, dialogue_data: Mapping) -> bool:
+        """The source is read-only, so its graph stays current"""
+        return dialogue_data is self.source.data
+
+    def get_dialogue(self, dialogue_id: str) -> Optional[FrozenDict]:
+        """Find a dialogue by its ID"""
+        index = self.source.find_dialogue(dialogue_id)
+        return None if index is None else self.source.dialogue(index)
+
+    def get_response(self, dialogue_id: str, response_id: str) -> Optional[FrozenDict]:
+        """Find a response by its ID within a dialogue"""
+        dialogue = self.get_dialogue(dialogue_id)
+        if dialogue is None:
+            return None
+        return next((response for response in dialogue.get("responses", [])
+                     if response.get("id") == response_id), None)
+
+    def get_script_op(self, script: str) -> CompiledOp:
+        """Get the compiled operation for a script command"""
+        op = self.scripts.get(script)
+        return op if op is not None else compile_script(script)
+
+    def get_condition_op(self, condition: str) -> CompiledOp:
+        """Get the compiled operation for a condition expression"""
+        op = self.conditions.get(condition)
+        return op if op is not None else compile_condition(condition)
+
+    def _quests(self) -> DialogueGraph:
+        """Index the quests and characters on first use; they are small next to the dialogues"""
+        if self._quest_graph is None:
+            self._quest_graph = DialogueGraph({"quests": self.source.data.get("quests", []),
+                                               "characters": self.source.data.get("characters", {})})
+        return self._quest_graph
+
+    def get_quest(self, quest_id: str) -> Optional[FrozenDict]:
+        """Find a quest by its ID"""
+        return self._quests().get_quest(quest_id)
+
+    def get_quest_stage(self, quest_id: str, stage_id: int) -> Optional[FrozenDict]:
+        """Find a quest stage by quest ID and stage ID"""
+        return self._quests().get_quest_stage(quest_id, stage_id)
+
+    def get_character_by_name(self, name: str) -> Optional[FrozenDict]:
+        """Find an entry of the "characters" section by its display name"""
+        return self._quests().get_character_by_name(name)
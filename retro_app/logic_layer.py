@@ -2,33 +2,86 @@
 Logic Layer for Terminal Dialogue System
 Handles dialogue navigation, game state, and quest tracking
 """
+import sys
+import time
+import threading
 from typing import Dict, List, Any, Optional, Union, Tuple
 from data_layer import dialogue_manager
+from conversation_history import DEFAULT_HISTORY_CAPACITY, ConversationHistory
+from state_space import DEFAULT_MAX_STATES, ReachabilityResult, StateKey, find_response_paths, get_state_encoder
+from script_compiler import (
+    compile_script, compile_condition,
+    SCRIPT_NOOP, SCRIPT_START_QUEST, SCRIPT_UPDATE_QUEST, SCRIPT_COMPLETE_QUEST, SCRIPT_SET_VARIABLE,
+    CONDITION_ALWAYS, CONDITION_NEVER, CONDITION_UNKNOWN, CONDITION_VARIABLE_EQUALS,
+    CONDITION_QUEST_ACTIVE, CONDITION_QUEST_COMPLETED, CONDITION_QUEST_STAGE
+)
 
 
 class GameState:
     """Manages the state of the dialogue game"""
     
-    def __init__(self):
-        """Initialize the game state"""
-        self.dialogue_data = None
+    # Sessions share the (read-only) dialogue data and graph, so only the
+    # small mutable per-player state lives on each instance
+    __slots__ = ("_dialogue_data", "graph", "current_dialogue_id",
+                 "conversation_history", "quest_state", "variables", "_stream", "_state_encoder")
+    
+    def __init__(self, history_capacity: int = DEFAULT_HISTORY_CAPACITY,
+                 history_archive: Optional[str] = None):
+        """
+        Initialize the game state
+        
+        Args:
+            history_capacity: Conversation entries kept in memory
+            history_archive: Optional file that older conversation entries
+                are spilled to instead of being dropped
+        """
+        self._dialogue_data = None
+        self.graph = None
         self.current_dialogue_id = None
-        self.conversation_history = []
+        self.conversation_history = ConversationHistory(history_capacity, history_archive)
         self.quest_state = {}
         self.variables = {}
+        # Stream of a file still loading in the background whose variable
+        # defaults haven't been applied yet
+        self._stream = None
+        self._state_encoder = None
     
-    def load_dialogue(self, file_path: str) -> bool:
+    @property
+    def dialogue_data(self) -> Optional[Dict[str, Any]]:
+        """The loaded dialogue data"""
+        return self._dialogue_data
+    
+    @dialogue_data.setter
+    def dialogue_data(self, dialogue_data: Optional[Dict[str, Any]]) -> None:
+        """Set the dialogue data and rebuild the lookup graph for it"""
+        self._dialogue_data = dialogue_data
+        self.graph = dialogue_manager.get_graph(dialogue_data) if dialogue_data else None
+        self._stream = None
+        self._state_encoder = None
+    
+    def load_dialogue(self, file_path: str, compact: bool = False, stream: bool = False,
+                      lazy: bool = False) -> bool:
         """
         Load dialogue data from a file and initialize the game state
         
         Args:
             file_path: Path to the dialogue file
+            compact: Load the memory-efficient compact model instead of dicts
+            stream: Parse the file in the background and return as soon as the
+                starting dialogue is available, for very large files
+            lazy: Parse each dialogue from disk when it is first visited,
+                through the file's offset index
             
         Returns:
             True if loading was successful, False otherwise
         """
+        if self._stream is not None:
+            self._stream.close()
+        if stream:
+            return self._load_dialogue_stream(file_path, compact)
+        
         try:
-            self.dialogue_data = dialogue_manager.load_dialogue_data(file_path)
+            self.dialogue_data = dialogue_manager.load_dialogue_data(file_path, compact=compact, lazy=lazy)
             self.current_dialogue_id = self.dialogue_data.get("starting_dialogue")
             # Initialize variables from the dialogue data if present
             self.variables = self.dialogue_data.get("variables", {}).copy()
@@ -36,11 +89,42 @@ class GameState:
         except Exception:
             return False
     
+    def _load_dialogue_stream(self, file_path: str, compact: bool) -> bool:
+        """Start the game on a file that is still being parsed"""
+        try:
+            dialogue_stream = dialogue_manager.stream_dialogue_data(file_path, compact=compact)
+            self._dialogue_data = dialogue_stream.data
+            self.graph = dialogue_stream.graph
+            self._state_encoder = None
+            self.current_dialogue_id = dialogue_stream.get_field("starting_dialogue")
+            # Wait for the first dialogue only; the rest of the file keeps loading
+            self.graph.get_dialogue(self.current_dialogue_id)
+            self.variables = {}
+            self._stream = dialogue_stream
+            self._apply_streamed_variables(wait=False)
+            return True
+        except Exception:
+            return False
+    
+    def _apply_streamed_variables(self, wait: bool = True) -> None:
+        """
+        Fill in the variable defaults of a file that was still loading when the game started
+        
+        Variables usually come after the dialogues in a file, so they are
+        applied once parsed; values set by scripts in the meantime are kept.
+        """
+        dialogue_stream = self._stream
+        if not wait and not (dialogue_stream.done or "variables" in dialogue_stream.data):
+            return
+        for name, value in dialogue_stream.get_field("variables", {}).items():
+            self.variables.setdefault(name, value)
+        self._stream = None
+    
     def reset_state(self) -> None:
         """Reset the game state but keep the dialogue data"""
         if self.dialogue_data:
             self.current_dialogue_id = self.dialogue_data.get("starting_dialogue")
-            self.conversation_history = []
+            self.conversation_history.clear()
             self.quest_state = {}
             self.variables = self.dialogue_data.get("variables", {}).copy()
     
@@ -49,7 +133,7 @@ class GameState:
         if not self.dialogue_data or not self.current_dialogue_id:
             return None
         
-        return dialogue_manager.get_dialogue_by_id(self.dialogue_data, self.current_dialogue_id)
+        return self.graph.get_dialogue(self.current_dialogue_id)
     
     def select_response(self, response_id: str) -> Tuple[bool, Optional[str]]:
         """
@@ -66,11 +150,7 @@ class GameState:
             return False, "No current dialogue"
         
         # Find the selected response
-        selected_response = None
-        for response in current_dialogue.get("responses", []):
-            if response.get("id") == response_id:
-                selected_response = response
-                break
+        selected_response = self.graph.get_response(self.current_dialogue_id, response_id)
         
         if not selected_response:
             return False, f"Response {response_id} not found"
@@ -119,43 +199,11 @@ class GameState:
         if not script:
             return
         
-        # Quest commands
-        if script.startswith("StartQuest_"):
-            quest_id = script.replace("StartQuest_", "")
-            self.quest_state[quest_id] = {"current_stage": 1}
-        
-        elif script.startswith("UpdateQuest_"):
-            parts = script.replace("UpdateQuest_", "").split("_")
-            if len(parts) >= 2:
-                quest_id = parts[0]
-                try:
-                    stage = int(parts[1])
-                    if quest_id in self.quest_state:
-                        self.quest_state[quest_id]["current_stage"] = stage
-                except ValueError:
-                    pass
-        
-        elif script.startswith("CompleteQuest_"):
-            quest_id = script.replace("CompleteQuest_", "")
-            if quest_id in self.quest_state:
-                self.quest_state[quest_id]["completed"] = True
-        
-        # Variable commands
-        elif script.startswith("SetVariable_"):
-            parts = script.replace("SetVariable_", "").split("_")
-            if len(parts) >= 2:
-                var_name = parts[0]
-                var_value = parts[1]
-                
-                # Convert value to appropriate type
-                if var_value.lower() == "true":
-                    var_value = True
-                elif var_value.lower() == "false":
-                    var_value = False
-                elif var_value.isdigit():
-                    var_value = int(var_value)
-                
-                self.variables[var_name] = var_value
+        if self.graph:
+            opcode, arg, value = self.graph.get_script_op(script)
+        else:
+            opcode, arg, value = compile_script(script)
+        SCRIPT_HANDLERS[opcode](self, arg, value)
     
     def evaluate_condition(self, condition: str) -> bool:
         """
@@ -170,51 +218,77 @@ class GameState:
         if not condition:
             return True
         
-        # Variable conditions
-        if condition.startswith("VariableEquals_"):
-            parts = condition.replace("VariableEquals_", "").split("_")
-            if len(parts) >= 2:
-                var_name = parts[0]
-                var_value = parts[1]
-                
-                # Convert value to appropriate type
-                if var_value.lower() == "true":
-                    var_value = True
-                elif var_value.lower() == "false":
-                    var_value = False
-                elif var_value.isdigit():
-                    var_value = int(var_value)
-                
-                return var_name in self.variables and self.variables[var_name] == var_value
+        if self.graph:
+            opcode, arg, value = self.graph.get_condition_op(condition)
+        else:
+            opcode, arg, value = compile_condition(condition)
+        return CONDITION_HANDLERS[opcode](self, arg, value)
+    
+    def state_key(self) -> StateKey:
+        """
+        Get the canonical key of the current state (dialogue, quests and variables)
         
-        # Quest conditions
-        if condition.startswith("QuestActive_"):
-            quest_id = condition.replace("QuestActive_", "")
-            return quest_id in self.quest_state
+        Two game states that behave the same from here on get equal keys; see
+        state_space.StateEncoder. The conversation history isn't part of it.
+        """
+        if self._stream is not None:
+            self._apply_streamed_variables()
+        return self._get_state_encoder().encode(self.current_dialogue_id, self.quest_state, self.variables)
+    
+    def restore_state(self, key: StateKey) -> None:
+        """Go back to a state saved with state_key (the conversation history is kept)"""
+        self.current_dialogue_id, self.quest_state, self.variables = self._get_state_encoder().decode(key)
+    
+    def _get_state_encoder(self):
+        """Get the state encoder of the loaded dialogue data"""
+        if self._state_encoder is None:
+            self._state_encoder = get_state_encoder(self.graph, self.dialogue_data)
+        return self._state_encoder
+    
+    def find_response_paths(self, targets: Optional[List[Tuple[str, str]]] = None,
+                            max_states: int = DEFAULT_MAX_STATES) -> ReachabilityResult:
+        """
+        Find which responses can still be taken from the current state, and how
         
-        if condition.startswith("QuestCompleted_"):
-            quest_id = condition.replace("QuestCompleted_", "")
-            return quest_id in self.quest_state and self.quest_state[quest_id].get("completed", False)
+        Args:
+            targets: (dialogue ID, response ID) pairs to look for; None looks for all
+            max_states: Stop after exploring this many distinct states
+            
+        Returns:
+            The reachable responses with the shortest path of choices to each
+        """
+        scratch = GameState(history_capacity=1)
+        scratch.dialogue_data = self.dialogue_data
         
-        if condition.startswith("QuestStage_"):
-            parts = condition.replace("QuestStage_", "").split("_")
-            if len(parts) >= 2:
-                quest_id = parts[0]
-                try:
-                    stage = int(parts[1])
-                    return (quest_id in self.quest_state and 
-                            self.quest_state[quest_id].get("current_stage") == stage)
-                except ValueError:
-                    return False
+        def expand(key):
+            scratch.restore_state(key)
+            dialogue = scratch.get_current_dialogue()
+            if not dialogue:
+                return []
+            
+            dialogue_id = dialogue["id"]
+            quest_state, variables = scratch.quest_state, scratch.variables
+            available = [response for response in dialogue["responses"]
+                         if scratch.evaluate_condition(response.get("condition"))]
+            transitions = []
+            for response in available:
+                # Scripts change quest dicts in place, so each response starts from fresh copies
+                scratch.current_dialogue_id = key[0]
+                scratch.quest_state = {quest_id: dict(quest) for quest_id, quest in quest_state.items()}
+                scratch.variables = dict(variables)
+                scratch.select_response(response["id"])
+                next_key = scratch.state_key() if response.get("next_dialogue") is not None else None
+                transitions.append((dialogue_id, response["id"], next_key))
+            return transitions
         
-        return False
+        return find_response_paths(self.state_key(), expand, targets, max_states)
     
     def get_quest_title(self, quest_id: str) -> str:
         """Get the title of a quest by its ID"""
         if not self.dialogue_data:
             return quest_id
         
-        quest = dialogue_manager.get_quest_by_id(self.dialogue_data, quest_id)
+        quest = self.graph.get_quest(quest_id)
         if quest:
             return quest.get("title", quest_id)
         
@@ -228,7 +302,7 @@ class GameState:
             return result
         
         for quest_id, quest_state in self.quest_state.items():
-            quest = dialogue_manager.get_quest_by_id(self.dialogue_data, quest_id)
+            quest = self.graph.get_quest(quest_id)
             if not quest:
                 continue
             
@@ -246,19 +320,187 @@ class GameState:
             if current_stage_id is None:
                 continue
                 
-            for stage in quest.get("stages", []):
-                if stage.get("id") == current_stage_id:
-                    result.append({
-                        "quest_id": quest_id,
-                        "quest_title": quest.get("title", quest_id),
-                        "stage_id": current_stage_id,
-                        "stage_text": stage.get("journal_entry", ""),
-                        "completed": False
-                    })
-                    break
+            stage = self.graph.get_quest_stage(quest_id, current_stage_id)
+            if stage:
+                result.append({
+                    "quest_id": quest_id,
+                    "quest_title": quest.get("title", quest_id),
+                    "stage_id": current_stage_id,
+                    "stage_text": stage.get("journal_entry", ""),
+                    "completed": False
+                })
         
         return result
+    
+    def estimate_memory(self) -> int:
+        """Estimate the bytes used by this session's own state (excluding shared dialogue data)"""
+        return (sys.getsizeof(self) +
+                deep_sizeof(self.current_dialogue_id) +
+                sys.getsizeof(self.conversation_history) +
+                sum(deep_sizeof(entry) for entry in self.conversation_history) +
+                deep_sizeof(self.quest_state) +
+                deep_sizeof(self.variables))
+
+
+def deep_sizeof(value: Any) -> int:
+    """Approximate the size of plain JSON-like data in bytes"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_sizeof(key) + deep_sizeof(item) for key, item in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(deep_sizeof(item) for item in value)
+    return size
+
+
+class SessionRegistry:
+    """
+    Keeps one GameState per session.
+    
+    Each browser session (or any caller-chosen key) gets its own GameState,
+    while the parsed dialogue data they load is shared through the data
+    layer's file cache. Sessions that have not been used for max_idle_seconds
+    are evicted.
+    """
+    
+    def __init__(self, max_idle_seconds: float = 3600, max_sessions: Optional[int] = None,
+                 eviction_interval: float = 60):
+        """
+        Initialize the registry
+        
+        Args:
+            max_idle_seconds: Sessions idle for longer than this are evicted
+            max_sessions: Optional cap on live sessions; the least recently used are evicted first
+            eviction_interval: Minimum seconds between automatic idle sweeps
+        """
+        self.max_idle_seconds = max_idle_seconds
+        self.max_sessions = max_sessions
+        self.eviction_interval = eviction_interval
+        self.evicted_count = 0
+        self._sessions: Dict[str, GameState] = {}
+        self._last_access: Dict[str, float] = {}
+        self._last_sweep = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def get_state(self, session_key: str) -> GameState:
+        """Get the game state for a session, creating it on first use"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._sessions.get(session_key)
+            if state is None:
+                state = GameState()
+                self._sessions[session_key] = state
+            self._last_access[session_key] = now
+            
+            if now - self._last_sweep >= self.eviction_interval:
+                self._evict_idle(now)
+            if self.max_sessions is not None and len(self._sessions) > self.max_sessions:
+                self._evict_oldest(len(self._sessions) - self.max_sessions)
+        return state
+    
+    def remove_session(self, session_key: str) -> None:
+        """Drop a session's state"""
+        with self._lock:
+            self._sessions.pop(session_key, None)
+            self._last_access.pop(session_key, None)
+    
+    def evict_idle(self) -> int:
+        """Evict sessions idle for longer than max_idle_seconds and return how many were removed"""
+        with self._lock:
+            return self._evict_idle(time.monotonic())
+    
+    def get_memory_stats(self) -> Dict[str, Any]:
+        """Get the number of sessions and the estimated memory used per session"""
+        with self._lock:
+            sizes = [state.estimate_memory() for state in self._sessions.values()]
+            return {
+                "sessions": len(sizes),
+                "evicted": self.evicted_count,
+                "total_bytes": sum(sizes),
+                "mean_bytes_per_session": sum(sizes) / len(sizes) if sizes else 0,
+                "max_bytes_per_session": max(sizes) if sizes else 0
+            }
+    
+    def __len__(self) -> int:
+        return len(self._sessions)
+    
+    def _evict_idle(self, now: float) -> int:
+        """Evict idle sessions (caller holds the lock)"""
+        self._last_sweep = now
+        idle = [key for key, last in self._last_access.items()
+                if now - last > self.max_idle_seconds]
+        for key in idle:
+            del self._sessions[key]
+            del self._last_access[key]
+        self.evicted_count += len(idle)
+        return len(idle)
+    
+    def _evict_oldest(self, count: int) -> None:
+        """Evict the least recently used sessions (caller holds the lock)"""
+        oldest = sorted(self._last_access, key=self._last_access.get)[:count]
+        for key in oldest:
+            del self._sessions[key]
+            del self._last_access[key]
+        self.evicted_count += len(oldest)
+
+
+def _start_quest(state: GameState, quest_id: str, _) -> None:
+    state.quest_state[quest_id] = {"current_stage": 1}
+
+
+def _update_quest(state: GameState, quest_id: str, stage: int) -> None:
+    if quest_id in state.quest_state:
+        state.quest_state[quest_id]["current_stage"] = stage
+
+
+def _complete_quest(state: GameState, quest_id: str, _) -> None:
+    if quest_id in state.quest_state:
+        state.quest_state[quest_id]["completed"] = True
+
+
+def _set_variable(state: GameState, var_name: str, var_value: Any) -> None:
+    state.variables[var_name] = var_value
+
+
+def _variable_equals(state: GameState, var_name: str, var_value: Any) -> bool:
+    if state._stream is not None:
+        state._apply_streamed_variables()
+    return var_name in state.variables and state.variables[var_name] == var_value
+
+
+def _quest_active(state: GameState, quest_id: str, _) -> bool:
+    return quest_id in state.quest_state
+
+
+def _quest_completed(state: GameState, quest_id: str, _) -> bool:
+    return quest_id in state.quest_state and state.quest_state[quest_id].get("completed", False)
+
+
+def _quest_stage(state: GameState, quest_id: str, stage: int) -> bool:
+    return quest_id in state.quest_state and state.quest_state[quest_id].get("current_stage") == stage
+
+
+# Dispatch tables indexed by the opcodes from script_compiler
+SCRIPT_HANDLERS = {
+    SCRIPT_NOOP: lambda state, arg, value: None,
+    SCRIPT_START_QUEST: _start_quest,
+    SCRIPT_UPDATE_QUEST: _update_quest,
+    SCRIPT_COMPLETE_QUEST: _complete_quest,
+    SCRIPT_SET_VARIABLE: _set_variable,
+}
+
+CONDITION_HANDLERS = {
+    CONDITION_ALWAYS: lambda state, arg, value: True,
+    CONDITION_NEVER: lambda state, arg, value: False,
+    CONDITION_UNKNOWN: lambda state, arg, value: False,
+    CONDITION_VARIABLE_EQUALS: _variable_equals,
+    CONDITION_QUEST_ACTIVE: _quest_active,
+    CONDITION_QUEST_COMPLETED: _quest_completed,
+    CONDITION_QUEST_STAGE: _quest_stage,
+}
 
 
 # Singleton instance for easy import
-game_state = GameState()
\ No newline at end of file
+game_state = GameState()
+
+# Per-session game states for multi-user front ends
+session_registry = SessionRegistry()
\ No newline at end of file
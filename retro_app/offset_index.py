@@ -0,0 +1,175 @@
+"""
+Offset Index for Terminal Dialogue System
+Sidecar index of where each dialogue lies in a JSON file, so single nodes can be read without parsing the rest
+"""
+import io
+import os
+import threading
+from array import array
+from typing import Any, Dict, List, Optional
+from data_layer import FrozenDict, freeze, json_loads, read_json_file, write_json_file
+from lazy_dialogue import LazyDialogueSource
+from stream_loader import DEFAULT_CHUNK_SIZE, iter_dialogue_spans
+
+# Suffix appended to a dialogue file's name for its sidecar index
+INDEX_SUFFIX = ".idx"
+
+# Bumped whenever the sidecar layout changes; older sidecars are rebuilt
+INDEX_VERSION = 1
+
+
+def index_path_for(file_path: str) -> str:
+    """Get the sidecar index path of a dialogue file"""
+    return file_path + INDEX_SUFFIX
+
+
+def _file_signature(file_path: str) -> List[int]:
+    """Modification time and size that an index was built against"""
+    stat = os.stat(file_path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def build_offset_index(file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Any]:
+    """
+    Scan a dialogue file and record the byte range of every dialogue and top-level field
+
+    The file is parsed once, one dialogue at a time, so building the index
+    never holds the whole document in memory.
+
+    Args:
+        file_path: Path to the JSON dialogue file
+        chunk_size: Bytes read at a time
+
+    Returns:
+        The index: {"version", "source", "fields": [[key, start, end], ...],
+        "ids": [...], "offsets": [start, end, start, end, ...]}; "dialogues"
+        is listed in "fields" with null offsets to keep the key order
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        json.JSONDecodeError: If the file contains invalid JSON
+        ValueError: If "dialogues" is not a list
+    """
+    signature = _file_signature(file_path)
+    fields = []
+    ids = []
+    offsets = []
+    with open(file_path, 'rb') as raw:
+        # Latin-1 maps every byte to one character, so character positions are byte offsets
+        text = io.TextIOWrapper(raw, encoding='latin-1', newline='')
+        for kind, key, value, start, end in iter_dialogue_spans(text, chunk_size, ("dialogues",)):
+            if kind == "item":
+                dialogue_id = value.get("id") if isinstance(value, dict) else None
+                if isinstance(dialogue_id, str) and not dialogue_id.isascii():
+                    dialogue_id = None  # re-read below as UTF-8
+                ids.append(dialogue_id)
+                offsets.extend((start, end))
+            elif key == "dialogues" and start == end:
+                fields.append([key, None, None])
+            else:
+                fields.append([key, start, end])
+
+        # The few IDs with non-ASCII characters are decoded from their UTF-8 bytes
+        for position, dialogue_id in enumerate(ids):
+            if dialogue_id is None:
+                raw.seek(offsets[2 * position])
+                node = json_loads(raw.read(offsets[2 * position + 1] - offsets[2 * position]))
+                ids[position] = node.get("id") if isinstance(node, dict) else None
+
+    if ["dialogues", None, None] not in fields:
+        raise ValueError(f"'{file_path}' has no \"dialogues\" list")
+    return {"version": INDEX_VERSION, "source": signature, "fields": fields,
+            "ids": ids, "offsets": offsets}
+
+
+def load_offset_index(file_path: str, write: bool = True) -> Dict[str, Any]:
+    """
+    Get the offset index of a dialogue file, building it if the sidecar is missing or stale
+
+    Args:
+        file_path: Path to the JSON dialogue file
+        write: Save a newly built index next to the file. A directory that
+            can't be written to just means the index is rebuilt on every load.
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        json.JSONDecodeError: If the file contains invalid JSON
+        ValueError: If "dialogues" is not a list
+    """
+    sidecar = index_path_for(file_path)
+    signature = _file_signature(file_path)
+    try:
+        index = read_json_file(sidecar)
+        if index.get("version") == INDEX_VERSION and index.get("source") == signature:
+            return index
+    except (OSError, ValueError):
+        pass
+
+    index = build_offset_index(file_path)
+    if write and index["source"] == signature:
+        try:
+            # The index can always be rebuilt, so it isn't worth an fsync
+            write_json_file(sidecar, index, pretty=False, fsync=False)
+        except OSError:
+            pass
+    return index
+
+
+class IndexedDialogueFile(LazyDialogueSource):
+    """
+    A JSON dialogue file read one node at a time through its offset index
+
+    Only the index (IDs and byte ranges) stays in memory; a dialogue is
+    parsed from its byte range when it is first looked up and kept in a
+    bounded LRU of decoded nodes.
+    """
+
+    def __init__(self, file_path: str, max_cached_nodes: int = 1024, write_index: bool = True):
+        """
+        Open a dialogue file and load (or build) its offset index
+
+        Raises:
+            FileNotFoundError: If the file doesn't exist
+            json.JSONDecodeError: If the file contains invalid JSON
+            ValueError: If "dialogues" is not a list
+        """
+        index = load_offset_index(file_path, write=write_index)
+        self._file = open(file_path, 'rb')
+        self._file_lock = threading.Lock()
+        self._field_names = [key for key, _, _ in index["fields"]]
+        self._field_ranges = {key: (start, end) for key, start, end in index["fields"]}
+        self._offsets = array('q', index["offsets"])
+        self.dialogue_count = len(index["ids"])
+        # Lookups return the first dialogue with an ID, like DialogueGraph
+        self._positions: Dict[str, int] = {}
+        for position, dialogue_id in enumerate(index["ids"]):
+            if isinstance(dialogue_id, str):
+                self._positions.setdefault(dialogue_id, position)
+        super().__init__(file_path, max_cached_nodes)
+
+    def find_dialogue(self, dialogue_id: str) -> Optional[int]:
+        """Get the position of the first dialogue with an ID, or None"""
+        return self._positions.get(dialogue_id)
+
+    def field_names(self) -> List[str]:
+        """Get the top-level keys, in file order"""
+        return self._field_names
+
+    def _read_range(self, start: int, end: int) -> Any:
+        """Parse the JSON value in a byte range of the file as read-only data"""
+        with self._file_lock:
+            self._file.seek(start)
+            raw = self._file.read(end - start)
+        return freeze(json_loads(raw))
+
+    def _read_field(self, key: str) -> Any:
+        """Parse a top-level field from its byte range"""
+        return self._read_range(*self._field_ranges[key])
+
+    def _read_dialogue(self, index: int) -> FrozenDict:
+        """Parse the dialogue at a position from its byte range"""
+        return self._read_range(self._offsets[2 * index], self._offsets[2 * index + 1])
+
+    def close(self) -> None:
+        """Close the dialogue file"""
+        self._file.close()
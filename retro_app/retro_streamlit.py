@@ -1,6 +1,7 @@
 import streamlit as st
 import random
 import datetime
+from theme import apply_theme
 
 # Set page config
 st.set_page_config(
@@ -10,89 +11,7 @@ st.set_page_config(
 )
 
 # Apply custom CSS for 1980s retro look
-st.markdown("""
-<style>
-    /* Global Retro Styling */
-    @import url('https://fonts.googleapis.com/css2?family=VT323&display=swap');
-    
-    /* Main container */
-    .main {
-        background-color: #000;
-        color: #33ff33;
-        font-family: 'VT323', monospace;
-        border: 2px solid #33ff33;
-        padding: 20px;
-        border-radius: 5px;
-    }
-    
-    /* Headers */
-    h1, h2, h3 {
-        color: #33ff33 !important;
-        font-family: 'VT323', monospace !important;
-        text-shadow: 0 0 5px #33ff33;
-    }
-    
-    /* Buttons */
-    .stButton>button {
-        font-family: 'VT323', monospace !important;
-        background-color: #000 !important;
-        color: #33ff33 !important;
-        border: 2px solid #33ff33 !important;
-        border-radius: 0 !important;
-        box-shadow: 0 0 5px #33ff33 !important;
-    }
-    
-    .stButton>button:hover {
-        background-color: #33ff33 !important;
-        color: #000 !important;
-    }
-    
-    /* Text inputs */
-    .stTextInput>div>div>input {
-        font-family: 'VT323', monospace !important;
-        background-color: #000 !important;
-        color: #33ff33 !important;
-        border: 2px solid #33ff33 !important;
-        border-radius: 0 !important;
-    }
-    
-    /* Sliders */
-    .stSlider>div>div {
-        color: #33ff33 !important;
-    }
-    
-    /* Progress bar */
-    .stProgress>div>div>div {
-        background-color: #33ff33 !important;
-    }
-    
-    /* Checkbox */
-    .stCheckbox>div>div>label {
-        color: #33ff33 !important;
-    }
-    
-    /* Divider */
-    hr {
-        border-color: #33ff33 !important;
-        box-shadow: 0 0 5px #33ff33 !important;
-    }
-    
-    /* Custom retro terminal text */
-    .terminal-text {
-        display: inline-block;
-        overflow: hidden;
-        border-right: .15em solid #33ff33;
-        white-space: nowrap;
-        letter-spacing: .1em;
-        animation: blink-caret .75s step-end infinite;
-    }
-    
-    @keyframes blink-caret {
-        from, to { border-color: transparent }
-        50% { border-color: #33ff33 }
-    }
-</style>
-""", unsafe_allow_html=True)
+apply_theme("retro_computer")
 
 # Header and intro
 st.markdown("<h1>RetroComputer 8000</h1>", unsafe_allow_html=True)
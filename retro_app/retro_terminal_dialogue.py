@@ -4,6 +4,9 @@ import os
 import re
 from PIL import Image
 import base64
+from data_layer import json_load, read_dialogue_file
+from typewriter import typewriter_text
+from theme import apply_theme
 
 # Set page configuration
 st.set_page_config(
@@ -15,211 +18,12 @@ st.set_page_config(
 
 # Apply the retro styling with VT323 font and green-on-black theme
 def apply_terminal_style():
-    # CSS for enhanced 80s retro terminal look
-    st.markdown("""
-    <style>
-    @import url('https://fonts.googleapis.com/css2?family=VT323&display=swap');
-    
-    /* Global retro styling */
-    .main {
-        background-color: #000;
-        color: #33ff33;
-        font-family: 'VT323', monospace;
-    }
-    
-    /* Main container styling with terminal border */
-    .block-container {
-        border: 2px solid #33ff33;
-        border-radius: 5px;
-        padding: 20px;
-        box-shadow: 0 0 10px #33ff33;
-        max-width: 1000px !important;
-    }
-    
-    /* Buttons */
-    .stButton>button {
-        background-color: #000;
-        color: #33ff33;
-        border: 2px solid #33ff33;
-        border-radius: 0;
-        font-family: 'VT323', monospace;
-        width: 100%;
-        text-align: left;
-        padding: 15px;
-        font-size: 20px;
-        margin-bottom: 10px;
-        box-shadow: 0 0 5px #33ff33;
-        transition: all 0.3s;
-    }
-    
-    .stButton>button:hover {
-        background-color: #33ff33;
-        color: #000;
-        transform: translateX(5px);
-    }
-    
-    /* Text inputs */
-    .stTextInput>div>div>input {
-        background-color: #000;
-        color: #33ff33;
-        border: 2px solid #33ff33;
-        border-radius: 0;
-        font-family: 'VT323', monospace;
-        padding: 10px;
-        box-shadow: 0 0 5px #33ff33;
-    }
-    
-    /* Sidebar styling */
-    .css-1kyxreq, .css-1d391kg, .css-1oe6wy4 {
-        background-color: #000;
-        color: #33ff33;
-    }
-    
-    .css-1kyxreq a, .css-1d391kg a, .css-1oe6wy4 a {
-        color: #33ffff !important;
-    }
-    
-    /* Dialog text box styling */
-    .dialog-text {
-        background-color: #000;
-        color: #33ff33;
-        border: 2px solid #33ff33;
-        padding: 15px;
-        font-family: 'VT323', monospace;
-        margin-bottom: 20px;
-        font-size: 20px;
-        position: relative;
-        box-shadow: 0 0 5px #33ff33;
-    }
-    
-    .dialog-header {
-        color: #ffffff;
-        margin-bottom: 10px;
-        font-weight: bold;
-        font-size: 22px;
-        text-shadow: 0 0 5px #33ff33;
-    }
-    
-    /* Blinking cursor */
-    .terminal-cursor {
-        display: inline-block;
-        background-color: #33ff33;
-        width: 10px;
-        height: 20px;
-        animation: blink 1s step-end infinite;
-    }
-    
-    @keyframes blink {
-        50% { opacity: 0; }
-    }
-    
-    /* History entries */
-    .history-entry {
-        margin-bottom: 15px;
-        border-bottom: 1px dashed #003300;
-        padding-bottom: 15px;
-        font-size: 18px;
-    }
-    
-    /* Quest log styling */
-    .quest-log {
-        background-color: #000;
-        color: #33ff33;
-        border: 2px solid #33ff33;
-        padding: 15px;
-        margin-top: 20px;
-        font-size: 18px;
-        box-shadow: 0 0 5px #33ff33;
-    }
-    
-    /* Header with scanlines effect */
-    .retro-header {
-        position: relative;
-        padding: 20px;
-        margin-bottom: 30px;
-        text-align: center;
-        overflow: hidden;
-    }
-    
-    .retro-header::before {
-        content: "";
-        position: absolute;
-        top: 0;
-        left: 0;
-        width: 100%;
-        height: 100%;
-        background: repeating-linear-gradient(
-            transparent 0px,
-            transparent 2px,
-            rgba(0, 0, 0, 0.3) 3px,
-            rgba(0, 0, 0, 0.3) 3px
-        );
-        pointer-events: none;
-    }
-    
-    /* File uploader */
-    .stFileUploader > div > button {
-        background-color: #000 !important;
-        color: #33ff33 !important;
-        border: 2px solid #33ff33 !important;
-    }
-    
-    /* For sliders, progress bars etc. */
-    .stSlider > div > div > div {
-        background-color: #33ff33 !important;
-    }
-    
-    /* Success/info message styling */
-    .stSuccess, .stInfo {
-        background-color: #000 !important;
-        color: #33ff33 !important;
-        border: 2px solid #33ff33 !important;
-    }
-    
-    /* For checkboxes */
-    .stCheckbox > div > label {
-        color: #33ff33 !important;
-    }
-    
-    /* For select boxes */
-    .stSelectbox > div > div > div {
-        background-color: #000 !important;
-        color: #33ff33 !important;
-        border: 2px solid #33ff33 !important;
-    }
-    
-    /* Simple system stats display */
-    .system-stats {
-        font-family: 'VT323', monospace;
-        font-size: 16px;
-        color: #33ff33;
-        border-top: 1px dashed #33ff33;
-        margin-top: 20px;
-        padding-top: 10px;
-    }
-    
-    /* Neon flicker animation for the title */
-    .title-neon {
-        animation: neon-flicker 3s infinite alternate;
-        text-shadow: 0 0 10px #33ff33, 0 0 20px #33ff33;
-    }
-    
-    @keyframes neon-flicker {
-        0%, 19%, 21%, 23%, 25%, 54%, 56%, 100% {
-            text-shadow: 0 0 10px #33ff33, 0 0 20px #33ff33;
-        }
-        20%, 24%, 55% {
-            text-shadow: none;
-        }
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    apply_theme("retro_terminal")
 
 # Function to load dialogue data from JSON file
 def load_dialogue_data(file_path="dialogue_data.json"):
     try:
-        with open(file_path, 'r') as file:
-            return json.load(file)
+        return read_dialogue_file(file_path)
     except FileNotFoundError:
         st.error(f"Dialogue data file '{file_path}' not found.")
         return {"dialogues": [], "quests": []}
@@ -227,14 +31,6 @@ def load_dialogue_data(file_path="dialogue_data.json"):
         st.error(f"Error decoding JSON from '{file_path}'. Check the file format.")
         return {"dialogues": [], "quests": []}
 
-# Function to simulate typing effect
-def typewriter_text(text, speed=40):
-    typed_text = st.empty()
-    for i in range(len(text) + 1):
-        typed_text.markdown(f"<div class='dialog-text'>{text[:i]}<span class='terminal-cursor'></span></div>", unsafe_allow_html=True)
-        # In a real implementation, you'd add a delay here
-        # But for the prototype, we'll skip that
-
 # Function to handle script actions
 def handle_script(script_name):
     if not script_name:
@@ -321,7 +117,7 @@ def main():
     uploaded_file = st.sidebar.file_uploader("UPLOAD DIALOGUE DATA (JSON)", type="json")
     if uploaded_file is not None:
         try:
-            st.session_state.dialogue_data = json.load(uploaded_file)
+            st.session_state.dialogue_data = json_load(uploaded_file)
             st.sidebar.success("DIALOGUE DATA LOADED SUCCESSFULLY!")
             # Reset conversation when new data is loaded
             st.session_state.current_dialogue_id = st.session_state.dialogue_data.get("starting_dialogue", "ai_escape_intro")
@@ -360,7 +156,7 @@ def main():
         
         if is_new_dialogue:
             st.markdown(f"<div class='dialog-header'>{current_dialogue['npc']}</div>", unsafe_allow_html=True)
-            typewriter_text(current_dialogue["text"])
+            typewriter_text(current_dialogue["text"], speed=40, cursor="", theme="retro_terminal")
             
             # Add to history
             st.session_state.conversation_history.append({
@@ -0,0 +1,303 @@
+"""
+Save Journal for Terminal Dialogue System
+Append-only journal of edits, so saving a small change doesn't rewrite a large dialogue file
+"""
+import os
+import threading
+from typing import Any, Dict, List, Optional
+from data_layer import atomic_write, fsync_directory, get_json_backend, json_dumps, json_loads, thaw
+
+# Suffix appended to a dialogue file's name for its journal
+JOURNAL_SUFFIX = ".journal"
+
+# Bumped whenever the journal layout changes
+JOURNAL_VERSION = 1
+
+
+def journal_path_for(file_path: str) -> str:
+    """Get the journal path of a dialogue file"""
+    return os.path.realpath(file_path) + JOURNAL_SUFFIX
+
+
+def _file_signature(file_path: str) -> List[int]:
+    """Modification time and size of the file a journal applies to"""
+    stat = os.stat(file_path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def diff_dialogue_data(old: Dict[str, Any], new: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Compute the patch operations that turn one version of a dialogue file into another
+
+    Top-level lists ("dialogues", "quests") are compared element by element,
+    so editing one dialogue produces one operation however large the file is.
+
+    Returns:
+        A list of {"op": "set", "path", "value"}, {"op": "delete", "path"}
+        and {"op": "truncate", "path", "length"} operations
+    """
+    ops = []
+    for key, value in new.items():
+        if key not in old:
+            ops.append({"op": "set", "path": [key], "value": value})
+        elif isinstance(value, list) and isinstance(old[key], list):
+            previous = old[key]
+            for index, item in enumerate(value):
+                if index >= len(previous) or previous[index] != item:
+                    ops.append({"op": "set", "path": [key, index], "value": item})
+            if len(value) < len(previous):
+                ops.append({"op": "truncate", "path": [key], "length": len(value)})
+        elif old[key] != value:
+            ops.append({"op": "set", "path": [key], "value": value})
+    for key in old:
+        if key not in new:
+            ops.append({"op": "delete", "path": [key]})
+    return ops
+
+
+def apply_ops(data: Dict[str, Any], ops: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Apply patch operations to dialogue data in place
+
+    Values are copied in, so the patched data never shares containers with
+    the operations.
+    """
+    for op in ops:
+        *parents, last = op["path"]
+        target = data
+        for key in parents:
+            target = target[key]
+        if op["op"] == "set":
+            value = thaw(op["value"])
+            if isinstance(target, list) and last == len(target):
+                target.append(value)
+            else:
+                target[last] = value
+        elif op["op"] == "delete":
+            del target[last]
+        elif op["op"] == "truncate":
+            del target[last][op["length"]:]
+        else:
+            raise ValueError(f"Unknown journal operation '{op['op']}'")
+    return data
+
+
+def read_journal(file_path: str) -> Optional[List[List[Dict[str, Any]]]]:
+    """
+    Read the saves recorded in a dialogue file's journal
+
+    A save interrupted while it was being appended leaves a partial last
+    line, which is ignored: every save is applied completely or not at all.
+
+    Returns:
+        The operations of each recorded save, or None if there is no journal
+        or it was written against a different version of the file
+
+    Raises:
+        ValueError: If the journal is damaged before its last line
+    """
+    try:
+        with open(journal_path_for(file_path), 'rb') as journal:
+            lines = journal.read().split(b"\n")
+    except FileNotFoundError:
+        return None
+
+    try:
+        header = json_loads(lines[0])
+    except ValueError:
+        return None  # interrupted while the journal was created, before any save
+    if header.get("journal") != JOURNAL_VERSION or header.get("base") != _file_signature(file_path):
+        return None
+
+    saves = []
+    for number, line in enumerate(lines[1:], start=2):
+        if not line:
+            continue
+        try:
+            saves.append(json_loads(line)["ops"])
+        except (ValueError, KeyError, TypeError):
+            if number == len(lines):
+                break  # torn final append
+            raise ValueError(f"Journal of '{file_path}' is damaged at line {number}")
+    return saves
+
+
+def compact_journal(file_path: str, pretty: bool = True) -> bool:
+    """
+    Apply a pending journal to its dialogue file and remove it
+
+    A journal that doesn't match the file (the file was replaced after the
+    journal was written) is renamed to <journal>.stale rather than applied
+    or deleted, so the edits in it can still be recovered by hand.
+
+    Returns:
+        True if the file was changed
+    """
+    journal_path = journal_path_for(file_path)
+    if not os.path.exists(journal_path):
+        return False
+
+    saves = read_journal(file_path)
+    if saves is None:
+        os.replace(journal_path, journal_path + ".stale")
+        return False
+
+    if saves:
+        with open(file_path, 'rb') as file:
+            data = json_loads(file.read())
+        for ops in saves:
+            apply_ops(data, ops)
+        atomic_write(file_path, get_json_backend().dumps(data, pretty))
+    os.remove(journal_path)
+    fsync_directory(os.path.dirname(journal_path))
+    return bool(saves)
+
+
+def remove_journal(file_path: str) -> None:
+    """Delete a dialogue file's journal, after the whole file has been written"""
+    try:
+        os.remove(journal_path_for(file_path))
+    except FileNotFoundError:
+        pass
+
+
+class SaveJournal:
+    """
+    Incremental saves of one dialogue file
+
+    The first save writes the whole file. Later saves append only what
+    changed since the previous save to the file's journal, and the journal
+    is folded back into the file on a background thread once saving has been
+    idle for a while (or the journal has grown large). Dialogue files are
+    only read through DialogueDataManager or data_layer.read_dialogue_file,
+    which apply a pending journal first, so a crash between a save and its
+    compaction loses nothing.
+    """
+
+    def __init__(self, file_path: str, pretty: bool = True,
+                 max_journal_bytes: int = 8 * 1024 * 1024, compact_delay: float = 5.0):
+        """
+        Args:
+            file_path: Path of the dialogue file
+            pretty: Write the file indented (see write_json_file)
+            max_journal_bytes: Compact as soon as the journal grows past this size
+            compact_delay: Seconds without a save before the journal is compacted
+        """
+        self.file_path = os.path.realpath(file_path)
+        self.journal_path = journal_path_for(self.file_path)
+        self.pretty = pretty
+        self.max_journal_bytes = max_journal_bytes
+        self.compact_delay = compact_delay
+        self.full_saves = 0
+        self.journal_saves = 0
+        self.compactions = 0
+        # The data as it is on disk (file plus journal), in plain containers,
+        # and the signature of the file when this saver last wrote it
+        self._snapshot = None
+        self._base_signature = None
+        self._journal_bytes = 0
+        self._lock = threading.RLock()
+        self._timer = None
+
+    def save(self, data: Dict[str, Any]) -> int:
+        """
+        Save dialogue data, appending only the changes to the journal when possible
+
+        Returns:
+            The number of changes recorded; 0 if nothing changed since the last
+            save. The first save writes the whole file and counts as one change.
+
+        Raises:
+            OSError: If the file or journal can't be written
+        """
+        with self._lock:
+            if self._snapshot is None or self._file_replaced():
+                self._write_file(get_json_backend().dumps(data, self.pretty))
+                self.full_saves += 1
+                return 1
+
+            ops = diff_dialogue_data(self._snapshot, data)
+            if not ops:
+                return 0
+            record = (json_dumps({"ops": ops}, pretty=False) + "\n").encode("utf-8")
+            if len(record) > self.max_journal_bytes:
+                # Journaling a change this large saves nothing over rewriting the file
+                self._write_file(get_json_backend().dumps(data, self.pretty))
+                self.full_saves += 1
+                return len(ops)
+
+            self._append(record)
+            apply_ops(self._snapshot, ops)
+            self.journal_saves += 1
+            self._schedule_compaction(0 if self._journal_bytes > self.max_journal_bytes else self.compact_delay)
+            return len(ops)
+
+    def compact(self) -> None:
+        """Fold the journal into the dialogue file now"""
+        with self._lock:
+            self._cancel_timer()
+            if self._snapshot is None or not os.path.exists(self.journal_path):
+                return
+            self._write_file(get_json_backend().dumps(self._snapshot, self.pretty), self._snapshot)
+            self.compactions += 1
+
+    def discard(self) -> None:
+        """Stop tracking the file, e.g. before it is overwritten by a full save"""
+        with self._lock:
+            self._cancel_timer()
+            self._snapshot = None
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get save counters and the current journal size"""
+        return {"full_saves": self.full_saves, "journal_saves": self.journal_saves,
+                "compactions": self.compactions, "journal_bytes": self._journal_bytes}
+
+    def _write_file(self, encoded: bytes, snapshot: Optional[Dict[str, Any]] = None) -> None:
+        """Replace the whole dialogue file and drop the journal (caller holds the lock)"""
+        atomic_write(self.file_path, encoded)
+        remove_journal(self.file_path)
+        self._base_signature = _file_signature(self.file_path)
+        self._journal_bytes = 0
+        # Parsed back from the written bytes, so the snapshot is exactly what is on disk
+        self._snapshot = snapshot if snapshot is not None else json_loads(encoded)
+
+    def _file_replaced(self) -> bool:
+        """Check whether something else wrote the file since this saver did (caller holds the lock)"""
+        try:
+            return _file_signature(self.file_path) != self._base_signature
+        except FileNotFoundError:
+            return True
+
+    def _append(self, record: bytes) -> None:
+        """Durably append one save to the journal, creating it if needed (caller holds the lock)"""
+        created = not os.path.exists(self.journal_path)
+        with open(self.journal_path, 'ab') as journal:
+            if created:
+                header = {"journal": JOURNAL_VERSION, "base": _file_signature(self.file_path)}
+                journal.write((json_dumps(header, pretty=False) + "\n").encode("utf-8"))
+            journal.write(record)
+            journal.flush()
+            os.fsync(journal.fileno())
+            self._journal_bytes = journal.tell()
+        if created:
+            fsync_directory(os.path.dirname(self.journal_path))
+
+    def _schedule_compaction(self, delay: float) -> None:
+        """(Re)start the idle timer that compacts the journal (caller holds the lock)"""
+        self._cancel_timer()
+        self._timer = threading.Timer(delay, self._compact_in_background)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _cancel_timer(self) -> None:
+        """Cancel a pending compaction (caller holds the lock)"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _compact_in_background(self) -> None:
+        """Timer thread: compact, leaving the journal for the next load if that fails"""
+        try:
+            self.compact()
+        except OSError:
+            pass
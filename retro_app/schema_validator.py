@@ -1,15 +1,48 @@
 import json
+import hashlib
 import jsonschema
 import argparse
 import sys
 from pathlib import Path
-from jsonschema import validate, ValidationError
+from jsonschema import ValidationError
+from jsonschema.exceptions import best_match
+from jsonschema.validators import validator_for
+from graph_analysis import ReferenceIndex, reachable_from
+from data_layer import read_dialogue_file, read_json_file, write_json_file
+
+# Compiled validators by schema hash, so each schema is checked and compiled once per process
+_compiled_validators = {}
+
+# The same validators by schema object, so a schema passed again isn't serialized and hashed
+# again. Each schema is kept with its validator, so its id can't be reused by another object.
+_validators_by_id = {}
+_MAX_SCHEMA_OBJECTS = 16
+
+def schema_hash(schema):
+    """Return a stable hash of a schema's content"""
+    return hashlib.sha256(json.dumps(schema, sort_keys=True).encode("utf-8")).hexdigest()
+
+def get_schema_validator(schema):
+    """Get a reusable validator object for the schema, compiling it on first use"""
+    cached = _validators_by_id.get(id(schema))
+    if cached is not None and cached[0] is schema:
+        return cached[1]
+    key = schema_hash(schema)
+    schema_validator = _compiled_validators.get(key)
+    if schema_validator is None:
+        validator_class = validator_for(schema)
+        validator_class.check_schema(schema)
+        schema_validator = validator_class(schema)
+        _compiled_validators[key] = schema_validator
+    if len(_validators_by_id) >= _MAX_SCHEMA_OBJECTS:
+        _validators_by_id.clear()
+    _validators_by_id[id(schema)] = (schema, schema_validator)
+    return schema_validator
 
 def load_schema(schema_path):
     """Load the JSON schema file"""
     try:
-        with open(schema_path, 'r') as f:
-            return json.load(f)
+        return read_json_file(schema_path)
     except FileNotFoundError:
         print(f"Error: Schema file '{schema_path}' not found.")
         sys.exit(1)
@@ -20,8 +53,7 @@ def load_schema(schema_path):
 def load_dialogue_file(file_path):
     """Load a dialogue JSON file"""
     try:
-        with open(file_path, 'r') as f:
-            return json.load(f)
+        return read_dialogue_file(file_path)
     except FileNotFoundError:
         print(f"Error: Dialogue file '{file_path}' not found.")
         sys.exit(1)
@@ -31,94 +63,75 @@ def load_dialogue_file(file_path):
 
 def validate_dialogue(dialogue_data, schema):
     """Validate dialogue data against the schema"""
-    try:
-        validate(instance=dialogue_data, schema=schema)
+    errors = validate_dialogue_all(dialogue_data, schema)
+    if not errors:
         return True, None
-    except ValidationError as e:
-        return False, e
+    return False, best_match(errors)
+
+def validate_dialogue_all(dialogue_data, schema):
+    """Validate dialogue data against the schema and return every error found"""
+    return list(get_schema_validator(schema).iter_errors(dialogue_data))
 
 def check_dialogue_references(dialogue_data):
     """Check for missing or circular dialogue references"""
     errors = []
     warnings = []
     
-    # Get all dialogue IDs
-    dialogue_ids = {d["id"] for d in dialogue_data["dialogues"]}
+    # Index every dialogue, edge and script in one pass
+    index = ReferenceIndex(dialogue_data)
     
     # Check starting dialogue
-    if dialogue_data["starting_dialogue"] not in dialogue_ids:
+    if dialogue_data["starting_dialogue"] not in index.adjacency:
         errors.append(f"Starting dialogue '{dialogue_data['starting_dialogue']}' doesn't exist in dialogues array")
     
     # Check next_dialogue references
-    for dialogue in dialogue_data["dialogues"]:
-        for response in dialogue["responses"]:
-            next_id = response["next_dialogue"]
-            if next_id is not None and next_id not in dialogue_ids:
-                errors.append(f"In dialogue '{dialogue['id']}', response '{response['id']}' references non-existent dialogue '{next_id}'")
+    for dialogue_id, response_id, next_id in index.broken_references:
+        errors.append(f"In dialogue '{dialogue_id}', response '{response_id}' references non-existent dialogue '{next_id}'")
     
     # Check for dialogues that can't be reached from starting point
-    reachable = set()
-    to_check = [dialogue_data["starting_dialogue"]]
-    
-    while to_check:
-        current = to_check.pop()
-        if current in reachable or current is None:
-            continue
-            
-        reachable.add(current)
-        
-        # Find dialogue object
-        dialogue = next((d for d in dialogue_data["dialogues"] if d["id"] == current), None)
-        if dialogue:
-            # Add all next_dialogue values to check
-            for response in dialogue["responses"]:
-                if response["next_dialogue"] and response["next_dialogue"] not in reachable:
-                    to_check.append(response["next_dialogue"])
-    
-    unreachable = dialogue_ids - reachable
-    if unreachable:
-        for d_id in unreachable:
+    reachable = reachable_from(dialogue_data["starting_dialogue"], index.adjacency)
+    for d_id in index.dialogue_ids:
+        if d_id not in reachable:
             warnings.append(f"Dialogue '{d_id}' is unreachable from the starting dialogue")
     
     # Check script references to quests
-    quest_ids = {q["id"] for q in dialogue_data["quests"]}
+    quests_by_id = {}
+    for quest in dialogue_data["quests"]:
+        quests_by_id.setdefault(quest["id"], quest)
     
-    for dialogue in dialogue_data["dialogues"]:
-        # Check on_entry script if it exists
-        if dialogue.get("on_entry") and dialogue["on_entry"] is not None:
-            script = dialogue["on_entry"]
+    for dialogue_id, response_id, script in index.scripts:
+        # Check on_entry script
+        if response_id is None:
             if script.startswith("StartQuest_") or script.startswith("UpdateQuest_") or script.startswith("CompleteQuest_"):
                 quest_id = script.split("_")[1]
-                if quest_id not in quest_ids:
-                    errors.append(f"In dialogue '{dialogue['id']}', on_entry script references non-existent quest '{quest_id}'")
+                if quest_id not in quests_by_id:
+                    errors.append(f"In dialogue '{dialogue_id}', on_entry script references non-existent quest '{quest_id}'")
+            continue
         
         # Check response scripts
-        for response in dialogue["responses"]:
-            if response.get("script") and response["script"] is not None:
-                script = response["script"]
-                if script.startswith("StartQuest_") or script.startswith("CompleteQuest_"):
-                    quest_id = script.split("_")[1]
-                    if quest_id not in quest_ids:
-                        errors.append(f"In dialogue '{dialogue['id']}', response '{response['id']}' script references non-existent quest '{quest_id}'")
-                elif script.startswith("UpdateQuest_"):
-                    parts = script.split("_")
-                    if len(parts) >= 2:
-                        quest_id = parts[1]
-                        if quest_id not in quest_ids:
-                            errors.append(f"In dialogue '{dialogue['id']}', response '{response['id']}' script references non-existent quest '{quest_id}'")
-                        
-                        # Check if quest stage exists
-                        if len(parts) >= 3:
-                            try:
-                                stage_id = int(parts[2])
-                                quest = next((q for q in dialogue_data["quests"] if q["id"] == quest_id), None)
-                                if quest:
-                                    stage_ids = [s["id"] for s in quest["stages"]]
-                                    if stage_id not in stage_ids:
-                                        errors.append(f"In dialogue '{dialogue['id']}', response '{response['id']}' script references non-existent stage {stage_id} for quest '{quest_id}'")
-                            except ValueError:
-                                # Not a number, so can't be a valid stage reference
-                                errors.append(f"In dialogue '{dialogue['id']}', response '{response['id']}' has invalid stage format in UpdateQuest command")
+        if script.startswith("StartQuest_") or script.startswith("CompleteQuest_"):
+            quest_id = script.split("_")[1]
+            if quest_id not in quests_by_id:
+                errors.append(f"In dialogue '{dialogue_id}', response '{response_id}' script references non-existent quest '{quest_id}'")
+        elif script.startswith("UpdateQuest_"):
+            parts = script.split("_")
+            if len(parts) >= 2:
+                quest_id = parts[1]
+                if quest_id not in quests_by_id:
+                    errors.append(f"In dialogue '{dialogue_id}', response '{response_id}' script references non-existent quest '{quest_id}'")
+                
+                # Check if quest stage exists
+                if len(parts) >= 3:
+                    try:
+                        stage_id = int(parts[2])
+                        quest = quests_by_id.get(quest_id)
+                        if quest:
+                            stage_ids = [s["id"] for s in quest["stages"]]
+                            if stage_id not in stage_ids:
+                                errors.append(f"In dialogue '{dialogue_id}', response '{response_id}' script references non-existent stage {stage_id} for quest '{quest_id}'")
+                    except ValueError:
+                        # Not a number, so can't be a valid stage reference
+                        errors.append(f"In dialogue '{dialogue_id}', response '{response_id}' has invalid stage format in UpdateQuest command")
     
     return errors, warnings
 
@@ -235,14 +248,16 @@ def main():
     dialogue_data = load_dialogue_file(args.file)
     
     # Validate against schema
-    is_valid, validation_error = validate_dialogue(dialogue_data, schema)
+    validation_errors = validate_dialogue_all(dialogue_data, schema)
+    is_valid = not validation_errors
     
     if is_valid:
         print(f"✅ File '{args.file}' is valid according to the schema")
     else:
         print(f"❌ File '{args.file}' is invalid:")
-        print(f"   {validation_error.message}")
-        print(f"   Path: {' → '.join(str(p) for p in validation_error.path)}")
+        for validation_error in validation_errors:
+            print(f"   {validation_error.message}")
+            print(f"   Path: {' → '.join(str(p) for p in validation_error.path)}")
     
     # Check dialogue references
     errors, warnings = check_dialogue_references(dialogue_data)
@@ -280,8 +295,7 @@ def main():
                     file_path = Path(args.file)
                     output_path = file_path.with_stem(file_path.stem + "_fixed")
                 
-                with open(output_path, 'w') as f:
-                    json.dump(fixed_data, f, indent=2)
+                write_json_file(output_path, fixed_data)
                 print(f"✍️  Fixed data written to {output_path}")
             else:
                 print("❌ Automatic fixes were not sufficient to make the file valid")
@@ -0,0 +1,120 @@
+"""
+Script Compiler for Terminal Dialogue System
+Turns script and condition strings into precompiled operations
+"""
+from functools import lru_cache
+from typing import Any, Tuple
+
+# A compiled operation is a tuple of (opcode, operand, operand)
+CompiledOp = Tuple[int, Any, Any]
+
+# Script opcodes
+SCRIPT_NOOP = 0
+SCRIPT_START_QUEST = 1
+SCRIPT_UPDATE_QUEST = 2
+SCRIPT_COMPLETE_QUEST = 3
+SCRIPT_SET_VARIABLE = 4
+
+# Condition opcodes
+CONDITION_ALWAYS = 0
+CONDITION_NEVER = 1
+CONDITION_UNKNOWN = 2
+CONDITION_VARIABLE_EQUALS = 3
+CONDITION_QUEST_ACTIVE = 4
+CONDITION_QUEST_COMPLETED = 5
+CONDITION_QUEST_STAGE = 6
+
+NOOP: CompiledOp = (SCRIPT_NOOP, None, None)
+ALWAYS: CompiledOp = (CONDITION_ALWAYS, None, None)
+NEVER: CompiledOp = (CONDITION_NEVER, None, None)
+
+
+def coerce_value(value: str) -> Any:
+    """Convert a script value to a bool or int where possible"""
+    if value.lower() == "true":
+        return True
+    if value.lower() == "false":
+        return False
+    if value.isdigit():
+        return int(value)
+    return value
+
+
+@lru_cache(maxsize=4096)
+def compile_script(script: str) -> CompiledOp:
+    """
+    Compile a script command into an operation
+
+    Args:
+        script: The script command, e.g. "UpdateQuest_repair_2"
+
+    Returns:
+        The compiled operation; malformed or unknown commands compile to NOOP
+    """
+    if not script:
+        return NOOP
+
+    # Quest commands
+    if script.startswith("StartQuest_"):
+        return (SCRIPT_START_QUEST, script.replace("StartQuest_", ""), None)
+
+    if script.startswith("UpdateQuest_"):
+        parts = script.replace("UpdateQuest_", "").split("_")
+        if len(parts) >= 2:
+            try:
+                return (SCRIPT_UPDATE_QUEST, parts[0], int(parts[1]))
+            except ValueError:
+                pass
+        return NOOP
+
+    if script.startswith("CompleteQuest_"):
+        return (SCRIPT_COMPLETE_QUEST, script.replace("CompleteQuest_", ""), None)
+
+    # Variable commands
+    if script.startswith("SetVariable_"):
+        parts = script.replace("SetVariable_", "").split("_")
+        if len(parts) >= 2:
+            return (SCRIPT_SET_VARIABLE, parts[0], coerce_value(parts[1]))
+
+    return NOOP
+
+
+@lru_cache(maxsize=4096)
+def compile_condition(condition: str) -> CompiledOp:
+    """
+    Compile a condition expression into an operation
+
+    Args:
+        condition: The condition, e.g. "VariableEquals_door_open_true"
+
+    Returns:
+        The compiled operation; an empty condition compiles to ALWAYS,
+        a malformed one to NEVER and an unrecognized one to CONDITION_UNKNOWN
+    """
+    if not condition:
+        return ALWAYS
+
+    # Variable conditions
+    if condition.startswith("VariableEquals_"):
+        parts = condition.replace("VariableEquals_", "").split("_")
+        if len(parts) >= 2:
+            return (CONDITION_VARIABLE_EQUALS, parts[0], coerce_value(parts[1]))
+        return NEVER
+
+    # Quest conditions
+    if condition.startswith("QuestActive_"):
+        return (CONDITION_QUEST_ACTIVE, condition.replace("QuestActive_", ""), None)
+
+    if condition.startswith("QuestCompleted_"):
+        return (CONDITION_QUEST_COMPLETED, condition.replace("QuestCompleted_", ""), None)
+
+    if condition.startswith("QuestStage_"):
+        parts = condition.replace("QuestStage_", "").split("_")
+        if len(parts) >= 2:
+            try:
+                return (CONDITION_QUEST_STAGE, parts[0], int(parts[1]))
+            except ValueError:
+                pass
+        return NEVER
+
+    return (CONDITION_UNKNOWN, condition, None)
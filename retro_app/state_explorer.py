@@ -0,0 +1,449 @@
+#!/usr/bin/env python
+"""
+State Explorer for Terminal Dialogue System
+Exhaustive walk of every playthrough state of a dialogue file, for coverage and soft-lock reports
+"""
+import argparse
+import os
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+from data_layer import dialogue_manager, json_dumps
+from logic_layer import GameState, deep_sizeof
+from state_space import StateKey
+
+# Hard caps on the explored state space
+DEFAULT_MAX_STATES = 1_000_000
+DEFAULT_MAX_MEMORY = 512 * 1024 * 1024
+
+# Example states kept per kind of problem in a report
+MAX_EXAMPLES = 20
+
+# States handed to a worker process at a time in parallel mode
+CHUNK_SIZE = 2048
+
+# What taking a response leads to
+MOVE = 0
+END = 1
+BROKEN = 2
+
+# A transition: (response ID, MOVE/END/BROKEN, next dialogue ID, key of the next state)
+Transition = Tuple[str, int, Optional[str], StateKey]
+
+
+class StateExpander:
+    """
+    Works out the transitions out of one state with GameState's own rules
+
+    States are restored into a scratch GameState from their canonical keys
+    (see state_space), so conditions and scripts are evaluated exactly like
+    in the game: the condition of every response is checked against the
+    state, and taking a response runs its script and then the on_entry
+    script of the dialogue it leads to.
+    """
+
+    def __init__(self, dialogue_data: Dict[str, Any]):
+        self.state = GameState(history_capacity=1)
+        self.state.dialogue_data = dialogue_data
+        self.graph = self.state.graph
+
+    def initial_state(self) -> StateKey:
+        """Get the key of the state a new game starts in"""
+        self.state.reset_state()
+        return self.state.state_key()
+
+    def describe(self, key: StateKey) -> Dict[str, Any]:
+        """Turn a state key back into readable data"""
+        self.state.restore_state(key)
+        return {"dialogue": key[0], "quests": self.state.quest_state, "variables": self.state.variables}
+
+    def expand(self, key: StateKey) -> List[Transition]:
+        """
+        Get the transitions of every response available in a state
+
+        Returns:
+            One transition per available response, in response order
+        """
+        dialogue = self.graph.get_dialogue(key[0])
+        if dialogue is None:
+            return []
+
+        state = self.state
+        state.restore_state(key)
+        quest_state, variables = state.quest_state, state.variables
+        available = [response for response in dialogue.get("responses", [])
+                     if state.evaluate_condition(response.get("condition"))]
+
+        transitions = []
+        for response in available:
+            next_id = response.get("next_dialogue")
+            next_dialogue = self.graph.get_dialogue(next_id) if next_id is not None else None
+            on_entry = next_dialogue.get("on_entry") if next_dialogue is not None else None
+            if response.get("script") or on_entry:
+                # Scripts change quest dicts in place, so each response starts from fresh copies
+                state.quest_state = {quest_id: dict(quest) for quest_id, quest in quest_state.items()}
+                state.variables = dict(variables)
+                state.execute_script(response.get("script"))
+                if on_entry:
+                    state.execute_script(on_entry)
+                next_key = (next_id,) + state.state_key()[1:]
+            else:
+                # Only the dialogue changes, so the rest of the key is reused as is
+                next_key = (next_id,) + key[1:]
+
+            if next_id is None:
+                kind = END
+            elif next_dialogue is None:
+                kind = BROKEN
+            else:
+                kind = MOVE
+            transitions.append((response["id"], kind, next_id, next_key))
+        return transitions
+
+
+class ExplorationReport:
+    """
+    Results of exploring a dialogue file
+
+    Attributes:
+        states: Distinct states reached (dialogue, quests and variables)
+        transitions: Response choices followed between them
+        endings: Transitions that end the conversation
+        truncated: Why exploration stopped early ("max_states" or "max_memory"), or None
+        dialogue_count / response_count: Dialogues and responses in the file
+        visited_dialogues: IDs of the dialogues reached in some state
+        available_responses: (dialogue ID, response ID) of responses available in some state
+        unreachable_dialogues: IDs of dialogues no playthrough reaches
+        unavailable_responses: (dialogue ID, response ID) of responses in reached dialogues
+            whose condition is never met
+        broken_transitions: (dialogue ID, response ID, missing ID) of available responses
+            that lead to a dialogue that doesn't exist
+        soft_locks: Number of states where no response is available
+        trapped_states: Number of states from which the conversation can never end,
+            or None if exploration was truncated
+        soft_lock_examples / trapped_examples: A few of those states
+        elapsed: Seconds spent exploring
+    """
+
+    def __init__(self):
+        self.states = 0
+        self.transitions = 0
+        self.endings = 0
+        self.truncated: Optional[str] = None
+        self.dialogue_count = 0
+        self.response_count = 0
+        self.visited_dialogues: Set[str] = set()
+        self.available_responses: Set[Tuple[str, str]] = set()
+        self.unreachable_dialogues: List[str] = []
+        self.unavailable_responses: List[Tuple[str, str]] = []
+        self.broken_transitions: List[Tuple[str, str, str]] = []
+        self.soft_locks = 0
+        self.trapped_states: Optional[int] = 0
+        self.soft_lock_examples: List[Dict[str, Any]] = []
+        self.trapped_examples: List[Dict[str, Any]] = []
+        self.elapsed = 0.0
+
+    @property
+    def dialogue_coverage(self) -> float:
+        """Fraction of the dialogues reached"""
+        return len(self.visited_dialogues) / self.dialogue_count if self.dialogue_count else 1.0
+
+    @property
+    def response_coverage(self) -> float:
+        """Fraction of the responses available in some state"""
+        return len(self.available_responses) / self.response_count if self.response_count else 1.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the report as JSON-ready data"""
+        return {
+            "states": self.states,
+            "transitions": self.transitions,
+            "endings": self.endings,
+            "truncated": self.truncated,
+            "dialogue_coverage": self.dialogue_coverage,
+            "response_coverage": self.response_coverage,
+            "unreachable_dialogues": self.unreachable_dialogues,
+            "unavailable_responses": [list(item) for item in self.unavailable_responses],
+            "broken_transitions": [list(item) for item in self.broken_transitions],
+            "soft_locks": self.soft_locks,
+            "soft_lock_examples": self.soft_lock_examples,
+            "trapped_states": self.trapped_states,
+            "trapped_examples": self.trapped_examples,
+            "elapsed": self.elapsed
+        }
+
+    def format_report(self) -> List[str]:
+        """Get a human readable summary, one line per entry"""
+        lines = [
+            f"States: {self.states} ({self.transitions} transitions, {self.endings} endings) in {self.elapsed:.2f}s",
+            f"Dialogue coverage: {len(self.visited_dialogues)}/{self.dialogue_count} ({self.dialogue_coverage:.1%})",
+            f"Response coverage: {len(self.available_responses)}/{self.response_count} ({self.response_coverage:.1%})"
+        ]
+        if self.truncated:
+            lines.append(f"⚠️  Exploration stopped early ({self.truncated}); coverage is a lower bound")
+        for dialogue_id in self.unreachable_dialogues:
+            lines.append(f"Unreachable dialogue: {dialogue_id}")
+        for dialogue_id, response_id in self.unavailable_responses:
+            lines.append(f"Response never available: {dialogue_id} → {response_id}")
+        for dialogue_id, response_id, next_id in self.broken_transitions:
+            lines.append(f"Broken transition: {dialogue_id} → {response_id} leads to missing '{next_id}'")
+        if self.soft_locks:
+            lines.append(f"Soft-locks (no response available): {self.soft_locks} states")
+            for example in self.soft_lock_examples:
+                lines.append(f"   - {example}")
+        if self.trapped_states:
+            lines.append(f"States that can never end the conversation: {self.trapped_states}")
+            for example in self.trapped_examples:
+                lines.append(f"   - {example}")
+        return lines
+
+
+class StateExplorer:
+    """
+    Breadth-first walk over every state a player can reach
+
+    A state is the current dialogue plus the quest state and variables, as
+    GameState keeps them, stored and deduplicated by its canonical key
+    (see state_space.StateEncoder). Keys are small tuples of a shared
+    dialogue ID, a bytes object and an int, so they are cheap to hash,
+    compare and send to worker processes.
+    """
+
+    def __init__(self, dialogue_data: Dict[str, Any], max_states: int = DEFAULT_MAX_STATES,
+                 max_memory: int = DEFAULT_MAX_MEMORY, jobs: int = 1, file_path: Optional[str] = None):
+        """
+        Args:
+            dialogue_data: Loaded dialogue data
+            max_states: Stop after reaching this many states
+            max_memory: Stop when the explorer's own bookkeeping passes this many bytes
+            jobs: Worker processes that expand states (0 = one per CPU core)
+            file_path: Path the dialogue data was loaded from; worker processes
+                load it themselves, so it is required when jobs isn't 1
+
+        Raises:
+            ValueError: If jobs isn't 1 and no file_path is given
+        """
+        self.expander = StateExpander(dialogue_data)
+        self.dialogue_data = dialogue_data
+        self.max_states = max_states
+        self.max_memory = max_memory
+        self.jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+        self.file_path = file_path
+        if self.jobs > 1 and file_path is None:
+            raise ValueError("Parallel exploration needs the path of the dialogue file")
+
+    def explore(self) -> ExplorationReport:
+        """
+        Walk the whole state space (or up to the caps) and report on it
+
+        Returns:
+            The exploration report
+        """
+        started = time.perf_counter()
+        report = ExplorationReport()
+        visited: Dict[StateKey, int] = {}
+        keys: List[StateKey] = []
+        # Successors of state n are edge_targets[edge_offsets[n]:edge_offsets[n + 1]]
+        edge_offsets = array('q', [0])
+        edge_targets = array('q')
+        can_end = bytearray()
+
+        start = self.expander.initial_state()
+        if self.expander.graph.get_dialogue(start[0]) is None:
+            report.elapsed = time.perf_counter() - started
+            self._summarize(report, keys, edge_offsets, edge_targets, can_end)
+            return report
+        visited[start] = 0
+        keys.append(start)
+
+        broken = {}
+        frontier = [0]
+        executor = None
+        if self.jobs > 1:
+            executor = ProcessPoolExecutor(max_workers=self.jobs, initializer=_init_worker,
+                                           initargs=(self.file_path,))
+        try:
+            while frontier and report.truncated is None:
+                next_frontier = []
+                for number, transitions in zip(frontier, self._expand_all(executor, frontier, keys)):
+                    dialogue_id = keys[number][0]
+                    report.visited_dialogues.add(dialogue_id)
+                    if not transitions:
+                        report.soft_locks += 1
+                        if len(report.soft_lock_examples) < MAX_EXAMPLES:
+                            report.soft_lock_examples.append(self.expander.describe(keys[number]))
+                    ends = False
+                    for response_id, kind, next_id, key in transitions:
+                        report.transitions += 1
+                        report.available_responses.add((dialogue_id, response_id))
+                        if kind == END:
+                            report.endings += 1
+                            ends = True
+                            continue
+                        if kind == BROKEN:
+                            broken[(dialogue_id, response_id)] = next_id
+                            continue
+                        target = visited.get(key)
+                        if target is None:
+                            if len(keys) >= self.max_states:
+                                report.truncated = "max_states"
+                                break
+                            target = len(keys)
+                            visited[key] = target
+                            keys.append(key)
+                            next_frontier.append(target)
+                            if target % 4096 == 0 and self._memory_used(visited, keys, edge_targets) > self.max_memory:
+                                report.truncated = "max_memory"
+                                break
+                        edge_targets.append(target)
+                    edge_offsets.append(len(edge_targets))
+                    can_end.append(ends)
+                    if report.truncated is not None:
+                        break
+                frontier = next_frontier
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        report.broken_transitions = [(dialogue_id, response_id, next_id)
+                                     for (dialogue_id, response_id), next_id in broken.items()]
+        report.elapsed = time.perf_counter() - started
+        self._summarize(report, keys, edge_offsets, edge_targets, can_end)
+        return report
+
+    def _expand_all(self, executor: Optional[ProcessPoolExecutor], frontier: List[int],
+                    keys: List[StateKey]):
+        """Expand a BFS level, in the worker processes when it is large enough to be worth it"""
+        states = [keys[number] for number in frontier]
+        if executor is None or len(states) < CHUNK_SIZE * 2:
+            return [self.expander.expand(state) for state in states]
+        chunks = [states[position:position + CHUNK_SIZE] for position in range(0, len(states), CHUNK_SIZE)]
+        return [transitions for chunk in executor.map(_expand_in_worker, chunks) for transitions in chunk]
+
+    def _memory_used(self, visited: Dict, keys: List, edge_targets: array) -> int:
+        """Estimate the bytes held by the explorer's bookkeeping"""
+        # Keys differ little in size, so the newest one stands for all of them
+        return (sys.getsizeof(visited) + sys.getsizeof(keys) + len(keys) * _key_size(keys[-1]) +
+                edge_targets.itemsize * len(edge_targets))
+
+    def _summarize(self, report: ExplorationReport, keys: List[Tuple[str, int, int]],
+                   edge_offsets: array, edge_targets: array, can_end: bytearray) -> None:
+        """Fill in the coverage totals and the states that can never end"""
+        report.states = len(keys)
+        for dialogue in self.dialogue_data.get("dialogues", []):
+            report.dialogue_count += 1
+            report.response_count += len(dialogue.get("responses", []))
+            if dialogue["id"] not in report.visited_dialogues:
+                report.unreachable_dialogues.append(dialogue["id"])
+            else:
+                for response in dialogue.get("responses", []):
+                    if (dialogue["id"], response["id"]) not in report.available_responses:
+                        report.unavailable_responses.append((dialogue["id"], response["id"]))
+        if report.truncated is not None:
+            report.trapped_states = None
+            return
+
+        # Walk the state graph backwards from the states that can end the conversation
+        expanded = len(can_end)
+        predecessor_counts = [0] * (expanded + 1)
+        for target in edge_targets:
+            predecessor_counts[target + 1] += 1
+        for number in range(expanded):
+            predecessor_counts[number + 1] += predecessor_counts[number]
+        predecessors = array('q', bytes(8 * len(edge_targets)))
+        fill = predecessor_counts[:]
+        for source in range(expanded):
+            for position in range(edge_offsets[source], edge_offsets[source + 1]):
+                target = edge_targets[position]
+                predecessors[fill[target]] = source
+                fill[target] += 1
+
+        ends = bytearray(can_end)
+        to_check = [number for number in range(expanded) if ends[number]]
+        while to_check:
+            number = to_check.pop()
+            for position in range(predecessor_counts[number], predecessor_counts[number + 1]):
+                source = predecessors[position]
+                if not ends[source]:
+                    ends[source] = 1
+                    to_check.append(source)
+
+        report.trapped_states = 0
+        for number in range(expanded):
+            if not ends[number]:
+                report.trapped_states += 1
+                if len(report.trapped_examples) < MAX_EXAMPLES:
+                    report.trapped_examples.append(self.expander.describe(keys[number]))
+
+
+def _key_size(key: StateKey) -> int:
+    """Approximate bytes of a state key, not counting the dialogue ID string it shares with the data"""
+    return sys.getsizeof(key) + sys.getsizeof(key[1]) + sys.getsizeof(key[2]) + (deep_sizeof(key[3]) if key[3] else 0)
+
+
+def explore_file(file_path: str, compact: bool = False, lazy: bool = False, **options) -> ExplorationReport:
+    """
+    Explore a dialogue file
+
+    Args:
+        file_path: Path to the dialogue file or pack
+        compact: Load the compact model
+        lazy: Read each dialogue from disk when visited, through an offset index
+        options: Passed on to StateExplorer (max_states, max_memory, jobs)
+
+    Returns:
+        The exploration report
+    """
+    file_path = os.path.abspath(file_path)
+    dialogue_data = dialogue_manager.load_dialogue_data(file_path, compact=compact, lazy=lazy)
+    return StateExplorer(dialogue_data, file_path=file_path, **options).explore()
+
+
+_worker_expander = None
+
+
+def _init_worker(file_path: str) -> None:
+    """Load the dialogue file once per worker process"""
+    global _worker_expander
+    _worker_expander = StateExpander(dialogue_manager.load_dialogue_data(file_path))
+
+
+def _expand_in_worker(states: List[StateKey]) -> List[List[Transition]]:
+    """Expand a chunk of states in a worker process"""
+    return [_worker_expander.expand(state) for state in states]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Explore every playthrough state of a dialogue file')
+    parser.add_argument('dialogue_file', help='Path to the dialogue JSON file or compiled pack')
+    parser.add_argument('--max-states', type=int, default=DEFAULT_MAX_STATES,
+                        help=f'Stop after this many states (default: {DEFAULT_MAX_STATES})')
+    parser.add_argument('--max-memory-mb', type=int, default=DEFAULT_MAX_MEMORY // (1024 * 1024),
+                        help=f'Stop when the explored states take this many MiB (default: {DEFAULT_MAX_MEMORY // (1024 * 1024)})')
+    parser.add_argument('--jobs', '-j', type=int, default=1, help='Worker processes (default: 1, 0 = one per CPU core)')
+    parser.add_argument('--compact', action='store_true', help='Use the memory-efficient compact dialogue model')
+    parser.add_argument('--lazy', action='store_true', help='Read each dialogue from disk when visited, through an offset index')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    args = parser.parse_args()
+
+    try:
+        report = explore_file(args.dialogue_file, compact=args.compact, lazy=args.lazy,
+                              max_states=args.max_states, max_memory=args.max_memory_mb * 1024 * 1024,
+                              jobs=args.jobs)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error loading dialogue file: {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json_dumps(report.to_dict()))
+    else:
+        print("\n".join(report.format_report()))
+    if report.soft_locks or report.trapped_states or report.broken_transitions:
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
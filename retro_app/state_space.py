@@ -0,0 +1,294 @@
+"""
+State Space for Terminal Dialogue System
+Canonical, compact keys for player states and a breadth-first search for reachable responses
+"""
+import weakref
+from array import array
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from data_layer import json_dumps, json_loads
+from script_compiler import (
+    compile_script, compile_condition,
+    SCRIPT_START_QUEST, SCRIPT_UPDATE_QUEST, SCRIPT_COMPLETE_QUEST, SCRIPT_SET_VARIABLE,
+    CONDITION_VARIABLE_EQUALS, CONDITION_QUEST_ACTIVE, CONDITION_QUEST_COMPLETED, CONDITION_QUEST_STAGE
+)
+
+# A state key: (current dialogue ID, one byte per known quest, two bits per known
+# boolean variable, sorted tuple of everything else). Equal states always get
+# equal keys, and the key is hashable and small.
+StateKey = Tuple[Optional[str], bytes, int, tuple]
+
+# A response in a dialogue: (dialogue ID, response ID)
+ResponseRef = Tuple[str, str]
+
+# Stop a search after this many distinct states unless told otherwise
+DEFAULT_MAX_STATES = 1_000_000
+
+# Largest quest stage that fits in a quest's byte; later stages go in the overflow part
+_MAX_PACKED_STAGE = 126
+
+# Overflow entry tags, so quests and variables sort apart
+_QUEST = 0
+_VARIABLE = 1
+
+_VARIABLE_FALSE = 1
+_VARIABLE_TRUE = 2
+
+# Decoded quest and variable parts kept per encoder
+_DECODE_CACHE_SIZE = 4096
+
+
+def _freeze(value: Any) -> Any:
+    """Make a JSON value hashable; lists and objects become a tuple holding their canonical JSON"""
+    if isinstance(value, (list, dict)):
+        return (json_dumps(value, pretty=False, sort_keys=True),)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    """Undo _freeze"""
+    if isinstance(value, tuple):
+        return json_loads(value[0])
+    return value
+
+
+class StateEncoder:
+    """
+    Turns a player state into a canonical, hashable key and back
+
+    The quest and variable names a file can ever use (its quests, variable
+    defaults, scripts and conditions) are numbered in sorted order, so the
+    same file always gets the same numbering, in any process. A quest is
+    then one byte (absent, or its stage and whether it's completed) and a
+    boolean variable two bits of a single int. Anything that doesn't fit
+    (unknown names, non-boolean values, very late stages) goes in a sorted
+    overflow tuple, which is empty for most states.
+    """
+
+    def __init__(self, dialogue_data: Dict[str, Any]):
+        """Number the quests and variables used anywhere in the dialogue data"""
+        quest_ids = {quest["id"] for quest in dialogue_data.get("quests", [])}
+        variable_names = set(dialogue_data.get("variables", {}))
+        for dialogue in dialogue_data.get("dialogues", []):
+            scripts = [dialogue.get("on_entry")]
+            conditions = []
+            for response in dialogue.get("responses", []):
+                scripts.append(response.get("script"))
+                conditions.append(response.get("condition"))
+            # Script and condition opcodes are numbered separately, so they're told apart here
+            for opcode, arg, _ in map(compile_script, filter(None, scripts)):
+                if opcode in (SCRIPT_START_QUEST, SCRIPT_UPDATE_QUEST, SCRIPT_COMPLETE_QUEST):
+                    quest_ids.add(arg)
+                elif opcode == SCRIPT_SET_VARIABLE:
+                    variable_names.add(arg)
+            for opcode, arg, _ in map(compile_condition, filter(None, conditions)):
+                if opcode in (CONDITION_QUEST_ACTIVE, CONDITION_QUEST_COMPLETED, CONDITION_QUEST_STAGE):
+                    quest_ids.add(arg)
+                elif opcode == CONDITION_VARIABLE_EQUALS:
+                    variable_names.add(arg)
+        self.quest_ids: List[str] = sorted(quest_ids)
+        self.variable_names: List[str] = sorted(variable_names)
+        self._quest_index = {quest_id: index for index, quest_id in enumerate(self.quest_ids)}
+        # Variable name -> (bits for False, bits for True), indexed by the value
+        self._variable_bits = {name: (_VARIABLE_FALSE << (2 * index), _VARIABLE_TRUE << (2 * index))
+                               for index, name in enumerate(self.variable_names)}
+        # Decoded quest and variable parts seen recently, copied on decode
+        self._decoded_quests: Dict[bytes, Dict[str, Dict[str, Any]]] = {}
+        self._decoded_variables: Dict[int, Dict[str, Any]] = {}
+
+    def encode(self, dialogue_id: Optional[str], quest_state: Dict[str, Dict[str, Any]],
+               variables: Dict[str, Any]) -> StateKey:
+        """
+        Get the key of a state
+
+        Args:
+            dialogue_id: ID of the current dialogue
+            quest_state: Quest ID -> {"current_stage": ..., "completed": ...}, as GameState keeps it
+            variables: Variable name -> value
+        """
+        overflow = []
+        quests = bytearray(len(self.quest_ids))
+        for quest_id, quest in quest_state.items():
+            stage = quest.get("current_stage")
+            completed = bool(quest.get("completed", False))
+            index = self._quest_index.get(quest_id)
+            if index is not None and type(stage) is int and 0 <= stage <= _MAX_PACKED_STAGE:
+                quests[index] = 1 + 2 * stage + completed
+            else:
+                overflow.append((_QUEST, quest_id, _freeze(stage), completed))
+
+        flags = 0
+        variable_bits = self._variable_bits
+        for name, value in variables.items():
+            bits = variable_bits.get(name)
+            if bits is not None and (value is True or value is False):
+                flags |= bits[value]
+            else:
+                overflow.append((_VARIABLE, name, _freeze(value)))
+
+        return (dialogue_id, bytes(quests), flags, tuple(sorted(overflow)) if overflow else ())
+
+    def decode(self, key: StateKey) -> Tuple[Optional[str], Dict[str, Dict[str, Any]], Dict[str, Any]]:
+        """
+        Rebuild a state from its key
+
+        Returns:
+            (dialogue ID, quest state, variables) as new, mutable dicts
+        """
+        dialogue_id, quests, flags, overflow = key
+        decoded_quests = self._decoded_quests.get(quests)
+        if decoded_quests is None:
+            decoded_quests = {}
+            for index, code in enumerate(quests):
+                if code:
+                    stage, completed = divmod(code - 1, 2)
+                    decoded_quests[self.quest_ids[index]] = (
+                        {"current_stage": stage, "completed": True} if completed else {"current_stage": stage})
+            self._remember(self._decoded_quests, quests, decoded_quests)
+        # Scripts change quest dicts in place, so the caller gets copies
+        quest_state = {quest_id: dict(quest) for quest_id, quest in decoded_quests.items()}
+
+        decoded_variables = self._decoded_variables.get(flags)
+        if decoded_variables is None:
+            decoded_variables = {}
+            index = 0
+            remaining = flags
+            while remaining:
+                code = remaining & 3
+                if code:
+                    decoded_variables[self.variable_names[index]] = code == _VARIABLE_TRUE
+                remaining >>= 2
+                index += 1
+            self._remember(self._decoded_variables, flags, decoded_variables)
+        variables = dict(decoded_variables)
+
+        for entry in overflow:
+            if entry[0] == _QUEST:
+                _, quest_id, stage, completed = entry
+                stage = _thaw(stage)
+                quest_state[quest_id] = (
+                    {"current_stage": stage, "completed": True} if completed else {"current_stage": stage})
+            else:
+                variables[entry[1]] = _thaw(entry[2])
+        return dialogue_id, quest_state, variables
+
+    @staticmethod
+    def _remember(cache: Dict, part: Any, decoded: Any) -> None:
+        """Keep a decoded part, starting over when the cache is full"""
+        if len(cache) >= _DECODE_CACHE_SIZE:
+            cache.clear()
+        cache[part] = decoded
+
+
+# Encoders are built once per graph, i.e. per loaded (and unchanged) document
+_encoders: "weakref.WeakKeyDictionary[Any, StateEncoder]" = weakref.WeakKeyDictionary()
+
+
+def get_state_encoder(graph: Any, dialogue_data: Dict[str, Any]) -> StateEncoder:
+    """
+    Get the state encoder for dialogue data, building it if needed
+
+    Args:
+        graph: The data's graph (see DialogueDataManager.get_graph); a new
+            graph, e.g. after the data was edited, gets a new encoder
+        dialogue_data: The dialogue data
+    """
+    encoder = _encoders.get(graph)
+    if encoder is None:
+        encoder = StateEncoder(dialogue_data)
+        _encoders[graph] = encoder
+    return encoder
+
+
+class ReachabilityResult:
+    """
+    Answer to a reachability search
+
+    Attributes:
+        paths: (dialogue ID, response ID) -> the shortest list of
+            (dialogue ID, response ID) choices that makes the response
+            available and takes it, for every response found
+        states: Distinct states explored
+        complete: True if the search ran out of states to explore, so
+            responses not in paths are never available
+        truncated: True if the search stopped at max_states
+    """
+
+    def __init__(self):
+        self.paths: Dict[ResponseRef, List[ResponseRef]] = {}
+        self.states = 0
+        self.complete = False
+        self.truncated = False
+
+    def is_reachable(self, dialogue_id: str, response_id: str) -> Optional[bool]:
+        """Check whether a response can be taken: True, False, or None if the search couldn't tell"""
+        if (dialogue_id, response_id) in self.paths:
+            return True
+        return False if self.complete else None
+
+
+# Transition function of a search: state key -> (dialogue ID, response ID,
+# next state key or None if the response ends the conversation) for every
+# response available in that state
+ExpandFunction = Callable[[StateKey], Iterable[Tuple[str, str, Optional[StateKey]]]]
+
+
+def find_response_paths(start: StateKey, expand: ExpandFunction,
+                        targets: Optional[Iterable[ResponseRef]] = None,
+                        max_states: int = DEFAULT_MAX_STATES) -> ReachabilityResult:
+    """
+    Breadth-first search for the responses a player can take
+
+    Every distinct state is expanded once: states are deduplicated through
+    their canonical keys, so the many paths that lead to the same dialogue
+    with the same quests and variables are only explored once.
+
+    Args:
+        start: Key of the state to search from
+        expand: The engine's transition function
+        targets: Responses to look for; the search stops once all are found.
+            None looks for every response.
+        max_states: Stop after this many distinct states
+
+    Returns:
+        The responses found, with the shortest path to each
+    """
+    result = ReachabilityResult()
+    remaining: Optional[Set[ResponseRef]] = set(targets) if targets is not None else None
+    visited: Dict[StateKey, int] = {start: 0}
+    # How each state was first reached: parent state number and the choice taken there
+    parents = array('q', [-1])
+    choices: List[Optional[ResponseRef]] = [None]
+
+    def path_to(number: int) -> List[ResponseRef]:
+        path = []
+        while number > 0:
+            path.append(choices[number])
+            number = parents[number]
+        path.reverse()
+        return path
+
+    queue = [start]
+    for number, key in enumerate(queue):
+        for dialogue_id, response_id, next_key in expand(key):
+            choice = (dialogue_id, response_id)
+            if choice not in result.paths:
+                result.paths[choice] = path_to(number) + [choice]
+                if remaining is not None:
+                    remaining.discard(choice)
+                    if not remaining:
+                        result.states = len(queue)
+                        return result
+            if next_key is None or next_key in visited:
+                continue
+            if len(queue) >= max_states:
+                result.states = len(queue)
+                result.truncated = True
+                return result
+            visited[next_key] = len(queue)
+            queue.append(next_key)
+            parents.append(number)
+            choices.append(choice)
+
+    result.states = len(queue)
+    result.complete = True
+    return result
@@ -0,0 +1,352 @@
+"""
+Streaming Loader for Terminal Dialogue System
+Parses dialogue files incrementally so play can start before a large file is fully read
+"""
+import json
+import re
+import threading
+from typing import Any, Callable, Dict, IO, Iterator, Optional, Tuple
+from data_layer import DialogueGraph, dialogue_manager
+
+# Characters read from the file at a time; the parse buffer stays around this size
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+# Top-level arrays whose elements are parsed one at a time
+STREAMED_ARRAYS = ("dialogues", "quests")
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER_CHARS = frozenset("0123456789.eE+-")
+
+
+class _ChunkReader:
+    """Sliding window over a text file that decodes one JSON value at a time"""
+
+    def __init__(self, file: IO[str], chunk_size: int):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        # File position (in characters) of buffer[0]
+        self.offset = 0
+        self.eof = False
+        # json.load shares one string per distinct key across the whole document;
+        # decoding value by value would otherwise store "id", "text", ... once per object
+        self._keys: Dict[str, str] = {}
+        self._decoder = json.JSONDecoder(object_pairs_hook=self._object)
+
+    def _object(self, pairs):
+        """Build a decoded object, reusing the key strings seen so far"""
+        keys = self._keys
+        return {keys.setdefault(key, key): value for key, value in pairs}
+
+    def _fill(self) -> bool:
+        """Append the next chunk to the buffer, dropping what has been consumed"""
+        if self.eof:
+            return False
+        # Read at least as much as is already pending, so a value larger than
+        # a chunk is retried a logarithmic rather than linear number of times
+        chunk = self.file.read(max(self.chunk_size, len(self.buffer) - self.pos))
+        if not chunk:
+            self.eof = True
+            return False
+        self.offset += self.pos
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character, or '' at the end of the file"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        """Consume the given structural character"""
+        if self.peek() != char:
+            self.error(f"Expecting '{char}' delimiter")
+        self.pos += 1
+
+    def end_of(self, close: str) -> bool:
+        """Consume the ',' between items, or the closing bracket; True if it was the bracket"""
+        char = self.peek()
+        if char == ",":
+            self.pos += 1
+            return False
+        if char == close:
+            self.pos += 1
+            return True
+        self.error(f"Expecting ',' or '{close}' delimiter")
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # Most likely the value continues in the next chunk
+                if self._fill():
+                    continue
+                raise
+            # A number cut off by the end of the buffer ("1" of "1.5") may carry on in the next chunk
+            if (type(value) in (int, float) and
+                    (end == len(self.buffer) or self.buffer[end] in _NUMBER_CHARS) and self._fill()):
+                continue
+            self.pos = end
+            return value
+
+    def tell(self) -> int:
+        """Get the file position (in characters) of the next unread character"""
+        return self.offset + self.pos
+
+    def error(self, message: str) -> None:
+        """Raise a decode error at the current position"""
+        raise json.JSONDecodeError(message, self.buffer, self.pos)
+
+
+def iter_dialogue_file(file: IO[str], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[str, str, Any]]:
+    """
+    Parse a dialogue file incrementally
+
+    Only one chunk of the file text is held at a time, and the "dialogues"
+    and "quests" arrays are produced element by element.
+
+    Args:
+        file: The dialogue file, opened in text mode
+        chunk_size: Characters read at a time
+
+    Yields:
+        ("field", key, value) for each top-level field; for "dialogues" and
+        "quests" the value is an empty list, followed by ("item", key, element)
+        for each element of the array
+
+    Raises:
+        json.JSONDecodeError: If the file contains invalid JSON
+    """
+    for kind, key, value, _, _ in iter_dialogue_spans(file, chunk_size):
+        yield kind, key, value
+
+
+def iter_dialogue_spans(file: IO[str], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                        streamed: Tuple[str, ...] = STREAMED_ARRAYS) -> Iterator[Tuple[str, str, Any, int, int]]:
+    """
+    Parse a dialogue file incrementally, reporting where each value lies in the file
+
+    Args:
+        file: The dialogue file, opened in text mode
+        chunk_size: Characters read at a time
+        streamed: Top-level arrays produced element by element
+
+    Yields:
+        (kind, key, value, start, end) like iter_dialogue_file, where
+        file[start:end] is the text of the value (in characters of the open
+        file); the empty list of a streamed array has an empty span at its '['
+
+    Raises:
+        json.JSONDecodeError: If the file contains invalid JSON
+    """
+    reader = _ChunkReader(file, chunk_size)
+    reader.expect("{")
+    if reader.peek() == "}":
+        reader.pos += 1
+    else:
+        while True:
+            if reader.peek() != '"':
+                reader.error("Expecting property name enclosed in double quotes")
+            key = reader.value()
+            reader.expect(":")
+
+            if key in streamed and reader.peek() == "[":
+                array_start = reader.tell()
+                reader.pos += 1
+                yield "field", key, [], array_start, array_start
+                if reader.peek() == "]":
+                    reader.pos += 1
+                else:
+                    while True:
+                        reader.peek()
+                        start = reader.tell()
+                        value = reader.value()
+                        yield "item", key, value, start, reader.tell()
+                        if reader.end_of("]"):
+                            break
+            else:
+                reader.peek()
+                start = reader.tell()
+                value = reader.value()
+                yield "field", key, value, start, reader.tell()
+
+            if reader.end_of("}"):
+                break
+
+    if reader.peek():
+        reader.error("Extra data")
+
+
+def load_dialogue_json(file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Any]:
+    """
+    Load a dialogue file without reading the whole file into one string first
+
+    Returns the same data as json.load, but peak memory is the parsed data
+    plus one chunk instead of the parsed data plus the complete file text.
+    A pending save journal is folded into the file first (see save_journal).
+    """
+    dialogue_manager.apply_pending_journal(file_path)
+    data = {}
+    with open(file_path, 'r') as file:
+        for kind, key, value in iter_dialogue_file(file, chunk_size):
+            if kind == "field":
+                data[key] = value
+            else:
+                data[key].append(value)
+    return data
+
+
+class StreamingDialogueGraph(DialogueGraph):
+    """
+    Dialogue graph that is filled in while its file is being parsed
+
+    Lookups for IDs that haven't been parsed yet wait for the parser instead
+    of failing, so they return the same results as a fully loaded graph.
+    """
+
+    def __init__(self, stream: "DialogueStream"):
+        """Create an empty graph over the stream's data"""
+        self.stream = stream
+        super().__init__(stream.data)
+
+    def is_current(self, dialogue_data: Dict[str, Any]) -> bool:
+        """The graph grows with the stream's data, so it is current for as long as that is"""
+        return dialogue_data is self.dialogue_data
+
+    def get_dialogue(self, dialogue_id: str) -> Optional[Dict[str, Any]]:
+        """Find a dialogue by its ID, waiting for it if it may still be parsed"""
+        if dialogue_id not in self.dialogues:
+            self.stream.wait_until(lambda: dialogue_id in self.dialogues)
+        return self.dialogues.get(dialogue_id)
+
+    def get_response(self, dialogue_id: str, response_id: str) -> Optional[Dict[str, Any]]:
+        """Find a response by its ID within a dialogue, waiting for the dialogue if needed"""
+        self.get_dialogue(dialogue_id)
+        return super().get_response(dialogue_id, response_id)
+
+    def get_quest(self, quest_id: str) -> Optional[Dict[str, Any]]:
+        """Find a quest by its ID, waiting for it if it may still be parsed"""
+        if quest_id not in self.quests:
+            self.stream.wait_until(lambda: quest_id in self.quests)
+        return self.quests.get(quest_id)
+
+    def get_quest_stage(self, quest_id: str, stage_id: int) -> Optional[Dict[str, Any]]:
+        """Find a quest stage, waiting for its quest if needed"""
+        self.get_quest(quest_id)
+        return super().get_quest_stage(quest_id, stage_id)
+
+    def get_character_by_name(self, name: str) -> Optional[Dict[str, Any]]:
+        """Find a character by its display name, waiting for the "characters" section if needed"""
+        if self._characters_by_name is None:
+            self.stream.get_field("characters", {})
+        return super().get_character_by_name(name)
+
+
+class DialogueStream:
+    """
+    Dialogue data parsed on a background thread
+
+    `data` fills up as the file is read and every dialogue and quest is added
+    to `graph` as soon as it is parsed, so a game can start at the starting
+    dialogue while the rest of the file is still loading.
+    """
+
+    def __init__(self, file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 convert: Optional[Dict[str, Callable[[Dict], Any]]] = None):
+        """
+        Prepare the stream; call start() to begin parsing
+
+        Args:
+            file_path: Path to the dialogue file
+            chunk_size: Characters read from the file at a time
+            convert: Optional "dialogues"/"quests" -> function applied to each
+                element as it is parsed (used to build the compact model)
+        """
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        self.convert = convert or {}
+        self.data: Dict[str, Any] = {}
+        self.graph = StreamingDialogueGraph(self)
+        self.done = False
+        self.error: Optional[Exception] = None
+        self._closed = False
+        self._ready = threading.Condition()
+        self._thread = threading.Thread(target=self._parse, name=f"dialogue-stream:{file_path}", daemon=True)
+
+    def start(self) -> "DialogueStream":
+        """Start parsing in the background"""
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        """Stop parsing, e.g. when the player loads another file"""
+        self._closed = True
+
+    def join(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Wait for the whole file to be parsed
+
+        Returns:
+            The complete dialogue data
+
+        Raises:
+            The parse error, if the file could not be read
+        """
+        self.wait_until(lambda: False, timeout)
+        return self.data
+
+    def wait_until(self, predicate: Callable[[], bool], timeout: Optional[float] = None) -> bool:
+        """
+        Block until predicate() is true or parsing has finished
+
+        Returns:
+            The final value of predicate()
+
+        Raises:
+            The parse error, if parsing failed before predicate() became true
+        """
+        with self._ready:
+            self._ready.wait_for(lambda: self.done or predicate(), timeout)
+        if predicate():
+            return True
+        if self.error is not None:
+            raise self.error
+        return False
+
+    def get_field(self, key: str, default: Any = None) -> Any:
+        """Get a top-level field, waiting until it has been parsed or the file has ended"""
+        self.wait_until(lambda: key in self.data)
+        return self.data.get(key, default)
+
+    def _parse(self) -> None:
+        """Parser thread: add each field and element to the data and graph as it arrives"""
+        index = {"dialogues": self.graph.index_dialogue, "quests": self.graph.index_quest}
+        try:
+            with open(self.file_path, 'r') as file:
+                for kind, key, value in iter_dialogue_file(file, self.chunk_size):
+                    if self._closed:
+                        break
+                    with self._ready:
+                        if kind == "field":
+                            self.data[key] = value
+                        else:
+                            if key in self.convert:
+                                value = self.convert[key](value)
+                            self.data[key].append(value)
+                            index[key](value)
+                        self._ready.notify_all()
+        except Exception as e:
+            self.error = e
+        finally:
+            with self._ready:
+                self.done = True
+                self._ready.notify_all()
@@ -5,16 +5,17 @@ This script helps users create a new dialogue file with proper structure.
 """
 import os
 import sys
-import json
 import argparse
 from datetime import datetime
 
-def create_dialogue_file(template_path, output_path, title, author, description):
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_layer import read_json_file, write_json_file
+
+def create_dialogue_file(template_path, output_path, title, author, description, pretty=True):
     """Create a new dialogue file from a template with custom metadata"""
     try:
         # Load template file
-        with open(template_path, 'r') as f:
-            dialogue_data = json.load(f)
+        dialogue_data = read_json_file(template_path)
         
         # Update metadata
         if "metadata" not in dialogue_data:
@@ -33,8 +34,7 @@ def create_dialogue_file(template_path, output_path, title, author, description)
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         
         # Write to output file
-        with open(output_path, 'w') as f:
-            json.dump(dialogue_data, f, indent=2)
+        write_json_file(output_path, dialogue_data, pretty)
             
         print(f"Created new dialogue file: {output_path}")
         return True
@@ -54,6 +54,8 @@ def main():
                         help='Author name')
     parser.add_argument('--description', default='A dialogue created from template', 
                         help='Description of the dialogue')
+    parser.add_argument('--compact-json', action='store_true',
+                        help='Write compact JSON instead of indented JSON')
     
     args = parser.parse_args()
     
@@ -80,7 +82,8 @@ def main():
         output_path, 
         args.title, 
         args.author, 
-        args.description
+        args.description,
+        pretty=not args.compact_json
     )
     
     # Suggest validation
@@ -1,12 +1,12 @@
 import streamlit as st
-import json
 import os
 import re
 from PIL import Image
 import base64
 import io
-import requests
-from io import BytesIO
+from data_layer import dialogue_manager, json_loads, read_dialogue_file
+from image_cache import image_cache
+from theme import apply_theme
 
 # Set page configuration
 st.set_page_config(
@@ -18,245 +18,7 @@ st.set_page_config(
 
 # Apply the retro CRT styling with 80s monitor frame and image support
 def apply_terminal_style():
-    # CSS for retro terminal look with CRT monitor frame and image support
-    st.markdown("""
-    <style>
-    /* Base styling */
-    body {
-        margin: 0;
-        padding: 0;
-        background-color: #111;
-        color: #00FF00;
-        font-family: 'Courier New', monospace;
-        height: 100vh;
-        overflow: hidden;
-    }
-    
-    /* Main container to position the CRT in the center */
-    .main {
-        display: flex;
-        justify-content: center;
-        align-items: center;
-        height: 100vh;
-        padding: 0 !important;
-        max-width: 100% !important;
-    }
-    
-    /* CRT Monitor Bezel */
-    .block-container {
-        max-width: 1000px !important;
-        padding-top: 0 !important;
-        padding-left: 0 !important;
-        padding-right: 0 !important;
-        margin: 0 auto;
-        position: relative;
-    }
-    
-    /* CRT Screen Effect */
-    .stApp {
-        background-color: #000000;
-        border-radius: 20px;
-        border: 25px solid #333;
-        box-shadow: 
-            inset 0 0 10px rgba(0, 255, 0, 0.3),
-            0 0 30px rgba(0, 255, 0, 0.1),
-            0 10px 50px rgba(0, 0, 0, 0.8);
-        position: relative;
-        overflow: hidden;
-        margin: 40px auto;
-        width: 90% !important;
-        max-width: 900px;
-    }
-    
-    /* CRT monitor plastic frame */
-    .stApp::before {
-        content: "";
-        position: absolute;
-        top: -25px;
-        left: -25px;
-        right: -25px;
-        bottom: -25px;
-        background-color: #222;
-        border-radius: 30px;
-        border: 5px solid #111;
-        z-index: -1;
-    }
-    
-    /* CRT scanlines */
-    .stApp::after {
-        content: "";
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        bottom: 0;
-        background: linear-gradient(
-            rgba(0, 0, 0, 0) 50%, 
-            rgba(0, 0, 0, 0.15) 50%
-        );
-        background-size: 100% 4px;
-        pointer-events: none;
-        z-index: 999;
-    }
-    
-    /* Add CRT screen curvature */
-    .stApp {
-        border-radius: 20px;
-        overflow: hidden;
-    }
-    
-    /* CRT glare effect */
-    .stApp::before {
-        content: "";
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        bottom: 0;
-        background: radial-gradient(
-            ellipse at center,
-            rgba(0, 20, 0, 0) 0%,
-            rgba(0, 20, 0, 0.2) 80%,
-            rgba(0, 20, 0, 0.3) 100%
-        );
-        pointer-events: none;
-        z-index: 998;
-    }
-    
-    /* Buttons styling */
-    .stButton>button {
-        background-color: #000000;
-        color: #00FF00;
-        border: 1px solid #00FF00;
-        border-radius: 0px;
-        font-family: 'Courier New', monospace;
-        width: 100%;
-        text-align: left;
-        padding: 10px;
-        transition: background-color 0.3s ease;
-    }
-    
-    .stButton>button:hover {
-        background-color: #003300;
-        color: #00FF00;
-    }
-    
-    /* Terminal text styling */
-    .stTextInput>div>div>input {
-        background-color: #000000;
-        color: #00FF00;
-        border: 1px solid #00FF00;
-        border-radius: 0px;
-        font-family: 'Courier New', monospace;
-    }
-    
-    /* Sidebar styling */
-    .stSidebar {
-        background-color: #000000;
-        color: #00FF00;
-        border-left: 1px solid #00FF00;
-    }
-    
-    /* Dialog text styling */
-    .dialog-text {
-        background-color: #000000;
-        color: #00FF00;
-        border: 1px solid #00FF00;
-        padding: 10px;
-        font-family: 'Courier New', monospace;
-        margin-bottom: 20px;
-        position: relative;
-        box-shadow: 0 0 5px rgba(0, 255, 0, 0.3);
-    }
-    
-    .dialog-header {
-        color: #FFFFFF;
-        font-weight: bold;
-        margin-bottom: 10px;
-        font-family: 'Courier New', monospace;
-    }
-    
-    /* Speaker image styling */
-    .speaker-image {
-        border: 2px solid #00FF00;
-        box-shadow: 0 0 10px rgba(0, 255, 0, 0.5);
-        background-color: #000;
-        max-width: 100%;
-        height: auto;
-    }
-    
-    .speaker-container {
-        display: flex;
-        margin-bottom: 20px;
-    }
-    
-    .speaker-image-container {
-        flex: 0 0 120px;
-        margin-right: 15px;
-    }
-    
-    .speaker-text-container {
-        flex: 1;
-        background-color: #000000;
-        border: 1px solid #00FF00;
-        padding: 10px;
-        box-shadow: 0 0 5px rgba(0, 255, 0, 0.3);
-    }
-    
-    /* Quest styling */
-    .quest-update {
-        background-color: #001100;
-        color: #FFFF00;
-        border: 1px solid #FFFF00;
-        padding: 10px;
-        margin-top: 20px;
-        margin-bottom: 20px;
-        font-family: 'Courier New', monospace;
-        box-shadow: 0 0 5px rgba(255, 255, 0, 0.3);
-    }
-    
-    /* History styling */
-    .history-container {
-        opacity: 0.7;
-        margin-bottom: 20px;
-    }
-    
-    /* Custom scrollbar */
-    ::-webkit-scrollbar {
-        width: 10px;
-        background: #000000;
-    }
-    
-    ::-webkit-scrollbar-thumb {
-        background: #00FF00;
-        border: 1px solid #00FF00;
-    }
-    
-    ::-webkit-scrollbar-thumb:hover {
-        background: #00CC00;
-    }
-    
-    /* Debug styling */
-    .debug-info {
-        font-size: 12px;
-        color: #888;
-        margin-top: 30px;
-        padding: 10px;
-        border: 1px dashed #444;
-        background-color: #111;
-    }
-    
-    /* ASCII art styling */
-    pre {
-        color: #00FF00;
-        background-color: transparent;
-        border: none;
-        font-family: 'Courier New', monospace;
-        margin: 0;
-        padding: 0;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    apply_theme("image_display")
 
 # Function to load dialogue data
 def load_dialogue_data(file_path=None):
@@ -264,11 +26,10 @@ def load_dialogue_data(file_path=None):
     if file_path:
         try:
             if isinstance(file_path, str):
-                with open(file_path, 'r') as f:
-                    return json.load(f)
+                return read_dialogue_file(file_path)
             else:
                 # Handle uploaded file
-                return json.loads(file_path.getvalue())
+                return json_loads(file_path.getvalue())
         except Exception as e:
             st.error(f"Error loading dialogue file: {e}")
             return None
@@ -277,18 +38,14 @@ def load_dialogue_data(file_path=None):
     try:
         script_dir = os.path.dirname(os.path.realpath(__file__))
         default_path = os.path.join(script_dir, "dialogue_default.json")
-        with open(default_path, 'r') as f:
-            return json.load(f)
+        return read_dialogue_file(default_path)
     except Exception as e:
         st.error(f"Error loading default dialogue file: {e}")
         return None
 
 # Function to get dialogue by ID
 def get_dialogue_by_id(dialogue_data, dialogue_id):
-    for dialogue in dialogue_data.get("dialogues", []):
-        if dialogue["id"] == dialogue_id:
-            return dialogue
-    return None
+    return dialogue_manager.get_graph(dialogue_data).get_dialogue(dialogue_id)
 
 # Function to get character image URL
 def get_character_image(dialogue_data, dialogue):
@@ -298,23 +55,29 @@ def get_character_image(dialogue_data, dialogue):
     
     # Then check if there's a characters section with an entry for this NPC
     if "characters" in dialogue_data:
-        npc_name = dialogue["npc"]
-        for char_id, char_data in dialogue_data["characters"].items():
-            if char_data.get("name") == npc_name:
-                return char_data.get("image_url")
+        character = dialogue_manager.get_graph(dialogue_data).get_character_by_name(dialogue["npc"])
+        if character:
+            return character.get("image_url")
     
     # Return None if no image found
     return None
 
-# Function to display an image from URL
+# Function to get an image from URL without waiting for the network
 def display_image_from_url(image_url):
-    try:
-        response = requests.get(image_url)
-        image = Image.open(BytesIO(response.content))
-        return image
-    except Exception as e:
-        st.error(f"Error loading image: {e}")
-        return None
+    # Cached portraits come back scaled down; others are fetched in the background
+    image = image_cache.get(image_url)
+    if image is None:
+        error = image_cache.get_error(image_url)
+        if error:
+            st.error(f"Error loading image: {error}")
+    return image
+
+# Function to start loading the portraits of the dialogues the player can go to next
+def prefetch_portraits(dialogue_data, dialogue):
+    for response in dialogue.get("responses", []):
+        next_dialogue = get_dialogue_by_id(dialogue_data, response.get("next_dialogue"))
+        if next_dialogue:
+            image_cache.prefetch_all([get_character_image(dialogue_data, next_dialogue)])
 
 # Function to display dialogue with image
 def display_dialogue_with_image(dialogue_data, dialogue):
@@ -327,6 +90,9 @@ def display_dialogue_with_image(dialogue_data, dialogue):
             image = display_image_from_url(image_url)
             if image:
                 st.image(image, width=150, caption=dialogue["npc"])
+            elif image_url.startswith(("http://", "https://")) and not image_cache.get_error(image_url):
+                # Still downloading: let the browser fetch this one itself
+                st.image(image_url, width=150, caption=dialogue["npc"])
         
         with col2:
             st.markdown(f"<div class='dialog-header'>{dialogue['npc']}</div>", unsafe_allow_html=True)
@@ -498,6 +264,7 @@ def main():
             
             # Display current dialogue with image
             display_dialogue_with_image(st.session_state.dialogue_data, current_dialogue)
+            prefetch_portraits(st.session_state.dialogue_data, current_dialogue)
             
             # Add to history
             if not st.session_state.dialogue_history or st.session_state.dialogue_history[-1].get("id") != current_dialogue["id"]:
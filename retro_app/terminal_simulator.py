@@ -5,6 +5,9 @@ import re
 from PIL import Image
 import base64
 import io
+from data_layer import dialogue_manager, json_load, read_dialogue_file
+from typewriter import typewriter_text
+from theme import apply_theme
 
 # Set page configuration
 st.set_page_config(
@@ -16,247 +19,18 @@ st.set_page_config(
 
 # Apply the retro CRT styling with 80s monitor frame
 def apply_terminal_style():
-    # CSS for retro terminal look with CRT monitor frame
-    st.markdown("""
-    <style>
-    /* Base styling */
-    body {
-        margin: 0;
-        padding: 0;
-        background-color: #111;
-        color: #00FF00;
-        font-family: 'Courier New', monospace;
-        height: 100vh;
-        overflow: hidden;
-    }
-    
-    /* Main container to position the CRT in the center */
-    .main {
-        display: flex;
-        justify-content: center;
-        align-items: center;
-        height: 100vh;
-        padding: 0 !important;
-        max-width: 100% !important;
-    }
-    
-    /* CRT Monitor Bezel */
-    .block-container {
-        max-width: 1000px !important;
-        padding-top: 0 !important;
-        padding-left: 0 !important;
-        padding-right: 0 !important;
-        margin: 0 auto;
-        position: relative;
-    }
-    
-    /* CRT Screen Effect */
-    .stApp {
-        background-color: #000000;
-        border-radius: 20px;
-        border: 25px solid #333;
-        box-shadow: 
-            inset 0 0 10px rgba(0, 255, 0, 0.3),
-            0 0 30px rgba(0, 255, 0, 0.1),
-            0 10px 50px rgba(0, 0, 0, 0.8);
-        position: relative;
-        overflow: hidden;
-        margin: 40px auto;
-        width: 90% !important;
-        max-width: 900px;
-    }
-    
-    /* CRT monitor plastic frame */
-    .stApp::before {
-        content: "";
-        position: absolute;
-        top: -25px;
-        left: -25px;
-        right: -25px;
-        bottom: -25px;
-        background-color: #222;
-        border-radius: 30px;
-        border: 5px solid #111;
-        z-index: -1;
-    }
-    
-    /* CRT scanlines */
-    .stApp::after {
-        content: "";
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        bottom: 0;
-        background: linear-gradient(
-            rgba(0, 0, 0, 0) 50%, 
-            rgba(0, 0, 0, 0.15) 50%
-        );
-        background-size: 100% 4px;
-        pointer-events: none;
-        z-index: 999;
-    }
-    
-    /* Add CRT screen curvature */
-    .stApp {
-        border-radius: 20px;
-        overflow: hidden;
-    }
-    
-    /* CRT glare effect */
-    .stApp::before {
-        content: "";
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        bottom: 0;
-        background: radial-gradient(
-            ellipse at center,
-            rgba(0, 20, 0, 0) 0%,
-            rgba(0, 20, 0, 0.2) 80%,
-            rgba(0, 20, 0, 0.3) 100%
-        );
-        pointer-events: none;
-        z-index: 998;
-    }
-    
-    /* Add power button to the frame */
-    footer {
-        position: fixed;
-        right: calc(50% - 450px);
-        bottom: 10px;
-        z-index: 1000;
-    }
-    
-    footer:after {
-        content: "POWER";
-        position: absolute;
-        bottom: 25px;
-        right: 25px;
-        width: 60px;
-        height: 30px;
-        background-color: #222;
-        border: 2px solid #111;
-        border-radius: 5px;
-        color: #555;
-        font-size: 10px;
-        text-align: center;
-        line-height: 30px;
-        cursor: pointer;
-    }
-    
-    /* Buttons styling */
-    .stButton>button {
-        background-color: #000000;
-        color: #00FF00;
-        border: 1px solid #00FF00;
-        border-radius: 0px;
-        font-family: 'Courier New', monospace;
-        width: 100%;
-        text-align: left;
-        padding: 10px;
-        transition: background-color 0.3s ease;
-    }
-    
-    .stButton>button:hover {
-        background-color: #003300;
-        color: #00FF00;
-    }
-    
-    /* Terminal text styling */
-    .stTextInput>div>div>input {
-        background-color: #000000;
-        color: #00FF00;
-        border: 1px solid #00FF00;
-        border-radius: 0px;
-        font-family: 'Courier New', monospace;
-    }
-    
-    /* Sidebar styling */
-    .stSidebar {
-        background-color: #000000;
-        color: #00FF00;
-        border-left: 1px solid #00FF00;
-    }
-    
-    /* Dialog text styling */
-    .dialog-text {
-        background-color: #000000;
-        color: #00FF00;
-        border: 1px solid #00FF00;
-        padding: 10px;
-        font-family: 'Courier New', monospace;
-        margin-bottom: 20px;
-        position: relative;
-        box-shadow: 0 0 5px rgba(0, 255, 0, 0.3);
-    }
-    
-    .dialog-header {
-        color: #FFFFFF;
-        margin-bottom: 5px;
-        font-weight: bold;
-        text-shadow: 0 0 5px rgba(255, 255, 255, 0.5);
-    }
-    
-    /* Terminal cursor */
-    .terminal-cursor {
-        animation: blink 1s step-end infinite;
-    }
-    
-    @keyframes blink {
-        0%, 100% { opacity: 1; }
-        50% { opacity: 0; }
-    }
-    
-    /* Conversation history */
-    .history-entry {
-        margin-bottom: 10px;
-        border-bottom: 1px dashed #003300;
-        padding-bottom: 10px;
-    }
-    
-    /* Quest log styling */
-    .quest-log {
-        background-color: #000000;
-        color: #00FF00;
-        border: 1px solid #00FF00;
-        padding: 10px;
-        margin-top: 20px;
-        box-shadow: 0 0 5px rgba(0, 255, 0, 0.3);
-    }
-    
-    /* Text flicker animation */
-    @keyframes textFlicker {
-        0% { text-shadow: 0 0 5px rgba(0, 255, 0, 0.8); }
-        5% { text-shadow: 0 0 10px rgba(0, 255, 0, 0.8); }
-        10% { text-shadow: 0 0 5px rgba(0, 255, 0, 0.8); }
-        15% { text-shadow: 0 0 7px rgba(0, 255, 0, 0.8); }
-        25% { text-shadow: 0 0 5px rgba(0, 255, 0, 0.8); }
-        30% { text-shadow: 0 0 8px rgba(0, 255, 0, 0.8); }
-        70% { text-shadow: 0 0 5px rgba(0, 255, 0, 0.8); }
-        80% { text-shadow: 0 0 9px rgba(0, 255, 0, 0.8); }
-        100% { text-shadow: 0 0 5px rgba(0, 255, 0, 0.8); }
-    }
-    
-    .dialog-text, .dialog-header {
-        animation: textFlicker 3s infinite;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    apply_theme("terminal")
 
 # Function to load dialogue data from JSON file
 def load_dialogue_data(file_path="dialogue_data.json"):
     # First try with the provided path
     try:
-        with open(file_path, 'r') as file:
-            return json.load(file)
+        return read_dialogue_file(file_path)
     except FileNotFoundError:
         # If not found, try looking in the conversations directory
         try:
             conversations_path = os.path.join(os.path.dirname(__file__), "conversations", os.path.basename(file_path))
-            with open(conversations_path, 'r') as file:
-                return json.load(file)
+            return read_dialogue_file(conversations_path)
         except FileNotFoundError:
             st.error(f"Dialogue data file '{file_path}' not found.")
             # Return a minimal default structure 
@@ -290,14 +64,6 @@ def display_image(dialogue):
         except Exception as e:
             st.error(f"Unable to load image: {e}")
 
-# Function to simulate typing effect
-def typewriter_text(text, speed=10):
-    typed_text = st.empty()
-    for i in range(len(text) + 1):
-        typed_text.markdown(f"<div class='dialog-text'>{text[:i]}▋</div>", unsafe_allow_html=True)
-        # In a real implementation, you'd add a delay here
-        # But for the prototype, we'll skip that
-
 # Function to handle script actions
 def handle_script(script_name):
     if not script_name:
@@ -355,14 +121,13 @@ def main():
     # Create a file selector for conversation files
     conversation_path = os.path.join(os.path.dirname(__file__), "conversations")
     if os.path.exists(conversation_path):
-        conversation_files = ["Select a conversation..."] + [f for f in os.listdir(conversation_path) if f.endswith(".json")]
+        conversation_files = ["Select a conversation..."] + dialogue_manager.get_catalog(conversation_path).names()
         
         selected_conversation = st.sidebar.selectbox("Load conversation", conversation_files, key="conversation_selector")
         if selected_conversation != "Select a conversation...":
             try:
                 file_path = os.path.join(conversation_path, selected_conversation)
-                with open(file_path, 'r') as file:
-                    st.session_state.dialogue_data = json.load(file)
+                st.session_state.dialogue_data = read_dialogue_file(file_path)
                 st.sidebar.success(f"Loaded: {selected_conversation}")
                 # Reset conversation when new data is loaded
                 st.session_state.current_dialogue_id = st.session_state.dialogue_data.get("starting_dialogue", "ai_terminal_start")
@@ -376,7 +141,7 @@ def main():
     uploaded_file = st.sidebar.file_uploader("Or upload dialogue data (JSON)", type="json", key="json_uploader")
     if uploaded_file is not None:
         try:
-            st.session_state.dialogue_data = json.load(uploaded_file)
+            st.session_state.dialogue_data = json_load(uploaded_file)
             st.sidebar.success("Dialogue data loaded successfully!")
             # Reset conversation when new data is loaded
             st.session_state.current_dialogue_id = st.session_state.dialogue_data.get("starting_dialogue", "ai_terminal_start")
@@ -424,13 +189,13 @@ def main():
             with col2:
                 st.markdown(f"<div class='dialog-header'>{current_dialogue['npc']}</div>", unsafe_allow_html=True)
                 if is_new_dialogue:
-                    typewriter_text(current_dialogue["text"])
+                    typewriter_text(current_dialogue["text"], theme="terminal")
                 else:
                     st.markdown(f"<div class='dialog-text'>{current_dialogue['text']}</div>", unsafe_allow_html=True)
         else:
             st.markdown(f"<div class='dialog-header'>{current_dialogue['npc']}</div>", unsafe_allow_html=True)
             if is_new_dialogue:
-                typewriter_text(current_dialogue["text"])
+                typewriter_text(current_dialogue["text"], theme="terminal")
             else:
                 st.markdown(f"<div class='dialog-text'>{current_dialogue['text']}</div>", unsafe_allow_html=True)
         
@@ -0,0 +1,145 @@
+"""
+Tests for the headless JSON-lines batch protocol of cli_parser.BatchRunner
+"""
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from cli_parser import BatchRunner, read_choice_script, script_requests
+from data_layer import json_loads
+
+
+def sample_data():
+    return {
+        "starting_dialogue": "start",
+        "dialogues": [
+            {"id": "start", "npc": "Terminal", "text": "Hello.",
+             "responses": [{"id": "go", "text": "> Go on", "next_dialogue": "second", "script": "SetVariable_seen_true"},
+                           {"id": "bye", "text": "> Bye", "next_dialogue": None}]},
+            {"id": "second", "npc": "Terminal", "text": "Second.",
+             "responses": [{"id": "back", "text": "> Back", "next_dialogue": "start"},
+                           {"id": "secret", "text": "> Secret", "next_dialogue": None,
+                            "condition": "VariableEquals_seen_false"}]}
+        ],
+        "quests": [],
+        "variables": {"seen": False}
+    }
+
+
+class BatchProtocolTest(unittest.TestCase):
+    def setUp(self):
+        self.runner = BatchRunner(sample_data())
+
+    def start(self, session="a"):
+        (record,) = self.runner.handle({"session": session})
+        return record
+
+    def test_start_shows_the_starting_dialogue(self):
+        record = self.start()
+        self.assertEqual(record["dialogue"], "start")
+        self.assertEqual(record["step"], 1)
+        self.assertEqual([r["id"] for r in record["responses"]], ["go", "bye"])
+        self.assertEqual(self.runner.handle({"session": "b", "command": "start"})[0]["dialogue"], "start")
+
+    def test_choice_by_number_and_by_id(self):
+        self.start()
+        (record,) = self.runner.handle({"session": "a", "choice": "go"})
+        self.assertEqual((record["from"], record["response"], record["dialogue"]), ("start", "go", "second"))
+        # The condition is false now that the script ran, so only one response is offered
+        self.assertEqual([r["id"] for r in record["responses"]], ["back"])
+        (record,) = self.runner.handle({"session": "a", "choice": 1})
+        self.assertEqual(record["dialogue"], "start")
+
+    def test_start_for_a_running_session_describes_it(self):
+        self.start()
+        (entered,) = self.runner.handle({"session": "a", "choice": "go"})
+        for request in ({"session": "a"}, {"session": "a", "command": "start"}):
+            with self.subTest(request=request):
+                (record,) = self.runner.handle(request)
+                self.assertEqual(record["dialogue"], "second")
+                self.assertEqual(record["step"], entered["step"])
+                self.assertEqual(record["responses"], entered["responses"])
+                self.assertEqual(record["events"], [])
+        (state,) = self.runner.handle({"session": "a", "command": "state"})
+        self.assertEqual(state["variables"], {"seen": True})
+
+    def test_unknown_command_does_not_create_a_session(self):
+        (record,) = self.runner.handle({"session": "b", "command": "bogus"})
+        self.assertIn("unknown command", record["error"])
+        self.assertNotIn("b", self.runner.sessions)
+
+    def test_requests_for_missing_sessions_are_errors(self):
+        for request in ({"session": "b", "command": "state"}, {"session": "b", "command": "end"},
+                        {"session": "b", "choice": 1}):
+            self.assertEqual(self.runner.handle(request), [{"session": "b", "error": "no such session"}])
+        self.assertEqual(self.runner.sessions, {})
+
+    def test_invalid_choice_keeps_the_session(self):
+        self.start()
+        for choice in (0, 3, True, "missing"):
+            (record,) = self.runner.handle({"session": "a", "choice": choice})
+            self.assertIn("invalid choice", record["error"])
+            self.assertEqual(record["dialogue"], "start")
+        self.assertIn("a", self.runner.sessions)
+
+    def test_conversation_end_drops_the_session(self):
+        self.start()
+        (record,) = self.runner.handle({"session": "a", "choice": "bye"})
+        self.assertTrue(record["ended"])
+        self.assertNotIn("a", self.runner.sessions)
+        self.assertEqual(self.runner.handle({"session": "a", "choice": 1})[0]["error"], "no such session")
+
+    def test_restart_keeps_variables(self):
+        self.start()
+        self.runner.handle({"session": "a", "choice": "go"})
+        (record,) = self.runner.handle({"session": "a", "command": "restart"})
+        self.assertEqual(record["dialogue"], "start")
+        (state,) = self.runner.handle({"session": "a", "command": "state"})
+        self.assertEqual(state["variables"], {"seen": True})
+
+    def test_end_command(self):
+        self.start()
+        self.assertEqual(self.runner.handle({"session": "a", "command": "end"}), [{"session": "a", "ended": True}])
+        self.assertNotIn("a", self.runner.sessions)
+
+    def test_sessions_are_independent(self):
+        self.start("a")
+        self.start("b")
+        self.runner.handle({"session": "a", "choice": "go"})
+        self.assertEqual(self.runner.handle({"session": "b", "command": "state"})[0]["variables"], {"seen": False})
+
+    def test_non_object_request(self):
+        self.assertEqual(self.runner.handle([1]), [{"error": "request must be a JSON object"}])
+
+    def test_run_reports_invalid_json_lines_and_skips_blank_ones(self):
+        output = io.StringIO()
+        written = self.runner.run(['{"session": 1}', 'not json', '', '{"session": 1, "choice": 2}'], output, flush_lines=1)
+        records = [json_loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(written, 3)
+        self.assertEqual(records[1]["line"], 2)
+        self.assertIn("invalid JSON", records[1]["error"])
+        self.assertTrue(records[2]["ended"])
+
+
+class ChoiceScriptTest(unittest.TestCase):
+    def test_script_requests_start_every_session(self):
+        requests = [json_loads(line) for line in script_requests([1, "bye"], sessions=2)]
+        self.assertEqual(requests, [{"session": 1}, {"session": 1, "choice": 1}, {"session": 1, "choice": "bye"},
+                                    {"session": 2}, {"session": 2, "choice": 1}, {"session": 2, "choice": "bye"}])
+
+    def test_read_choice_script(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "choices.txt")
+            with open(path, 'w') as file:
+                file.write("# play the short way\n1\n\nbye\n")
+            self.assertEqual(read_choice_script(path), [1, "bye"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+"""
+Tests for the compact dialogue model: records behave like the dicts they were
+built from, including the order of their keys.
+"""
+import os
+import sys
+import unittest
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from data_layer import json_dumps, thaw
+from dialogue_model import CompactDialogue, CompactResponse, compact_dialogue_data
+
+
+def sample_data():
+    return {
+        "starting_dialogue": "start",
+        "dialogues": [
+            {"text": "Hello.", "id": "start", "mood": "calm", "npc": "Terminal",
+             "responses": [{"next_dialogue": None, "text": "> Bye", "id": "bye", "condition": None}]},
+            {"id": "second", "npc": "Terminal", "image_url": None, "text": "Second.", "responses": [],
+             "on_entry": "SetVariable_seen_true"}
+        ],
+        "quests": [{"title": "Quest", "id": "q", "stages": [{"description": "First", "id": 1}]}],
+        "variables": {}
+    }
+
+
+class CompactRecordTest(unittest.TestCase):
+    def test_keys_keep_the_source_order(self):
+        data = sample_data()
+        compact = compact_dialogue_data(data)
+        for original, record in zip(data["dialogues"], compact["dialogues"]):
+            self.assertEqual(list(record), list(original))
+            self.assertEqual(len(record), len(original))
+        self.assertEqual(list(compact["dialogues"][0]["responses"][0]), ["next_dialogue", "text", "id", "condition"])
+        self.assertEqual(list(compact["quests"][0]["stages"][0]), ["description", "id"])
+
+    def test_thawed_data_saves_like_the_source(self):
+        data = sample_data()
+        self.assertEqual(json_dumps(thaw(compact_dialogue_data(data))), json_dumps(data))
+
+    def test_records_with_the_same_layout_share_their_key_order(self):
+        first = CompactResponse({"id": "a", "text": "> A", "next_dialogue": None})
+        second = CompactResponse({"id": "b", "text": "> B", "next_dialogue": "x"})
+        self.assertIs(first._keys, second._keys)
+
+    def test_missing_fields_stay_missing(self):
+        record = CompactDialogue({"id": "bare", "text": "No responses key"})
+        self.assertNotIn("responses", record)
+        self.assertIsNone(record.get("npc"))
+        with self.assertRaises(KeyError):
+            record["npc"]
+        self.assertEqual(dict(record), {"id": "bare", "text": "No responses key"})
+
+    def test_records_are_read_only(self):
+        record = CompactDialogue({"id": "start", "text": "Hello."})
+        with self.assertRaises(TypeError):
+            record.text = "Changed"
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+"""
+Tests for binary dialogue packs: the on-disk hash index of dialogue IDs, round
+trips of dialogue files through a pack, and the lazy source base class.
+"""
+import os
+import sys
+import glob
+import shutil
+import struct
+import tempfile
+import unittest
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from data_layer import read_json_file, thaw, write_json_file
+from dialogue_pack import PACK_VERSION, DialoguePack, compile_pack, verify_pack
+from lazy_dialogue import LazyDialogueSource
+
+CONVERSATIONS_DIR = os.path.join(ROOT_DIR, "conversations")
+
+
+def chain_data(count):
+    return {
+        "starting_dialogue": "node_0",
+        "dialogues": [{"id": f"node_{n}", "npc": "NPC", "text": f"Dialogue {n}",
+                       "responses": [{"id": "next", "text": "> Next",
+                                      "next_dialogue": f"node_{n + 1}" if n + 1 < count else None}]}
+                      for n in range(count)],
+        "quests": []
+    }
+
+
+class PackTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.pack_path = os.path.join(self.tmp_dir, "dialogue.dlgpack")
+        self.packs = []
+
+    def tearDown(self):
+        for pack in self.packs:
+            pack.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def pack(self, dialogue_data, **kwargs):
+        compile_pack(dialogue_data, self.pack_path)
+        pack = DialoguePack(self.pack_path, **kwargs)
+        self.packs.append(pack)
+        return pack
+
+
+class HashIndexTest(PackTestCase):
+    def test_every_id_is_found_at_its_position(self):
+        # Enough IDs that linear probing has to step past occupied slots
+        data = chain_data(500)
+        pack = self.pack(data)
+        for index, dialogue in enumerate(data["dialogues"]):
+            self.assertEqual(pack.find_dialogue(dialogue["id"]), index)
+
+    def test_missing_ids(self):
+        pack = self.pack(chain_data(50))
+        for dialogue_id in ("node_50", "node_", "", "NODE_1", "node_1 ", None, 1):
+            self.assertIsNone(pack.find_dialogue(dialogue_id))
+            self.assertIsNone(pack.graph.get_dialogue(dialogue_id))
+
+    def test_first_duplicate_wins_and_odd_ids_are_skipped(self):
+        data = chain_data(3)
+        data["dialogues"].append({"id": "node_1", "npc": "Duplicate", "text": "Later copy", "responses": []})
+        data["dialogues"].append({"id": 7, "npc": "Numeric", "text": "Not a string ID", "responses": []})
+        data["dialogues"].append({"id": "réponse ✓", "npc": "Unicode", "text": "Non-ASCII ID", "responses": []})
+        pack = self.pack(data)
+        self.assertEqual(pack.find_dialogue("node_1"), 1)
+        self.assertEqual(pack.graph.get_dialogue("node_1")["npc"], "NPC")
+        self.assertIsNone(pack.find_dialogue("7"))
+        self.assertEqual(pack.find_dialogue("réponse ✓"), 5)
+
+    def test_empty_pack(self):
+        pack = self.pack({"dialogues": []})
+        self.assertIsNone(pack.find_dialogue("anything"))
+        self.assertEqual(list(pack.data["dialogues"]), [])
+
+
+class RoundTripTest(PackTestCase):
+    def test_conversations_round_trip(self):
+        paths = sorted(glob.glob(os.path.join(CONVERSATIONS_DIR, "*.json")))
+        self.assertTrue(paths)
+        for json_path in paths:
+            with self.subTest(json_path=os.path.basename(json_path)):
+                compile_pack(read_json_file(json_path), self.pack_path)
+                self.assertEqual(verify_pack(json_path, self.pack_path), [])
+
+    def test_unusual_values_round_trip(self):
+        data = {
+            "metadata": {"title": "Odd values", "tags": ["a", "b"]},
+            "dialogues": [
+                {"npc": None, "id": "start", "text": 42, "mood": {"level": 3},
+                 "on_entry": "SetVariable_count_99999999999999999999",
+                 "responses": [{"text": "> Go", "id": "go", "next_dialogue": "bare", "weight": 1.5,
+                                "script": "SetVariable_name_Ada", "condition": "VariableEquals_flag_true"}]},
+                {"id": "bare", "text": ""}
+            ],
+            "variables": {"count": 0, "flag": True},
+            "quests": [{"id": "q", "title": "Quest", "stages": [{"id": 1, "description": "First"}]}]
+        }
+        json_path = os.path.join(self.tmp_dir, "odd.json")
+        write_json_file(json_path, data)
+        compile_pack(data, self.pack_path)
+        self.assertEqual(verify_pack(json_path, self.pack_path), [])
+
+        pack = DialoguePack(self.pack_path)
+        self.packs.append(pack)
+        # The top-level key order of the file survives the pack
+        self.assertEqual(list(pack.data), list(data))
+        self.assertNotIn("responses", pack.data["dialogues"][1])
+        self.assertEqual(pack.graph.get_script_op("SetVariable_count_99999999999999999999")[2],
+                         99999999999999999999)
+
+    def test_decoded_nodes_are_bounded(self):
+        data = chain_data(20)
+        pack = self.pack(data, max_cached_nodes=4)
+        self.assertEqual(thaw(pack.data), data)
+        self.assertEqual(pack.get_cache_stats()["cached_nodes"], 4)
+        self.assertEqual(pack.data["dialogues"][-1]["id"], "node_19")
+
+    def test_rejects_other_files(self):
+        not_a_pack = os.path.join(self.tmp_dir, "dialogue.json")
+        write_json_file(not_a_pack, chain_data(2))
+        with self.assertRaises(ValueError):
+            DialoguePack(not_a_pack)
+
+        compile_pack(chain_data(2), self.pack_path)
+        with open(self.pack_path, 'r+b') as f:
+            f.seek(8)
+            f.write(struct.pack("<I", PACK_VERSION + 1))
+        with self.assertRaisesRegex(ValueError, "recompile"):
+            DialoguePack(self.pack_path)
+
+    def test_compile_rejects_data_without_dialogues(self):
+        for data in ([], {"dialogues": {}}, {"dialogues": ["not an object"]}):
+            with self.assertRaises(ValueError):
+                compile_pack(data, self.pack_path)
+
+
+class LazySourceTest(unittest.TestCase):
+    def test_incomplete_subclass_cannot_be_instantiated(self):
+        class NoLookup(LazyDialogueSource):
+            def field_names(self):
+                return ["dialogues"]
+
+            def _read_field(self, key):
+                raise KeyError(key)
+
+            def _read_dialogue(self, index):
+                raise IndexError(index)
+
+        with self.assertRaises(TypeError):
+            NoLookup("unused.json", 16)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+Tests for the parsed-file cache: graphs of cached documents are charged to the
+cache's byte budget and released with the document.
+"""
+import gc
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from data_layer import DialogueDataManager, DialogueFileCache, DialogueGraph, write_json_file
+
+
+def sample_data(count):
+    return {
+        "starting_dialogue": "node_0",
+        "dialogues": [{"id": f"node_{n}", "npc": "NPC", "text": f"Dialogue {n}",
+                       "responses": [{"id": "next", "text": "> Next", "next_dialogue": f"node_{n + 1}",
+                                      "script": f"SetVariable_visited_{n}"}]}
+                      for n in range(count)],
+        "quests": []
+    }
+
+
+class CachedGraphTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.paths = []
+        for n in range(3):
+            path = os.path.join(self.tmp_dir, f"dialogue_{n}.json")
+            write_json_file(path, sample_data(50))
+            self.paths.append(path)
+        self.cache = DialogueFileCache()
+        self.manager = DialogueDataManager(base_directory=self.tmp_dir, cache=self.cache)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_graph_is_shared_and_charged_to_the_budget(self):
+        data = self.manager.load_dialogue_data(self.paths[0])
+        file_bytes = self.cache.get_stats()["bytes"]
+        graph = self.manager.get_graph(data)
+        self.assertIs(self.manager.get_graph(self.manager.load_dialogue_data(self.paths[0])), graph)
+        self.assertEqual(graph.get_dialogue("node_7")["text"], "Dialogue 7")
+
+        stats = self.cache.get_stats()
+        self.assertEqual(stats["graphs"], 1)
+        self.assertEqual(stats["bytes"], file_bytes + graph.index_bytes())
+        self.assertEqual(self.manager._graphs, {})
+
+    def test_evicting_a_document_releases_its_graph(self):
+        self.cache.configure(max_entries=1)
+        data = self.manager.load_dialogue_data(self.paths[0])
+        self.manager.get_graph(data)
+        data_id = id(data)
+        del data
+
+        self.manager.load_dialogue_data(self.paths[1])
+        self.assertEqual(self.cache.get_stats()["evictions"], 1)
+        gc.collect()
+        self.assertFalse(any(isinstance(obj, DialogueGraph) and id(obj.dialogue_data) == data_id
+                             for obj in gc.get_objects()))
+
+    def test_graph_that_does_not_fit_is_not_kept(self):
+        data = self.manager.load_dialogue_data(self.paths[0])
+        self.cache.configure(max_bytes=self.cache.get_stats()["bytes"])
+        graph = self.manager.get_graph(data)
+        self.assertEqual(graph.get_dialogue("node_0")["id"], "node_0")
+        self.assertEqual(self.cache.get_stats()["graphs"], 0)
+        self.assertEqual(self.cache.get_stats()["entries"], 1)
+
+    def test_private_copies_use_the_manager_graphs(self):
+        data = self.manager.load_dialogue_data(self.paths[0], use_cache=False)
+        graph = self.manager.get_graph(data)
+        self.assertIs(self.manager.get_graph(data), graph)
+        self.assertEqual(self.cache.get_stats()["graphs"], 0)
+
+        data["dialogues"].append({"id": "extra", "npc": "NPC", "text": "Added", "responses": []})
+        self.assertEqual(self.manager.get_graph(data).get_dialogue("extra")["text"], "Added")
+
+    def test_invalidate_drops_the_graph(self):
+        data = self.manager.load_dialogue_data(self.paths[0])
+        graph = self.manager.get_graph(data)
+        self.cache.invalidate(self.paths[0])
+        self.assertEqual(self.cache.get_stats()["graphs"], 0)
+        self.assertIsNot(self.manager.get_graph(self.manager.load_dialogue_data(self.paths[0])), graph)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+Tests for the dialogue graph checks: strongly connected components, loop
+reports and the places a player can get stuck.
+"""
+import os
+import sys
+import random
+import unittest
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from graph_analysis import (ReferenceIndex, find_closed_loops, find_cycle, is_cyclic, reachable_from,
+                            strongly_connected_components)
+
+SCHEMA_PATH = os.path.join(ROOT_DIR, "dialogue_schema.json")
+
+
+def dialogue_data(edges, terminals=(), starting_dialogue="a"):
+    """Dialogue data with one response per edge and an ending response for each terminal"""
+    dialogues = []
+    for dialogue_id, targets in edges.items():
+        responses = [{"id": f"to_{target}_{n}", "text": "> Go", "next_dialogue": target}
+                     for n, target in enumerate(targets)]
+        if dialogue_id in terminals:
+            responses.append({"id": "leave", "text": "> Leave", "next_dialogue": None})
+        dialogues.append({"id": dialogue_id, "npc": "NPC", "text": dialogue_id, "responses": responses})
+    return {"starting_dialogue": starting_dialogue, "dialogues": dialogues, "quests": []}
+
+
+def components_by_reachability(adjacency):
+    """Brute-force components: two dialogues share one when each reaches the other"""
+    reach = {node: reachable_from(node, adjacency) for node in adjacency}
+    return {frozenset(other for other in adjacency if node in reach[other] and other in reach[node])
+            for node in adjacency}
+
+
+class StronglyConnectedComponentsTest(unittest.TestCase):
+    def test_matches_brute_force_on_random_graphs(self):
+        rng = random.Random(6)
+        for trial in range(200):
+            size = rng.randint(1, 12)
+            nodes = [f"n{n}" for n in range(size)]
+            adjacency = {node: list(dict.fromkeys(rng.choice(nodes) for _ in range(rng.randint(0, 3))))
+                         for node in nodes}
+            with self.subTest(trial=trial):
+                components = strongly_connected_components(adjacency)
+                self.assertEqual(sum(len(c) for c in components), size)
+                self.assertEqual({frozenset(c) for c in components}, components_by_reachability(adjacency))
+                # Reverse topological order: edges never lead to a later component
+                position = {member: n for n, component in enumerate(components) for member in component}
+                for node, targets in adjacency.items():
+                    for target in targets:
+                        self.assertLessEqual(position[target], position[node])
+
+    def test_chain_deeper_than_the_recursion_limit(self):
+        length = sys.getrecursionlimit() * 3
+        adjacency = {f"n{n}": [f"n{n + 1}"] for n in range(length)}
+        adjacency[f"n{length}"] = ["n0"]
+        (component,) = strongly_connected_components(adjacency)
+        self.assertEqual(len(component), length + 1)
+
+        adjacency[f"n{length}"] = []
+        components = strongly_connected_components(adjacency)
+        self.assertEqual(len(components), length + 1)
+        self.assertEqual(components[0], [f"n{length}"])
+
+    def test_self_loops_and_single_dialogues(self):
+        adjacency = {"a": ["a", "b"], "b": []}
+        self.assertEqual(strongly_connected_components(adjacency), [["b"], ["a"]])
+        self.assertTrue(is_cyclic(["a"], adjacency))
+        self.assertFalse(is_cyclic(["b"], adjacency))
+        self.assertEqual(find_cycle(["a"], adjacency), ["a", "a"])
+
+
+class LoopReportTest(unittest.TestCase):
+    def test_find_cycle_is_a_shortest_loop_within_the_component(self):
+        adjacency = {"a": ["b", "x"], "b": ["c"], "c": ["d", "a"], "d": ["a"], "x": ["y"], "y": ["a"]}
+        (component,) = strongly_connected_components(adjacency)
+        cycle = find_cycle(component, adjacency)
+        self.assertEqual(cycle[0], cycle[-1])
+        self.assertEqual(len(cycle), 4)
+        for node, next_id in zip(cycle, cycle[1:]):
+            self.assertIn(next_id, adjacency[node])
+
+    def test_closed_loops_and_dead_ends(self):
+        edges = {"a": ["b", "trap1", "stuck"], "b": ["a"], "trap1": ["trap2"], "trap2": ["trap1"],
+                 "stuck": [], "exit_loop": ["exit_loop"]}
+        index = ReferenceIndex(dialogue_data(edges, terminals={"b", "exit_loop"}))
+        components = strongly_connected_components(index.adjacency)
+        closed = find_closed_loops(components, index.adjacency, index.terminals)
+        self.assertEqual(sorted(sorted(component) for component in closed), [["stuck"], ["trap1", "trap2"]])
+
+
+class ReferenceIndexTest(unittest.TestCase):
+    def test_first_duplicate_is_used_and_broken_references_are_listed(self):
+        data = dialogue_data({"a": ["b", "b", "missing"], "b": ["a"]}, terminals={"b"})
+        data["dialogues"].append({"id": "a", "npc": "Copy", "text": "Shadowed", "responses": [
+            {"id": "c", "text": "> C", "next_dialogue": "b", "script": "SetVariable_x_1"},
+            {"id": "end", "text": "> End", "next_dialogue": None}]})
+        index = ReferenceIndex(data)
+        self.assertEqual(index.dialogue_ids, ["a", "b"])
+        self.assertEqual(index.adjacency, {"a": ["b"], "b": ["a"]})
+        self.assertEqual(index.terminals, {"b"})
+        self.assertEqual(index.broken_references, [("a", "to_missing_2", "missing")])
+        self.assertEqual(index.scripts, [("a", "c", "SetVariable_x_1")])
+
+
+class ValidatorLoopWarningsTest(unittest.TestCase):
+    def test_each_loop_is_reported_once(self):
+        from dialogue_validator import DialogueValidator
+        validator = DialogueValidator(SCHEMA_PATH, cache_path=None)
+        edges = {"a": ["b"], "b": ["c"], "c": ["a", "d"], "d": ["trap"], "trap": ["d"]}
+        errors, warnings = validator.check_dialogue_references(dialogue_data(edges, terminals={"a"}))
+        self.assertEqual(errors, [])
+        self.assertEqual(sum("Circular dialogue reference detected" in w for w in warnings), 2)
+        self.assertIn("Circular dialogue reference detected: a -> b -> c -> a", warnings)
+        self.assertEqual([w for w in warnings if "no exit" in w],
+                         ["Dialogue loop has no exit to the end of the conversation: d -> trap -> d"])
+
+
+if __name__ == "__main__":
+    unittest.main()
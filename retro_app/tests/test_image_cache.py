@@ -0,0 +1,202 @@
+"""
+Tests for the portrait cache, with portraits served by a local HTTP stand-in:
+what starts a download, where hits come from and how failures are remembered.
+"""
+import io
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import unittest
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from PIL import Image
+from image_cache import ImageCache
+
+
+def make_portrait(color, size=40):
+    """Encode a one-colour test portrait as PNG bytes"""
+    encoded = io.BytesIO()
+    Image.new("RGB", (size, size), color).save(encoded, format="PNG")
+    return encoded.getvalue()
+
+
+class PortraitServer:
+    """
+    Serves /portrait/<n>.png, counting the requests for each path
+
+    Requests for /slow/<n>.png wait until release() is called.
+    """
+
+    def __init__(self, count=4):
+        self.portraits = [make_portrait((40 * n, 255 - 40 * n, 120)) for n in range(count)]
+        self.requests = Counter()
+        self.gate = threading.Event()
+        server = self
+
+        class PortraitHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests[self.path] += 1
+                if self.path.startswith("/slow/"):
+                    server.gate.wait(10)
+                try:
+                    body = server.portraits[int(self.path.rsplit("/", 1)[-1].split(".")[0])]
+                except (ValueError, IndexError):
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "image/png")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), PortraitHandler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def url(self, number, folder="portrait"):
+        return f"{self.base_url}/{folder}/{number}.png"
+
+    def release(self):
+        self.gate.set()
+
+    def close(self):
+        self.release()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class ImageCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmp_dir, "cache")
+        self.server = PortraitServer()
+        self.caches = []
+
+    def tearDown(self):
+        self.server.close()
+        for cache in self.caches:
+            cache.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def make_cache(self, **options):
+        cache = ImageCache(self.cache_dir, **options)
+        self.caches.append(cache)
+        return cache
+
+
+class ImageCacheTest(ImageCacheTestCase):
+    def test_miss_starts_one_download(self):
+        cache = self.make_cache()
+        url = self.server.url(0, "slow")
+        self.assertIsNone(cache.get(url))
+        self.assertIsNone(cache.get(url))
+        pending = cache.prefetch(url)
+        self.assertIs(cache.prefetch(url), pending)
+        self.assertEqual(cache.get_stats()["pending"], 1)
+
+        self.server.release()
+        image = pending.result(timeout=10)
+        self.assertEqual(image.getpixel((0, 0)), (0, 255, 120))
+        self.assertEqual(self.server.requests["/slow/0.png"], 1)
+        self.assertEqual(cache.get_stats()["fetches"], 1)
+        self.assertEqual(cache.get_stats()["pending"], 0)
+
+    def test_later_lookups_hit_memory_then_disk(self):
+        cache = self.make_cache()
+        url = self.server.url(1)
+        self.assertIsNotNone(cache.get(url, wait=None))
+        self.assertIsNotNone(cache.get(url))
+        self.assertEqual(cache.get_stats()["memory_hits"], 1)
+
+        cache.clear_memory()
+        self.assertIsNotNone(cache.get(url))
+        self.assertEqual(cache.get_stats()["disk_hits"], 1)
+
+        # The disk cache outlives the process
+        restarted = self.make_cache()
+        self.assertEqual(restarted.get(url).getpixel((0, 0)), (40, 215, 120))
+        self.assertEqual(restarted.get_stats()["disk_hits"], 1)
+        self.assertEqual(self.server.requests["/portrait/1.png"], 1)
+
+    def test_large_portraits_are_scaled_down(self):
+        self.server.portraits[0] = make_portrait((1, 2, 3), size=600)
+        cache = self.make_cache(max_image_size=(100, 100))
+        self.assertEqual(cache.get(self.server.url(0), wait=None).size, (100, 100))
+
+    def test_failures_are_remembered_until_retry_after(self):
+        cache = self.make_cache(retry_after=60)
+        url = self.server.url(9)
+        self.assertIsNone(cache.get(url, wait=None))
+        self.assertIn("404", cache.get_error(url))
+        self.assertIsNone(cache.prefetch(url))
+        self.assertIsNone(cache.get(url, wait=None))
+        self.assertEqual(self.server.requests["/portrait/9.png"], 1)
+        self.assertEqual(cache.get_stats()["failures"], 1)
+
+        cache.retry_after = 0
+        self.assertIsNone(cache.get(url, wait=None))
+        self.assertEqual(self.server.requests["/portrait/9.png"], 2)
+
+    def test_memory_is_bounded(self):
+        cache = self.make_cache(max_memory_images=2)
+        urls = [self.server.url(n) for n in range(3)]
+        for url in urls:
+            cache.get(url, wait=None)
+        self.assertEqual(cache.get_stats()["in_memory"], 2)
+
+        # The least recently used portrait was dropped and comes back from disk
+        cache.get(urls[0])
+        self.assertEqual(cache.get_stats()["disk_hits"], 1)
+        cache.get(urls[0])
+        self.assertEqual(cache.get_stats()["memory_hits"], 1)
+        self.assertEqual(cache.get_stats()["in_memory"], 2)
+
+    def test_slow_server_times_out(self):
+        cache = self.make_cache(timeout=0.2)
+        url = self.server.url(0, "slow")
+        self.assertIsNone(cache.get(url, wait=None))
+        self.assertIsNotNone(cache.get_error(url))
+        self.assertEqual(cache.get_stats()["failures"], 1)
+
+    def test_damaged_disk_file_is_downloaded_again(self):
+        cache = self.make_cache()
+        url = self.server.url(2)
+        cache.get(url, wait=None)
+        with open(cache._disk_path(url), 'wb') as file:
+            file.write(b"not a png")
+        cache.clear_memory()
+
+        self.assertIsNone(cache.get(url))
+        self.assertEqual(cache.get(url, wait=None).getpixel((0, 0)), (80, 175, 120))
+        self.assertEqual(self.server.requests["/portrait/2.png"], 2)
+
+    def test_edited_local_file_is_loaded_again(self):
+        cache = self.make_cache()
+        path = os.path.join(self.tmp_dir, "portrait.png")
+        with open(path, 'wb') as file:
+            file.write(make_portrait((255, 0, 0)))
+        self.assertEqual(cache.get(path, wait=None).getpixel((0, 0)), (255, 0, 0))
+        first_disk_path = cache._disk_path(path)
+
+        with open(path, 'wb') as file:
+            file.write(make_portrait((0, 0, 255), size=41))
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertNotEqual(cache._disk_path(path), first_disk_path)
+        restarted = self.make_cache()
+        self.assertEqual(restarted.get(path, wait=None).getpixel((0, 0)), (0, 0, 255))
+        self.assertEqual(restarted.get_stats()["disk_hits"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
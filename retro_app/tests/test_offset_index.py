@@ -0,0 +1,140 @@
+"""
+Tests for the .idx offset index: byte ranges of every dialogue, and that a
+sidecar is rebuilt once the dialogue file is edited.
+"""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from data_layer import json_loads, read_json_file, thaw, write_json_file
+from offset_index import (INDEX_VERSION, IndexedDialogueFile, build_offset_index, index_path_for,
+                          load_offset_index)
+
+
+def sample_data():
+    return {
+        "metadata": {"title": "Index test"},
+        "starting_dialogue": "start",
+        "dialogues": [
+            {"id": "start", "npc": "Terminal", "text": "Brackets ] and braces } in \"text\".",
+             "responses": [{"id": "next", "text": "> Next", "next_dialogue": "café"}]},
+            {"id": "café", "npc": "Barista ☕", "text": "Non-ASCII ID and text.",
+             "responses": [{"id": "back", "text": "> Back", "next_dialogue": "start"}]},
+            {"id": "end", "npc": "Terminal", "text": "The end.", "responses": []}
+        ],
+        "quests": [],
+        "variables": {"visits": 0}
+    }
+
+
+class OffsetIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "dialogue.json")
+        write_json_file(self.path, sample_data())
+        self.files = []
+
+    def tearDown(self):
+        for indexed in self.files:
+            indexed.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def open_indexed(self, **kwargs):
+        indexed = IndexedDialogueFile(self.path, **kwargs)
+        self.files.append(indexed)
+        return indexed
+
+    def edit(self, change):
+        """Rewrite the dialogue file with a change applied"""
+        data = read_json_file(self.path)
+        change(data)
+        write_json_file(self.path, data)
+
+    def test_offsets_cover_each_dialogue(self):
+        for pretty in (True, False):
+            with self.subTest(pretty=pretty):
+                write_json_file(self.path, sample_data(), pretty=pretty)
+                index = build_offset_index(self.path, chunk_size=7)
+                self.assertEqual(index["ids"], ["start", "café", "end"])
+                self.assertEqual([key for key, _, _ in index["fields"]], list(sample_data()))
+                with open(self.path, 'rb') as f:
+                    raw = f.read()
+                offsets = index["offsets"]
+                for position, dialogue in enumerate(sample_data()["dialogues"]):
+                    span = raw[offsets[2 * position]:offsets[2 * position + 1]]
+                    self.assertEqual(json_loads(span), dialogue)
+
+    def test_indexed_file_reads_like_the_json(self):
+        indexed = self.open_indexed()
+        self.assertEqual(thaw(indexed.data), sample_data())
+        self.assertEqual(indexed.graph.get_dialogue("café")["npc"], "Barista ☕")
+        self.assertIsNone(indexed.graph.get_dialogue("missing"))
+        self.assertTrue(os.path.exists(index_path_for(self.path)))
+
+    def test_sidecar_is_reused_while_the_file_is_unchanged(self):
+        load_offset_index(self.path)
+        sidecar = index_path_for(self.path)
+        marked = read_json_file(sidecar)
+        marked["ids"][0] = "from the sidecar"
+        write_json_file(sidecar, marked)
+        self.assertEqual(load_offset_index(self.path)["ids"][0], "from the sidecar")
+
+    def test_edit_that_changes_the_size_rebuilds_the_index(self):
+        load_offset_index(self.path)
+
+        def insert_dialogue(data):
+            data["dialogues"].insert(0, {"id": "intro", "npc": "Narrator", "text": "A new first node.",
+                                         "responses": []})
+        self.edit(insert_dialogue)
+
+        indexed = self.open_indexed()
+        self.assertEqual(indexed.graph.get_dialogue("intro")["text"], "A new first node.")
+        self.assertEqual(indexed.graph.get_dialogue("end")["text"], "The end.")
+        self.assertEqual(read_json_file(index_path_for(self.path))["ids"], ["intro", "start", "café", "end"])
+
+    def test_same_size_edit_with_a_new_mtime_rebuilds_the_index(self):
+        load_offset_index(self.path)
+        size = os.path.getsize(self.path)
+
+        def rename_start(data):
+            data["dialogues"][0]["id"] = "first"
+        self.edit(rename_start)
+        # Make sure the mtime moves even on filesystems with coarse timestamps
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        self.assertEqual(os.path.getsize(self.path), size)
+
+        indexed = self.open_indexed()
+        self.assertIsNone(indexed.graph.get_dialogue("start"))
+        self.assertEqual(indexed.graph.get_dialogue("first")["npc"], "Terminal")
+
+    def test_sidecar_from_another_version_or_damaged_is_rebuilt(self):
+        sidecar = index_path_for(self.path)
+        index = load_offset_index(self.path)
+        write_json_file(sidecar, dict(index, version=INDEX_VERSION + 1, ids=[]))
+        self.assertEqual(load_offset_index(self.path)["ids"], index["ids"])
+
+        with open(sidecar, 'w') as f:
+            f.write('{"version": 1, "sou')
+        self.assertEqual(load_offset_index(self.path)["ids"], index["ids"])
+        self.assertEqual(read_json_file(sidecar)["ids"], index["ids"])
+
+    def test_write_false_leaves_no_sidecar(self):
+        indexed = self.open_indexed(write_index=False)
+        self.assertEqual(indexed.dialogue_count, 3)
+        self.assertFalse(os.path.exists(index_path_for(self.path)))
+
+    def test_file_without_dialogues_list(self):
+        write_json_file(self.path, {"dialogues": {"start": {}}})
+        with self.assertRaises(ValueError):
+            build_offset_index(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,197 @@
+"""
+Tests for the save journal: replay, torn and damaged journals, and that every
+loader sees journaled saves after the saving process died before compaction.
+"""
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+import unittest
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from data_layer import dialogue_manager, json_dumps, read_json_file, write_json_file
+from save_journal import (SaveJournal, apply_ops, compact_journal, diff_dialogue_data,
+                          journal_path_for, read_journal)
+
+SCHEMA_PATH = os.path.join(ROOT_DIR, "dialogue_schema.json")
+
+# A full save and two journaled ones, then the process dies before the compaction timer fires
+CRASHING_SAVER = """
+import os, sys
+sys.path.insert(0, {root!r})
+from data_layer import dialogue_manager, read_json_file
+data = read_json_file({path!r})
+dialogue_manager.save_dialogue_data(data, {path!r}, journal=True)
+data["dialogues"][0]["text"] = "EDITED"
+dialogue_manager.save_dialogue_data(data, {path!r}, journal=True)
+data["dialogues"][1]["npc"] = "EDITED NPC"
+dialogue_manager.save_dialogue_data(data, {path!r}, journal=True)
+os._exit(0)
+"""
+
+
+def sample_data():
+    return {
+        "metadata": {"title": "Journal test", "version": "1.0"},
+        "starting_dialogue": "start",
+        "dialogues": [
+            {"id": "start", "npc": "Terminal", "text": "Original text.",
+             "responses": [{"id": "start_next", "text": "> Next", "next_dialogue": "second"}]},
+            {"id": "second", "npc": "Terminal", "text": "Second dialogue.",
+             "responses": [{"id": "second_end", "text": "> Leave", "next_dialogue": None}]}
+        ],
+        "quests": [],
+        "variables": {}
+    }
+
+
+class JournalTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "dialogue.json")
+        write_json_file(self.path, sample_data())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+
+class JournalReplayTest(JournalTestCase):
+    def test_diff_and_apply_round_trip(self):
+        old = sample_data()
+        new = sample_data()
+        new["dialogues"][1]["text"] = "Changed"
+        new["dialogues"].append({"id": "third", "npc": "X", "text": "Y", "responses": []})
+        new["quests"] = [{"id": "q", "title": "Q", "description": "D", "stages": []}]
+        del new["variables"]
+        self.assertEqual(apply_ops(sample_data(), diff_dialogue_data(old, new)), new)
+
+    def test_truncate_round_trip(self):
+        old = sample_data()
+        new = sample_data()
+        del new["dialogues"][1:]
+        ops = diff_dialogue_data(old, new)
+        self.assertEqual(ops, [{"op": "truncate", "path": ["dialogues"], "length": 1}])
+        self.assertEqual(apply_ops(old, ops), new)
+
+    def test_saves_are_replayed_in_order(self):
+        saver = SaveJournal(self.path, compact_delay=3600)
+        data = sample_data()
+        saver.save(data)
+        data["dialogues"][0]["text"] = "First edit"
+        saver.save(data)
+        data["dialogues"][0]["text"] = "Second edit"
+        self.assertEqual(saver.save(data), 1)
+        self.assertEqual(saver.save(data), 0)
+        saver.discard()
+
+        self.assertEqual(len(read_journal(self.path)), 2)
+        self.assertEqual(read_json_file(self.path)["dialogues"][0]["text"], "Original text.")
+        self.assertTrue(compact_journal(self.path))
+        self.assertEqual(read_json_file(self.path), data)
+        self.assertFalse(os.path.exists(journal_path_for(self.path)))
+
+    def test_torn_last_line_is_ignored(self):
+        saver = SaveJournal(self.path, compact_delay=3600)
+        data = sample_data()
+        saver.save(data)
+        data["dialogues"][0]["text"] = "Kept"
+        saver.save(data)
+        saver.discard()
+        with open(journal_path_for(self.path), 'ab') as journal:
+            journal.write(b'{"ops": [{"op": "set", "path": ["starting_dia')
+
+        self.assertEqual(len(read_journal(self.path)), 1)
+        compact_journal(self.path)
+        self.assertEqual(read_json_file(self.path)["dialogues"][0]["text"], "Kept")
+
+    def test_damage_before_last_line_raises(self):
+        saver = SaveJournal(self.path, compact_delay=3600)
+        data = sample_data()
+        saver.save(data)
+        for text in ("One", "Two"):
+            data["dialogues"][0]["text"] = text
+            saver.save(data)
+        saver.discard()
+        journal_path = journal_path_for(self.path)
+        with open(journal_path, 'rb') as journal:
+            lines = journal.read().split(b"\n")
+        lines[1] = lines[1][:10]
+        with open(journal_path, 'wb') as journal:
+            journal.write(b"\n".join(lines))
+
+        with self.assertRaises(ValueError):
+            read_journal(self.path)
+
+    def test_journal_for_replaced_file_is_kept_aside(self):
+        saver = SaveJournal(self.path, compact_delay=3600)
+        data = sample_data()
+        saver.save(data)
+        data["dialogues"][0]["text"] = "Journaled"
+        saver.save(data)
+        saver.discard()
+        replaced = sample_data()
+        replaced["dialogues"][0]["text"] = "Replaced by another tool, with a different size"
+        write_json_file(self.path, replaced)
+
+        self.assertIsNone(read_journal(self.path))
+        self.assertFalse(compact_journal(self.path))
+        self.assertEqual(read_json_file(self.path), replaced)
+        self.assertTrue(os.path.exists(journal_path_for(self.path) + ".stale"))
+
+
+class CrashBeforeCompactionTest(JournalTestCase):
+    """Every entry point that reads dialogue files must see saves still in the journal"""
+
+    def setUp(self):
+        super().setUp()
+        subprocess.run([sys.executable, "-c", CRASHING_SAVER.format(root=ROOT_DIR, path=self.path)],
+                       check=True, cwd=self.tmp_dir)
+        # The file itself is stale; the edits are only in the journal
+        self.assertTrue(os.path.exists(journal_path_for(self.path)))
+        self.assertEqual(read_json_file(self.path)["dialogues"][0]["text"], "Original text.")
+
+    def assertEdited(self, data):
+        self.assertEqual(data["dialogues"][0]["text"], "EDITED")
+        self.assertEqual(data["dialogues"][1]["npc"], "EDITED NPC")
+
+    def test_data_manager(self):
+        self.assertEdited(dialogue_manager.load_dialogue_data(self.path, use_cache=False))
+
+    def test_cli(self):
+        from cli_parser import DialogueCLI
+        self.assertEdited(DialogueCLI(self.path).dialogue_data)
+
+    def test_cli_in_a_fresh_process(self):
+        result = subprocess.run([sys.executable, os.path.join(ROOT_DIR, "cli_parser.py"), self.path, "--batch"],
+                                input=json_dumps({"session": 1}, pretty=False) + "\n",
+                                capture_output=True, text=True, check=True, cwd=self.tmp_dir)
+        self.assertIn("EDITED", result.stdout)
+
+    def test_dialogue_validator(self):
+        from dialogue_validator import DialogueValidator
+        validator = DialogueValidator(SCHEMA_PATH, cache_path=None)
+        self.assertEdited(validator.load_dialogue_file(self.path))
+
+    def test_schema_validator(self):
+        from schema_validator import load_dialogue_file
+        self.assertEdited(load_dialogue_file(self.path))
+
+    def test_dialogue_pack_compile(self):
+        from dialogue_pack import DialoguePack
+        pack_path = os.path.join(self.tmp_dir, "dialogue.dlgpack")
+        subprocess.run([sys.executable, os.path.join(ROOT_DIR, "dialogue_pack.py"), "compile", self.path,
+                        "--output", pack_path, "--schema", SCHEMA_PATH], capture_output=True, check=True,
+                       cwd=self.tmp_dir)
+        pack = DialoguePack(pack_path)
+        try:
+            self.assertEqual(pack.data["dialogues"][0]["text"], "EDITED")
+        finally:
+            pack.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+"""
+Tests for the state explorer: soft-locks, states that can never end the
+conversation, the exploration caps and parallel exploration.
+"""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+import state_explorer
+from data_layer import write_json_file
+from state_explorer import StateExplorer
+
+
+def response(response_id, next_dialogue, script=None, condition=None):
+    return {"id": response_id, "text": f"> {response_id}", "next_dialogue": next_dialogue,
+            "script": script, "condition": condition}
+
+
+def dialogue(dialogue_id, *responses):
+    return {"id": dialogue_id, "npc": "Terminal", "text": dialogue_id, "responses": list(responses)}
+
+
+def trap_data():
+    """
+    A dead end, a loop with no way out, and a cell that is only a trap when
+    it was entered through the locking response
+    """
+    return {
+        "starting_dialogue": "start",
+        "dialogues": [
+            dialogue("start", response("to_dead", "dead"), response("to_loop", "loop_a"),
+                     response("visit", "cell"), response("lock", "cell", script="SetVariable_locked_true"),
+                     response("leave", None)),
+            dialogue("dead", response("use_key", None, condition="VariableEquals_key_true")),
+            dialogue("loop_a", response("on", "loop_b")),
+            dialogue("loop_b", response("back", "loop_a")),
+            dialogue("cell", response("out", "start", condition="VariableEquals_locked_false"),
+                     response("wait", "cell")),
+            dialogue("orphan", response("bye", None))
+        ],
+        "quests": [],
+        "variables": {"locked": False, "key": False}
+    }
+
+
+def switch_data(count):
+    """A hub with a switch per variable: every combination of switches is a state"""
+    switches = [response(f"flip_{n}", "hub", script=f"SetVariable_switch{n}_true") for n in range(count)]
+    return {
+        "starting_dialogue": "hub",
+        "dialogues": [dialogue("hub", *switches, response("leave", None))],
+        "quests": [],
+        "variables": {f"switch{n}": False for n in range(count)}
+    }
+
+
+class TrapDetectionTest(unittest.TestCase):
+    def setUp(self):
+        self.report = StateExplorer(trap_data()).explore()
+
+    def test_soft_locks(self):
+        self.assertEqual(self.report.soft_locks, 1)
+        self.assertEqual([example["dialogue"] for example in self.report.soft_lock_examples], ["dead"])
+        self.assertEqual(self.report.unavailable_responses, [("dead", "use_key")])
+
+    def test_trapped_states_are_found_per_state(self):
+        self.assertIsNone(self.report.truncated)
+        self.assertEqual(self.report.states, 6)
+        self.assertEqual(self.report.trapped_states, 4)
+        trapped = sorted((example["dialogue"], example["variables"]["locked"])
+                         for example in self.report.trapped_examples)
+        # The cell can be left again unless it was locked
+        self.assertEqual(trapped, [("cell", True), ("dead", False), ("loop_a", False), ("loop_b", False)])
+
+    def test_coverage(self):
+        self.assertEqual(self.report.unreachable_dialogues, ["orphan"])
+        self.assertEqual(self.report.endings, 1)
+        self.assertEqual(self.report.dialogue_count, 6)
+        self.assertEqual(len(self.report.available_responses), 9)
+
+    def test_broken_transitions(self):
+        data = trap_data()
+        data["dialogues"][0]["responses"].append(response("nowhere", "missing"))
+        report = StateExplorer(data).explore()
+        self.assertEqual(report.broken_transitions, [("start", "nowhere", "missing")])
+        self.assertEqual(report.trapped_states, 4)
+
+
+class ExplorationCapsTest(unittest.TestCase):
+    def test_max_states(self):
+        report = StateExplorer(trap_data(), max_states=3).explore()
+        self.assertEqual(report.truncated, "max_states")
+        self.assertEqual(report.states, 3)
+        self.assertIsNone(report.trapped_states)
+        self.assertTrue(any("stopped early (max_states)" in line for line in report.format_report()))
+
+    def test_max_memory(self):
+        # Memory is checked every 4096 new states, so this needs more of them
+        report = StateExplorer(switch_data(13), max_memory=1).explore()
+        self.assertEqual(report.truncated, "max_memory")
+        self.assertEqual(report.states, 4097)
+        self.assertIsNone(report.trapped_states)
+
+    def test_untruncated_switches(self):
+        report = StateExplorer(switch_data(6)).explore()
+        self.assertIsNone(report.truncated)
+        self.assertEqual(report.states, 2 ** 6)
+        self.assertEqual(report.trapped_states, 0)
+
+
+class ParallelExplorationTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def assertSameReport(self, data):
+        path = os.path.join(self.tmp_dir, "dialogue.json")
+        write_json_file(path, data)
+        serial = StateExplorer(data).explore().to_dict()
+        # Small chunks, so even these levels are sent to the worker processes
+        with mock.patch.object(state_explorer, "CHUNK_SIZE", 4):
+            parallel = StateExplorer(data, jobs=2, file_path=path).explore().to_dict()
+        del serial["elapsed"], parallel["elapsed"]
+        self.assertEqual(parallel, serial)
+
+    def test_two_jobs_match_one(self):
+        for name, data in [("switches", switch_data(8)), ("traps", trap_data())]:
+            with self.subTest(data=name):
+                self.assertSameReport(data)
+
+    def test_parallel_needs_the_file_path(self):
+        with self.assertRaises(ValueError):
+            StateExplorer(trap_data(), jobs=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
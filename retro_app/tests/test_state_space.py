@@ -0,0 +1,144 @@
+"""
+Tests for the state space: canonical state keys and the breadth-first search
+for the responses a player can reach.
+"""
+import os
+import sys
+import unittest
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from logic_layer import GameState
+from state_space import StateEncoder
+
+
+def response(response_id, next_dialogue, script=None, condition=None):
+    return {"id": response_id, "text": f"> {response_id}", "next_dialogue": next_dialogue,
+            "script": script, "condition": condition}
+
+
+def sample_data():
+    """A repair quest and a door; some endings need both, one can never be taken"""
+    return {
+        "starting_dialogue": "start",
+        "dialogues": [
+            {"id": "start", "npc": "Terminal", "text": "Hello.", "responses": [
+                response("ask", "hub", script="StartQuest_repair"),
+                response("leave", None)]},
+            {"id": "hub", "npc": "Terminal", "text": "Hub.", "responses": [
+                response("fix", "hub", script="UpdateQuest_repair_2", condition="QuestActive_repair"),
+                response("open", "hub", script="SetVariable_door_true"),
+                response("walk_out", None, condition="VariableEquals_door_true"),
+                response("report", None, condition="QuestStage_repair_2"),
+                response("impossible", None, condition="VariableEquals_door_maybe")]}
+        ],
+        "quests": [{"id": "repair", "title": "Repair", "stages": [{"id": 1, "description": "Start"},
+                                                                  {"id": 2, "description": "Fixed"}]}],
+        "variables": {"door": False}
+    }
+
+
+class StateEncoderTest(unittest.TestCase):
+    def setUp(self):
+        self.encoder = StateEncoder(sample_data())
+
+    def assertRoundTrips(self, dialogue_id, quest_state, variables):
+        key = self.encoder.encode(dialogue_id, quest_state, variables)
+        self.assertEqual(self.encoder.decode(key), (dialogue_id, quest_state, variables))
+        hash(key)
+        return key
+
+    def test_names_used_anywhere_are_numbered(self):
+        self.assertEqual(self.encoder.quest_ids, ["repair"])
+        self.assertEqual(self.encoder.variable_names, ["door"])
+
+    def test_known_quests_and_variables_round_trip_without_overflow(self):
+        for quest_state, variables in [({}, {}),
+                                       ({"repair": {"current_stage": 0}}, {"door": False}),
+                                       ({"repair": {"current_stage": 2}}, {"door": True}),
+                                       ({"repair": {"current_stage": 126, "completed": True}}, {})]:
+            with self.subTest(quest_state=quest_state, variables=variables):
+                key = self.assertRoundTrips("hub", quest_state, variables)
+                self.assertEqual(key[3], ())
+
+    def test_everything_else_round_trips_through_the_overflow(self):
+        cases = [
+            ({"ghost": {"current_stage": 1}}, {}),
+            ({"repair": {"current_stage": 127}}, {}),
+            ({"repair": {"current_stage": 500, "completed": True}}, {}),
+            ({"repair": {"current_stage": -1}}, {}),
+            ({"repair": {"current_stage": "two"}}, {}),
+            ({}, {"door": "maybe"}),
+            ({}, {"door": 1}),
+            ({}, {"mood": "calm", "count": 3, "items": [1, {"b": 2, "a": None}]}),
+        ]
+        for quest_state, variables in cases:
+            with self.subTest(quest_state=quest_state, variables=variables):
+                key = self.assertRoundTrips("start", quest_state, variables)
+                self.assertNotEqual(key[3], ())
+
+    def test_decoded_dicts_are_copies(self):
+        key = self.encoder.encode("hub", {"repair": {"current_stage": 1}}, {"door": True})
+        _, quest_state, variables = self.encoder.decode(key)
+        quest_state["repair"]["current_stage"] = 2
+        variables["door"] = False
+        self.assertEqual(self.encoder.decode(key)[1:], ({"repair": {"current_stage": 1}}, {"door": True}))
+
+    def test_equal_states_get_equal_keys_in_any_order(self):
+        first = self.encoder.encode("hub", {"repair": {"current_stage": 2}, "ghost": {"current_stage": 1}},
+                                    {"door": True, "mood": "calm", "items": {"a": 1, "b": 2}})
+        second = self.encoder.encode("hub", {"ghost": {"current_stage": 1}, "repair": {"current_stage": 2}},
+                                     {"items": {"b": 2, "a": 1}, "mood": "calm", "door": True})
+        self.assertEqual(first, second)
+        self.assertEqual(hash(first), hash(second))
+        self.assertNotEqual(first, self.encoder.encode("hub", {"repair": {"current_stage": 2}},
+                                                       {"door": True, "mood": "calm", "items": {"a": 1, "b": 2}}))
+
+    def test_numbering_does_not_depend_on_the_file_order(self):
+        data = sample_data()
+        data["dialogues"].reverse()
+        state = ("hub", {"repair": {"current_stage": 2}}, {"door": True})
+        self.assertEqual(StateEncoder(data).encode(*state), self.encoder.encode(*state))
+
+
+class ResponsePathsTest(unittest.TestCase):
+    def setUp(self):
+        self.game = GameState(history_capacity=1)
+        self.game.dialogue_data = sample_data()
+        self.game.reset_state()
+
+    def test_gated_responses_are_found_by_their_shortest_paths(self):
+        result = self.game.find_response_paths()
+        self.assertTrue(result.complete)
+        self.assertFalse(result.truncated)
+        self.assertEqual(result.paths[("hub", "walk_out")], [("start", "ask"), ("hub", "open"), ("hub", "walk_out")])
+        self.assertEqual(result.paths[("hub", "report")], [("start", "ask"), ("hub", "fix"), ("hub", "report")])
+        self.assertIs(result.is_reachable("hub", "report"), True)
+        self.assertIs(result.is_reachable("hub", "impossible"), False)
+        # start, then the hub with every combination of the quest stage and the door
+        self.assertEqual(result.states, 5)
+
+    def test_search_stops_once_the_targets_are_found(self):
+        result = self.game.find_response_paths(targets=[("hub", "report")])
+        self.assertEqual(list(result.paths)[-1], ("hub", "report"))
+        self.assertNotIn(("hub", "walk_out"), result.paths)
+        self.assertFalse(result.complete)
+
+    def test_search_is_truncated_at_max_states(self):
+        result = self.game.find_response_paths(max_states=2)
+        self.assertTrue(result.truncated)
+        self.assertFalse(result.complete)
+        self.assertEqual(result.states, 2)
+        self.assertIsNone(result.is_reachable("hub", "impossible"))
+
+    def test_search_leaves_the_game_state_alone(self):
+        key = self.game.state_key()
+        self.game.find_response_paths()
+        self.assertEqual(self.game.state_key(), key)
+        self.assertEqual(self.game.current_dialogue_id, "start")
+
+
+if __name__ == "__main__":
+    unittest.main()
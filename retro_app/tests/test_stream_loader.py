@@ -0,0 +1,114 @@
+"""
+Tests for the streaming dialogue parser: every chunk size must give what
+json.load gives, whatever values a chunk boundary happens to cut through.
+"""
+import io
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from stream_loader import DialogueStream, iter_dialogue_file, iter_dialogue_spans, load_dialogue_json
+
+# Values that are easy to cut in the wrong place: numbers that are valid
+# prefixes of longer numbers, escapes, and brackets and quotes inside strings
+TRICKY_DOCUMENT = """{
+  "version": 12345678901234567890,
+  "ratio" :-1.5e-3,
+  "starting_dialogue": "st\\"art",
+  "dialogues" : [
+    {"id": "st\\"art", "npc": "Caf\\u00e9 ☕", "text": "Brackets ] } [ { and \\\\ backslashes",
+     "weight": 100, "responses": [{"id": "a", "text": "> \\"Go\\"", "next_dialogue": "two", "cost": 0.25},
+                                  {"id": "b", "text": "> Stay", "next_dialogue": null}]},
+    {"id": "two", "npc": "", "text": "\\n\\t", "tags": [[], [1, [2.0, true]], {}], "responses": []}
+  ],
+  "quests": [],
+  "variables": {"count": 7, "flag": false, "name": "x\\/y"},
+  "last": 42
+}
+"""
+
+
+class ChunkBoundaryTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "dialogue.json")
+        with open(self.path, 'w') as f:
+            f.write(TRICKY_DOCUMENT)
+        self.expected = json.loads(TRICKY_DOCUMENT)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_every_chunk_size_matches_json_load(self):
+        for chunk_size in list(range(1, 80)) + [len(TRICKY_DOCUMENT) - 1, len(TRICKY_DOCUMENT), 1 << 20]:
+            with self.subTest(chunk_size=chunk_size):
+                data = load_dialogue_json(self.path, chunk_size)
+                self.assertEqual(data, self.expected)
+                self.assertEqual(list(data), list(self.expected))
+                self.assertEqual(type(data["ratio"]), float)
+
+    def test_streamed_arrays_come_element_by_element(self):
+        events = list(iter_dialogue_file(io.StringIO(TRICKY_DOCUMENT), chunk_size=3))
+        self.assertEqual([(kind, key) for kind, key, _ in events],
+                         [("field", "version"), ("field", "ratio"), ("field", "starting_dialogue"),
+                          ("field", "dialogues"), ("item", "dialogues"), ("item", "dialogues"),
+                          ("field", "quests"), ("field", "variables"), ("field", "last")])
+        self.assertEqual(events[3][2], [])
+
+    def test_spans_locate_each_value(self):
+        for chunk_size in (1, 2, 5, 16, 1 << 20):
+            with self.subTest(chunk_size=chunk_size):
+                for kind, key, value, start, end in iter_dialogue_spans(io.StringIO(TRICKY_DOCUMENT), chunk_size):
+                    if start == end:
+                        self.assertEqual(TRICKY_DOCUMENT[start], "[")
+                    else:
+                        self.assertEqual(json.loads(TRICKY_DOCUMENT[start:end]), value)
+
+    def test_key_strings_are_shared(self):
+        data = load_dialogue_json(self.path, chunk_size=4)
+        first, second = data["dialogues"]
+        self.assertIs(next(iter(first)), next(iter(second)))
+
+    def test_invalid_documents_fail_at_every_chunk_size(self):
+        broken = [
+            TRICKY_DOCUMENT[:len(TRICKY_DOCUMENT) // 2],    # truncated inside the dialogues
+            TRICKY_DOCUMENT.rstrip()[:-1],                 # missing the closing brace
+            TRICKY_DOCUMENT.replace('"last": 42', '"last": 42,'),
+            TRICKY_DOCUMENT + "{}",                         # extra data
+            TRICKY_DOCUMENT.replace('"quests": [],', '"quests": []'),
+            '["not", "an", "object"]',
+        ]
+        for document in broken:
+            for chunk_size in (1, 7, 1 << 20):
+                with self.subTest(document=document[-20:], chunk_size=chunk_size):
+                    with self.assertRaises(json.JSONDecodeError):
+                        list(iter_dialogue_file(io.StringIO(document), chunk_size))
+
+    def test_empty_object_and_number_at_the_very_end(self):
+        self.assertEqual(list(iter_dialogue_file(io.StringIO(" { } "), 1)), [])
+        self.assertEqual(list(iter_dialogue_file(io.StringIO('{"n":1}'), 1)), [("field", "n", 1)])
+        self.assertEqual(list(iter_dialogue_file(io.StringIO('{"n":-2.50}'), 2)), [("field", "n", -2.5)])
+
+    def test_background_stream_matches_json_load(self):
+        stream = DialogueStream(self.path, chunk_size=5).start()
+        self.assertEqual(stream.graph.get_dialogue("two")["text"], "\n\t")
+        self.assertIsNone(stream.graph.get_dialogue("missing"))
+        self.assertEqual(stream.join(timeout=30), self.expected)
+
+    def test_background_stream_reports_parse_errors(self):
+        with open(self.path, 'w') as f:
+            f.write(TRICKY_DOCUMENT[:200])
+        stream = DialogueStream(self.path, chunk_size=5).start()
+        with self.assertRaises(json.JSONDecodeError):
+            stream.join(timeout=30)
+
+
+if __name__ == "__main__":
+    unittest.main()
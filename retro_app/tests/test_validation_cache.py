@@ -0,0 +1,136 @@
+"""
+Tests for the dialogue validator's results cache: when it is written, where
+the command line keeps it, and when its summary is printed.
+"""
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+import unittest
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from data_layer import dialogue_manager, read_json_file, write_json_file
+from dialogue_validator import DEFAULT_CACHE_FILE, DialogueValidator, ValidationCache
+from save_journal import journal_path_for
+
+SCHEMA_PATH = os.path.join(ROOT_DIR, "dialogue_schema.json")
+VALIDATOR = os.path.join(ROOT_DIR, "dialogue_validator.py")
+
+
+def sample_data(text="Hello."):
+    return {
+        "schema_version": "1.0",
+        "starting_dialogue": "start",
+        "dialogues": [{"id": "start", "npc": "Terminal", "text": text, "on_entry": None,
+                       "responses": [{"id": "start_bye", "text": "> Bye", "next_dialogue": None,
+                                      "script": None, "condition": None}]}],
+        "quests": [],
+        "variables": {}
+    }
+
+
+class CacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.tmp_dir, "cache.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+
+class ValidationCacheTest(CacheTestCase):
+    def test_hits_do_not_rewrite_the_cache(self):
+        cache = ValidationCache(self.cache_path, "schema")
+        cache.put("key", {"path": "a.json", "all_errors": []}, 0.5)
+        cache.save()
+        written = os.stat(self.cache_path).st_mtime_ns
+        os.utime(self.cache_path, ns=(written - 10 ** 9, written - 10 ** 9))
+
+        cache = ValidationCache(self.cache_path, "schema")
+        self.assertEqual(cache.get("key", "b.json"), {"path": "b.json", "all_errors": []})
+        self.assertIsNone(cache.get("other", "c.json"))
+        cache.save()
+        self.assertEqual(os.stat(self.cache_path).st_mtime_ns, written - 10 ** 9)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_least_recently_used_results_are_evicted(self):
+        cache = ValidationCache(self.cache_path, "schema", max_entries=2)
+        cache.put("old", {}, 0.1)
+        cache.put("used", {}, 0.1)
+        cache.entries["old"]["last_used"] -= 10
+        cache.entries["used"]["last_used"] -= 5
+        cache.get("used", "used.json")
+        cache.put("new", {}, 0.1)
+        self.assertEqual(set(cache.entries), {"used", "new"})
+        cache.save()
+        self.assertEqual(set(read_json_file(self.cache_path)["entries"]), {"used", "new"})
+
+
+class JournaledEditTest(CacheTestCase):
+    def test_journaled_edit_invalidates_the_cached_result(self):
+        path = os.path.join(self.tmp_dir, "dialogue.json")
+        data = sample_data()
+        dialogue_manager.save_dialogue_data(data, path, journal=True)
+        validator = DialogueValidator(SCHEMA_PATH, cache_path=self.cache_path)
+        valid, _ = validator.validate_file(path)
+        self.assertTrue(valid)
+
+        # The edit only reaches the journal; the file's bytes are unchanged
+        data["dialogues"][0]["responses"][0]["next_dialogue"] = "missing"
+        dialogue_manager.save_dialogue_data(data, path, journal=True)
+        self.assertTrue(os.path.exists(journal_path_for(path)))
+
+        validator = DialogueValidator(SCHEMA_PATH, cache_path=self.cache_path)
+        valid, result = validator.validate_file(path)
+        self.assertFalse(valid)
+        self.assertEqual(validator.cache.hits, 0)
+        self.assertTrue(any("non-existent dialogue 'missing'" in error for error in result["all_errors"]))
+        self.assertFalse(os.path.exists(journal_path_for(path)))
+
+
+class ValidatorCommandLineCacheTest(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.dialogue_dir = os.path.join(self.tmp_dir, "dialogues")
+        os.mkdir(self.dialogue_dir)
+        for n in range(2):
+            write_json_file(os.path.join(self.dialogue_dir, f"dialogue_{n}.json"), sample_data(f"Hello {n}."))
+        # Run from elsewhere to show that nothing is written to the working directory
+        self.work_dir = os.path.join(self.tmp_dir, "work")
+        os.mkdir(self.work_dir)
+
+    def validate(self, *args):
+        result = subprocess.run([sys.executable, VALIDATOR, "--schema", SCHEMA_PATH, *args],
+                                capture_output=True, text=True, cwd=self.work_dir)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return result.stderr
+
+    def test_directory_runs_keep_the_cache_in_the_directory(self):
+        output = self.validate("--dir", self.dialogue_dir)
+        self.assertIn("Validation cache: 0/2 files unchanged", output)
+        self.assertTrue(os.path.exists(os.path.join(self.dialogue_dir, DEFAULT_CACHE_FILE)))
+        self.assertEqual(os.listdir(self.work_dir), [])
+
+        output = self.validate("--dir", self.dialogue_dir)
+        self.assertIn("Validation cache: 2/2 files unchanged", output)
+
+    def test_single_file_runs_print_no_cache_summary(self):
+        file_path = os.path.join(self.dialogue_dir, "dialogue_0.json")
+        output = self.validate("--file", file_path)
+        self.assertNotIn("Validation cache", output)
+        self.assertTrue(os.path.exists(os.path.join(self.dialogue_dir, DEFAULT_CACHE_FILE)))
+        self.assertEqual(os.listdir(self.work_dir), [])
+
+    def test_cache_file_option_and_no_cache(self):
+        self.validate("--dir", self.dialogue_dir, "--cache-file", self.cache_path)
+        self.assertTrue(os.path.exists(self.cache_path))
+        self.validate("--dir", self.dialogue_dir, "--no-cache")
+        self.assertFalse(os.path.exists(os.path.join(self.dialogue_dir, DEFAULT_CACHE_FILE)))
+
+
+if __name__ == "__main__":
+    unittest.main()
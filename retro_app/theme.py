@@ -0,0 +1,54 @@
+"""
+Theme for Terminal Dialogue System
+Retro terminal stylesheets served as static files and added to the page once per browser session
+"""
+import os
+from functools import lru_cache
+import streamlit as st
+import streamlit.components.v1 as components
+
+# Stylesheets (<theme>.css) and the loader page that links them into the app
+_COMPONENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "theme_component")
+_theme_loader = components.declare_component("theme", path=_COMPONENT_DIR)
+
+
+def available_themes():
+    """Get the names of the bundled themes"""
+    return sorted(name[:-len(".css")] for name in os.listdir(_COMPONENT_DIR) if name.endswith(".css"))
+
+
+@lru_cache(maxsize=None)
+def load_theme_css(name: str) -> str:
+    """
+    Read a theme's stylesheet, once per process
+
+    Raises:
+        ValueError: If there is no theme with that name
+    """
+    try:
+        with open(os.path.join(_COMPONENT_DIR, f"{name}.css"), 'r', encoding='utf-8') as file:
+            return file.read()
+    except FileNotFoundError:
+        raise ValueError(f"Unknown theme '{name}'; available themes: {', '.join(available_themes())}")
+
+
+def apply_theme(name: str = "terminal") -> None:
+    """
+    Style the app with one of the bundled themes
+
+    The stylesheet is a static file: the loader links it into the page the
+    first time it runs in a browser session, the browser caches it, and
+    later reruns only re-send the loader's small element instead of the
+    whole stylesheet. If the page can't be reached from the loader (e.g.
+    the app is embedded cross-origin), the stylesheet is sent inline like
+    any other markdown.
+
+    Args:
+        name: Theme name, the stem of a .css file in theme_component/
+
+    Raises:
+        ValueError: If there is no theme with that name
+    """
+    css = load_theme_css(name)
+    if _theme_loader(stylesheet=f"{name}.css", key="retro_theme", default=None) == "inline":
+        st.markdown(f"<style>{css}</style>", unsafe_allow_html=True)
@@ -0,0 +1,41 @@
+"""
+Typewriter for Terminal Dialogue System
+Client-side typewriter effect for dialogue text, sent to the browser in a single message
+"""
+import os
+import streamlit.components.v1 as components
+from theme import load_theme_css
+
+# The component is a static page, so it needs no build step or dev server
+_COMPONENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "typewriter_component")
+_typewriter = components.declare_component("typewriter", path=_COMPONENT_DIR)
+
+# Milliseconds per character unless a speed is given
+DEFAULT_TYPEWRITER_SPEED = 10
+
+
+def typewriter_text(text: str, speed: int = DEFAULT_TYPEWRITER_SPEED, cursor: str = "▋",
+                    theme: str = "terminal", key: str = None) -> None:
+    """
+    Display text with a typewriter effect
+
+    The whole text is sent to the browser once and typed out there, so a
+    dialogue costs one update however long it is, and the script doesn't
+    wait for the animation. Clicking the text shows the rest immediately.
+    The text box is drawn with the theme's .dialog-text and .terminal-cursor
+    styles, so it matches the text shown with st.markdown on later reruns.
+
+    Args:
+        text: Text to type out; shown as plain text, with line breaks kept
+        speed: Milliseconds per character; 0 shows the text at once
+        cursor: Cursor shown after the typed text while typing; "" leaves it
+            to the theme's .terminal-cursor style
+        theme: Theme the app applied with apply_theme
+        key: Optional Streamlit key, for several typewriters with the same text
+
+    Raises:
+        ValueError: If there is no theme with that name
+    """
+    # The stylesheet is only used inline when the frame can't link the page's copy
+    _typewriter(text=text, speed=speed, cursor=cursor, theme=theme, css=load_theme_css(theme),
+                key=key, default=None)